@@ -4,7 +4,7 @@ from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import AuthApiError
 from app.schemas.user import UserProfileAndRolesOut
-from app.supabase.auth_service import supabase_auth  # Importa el cliente Supabase inicializado
+from app.supabase.async_auth_client import async_auth_client  # Cliente asíncrono de Supabase Auth
 from app.schemas.auth_user import SupabaseUser  # 
 from gotrue.types import User  # Importa el tipo User de gotrue
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,20 +13,15 @@ from app.api.v1.dependencies.database_supabase import get_async_db
 from app.models.empresa.perfil_empresa import PerfilEmpresa
 import logging
 import uuid
+from typing import Optional
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
-# Dependencia para validar el token JWT desde cookies o headers
-def get_current_user(
-        request: Request,
-        credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer(auto_error=False))
-    ) -> SupabaseUser:
-    """
-    Dependencia que valida el token JWT desde cookies o headers y retorna los datos del usuario autenticado.
-    """
+def extract_access_token(request: Request, credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[str]:
+    """Token de acceso desde la cookie access_token o, si no está, desde el header Authorization"""
     # Intentar obtener token desde cookies primero
     token = request.cookies.get("access_token")
     print(f"🍪 Token desde cookies: {token[:20] + '...' if token else 'None'}")
@@ -35,6 +30,18 @@ def get_current_user(
     if not token and credentials:
         token = credentials.credentials
         print(f"🔑 Token desde header: {token[:20] + '...' if token else 'None'}")
+    return token
+
+# Dependencia para validar el token JWT desde cookies o headers
+async def get_current_user(
+        request: Request,
+        credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer(auto_error=False))
+    ) -> SupabaseUser:
+    """
+    Dependencia que valida el token JWT desde cookies o headers y retorna los datos del usuario autenticado.
+    La validación contra Supabase Auth es asíncrona y no bloquea el event loop.
+    """
+    token = extract_access_token(request, credentials)
     
     if not token:
         print("❌ No se encontró token en cookies ni headers")
@@ -48,7 +55,7 @@ def get_current_user(
         logger.info(f"🔍 Validando token: {token[:20]}...")
         
         # Obtenemos la respuesta completa del cliente de Supabase
-        user_response = supabase_auth.auth.get_user(token)
+        user_response = await async_auth_client.get_user(token)
         logger.info(f"🔍 Respuesta de Supabase recibida: {user_response}")
         
         # Accedemos al objeto 'user' que está anidado en la respuesta
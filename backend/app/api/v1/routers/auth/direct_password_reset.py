@@ -1,7 +1,7 @@
 """
 Router para restablecimiento de contraseña directo (sin SMTP)
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 import logging
 from app.schemas.password_reset import (
     PasswordResetRequest,
@@ -10,6 +10,7 @@ from app.schemas.password_reset import (
     PasswordResetResponse
 )
 from app.services.direct_password_reset import direct_password_reset_service
+from app.services.rate_limit_service import password_reset_rate_limit_service, get_client_ip
 
 logger = logging.getLogger(__name__)
 
@@ -32,10 +33,17 @@ KEY_SUCCESS = "success"
 KEY_VERIFIED = "verified"
 
 @router.post("/request", response_model=PasswordResetResponse)
-async def request_password_reset_direct(request: PasswordResetRequest):
+async def request_password_reset_direct(request: PasswordResetRequest, http_request: Request):
     """
     Solicita restablecimiento de contraseña (devuelve código directamente)
     """
+    # Límite por email y por IP (lanza 429 con Retry-After)
+    await password_reset_rate_limit_service.enforce(
+        request.email.lower().strip(),
+        get_client_ip(http_request),
+        detail="Demasiadas solicitudes de restablecimiento. Intenta nuevamente en unos minutos."
+    )
+    
     try:
         email = request.email.lower().strip()
         
@@ -72,7 +80,7 @@ async def verify_reset_code_direct(request: PasswordResetCodeVerify):
         email = request.email.lower().strip()
         
         # Verificar código
-        result = direct_password_reset_service.verify_reset_code(email, request.code.strip())
+        result = await direct_password_reset_service.verify_reset_code(email, request.code.strip())
         
         if result[KEY_SUCCESS]:
             logger.info(f"✅ Código verificado correctamente para {email}")
@@ -107,7 +115,7 @@ async def set_new_password_direct(request: PasswordResetNewPassword):
         new_password = request.new_password
         
         # Verificar que el código esté verificado
-        if not direct_password_reset_service.is_code_verified(email):
+        if not await direct_password_reset_service.is_code_verified(email):
             logger.warning(f"⚠️ Intento de cambiar contraseña sin código verificado para {email}")
             return PasswordResetResponse(
                 success=False,
@@ -146,13 +154,12 @@ async def get_reset_status_direct(email: str):
         email = email.lower().strip()
         
         # Verificar si hay un código activo
-        if email in direct_password_reset_service.reset_codes:
-            reset_data = direct_password_reset_service.reset_codes[email]
-            
+        reset_data = await direct_password_reset_service.get_reset_data(email)
+        if reset_data is not None:
             # Verificar expiración
             from datetime import datetime
             if datetime.now() > reset_data[KEY_EXPIRES_AT]:
-                direct_password_reset_service.clear_reset_code(email)
+                await direct_password_reset_service.clear_reset_code(email)
                 return {
                     KEY_HAS_ACTIVE_CODE: False,
                     KEY_MESSAGE: MENSAJE_NO_CODIGO_ACTIVO
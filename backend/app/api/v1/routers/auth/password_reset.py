@@ -1,7 +1,7 @@
 """
 Router para restablecimiento de contraseña
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import JSONResponse
 import logging
 from app.schemas.password_reset import (
@@ -11,6 +11,7 @@ from app.schemas.password_reset import (
     PasswordResetResponse
 )
 from app.services.password_reset_service import password_reset_service
+from app.services.rate_limit_service import password_reset_rate_limit_service, get_client_ip
 from app.supabase.auth_service import supabase_admin
 from app.core.config import SUPABASE_SERVICE_ROLE_KEY
 
@@ -22,10 +23,17 @@ MSG_ERROR_INTERNO_SERVIDOR = "Error interno del servidor"
 router = APIRouter(prefix="/password-reset", tags=["Password Reset"])
 
 @router.post("/request", response_model=PasswordResetResponse)
-async def request_password_reset(request: PasswordResetRequest):
+async def request_password_reset(request: PasswordResetRequest, http_request: Request):
     """
     Solicita restablecimiento de contraseña enviando código por email
     """
+    # Límite por email y por IP (lanza 429 con Retry-After)
+    await password_reset_rate_limit_service.enforce(
+        request.email.lower().strip(),
+        get_client_ip(http_request),
+        detail="Demasiadas solicitudes de restablecimiento. Intenta nuevamente en unos minutos."
+    )
+    
     try:
         email = request.email.lower().strip()
         
@@ -88,7 +96,7 @@ async def verify_reset_code(request: PasswordResetCodeVerify):
         code = request.code.strip()
         
         # Verificar código
-        result = password_reset_service.verify_reset_code(email, code)
+        result = await password_reset_service.verify_reset_code(email, code)
         
         if result["success"]:
             logger.info(f"✅ Código verificado correctamente para {email}")
@@ -123,7 +131,7 @@ async def set_new_password(request: PasswordResetNewPassword):
         new_password = request.new_password
         
         # Verificar que el código esté verificado
-        if not password_reset_service.is_code_verified(email):
+        if not await password_reset_service.is_code_verified(email):
             logger.warning(f"⚠️ Intento de cambiar contraseña sin código verificado para {email}")
             return PasswordResetResponse(
                 success=False,
@@ -155,7 +163,7 @@ async def set_new_password(request: PasswordResetNewPassword):
             
             if update_result.user:
                 # Limpiar código de restablecimiento
-                password_reset_service.clear_reset_code(email)
+                await password_reset_service.clear_reset_code(email)
                 
                 # Enviar confirmación por email
                 await password_reset_service.send_password_change_confirmation(email)
@@ -195,13 +203,12 @@ async def get_reset_status(email: str):
         email = email.lower().strip()
         
         # Verificar si hay un código activo
-        if email in password_reset_service.reset_codes:
-            reset_data = password_reset_service.reset_codes[email]
-            
+        reset_data = await password_reset_service.get_reset_data(email)
+        if reset_data is not None:
             # Verificar expiración
             from datetime import datetime
             if datetime.now() > reset_data["expires_at"]:
-                password_reset_service.clear_reset_code(email)
+                await password_reset_service.clear_reset_code(email)
                 return {
                     "has_active_code": False,
                     "message": "No hay código activo"
@@ -1,7 +1,7 @@
 """
 Router para restablecimiento de contraseña usando Supabase Auth nativo
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 import logging
 from app.schemas.password_reset import (
     PasswordResetRequest,
@@ -9,6 +9,7 @@ from app.schemas.password_reset import (
     PasswordResetResponse
 )
 from app.services.supabase_password_reset import supabase_password_reset_service
+from app.services.rate_limit_service import password_reset_rate_limit_service, get_client_ip
 
 logger = logging.getLogger(__name__)
 
@@ -27,10 +28,17 @@ KEY_SUCCESS = "success"
 KEY_MESSAGE = "message"
 
 @router.post("/request", response_model=PasswordResetResponse)
-async def request_password_reset_native(request: PasswordResetRequest):
+async def request_password_reset_native(request: PasswordResetRequest, http_request: Request):
     """
     Solicita restablecimiento de contraseña usando Supabase Auth nativo
     """
+    # Límite por email y por IP (lanza 429 con Retry-After)
+    await password_reset_rate_limit_service.enforce(
+        request.email.lower().strip(),
+        get_client_ip(http_request),
+        detail="Demasiadas solicitudes de restablecimiento. Intenta nuevamente en unos minutos."
+    )
+    
     try:
         email = request.email.lower().strip()
         
@@ -193,7 +193,7 @@ async def calificar_como_cliente(
                     fecha_formateada = notif_data['fecha'].strftime(DATE_FORMAT_DD_MM_YYYY) if notif_data['fecha'] else DEFAULT_NA
                     hora_formateada = notif_data['hora'].strftime(TIME_FORMAT_HH_MM) if notif_data['hora'] else DEFAULT_NA
                     
-                    calificacion_notification_service.notify_calificacion_a_proveedor(
+                    await calificacion_notification_service.notify_calificacion_a_proveedor(
                         reserva_id=reserva_id,
                         servicio_nombre=notif_data['servicio_nombre'],
                         proveedor_nombre=notif_data['proveedor_nombre'] or DEFAULT_PROVEEDOR,
@@ -221,7 +221,7 @@ async def calificar_como_cliente(
                 satisfaccion_nps=calificacion_data.satisfaccion_nps
             )
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except HTTPException:
         raise
@@ -335,7 +335,7 @@ async def calificar_como_proveedor(
                     fecha_formateada = notif_data['fecha'].strftime(DATE_FORMAT_DD_MM_YYYY) if notif_data['fecha'] else DEFAULT_NA
                     hora_formateada = notif_data['hora'].strftime(TIME_FORMAT_HH_MM) if notif_data['hora'] else DEFAULT_NA
                     
-                    calificacion_notification_service.notify_calificacion_a_cliente(
+                    await calificacion_notification_service.notify_calificacion_a_cliente(
                         reserva_id=reserva_id,
                         servicio_nombre=notif_data['servicio_nombre'],
                         cliente_nombre=notif_data['cliente_nombre'] or DEFAULT_CLIENTE,
@@ -363,7 +363,7 @@ async def calificar_como_proveedor(
                 satisfaccion_nps=None
             )
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except HTTPException:
         raise
@@ -415,7 +415,7 @@ async def verificar_calificacion_existente(
             else:
                 return CalificacionExistenteOut(existe=False)
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
                 
     except Exception as e:
         logger.error(f"❌ Error al verificar calificación: {str(e)}")
@@ -480,7 +480,7 @@ async def get_mis_calificaciones_recibidas_cliente(
                 })
         
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
         return {
             "total_calificaciones": len(calificaciones_detalladas),
@@ -549,7 +549,7 @@ async def get_mis_calificaciones_recibidas_proveedor(
                 })
         
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
         return {
             "total_calificaciones": len(calificaciones_detalladas),
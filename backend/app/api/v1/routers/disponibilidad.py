@@ -3,22 +3,29 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import selectinload
-from app.schemas.disponibilidad import DisponibilidadIn, DisponibilidadOut, DisponibilidadUpdate
+from app.schemas.disponibilidad import DisponibilidadIn, DisponibilidadOut, DisponibilidadUpdate, ServicioConDisponibilidadOut
 from app.models.disponibilidad import DisponibilidadModel
 from app.models.servicio.service import ServicioModel
 from app.api.v1.dependencies.database_supabase import get_async_db
 from app.api.v1.dependencies.auth_user import get_current_user
 from app.schemas.auth_user import SupabaseUser
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 from datetime import datetime, date, time, timezone, timedelta
 from app.services.direct_db_service import direct_db_service
+from app.services.availability_cache import availability_cache
+from app.services.capacidad_diaria_service import capacidad_diaria_service, mascara_horas
+from app.services.availability_engine import Slot, construir_datos_rango, calcular_slots_rango, from_minutes
 
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/disponibilidades", tags=["disponibilidades"])
 
+# Constantes para la generación de disponibilidades desde horario_trabajo
+DIAS_DISPONIBILIDAD = 30
+DURACION_SLOTS_DISPONIBILIDAD = 60
+
 @router.post(
     "/",
     response_model=DisponibilidadOut,
@@ -341,178 +348,67 @@ async def _verificar_servicio(conn: Any, servicio_id: int) -> Dict[str, Any]:
     }
 
 
-async def _obtener_horarios_trabajo(conn: Any, proveedor_id: int) -> Dict[int, Any]:
-    """Obtiene todos los horarios de trabajo del proveedor."""
-    logger.info(f"🔍 [GET /disponibilidades] Obteniendo horarios de trabajo para proveedor {proveedor_id}...")
+async def _obtener_horarios_trabajo(conn: Any, proveedor_id: int) -> List[Any]:
+    """
+    Obtiene los horarios de trabajo activos del proveedor.
+    Ordenados por id_horario: si hay varios para el mismo día prevalece el más reciente.
+    """
     horarios_query = """
-        SELECT dia_semana, hora_inicio, hora_fin, activo, id_horario
+        SELECT dia_semana, hora_inicio, hora_fin
         FROM horario_trabajo
         WHERE id_proveedor = $1 AND activo = true
-        ORDER BY dia_semana
+        ORDER BY id_horario
     """
-    horarios_result = await conn.fetch(horarios_query, proveedor_id)
-    
-    # Log detallado de los horarios obtenidos
-    dias_nombres = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-    for row in horarios_result:
-        dia_nombre = dias_nombres[row['dia_semana']] if 0 <= row['dia_semana'] <= 6 else f"Día {row['dia_semana']}"
-        logger.info(f"📅 [GET /disponibilidades] Horario encontrado: {dia_nombre} (dia_semana={row['dia_semana']}) - {row['hora_inicio']} a {row['hora_fin']} (id_horario={row['id_horario']})")
-    
-    # Si hay múltiples horarios para el mismo día, tomar el más reciente (mayor id_horario)
-    horarios_map: Dict[int, Any] = {}
-    for row in horarios_result:
-        dia_semana = row['dia_semana']
-        # Si ya existe un horario para este día, mantener el que tenga mayor id_horario (más reciente)
-        if dia_semana in horarios_map:
-            if row['id_horario'] > horarios_map[dia_semana].get('id_horario', 0):
-                logger.warning(f"⚠️ [GET /disponibilidades] Múltiples horarios para {dias_nombres[dia_semana]}, usando el más reciente (id_horario={row['id_horario']})")
-                horarios_map[dia_semana] = row
-        else:
-            horarios_map[dia_semana] = row
-    
-    logger.info(f"✅ [GET /disponibilidades] Obtenidos {len(horarios_map)} horarios de trabajo únicos")
-    return horarios_map
+    return await conn.fetch(horarios_query, proveedor_id)
 
 
-async def _obtener_excepciones_horario(conn: Any, proveedor_id: int, fecha_inicio: date, fecha_fin: date) -> Dict[date, Any]:
+async def _obtener_excepciones_horario(conn: Any, proveedor_id: int, fecha_inicio: date, fecha_fin: date) -> List[Any]:
     """Obtiene todas las excepciones de horario en el rango de fechas."""
-    logger.info("🔍 [GET /disponibilidades] Obteniendo excepciones de horario...")
     excepciones_query = """
         SELECT fecha, tipo, hora_inicio, hora_fin
         FROM excepciones_horario
         WHERE id_proveedor = $1 AND fecha >= $2 AND fecha <= $3
     """
-    excepciones_result = await conn.fetch(excepciones_query, proveedor_id, fecha_inicio, fecha_fin)
-    excepciones_map = {row['fecha']: row for row in excepciones_result}
-    logger.info(f"✅ [GET /disponibilidades] Obtenidas {len(excepciones_map)} excepciones")
-    return excepciones_map
+    return await conn.fetch(excepciones_query, proveedor_id, fecha_inicio, fecha_fin)
 
 
-async def _obtener_reservas(conn: Any, servicio_id: int, fecha_inicio: date, fecha_fin: date) -> Dict[date, List[Dict[str, Any]]]:
+async def _obtener_reservas(conn: Any, servicio_id: int, fecha_inicio: date, fecha_fin: date) -> List[Any]:
     """
     Obtiene todas las reservas confirmadas del servicio en el rango de fechas.
     Solo considera reservas confirmadas para que no aparezcan como disponibles.
+    El rango se filtra con && sobre reserva.periodo (índice GiST id_servicio, periodo).
     """
-    logger.info("🔍 [GET /disponibilidades] Obteniendo reservas confirmadas existentes...")
     reservas_query = """
         SELECT fecha, hora_inicio, hora_fin
         FROM reserva
-        WHERE id_servicio = $1 
-        AND fecha >= $2 
-        AND fecha <= $3 
+        WHERE id_servicio = $1
+        AND periodo && tsrange($2::date, $3::date + 1, '[)')
         AND estado = 'confirmada'
     """
-    reservas_result = await conn.fetch(reservas_query, servicio_id, fecha_inicio, fecha_fin)
-    reservas_map: Dict[date, List[Dict[str, Any]]] = {}
-    for reserva in reservas_result:
-        fecha_reserva = reserva['fecha']
-        if fecha_reserva not in reservas_map:
-            reservas_map[fecha_reserva] = []
-        reservas_map[fecha_reserva].append({
-            'hora_inicio': reserva['hora_inicio'],
-            'hora_fin': reserva['hora_fin']
-        })
-    logger.info(f"✅ [GET /disponibilidades] Obtenidas {len(reservas_map)} fechas con reservas confirmadas")
-    return reservas_map
-
-
-def _obtener_horarios_efectivos(
-    horario_base: Dict[str, Any],
-    excepcion: Optional[Dict[str, Any]]
-) -> Optional[tuple]:
-    """Determina los horarios efectivos para una fecha considerando excepciones."""
-    if excepcion and excepcion['tipo'] == 'cerrado':
-        return None
-    
-    if excepcion and excepcion['tipo'] == 'horario_especial':
-        return (excepcion['hora_inicio'], excepcion['hora_fin'])
-    
-    return (horario_base['hora_inicio'], horario_base['hora_fin'])
-
-
-def _generar_slots_fecha(
-    fecha_actual: date,
-    hora_inicio: Any,
-    hora_fin: Any,
-    duracion_minutos: int,
-    servicio_id: int
-) -> List[Dict[str, Any]]:
-    """Genera los slots de tiempo para una fecha específica."""
-    slots = []
-    
-    # Normalizar las horas para asegurar que no tengan segundos ni microsegundos
-    # Esto evita problemas de comparación
-    if isinstance(hora_inicio, time):
-        hora_inicio = time(hora_inicio.hour, hora_inicio.minute, 0)
-    if isinstance(hora_fin, time):
-        hora_fin = time(hora_fin.hour, hora_fin.minute, 0)
-    
-    hora_actual = datetime.combine(fecha_actual, hora_inicio)
-    hora_final = datetime.combine(fecha_actual, hora_fin)
-    
-    logger.debug(f"🔍 [GET /disponibilidades] Generando slots: fecha={fecha_actual}, desde={hora_inicio}, hasta={hora_fin}, duracion={duracion_minutos}min")
-    logger.debug(f"🔍 [GET /disponibilidades] hora_actual inicial: {hora_actual}, hora_final: {hora_final}")
-    
-    # Generar slots mientras la hora de inicio del slot sea menor que la hora_fin
-    # Incluir todos los slots que quepan completamente dentro del horario
-    # Ejemplo: si horario es 11:00-17:00 y duracion es 60min:
-    # - 11:00-12:00, 12:00-13:00, 13:00-14:00, 14:00-15:00, 15:00-16:00, 16:00-17:00
-    iteracion = 0
-    while hora_actual < hora_final:
-        iteracion += 1
-        hora_fin_slot = hora_actual + timedelta(minutes=duracion_minutos)
-        
-        logger.debug(f"🔍 [GET /disponibilidades] Iteración {iteracion}: hora_actual={hora_actual.time()}, hora_fin_slot={hora_fin_slot.time()}, hora_final={hora_final.time()}, hora_fin_slot <= hora_final: {hora_fin_slot <= hora_final}")
-        
-        # Solo agregar el slot si cabe completamente dentro del horario (hora_fin_slot <= hora_final)
-        if hora_fin_slot <= hora_final:
-            slots.append({
-                "id_servicio": servicio_id,
-                "fecha_inicio": hora_actual,
-                "fecha_fin": hora_fin_slot,
-                "disponible": True,
-                "precio_adicional": 0,
-                "observaciones": None,
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
-            })
-            hora_actual += timedelta(minutes=duracion_minutos)
-        else:
-            # Si el slot excede la hora_fin, no lo agregamos y terminamos
-            logger.debug(f"🔍 [GET /disponibilidades] Slot excede hora_final, terminando generación")
-            break
-    
-    logger.info(f"🔍 [GET /disponibilidades] Generados {len(slots)} slots para {fecha_actual} desde {hora_inicio} hasta {hora_fin}")
-    if slots:
-        logger.info(f"🔍 [GET /disponibilidades] Primer slot: {slots[0]['fecha_inicio'].time()} - {slots[0]['fecha_fin'].time()}")
-        logger.info(f"🔍 [GET /disponibilidades] Último slot: {slots[-1]['fecha_inicio'].time()} - {slots[-1]['fecha_fin'].time()}")
-    else:
-        logger.warning(f"⚠️ [GET /disponibilidades] No se generaron slots para {fecha_actual} desde {hora_inicio} hasta {hora_fin}")
-    
-    return slots
+    return await conn.fetch(reservas_query, servicio_id, fecha_inicio, fecha_fin)
 
 
-def _aplicar_reservas_a_slots(
-    slots: List[Dict[str, Any]],
-    reservas_fecha: List[Dict[str, Any]],
-    fecha_actual: date
-) -> None:
-    """Marca los slots como no disponibles si hay solapamiento con reservas."""
-    for reserva in reservas_fecha:
-        reserva_inicio = datetime.combine(fecha_actual, reserva['hora_inicio'])
-        reserva_fin = datetime.combine(fecha_actual, reserva['hora_fin'])
-        
-        for slot in slots:
-            slot_inicio = slot["fecha_inicio"]
-            slot_fin = slot["fecha_fin"]
-            
-            if (slot_inicio < reserva_fin and slot_fin > reserva_inicio):
-                slot["disponible"] = False
+def _slots_a_disponibilidades(servicio_id: int, slots: List[Slot]) -> List[Dict[str, Any]]:
+    """Serializa los slots del motor (fecha, inicio, fin en minutos) al formato de DisponibilidadOut."""
+    generado = datetime.now()
+    return [
+        {
+            "id_servicio": servicio_id,
+            "fecha_inicio": datetime.combine(fecha, from_minutes(inicio)),
+            "fecha_fin": datetime.combine(fecha, from_minutes(fin)),
+            "disponible": True,
+            "precio_adicional": 0,
+            "observaciones": None,
+            "created_at": generado,
+            "updated_at": generado
+        }
+        for fecha, inicio, fin in slots
+    ]
 
 
 def _obtener_siguiente_dia_habil(
     fecha_actual: date,
-    horarios_map: Dict[int, Any],
+    dias_laborables: Set[int],
     max_dias_busqueda: int = 7
 ) -> date:
     """
@@ -521,7 +417,7 @@ def _obtener_siguiente_dia_habil(
     
     Args:
         fecha_actual: Fecha actual desde la cual buscar
-        horarios_map: Mapa de horarios por día de la semana (0=Lunes, 6=Domingo)
+        dias_laborables: Días de la semana con horario configurado (0=Lunes, 6=Domingo)
         max_dias_busqueda: Máximo de días a buscar hacia adelante (default: 7)
     
     Returns:
@@ -532,8 +428,8 @@ def _obtener_siguiente_dia_habil(
     
     while dias_buscados < max_dias_busqueda:
         dia_semana = fecha_busqueda.weekday()
-        if dia_semana in horarios_map:
-            logger.info(f"🔍 [GET /disponibilidades] Siguiente día hábil encontrado: {fecha_busqueda} ({['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo'][dia_semana]})")
+        if dia_semana in dias_laborables:
+            logger.debug(f"🔍 [GET /disponibilidades] Siguiente día hábil encontrado: {fecha_busqueda}")
             return fecha_busqueda
         fecha_busqueda += timedelta(days=1)
         dias_buscados += 1
@@ -543,75 +439,6 @@ def _obtener_siguiente_dia_habil(
     return fecha_actual + timedelta(days=1)
 
 
-def _generar_horarios_disponibles(
-    servicio_id: int,
-    fecha_inicio: date,
-    fecha_fin: date,
-    horarios_map: Dict[int, Any],
-    excepciones_map: Dict[date, Any],
-    reservas_map: Dict[date, List[Dict[str, Any]]],
-    duracion_minutos: int
-) -> List[Dict[str, Any]]:
-    """Genera todos los horarios disponibles en el rango de fechas."""
-    logger.info("🔍 [GET /disponibilidades] Generando horarios disponibles...")
-    todos_horarios = []
-    fecha_actual = fecha_inicio
-    
-    dias_nombres = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-    
-    while fecha_actual <= fecha_fin:
-        dia_semana = fecha_actual.weekday()  # 0=Lunes, 6=Domingo
-        dia_nombre = dias_nombres[dia_semana]
-        
-        if dia_semana not in horarios_map:
-            logger.debug(f"🔍 [GET /disponibilidades] No hay horario configurado para {dia_nombre} ({fecha_actual})")
-            fecha_actual += timedelta(days=1)
-            continue
-        
-        horario_base = horarios_map[dia_semana]
-        logger.info(f"📅 [GET /disponibilidades] Procesando {dia_nombre} ({fecha_actual}): horario base {horario_base['hora_inicio']} - {horario_base['hora_fin']}")
-        
-        excepcion = excepciones_map.get(fecha_actual)
-        if excepcion:
-            logger.info(f"⚠️ [GET /disponibilidades] Excepción encontrada para {fecha_actual}: {excepcion['tipo']}")
-        
-        horarios_efectivos = _obtener_horarios_efectivos(horario_base, excepcion)
-        if not horarios_efectivos:
-            logger.debug(f"🔍 [GET /disponibilidades] No hay horarios efectivos para {dia_nombre} ({fecha_actual})")
-            fecha_actual += timedelta(days=1)
-            continue
-        
-        hora_inicio, hora_fin = horarios_efectivos
-        logger.info(f"⏰ [GET /disponibilidades] Horarios efectivos para {dia_nombre} ({fecha_actual}): {hora_inicio} - {hora_fin}")
-        logger.info(f"⏰ [GET /disponibilidades] Tipo de hora_inicio: {type(hora_inicio)}, Tipo de hora_fin: {type(hora_fin)}")
-        
-        slots = _generar_slots_fecha(fecha_actual, hora_inicio, hora_fin, duracion_minutos, servicio_id)
-        logger.info(f"📊 [GET /disponibilidades] Generados {len(slots)} slots para {dia_nombre} ({fecha_actual})")
-        if slots:
-            logger.info(f"📊 [GET /disponibilidades] Primer slot: {slots[0]['fecha_inicio'].time()} - {slots[0]['fecha_fin'].time()}")
-            logger.info(f"📊 [GET /disponibilidades] Último slot: {slots[-1]['fecha_inicio'].time()} - {slots[-1]['fecha_fin'].time()}")
-        logger.info(f"📊 [GET /disponibilidades] Generados {len(slots)} slots para {dia_nombre} ({fecha_actual})")
-        
-        reservas_fecha = reservas_map.get(fecha_actual, [])
-        _aplicar_reservas_a_slots(slots, reservas_fecha, fecha_actual)
-        
-        todos_horarios.extend(slots)
-        fecha_actual += timedelta(days=1)
-    
-    horarios_disponibles = [h for h in todos_horarios if h["disponible"]]
-    
-    # Filtrar para asegurar que solo se muestren disponibilidades a partir del día hábil siguiente
-    # Esto es una validación adicional por si acaso alguna disponibilidad se generó para hoy
-    fecha_hoy = date.today()
-    horarios_disponibles = [
-        h for h in horarios_disponibles 
-        if h["fecha_inicio"].date() > fecha_hoy
-    ]
-    
-    logger.info(f"✅ [GET /disponibilidades] Generados {len(horarios_disponibles)} horarios disponibles para servicio {servicio_id} (a partir del día hábil siguiente)")
-    return horarios_disponibles
-
-
 @router.get(
     "/servicio/{servicio_id}/disponibles",
     response_model=List[DisponibilidadOut],
@@ -643,45 +470,44 @@ async def obtener_disponibilidades_disponibles_servicio(
             fecha_hoy = date.today()
             logger.info(f"📅 [GET /disponibilidades] Fecha actual: {fecha_hoy}")
             
-            # Obtener horarios de trabajo del proveedor
-            horarios_map = await _obtener_horarios_trabajo(conn, proveedor_id)
-            
-            if not horarios_map or len(horarios_map) == 0:
-                logger.warning(f"⚠️ [GET /disponibilidades] No hay horarios de trabajo configurados para proveedor {proveedor_id}")
-                return []
-            
-            # Calcular el siguiente día hábil (día con horario configurado)
-            # Las reservas solo pueden hacerse a partir del día hábil siguiente
-            fecha_inicio = _obtener_siguiente_dia_habil(fecha_hoy, horarios_map)
-            fecha_fin = fecha_inicio + timedelta(days=30)
+            async def calcular_slots() -> List[Slot]:
+                # Obtener horarios de trabajo del proveedor
+                horarios = await _obtener_horarios_trabajo(conn, proveedor_id)
+                if not horarios:
+                    logger.warning(f"⚠️ [GET /disponibilidades] No hay horarios de trabajo configurados para proveedor {proveedor_id}")
+                    return []
+                
+                # Calcular el siguiente día hábil (día con horario configurado)
+                # Las reservas solo pueden hacerse a partir del día hábil siguiente
+                dias_laborables = {row['dia_semana'] for row in horarios}
+                fecha_inicio = _obtener_siguiente_dia_habil(fecha_hoy, dias_laborables)
+                fecha_fin = fecha_inicio + timedelta(days=DIAS_DISPONIBILIDAD)
+                
+                excepciones = await _obtener_excepciones_horario(conn, proveedor_id, fecha_inicio, fecha_fin)
+                reservas = await _obtener_reservas(conn, servicio_id, fecha_inicio, fecha_fin)
+                datos = construir_datos_rango(horarios, excepciones, reservas)
+                
+                # Forzar intervalos de 1 hora (60 minutos) para las disponibilidades
+                # independientemente de la duración del servicio
+                # Esto asegura que los horarios disponibles se muestren cada hora completa
+                return calcular_slots_rango(datos, fecha_inicio, fecha_fin, DURACION_SLOTS_DISPONIBILIDAD)
             
-            logger.info(f"📅 [GET /disponibilidades] Fecha inicio (siguiente día hábil): {fecha_inicio}")
-            logger.info(f"📅 [GET /disponibilidades] Fecha fin: {fecha_fin}")
-            
-            excepciones_map = await _obtener_excepciones_horario(conn, proveedor_id, fecha_inicio, fecha_fin)
-            reservas_map = await _obtener_reservas(conn, servicio_id, fecha_inicio, fecha_fin)
-            
-            # Forzar intervalos de 1 hora (60 minutos) para las disponibilidades
-            # independientemente de la duración del servicio
-            # Esto asegura que los horarios disponibles se muestren cada hora completa
-            duracion_slots_disponibilidad = 60
-            logger.info(f"🔍 [GET /disponibilidades] Usando duración de slots: {duracion_slots_disponibilidad} minutos (1 hora)")
-            
-            horarios_disponibles = _generar_horarios_disponibles(
+            # El rango depende solo de la fecha actual y del horario del proveedor (que invalida el cache)
+            slots = await availability_cache.get_slots(
+                proveedor_id,
                 servicio_id,
-                fecha_inicio,
-                fecha_fin,
-                horarios_map,
-                excepciones_map,
-                reservas_map,
-                duracion_slots_disponibilidad
+                fecha_hoy,
+                fecha_hoy + timedelta(days=DIAS_DISPONIBILIDAD),
+                DURACION_SLOTS_DISPONIBILIDAD,
+                calcular_slots
             )
+            horarios_disponibles = _slots_a_disponibilidades(servicio_id, slots)
             
             logger.info(f"✅ [GET /disponibilidades] Retornando {len(horarios_disponibles)} horarios generados")
             return horarios_disponibles
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except HTTPException:
         raise
@@ -695,6 +521,103 @@ async def obtener_disponibilidades_disponibles_servicio(
             detail=f"Error interno del servidor al obtener disponibilidades: {str(e)}"
         )
 
+def _build_busqueda_query(
+    id_categoria: Optional[int],
+    departamento: Optional[str],
+    ciudad: Optional[str],
+    params: list
+) -> str:
+    """Construye la búsqueda sobre capacidad_diaria_servicio (params ya trae fechas, máscara, limit y offset)"""
+    filters = []
+    if id_categoria:
+        params.append(id_categoria)
+        filters.append(f"s.id_categoria = ${len(params)}")
+    if departamento:
+        params.append(f"%{departamento}%")
+        filters.append(f"LOWER(d.nombre) LIKE LOWER(${len(params)})")
+    if ciudad:
+        params.append(f"%{ciudad}%")
+        filters.append(f"LOWER(c.nombre) LIKE LOWER(${len(params)})")
+    extra = "".join(f" AND {condicion}" for condicion in filters)
+    return f"""
+        SELECT
+            s.id_servicio, s.nombre, s.id_categoria, s.id_perfil, pe.razon_social,
+            d.nombre AS departamento, c.nombre AS ciudad,
+            MIN(cd.fecha) AS primera_fecha,
+            (array_agg(cd.primer_slot ORDER BY cd.fecha))[1] AS primer_slot,
+            SUM(cd.slots_libres)::int AS slots_libres,
+            array_agg(cd.fecha ORDER BY cd.fecha) AS fechas
+        FROM capacidad_diaria_servicio cd
+        JOIN servicio s ON cd.id_servicio = s.id_servicio
+        JOIN perfil_empresa pe ON s.id_perfil = pe.id_perfil
+        LEFT JOIN direccion dir ON pe.id_direccion = dir.id_direccion
+        LEFT JOIN departamento d ON dir.id_departamento = d.id_departamento
+        LEFT JOIN ciudad c ON dir.id_ciudad = c.id_ciudad
+        WHERE cd.fecha >= $1 AND cd.fecha <= $2
+        AND (cd.horas_libres & $3) <> 0
+        AND s.estado = true AND pe.verificado = true{extra}
+        GROUP BY s.id_servicio, pe.razon_social, d.nombre, c.nombre
+        ORDER BY primera_fecha, primer_slot, s.id_servicio
+        LIMIT $4 OFFSET $5
+    """
+
+
+@router.get(
+    "/buscar",
+    response_model=List[ServicioConDisponibilidadOut],
+    summary="Buscar servicios con horarios libres",
+    description="Servicios con al menos un horario libre en la ventana de fechas y horas indicada, filtrados por categoría y ubicación"
+)
+async def buscar_servicios_disponibles(
+    fecha_desde: date = Query(..., description="Primer día de la ventana"),
+    fecha_hasta: Optional[date] = Query(None, description="Último día de la ventana (por defecto: fecha_desde)"),
+    hora_desde: int = Query(0, ge=0, le=23, description="Hora mínima de inicio del slot (0-23)"),
+    hora_hasta: int = Query(24, ge=1, le=24, description="Hora máxima de inicio del slot, exclusiva (1-24)"),
+    id_categoria: Optional[int] = Query(None, ge=1, description="ID de categoría"),
+    departamento: Optional[str] = Query(None, description="Nombre del departamento"),
+    ciudad: Optional[str] = Query(None, description="Nombre de la ciudad"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Busca servicios disponibles en una sola consulta sobre la capacidad diaria
+    precalculada (ver CapacidadDiariaService), sin calcular la disponibilidad de
+    cada servicio. Ejemplo "el martes por la mañana": fecha_desde=<martes>&hora_desde=6&hora_hasta=12.
+    """
+    fecha_hasta = fecha_hasta or fecha_desde
+    if fecha_hasta < fecha_desde:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha de fin debe ser posterior a la fecha de inicio."
+        )
+    if hora_hasta <= hora_desde:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La hora de fin debe ser posterior a la hora de inicio."
+        )
+    horizonte_inicio, horizonte_fin = capacidad_diaria_service.horizonte()
+    if fecha_hasta > horizonte_fin:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Solo se puede buscar disponibilidad hasta el {horizonte_fin.isoformat()}."
+        )
+    
+    params: list = [max(fecha_desde, horizonte_inicio), fecha_hasta, mascara_horas(hora_desde, hora_hasta), limit, offset]
+    query = _build_busqueda_query(id_categoria, departamento, ciudad, params)
+    try:
+        async with direct_db_service.connection() as conn:
+            rows = await conn.fetch(query, *params)
+    except Exception as e:
+        logger.error(f"❌ [GET /disponibilidades/buscar] Error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al buscar servicios disponibles."
+        )
+    
+    logger.info(f"✅ [GET /disponibilidades/buscar] {len(rows)} servicios disponibles entre {fecha_desde} y {fecha_hasta}")
+    return [dict(row) for row in rows]
+
+
 @router.get(
     "/servicio/{servicio_id}/excepciones",
     summary="Obtener excepciones de horario para un servicio",
@@ -724,17 +647,17 @@ async def obtener_excepciones_servicio(
                 fecha_fin = fecha_inicio + timedelta(days=30)
             
             # Obtener excepciones
-            excepciones_map = await _obtener_excepciones_horario(conn, proveedor_id, fecha_inicio, fecha_fin)
+            excepciones = await _obtener_excepciones_horario(conn, proveedor_id, fecha_inicio, fecha_fin)
             
-            # Convertir a lista de diccionarios con información formateada
+            # Convertir a lista de diccionarios con información formateada, ordenada por fecha
             excepciones_list = []
-            for fecha_excepcion, excepcion_data in excepciones_map.items():
+            for row in sorted(excepciones, key=lambda row: row['fecha']):
                 excepcion_info = {
-                    "fecha": fecha_excepcion.isoformat(),
-                    "tipo": excepcion_data['tipo'],
-                    "hora_inicio": excepcion_data.get('hora_inicio').strftime('%H:%M') if excepcion_data.get('hora_inicio') else None,
-                    "hora_fin": excepcion_data.get('hora_fin').strftime('%H:%M') if excepcion_data.get('hora_fin') else None,
-                    "motivo": excepcion_data.get('motivo')
+                    "fecha": row['fecha'].isoformat(),
+                    "tipo": row['tipo'],
+                    "hora_inicio": row['hora_inicio'].strftime('%H:%M') if row['hora_inicio'] else None,
+                    "hora_fin": row['hora_fin'].strftime('%H:%M') if row['hora_fin'] else None,
+                    "motivo": row.get('motivo')
                 }
                 excepciones_list.append(excepcion_info)
             
@@ -742,7 +665,7 @@ async def obtener_excepciones_servicio(
             return excepciones_list
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except HTTPException:
         raise
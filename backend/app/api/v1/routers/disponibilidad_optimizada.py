@@ -5,11 +5,29 @@ from app.api.v1.dependencies.database_supabase import get_async_db
 from app.api.v1.dependencies.auth_user import get_current_user
 from app.models.disponibilidad import DisponibilidadModel
 from app.models.servicio import ServicioModel
-from app.schemas.disponibilidad import DisponibilidadOut
+from app.schemas.disponibilidad import DisponibilidadIn, DisponibilidadOut
+from app.services.direct_db_service import direct_db_service
+from datetime import datetime, timezone
+from decimal import Decimal
+from pydantic import ValidationError
 from typing import List
 
 router = APIRouter()
 
+MAX_DISPONIBILIDADES_LOTE = 100
+DISPONIBILIDAD_COPY_COLUMNS = [
+    "id_servicio", "fecha_inicio", "fecha_fin", "disponible",
+    "precio_adicional", "observaciones", "created_at", "updated_at"
+]
+
+# Servicios del lote que pertenecen al proveedor autenticado (una consulta para todo el lote)
+SERVICIOS_DEL_PROVEEDOR_QUERY = """
+    SELECT s.id_servicio
+    FROM servicio s
+    JOIN perfil_empresa pe ON s.id_perfil = pe.id_perfil
+    WHERE pe.user_id = $1 AND s.id_servicio = ANY($2::bigint[])
+"""
+
 @router.get("/proveedor", response_model=List[DisponibilidadOut])
 async def get_disponibilidades_proveedor(
     db: AsyncSession = Depends(get_async_db),
@@ -52,60 +70,56 @@ async def get_disponibilidades_proveedor(
 @router.post("/masivo")
 async def crear_disponibilidades_masivo(
     disponibilidades: List[dict],
-    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ):
     """
     Crea múltiples disponibilidades de una vez.
-    Optimizado para creación masiva.
+    Valida las filas, verifica en una sola consulta que los servicios pertenecen
+    al proveedor y las inserta con COPY en una transacción.
     """
+    # Validar que no exceda el límite de seguridad
+    if len(disponibilidades) > MAX_DISPONIBILIDADES_LOTE:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Límite de seguridad: máximo {MAX_DISPONIBILIDADES_LOTE} disponibilidades por lote"
+        )
+    
     try:
-        # Validar que no exceda el límite de seguridad
-        if len(disponibilidades) > 100:
-            raise HTTPException(
-                status_code=400, 
-                detail="Límite de seguridad: máximo 100 disponibilidades por lote"
-            )
-        
-        creadas = 0
+        validas: List[DisponibilidadIn] = []
         errores = 0
-        
         for disp_data in disponibilidades:
             try:
-                # Validar que el servicio pertenece al usuario
-                servicio_query = select(ServicioModel).where(
-                    and_(
-                        ServicioModel.id_servicio == disp_data.get('id_servicio'),
-                        ServicioModel.id_perfil == current_user.id
-                    )
-                )
-                servicio_result = await db.execute(servicio_query)
-                servicio = servicio_result.scalar_one_or_none()
-                
-                if not servicio:
-                    errores += 1
-                    continue
-                
-                # Crear disponibilidad
-                disponibilidad = DisponibilidadModel(
-                    id_servicio=disp_data.get('id_servicio'),
-                    fecha_inicio=disp_data.get('fecha_inicio'),
-                    fecha_fin=disp_data.get('fecha_fin'),
-                    disponible=disp_data.get('disponible', True),
-                    precio_adicional=disp_data.get('precio_adicional', 0),
-                    observaciones=disp_data.get('observaciones')
-                )
-                
-                db.add(disponibilidad)
-                creadas += 1
-                
-            except Exception as e:
-                print(f"Error creando disponibilidad individual: {e}")
+                validas.append(DisponibilidadIn(**disp_data))
+            except (ValidationError, TypeError):
                 errores += 1
-                continue
         
-        # Commit de todas las disponibilidades
-        await db.commit()
+        creadas = 0
+        async with direct_db_service.connection() as conn:
+            async with conn.transaction():
+                servicios_propios = {
+                    row['id_servicio'] for row in await conn.fetch(
+                        SERVICIOS_DEL_PROVEEDOR_QUERY,
+                        current_user.id,
+                        list({d.id_servicio for d in validas})
+                    )
+                }
+                ahora = datetime.now(timezone.utc)
+                records = [
+                    (
+                        d.id_servicio, d.fecha_inicio, d.fecha_fin, d.disponible,
+                        Decimal(str(d.precio_adicional or 0)), d.observaciones, ahora, ahora
+                    )
+                    for d in validas
+                    if d.id_servicio in servicios_propios
+                ]
+                errores += len(validas) - len(records)
+                if records:
+                    await conn.copy_records_to_table(
+                        "disponibilidad",
+                        records=records,
+                        columns=DISPONIBILIDAD_COPY_COLUMNS
+                    )
+                creadas = len(records)
         
         return {
             "mensaje": f"Proceso completado: {creadas} creadas, {errores} errores",
@@ -114,6 +128,5 @@ async def crear_disponibilidades_masivo(
         }
         
     except Exception as e:
-        await db.rollback()
         print(f"Error en creación masiva: {e}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
@@ -1,6 +1,7 @@
 # backend/app/api/v1/routers/horario_trabajo.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.services.direct_db_service import direct_db_service
+from app.services.capacidad_diaria_service import registrar_cambio_disponibilidad
 from app.api.v1.dependencies.auth_user import get_current_user
 from app.schemas.horario_trabajo import (
     HorarioTrabajoIn, HorarioTrabajoOut, HorarioTrabajoUpdate,
@@ -47,7 +48,7 @@ async def get_provider_profile_direct(user_id: str) -> int:
         
         return perfil_result['id_perfil']
     finally:
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
 
 # Helper function para ejecutar consultas con direct_db_service
 async def execute_query(query: str, *params):
@@ -56,7 +57,7 @@ async def execute_query(query: str, *params):
     try:
         return await conn.execute(query, *params)
     finally:
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
 
 # Helper function para fetch_one con direct_db_service
 async def fetch_one_query(query: str, *params):
@@ -66,7 +67,7 @@ async def fetch_one_query(query: str, *params):
         result = await conn.fetchrow(query, *params)
         return dict(result) if result else None
     finally:
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
 
 # Helper function para fetch_all con direct_db_service
 async def fetch_all_query(query: str, *params):
@@ -76,7 +77,37 @@ async def fetch_all_query(query: str, *params):
         result = await conn.fetch(query, *params)
         return [dict(row) for row in result]
     finally:
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
+
+# Consultas de la configuración completa (inserciones masivas con unnest: una sentencia por tabla)
+DELETE_HORARIOS_PROVEEDOR_QUERY = """
+    DELETE FROM horario_trabajo 
+    WHERE id_proveedor = $1
+"""
+
+INSERT_HORARIOS_BULK_QUERY = """
+    INSERT INTO horario_trabajo (id_proveedor, dia_semana, hora_inicio, hora_fin, activo)
+    SELECT $1, dia_semana, hora_inicio, hora_fin, activo
+    FROM unnest($2::int[], $3::time[], $4::time[], $5::bool[]) AS t(dia_semana, hora_inicio, hora_fin, activo)
+    RETURNING id_horario, id_proveedor, dia_semana, hora_inicio, hora_fin, activo, created_at
+"""
+
+INSERT_EXCEPCIONES_BULK_QUERY = """
+    INSERT INTO excepciones_horario (id_proveedor, fecha, tipo, hora_inicio, hora_fin, motivo)
+    SELECT $1, fecha, tipo, hora_inicio, hora_fin, motivo
+    FROM unnest($2::date[], $3::text[], $4::time[], $5::time[], $6::text[]) AS t(fecha, tipo, hora_inicio, hora_fin, motivo)
+    RETURNING id_excepcion, id_proveedor, fecha, tipo, hora_inicio, hora_fin, motivo, created_at
+"""
+
+# Fechas repetidas en el lote o que ya tienen una excepción del proveedor
+EXCEPCIONES_EN_CONFLICTO_QUERY = """
+    SELECT fecha FROM unnest($2::date[]) AS t(fecha)
+    GROUP BY fecha HAVING COUNT(*) > 1
+    UNION
+    SELECT fecha FROM excepciones_horario
+    WHERE id_proveedor = $1 AND fecha = ANY($2::date[])
+    ORDER BY fecha
+"""
 
 router = APIRouter(prefix="/horario-trabajo", tags=["horario-trabajo"])
 
@@ -163,6 +194,7 @@ async def crear_horario_trabajo(
             horario.activo
         )
         logger.info(f"🔍 [POST /horario-trabajo/] Horario insertado: {nuevo_horario}")
+        await registrar_cambio_disponibilidad(perfil_id)
         
         logger.info(f"✅ [POST /horario-trabajo/] Horario creado exitosamente: {nuevo_horario['id_horario']}")
         
@@ -326,6 +358,7 @@ async def actualizar_horario_trabajo(
         logger.info("🔍 [PUT /horario-trabajo] Ejecutando actualización...")
         horario_actualizado = await fetch_one_query(update_query, *params)
         logger.info(f"🔍 [PUT /horario-trabajo] Horario actualizado: {horario_actualizado}")
+        await registrar_cambio_disponibilidad(perfil_id)
         
         logger.info(f"✅ [PUT /horario-trabajo] Horario {horario_id} actualizado exitosamente")
         return horario_actualizado
@@ -392,6 +425,7 @@ async def eliminar_horario_trabajo(
             WHERE id_horario = $1 AND id_proveedor = $2
         """
         await execute_query(delete_query, horario_id, perfil_id)
+        await registrar_cambio_disponibilidad(perfil_id)
         
         logger.info(f"✅ [DELETE /horario-trabajo] Horario {horario_id} eliminado exitosamente")
         
@@ -432,16 +466,7 @@ async def configurar_horario_completo(
         perfil_id = await get_provider_profile_direct(current_user.id)
         logger.info(f"✅ [POST /configuracion-completa] Perfil encontrado: id_perfil = {perfil_id}")
     
-        # Eliminar horarios existentes usando helper
-        logger.info("🔍 [POST /configuracion-completa] Eliminando horarios existentes...")
-        delete_horarios_query = """
-            DELETE FROM horario_trabajo 
-            WHERE id_proveedor = $1
-        """
-        await execute_query(delete_horarios_query, perfil_id)
-        logger.info("✅ [POST /configuracion-completa] Horarios existentes eliminados")
-        
-        # Validar todos los horarios antes de crear
+        # Validar todo antes de modificar nada
         from app.schemas.horario_trabajo import validate_horario_times
         for i, horario_data in enumerate(configuracion.horarios):
             try:
@@ -454,65 +479,75 @@ async def configurar_horario_completo(
                     detail=f"Error en horario del día {nombre_dia}: {str(e)}"
                 )
         
-        # Crear nuevos horarios usando direct_db_service
-        logger.info(f"🔍 [POST /configuracion-completa] Creando {len(configuracion.horarios)} nuevos horarios...")
-        horarios_creados = []
-        for i, horario_data in enumerate(configuracion.horarios):
-            logger.info(f"🔍 [POST /configuracion-completa] Creando horario {i+1}: día {horario_data.dia_semana}")
-            insert_horario_query = """
-                INSERT INTO horario_trabajo (id_proveedor, dia_semana, hora_inicio, hora_fin, activo)
-                VALUES ($1, $2, $3, $4, $5)
-                RETURNING id_horario, id_proveedor, dia_semana, hora_inicio, hora_fin, activo, created_at
-            """
-            nuevo_horario = await fetch_one_query(
-                insert_horario_query,
-                perfil_id,
-                horario_data.dia_semana,
-                horario_data.hora_inicio,
-                horario_data.hora_fin,
-                horario_data.activo
+        excepciones = configuracion.excepciones or []
+        for i, excepcion_data in enumerate(excepciones):
+            if excepcion_data.tipo == 'horario_especial':
+                try:
+                    if excepcion_data.hora_inicio and excepcion_data.hora_fin:
+                        validate_horario_times(excepcion_data.hora_inicio, excepcion_data.hora_fin)
+                except ValueError as e:
+                    logger.warning(f"❌ [POST /configuracion-completa] Validación falló para excepción {i+1} (fecha {excepcion_data.fecha}): {str(e)}")
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Error en excepción del {excepcion_data.fecha}: {str(e)}"
+                    )
+        
+        dias_activos = [h.dia_semana for h in configuracion.horarios if h.activo]
+        dias_repetidos = sorted({dia for dia in dias_activos if dias_activos.count(dia) > 1})
+        if dias_repetidos:
+            nombres = ", ".join(get_nombre_dia_semana(dia) for dia in dias_repetidos)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Hay más de un horario activo para: {nombres}."
             )
-            horarios_creados.append(nuevo_horario)
-        logger.info(f"✅ [POST /configuracion-completa] {len(horarios_creados)} horarios creados")
-        
-        # Validar excepciones antes de crear
-        if configuracion.excepciones:
-            for i, excepcion_data in enumerate(configuracion.excepciones):
-                if excepcion_data.tipo == 'horario_especial':
-                    try:
-                        if excepcion_data.hora_inicio and excepcion_data.hora_fin:
-                            validate_horario_times(excepcion_data.hora_inicio, excepcion_data.hora_fin)
-                    except ValueError as e:
-                        logger.warning(f"❌ [POST /configuracion-completa] Validación falló para excepción {i+1} (fecha {excepcion_data.fecha}): {str(e)}")
+        
+        # Reemplazar horarios e insertar excepciones en una transacción con un número
+        # fijo de sentencias, sin importar cuántas filas se envíen
+        async with direct_db_service.connection() as conn:
+            async with conn.transaction():
+                await conn.execute(DELETE_HORARIOS_PROVEEDOR_QUERY, perfil_id)
+                
+                if excepciones:
+                    fechas_en_conflicto = await conn.fetch(
+                        EXCEPCIONES_EN_CONFLICTO_QUERY,
+                        perfil_id,
+                        [e.fecha for e in excepciones]
+                    )
+                    if fechas_en_conflicto:
+                        fechas = ", ".join(str(row['fecha']) for row in fechas_en_conflicto)
+                        logger.warning(f"❌ [POST /configuracion-completa] Excepciones en conflicto: {fechas}")
                         raise HTTPException(
                             status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"Error en excepción del {excepcion_data.fecha}: {str(e)}"
+                            detail=f"Ya existe o se repite una excepción para las fechas: {fechas}. Actualiza las existentes o elimínalas primero."
                         )
+                
+                horarios_creados = [
+                    dict(row) for row in await conn.fetch(
+                        INSERT_HORARIOS_BULK_QUERY,
+                        perfil_id,
+                        [h.dia_semana for h in configuracion.horarios],
+                        [h.hora_inicio for h in configuracion.horarios],
+                        [h.hora_fin for h in configuracion.horarios],
+                        [h.activo for h in configuracion.horarios]
+                    )
+                ]
+                
+                excepciones_creadas = []
+                if excepciones:
+                    excepciones_creadas = [
+                        dict(row) for row in await conn.fetch(
+                            INSERT_EXCEPCIONES_BULK_QUERY,
+                            perfil_id,
+                            [e.fecha for e in excepciones],
+                            [e.tipo for e in excepciones],
+                            [e.hora_inicio for e in excepciones],
+                            [e.hora_fin for e in excepciones],
+                            [e.motivo for e in excepciones]
+                        )
+                    ]
         
-        # Crear excepciones si se proporcionan
-        excepciones_creadas = []
-        if configuracion.excepciones:
-            logger.info(f"🔍 [POST /configuracion-completa] Creando {len(configuracion.excepciones)} excepciones...")
-            for i, excepcion_data in enumerate(configuracion.excepciones):
-                logger.info(f"🔍 [POST /configuracion-completa] Creando excepción {i+1}: {excepcion_data.fecha}")
-                insert_excepcion_query = """
-                    INSERT INTO excepciones_horario (id_proveedor, fecha, tipo, hora_inicio, hora_fin, motivo)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                    RETURNING id_excepcion, id_proveedor, fecha, tipo, hora_inicio, hora_fin, motivo, created_at
-                """
-                nueva_excepcion = await fetch_one_query(
-                    insert_excepcion_query,
-                    perfil_id,
-                    excepcion_data.fecha,
-                    excepcion_data.tipo,
-                    excepcion_data.hora_inicio,
-                    excepcion_data.hora_fin,
-                    excepcion_data.motivo
-                )
-                excepciones_creadas.append(nueva_excepcion)
-            logger.info(f"✅ [POST /configuracion-completa] {len(excepciones_creadas)} excepciones creadas")
-        
-        logger.info(f"✅ [POST /configuracion-completa] Configuración completa creada para proveedor {perfil_id}")
+        logger.info(f"✅ [POST /configuracion-completa] Configuración completa creada para proveedor {perfil_id}: {len(horarios_creados)} horarios, {len(excepciones_creadas)} excepciones")
+        await registrar_cambio_disponibilidad(perfil_id)
         
         return {
             "horarios": horarios_creados,
@@ -640,6 +675,7 @@ async def crear_excepcion_horario(
         )
         logger.info(f"🔍 [POST /excepciones] Fecha guardada en BD: {nueva_excepcion.get('fecha')} (tipo: {type(nueva_excepcion.get('fecha')).__name__})")
         logger.info(f"🔍 [POST /excepciones] Excepción insertada: {nueva_excepcion}")
+        await registrar_cambio_disponibilidad(perfil_id)
         
         logger.info(f"✅ [POST /excepciones] Excepción creada exitosamente: {nueva_excepcion['id_excepcion']}")
         
@@ -800,6 +836,7 @@ async def eliminar_excepcion_horario(
             WHERE id_excepcion = $1 AND id_proveedor = $2
         """
         await execute_query(delete_query, excepcion_id, perfil_id)
+        await registrar_cambio_disponibilidad(perfil_id)
         
         logger.info(f"✅ [DELETE /excepciones] Excepción {excepcion_id} eliminada exitosamente")
         
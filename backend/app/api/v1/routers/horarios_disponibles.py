@@ -1,30 +1,22 @@
 # backend/app/api/v1/routers/horarios_disponibles.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_
 from app.api.v1.dependencies.database_supabase import get_async_db
 from app.api.v1.dependencies.auth_user import get_current_user
-from app.models.horario_trabajo import HorarioTrabajoModel, ExcepcionHorarioModel
-from app.models.reserva_servicio.reserva import ReservaModel
 from app.models.servicio.service import ServicioModel
 from app.schemas.horario_trabajo import HorarioDisponibleOut
 from app.schemas.auth_user import SupabaseUser
+from app.services.availability_cache import availability_cache
+from app.services.availability_engine import Slot, cargar_datos_rango, calcular_slots_rango, from_minutes
 import logging
 from typing import List, Optional
-from datetime import datetime, date, time, timedelta
+from datetime import date
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/horarios-disponibles", tags=["horarios-disponibles"])
 
-# Constantes para tipos de excepción
-TIPO_EXCEPCION_CERRADO = "cerrado"
-TIPO_EXCEPCION_HORARIO_ESPECIAL = "horario_especial"
-
-# Constantes para estados de reserva
-ESTADO_CONFIRMADA = "confirmada"
-ESTADO_PENDIENTE = "pendiente"
-
 # Constantes para mensajes
 MSG_ERROR_OBTENER_HORARIOS = "Error al obtener horarios disponibles."
 MSG_ERROR_OBTENER_HORARIOS_SERVICIO = "Error al obtener horarios disponibles para el servicio."
@@ -43,128 +35,34 @@ DESC_DURACION_SLOT = "Duración de cada slot en minutos"
 DESC_FECHA_INICIO = "Fecha de inicio del rango"
 DESC_FECHA_FIN = "Fecha de fin del rango"
 
-def generar_slots_tiempo(hora_inicio: time, hora_fin: time, duracion_minutos: int = DEFAULT_DURACION_MINUTOS) -> List[time]:
-    """
-    Genera slots de tiempo entre hora_inicio y hora_fin con la duración especificada.
-    """
-    slots = []
-    hora_actual = datetime.combine(date.today(), hora_inicio)
-    hora_final = datetime.combine(date.today(), hora_fin)
-    
-    while hora_actual + timedelta(minutes=duracion_minutos) <= hora_final:
-        slots.append(hora_actual.time())
-        hora_actual += timedelta(minutes=duracion_minutos)
-    
-    return slots
-
-def hay_conflicto_horario(slot_inicio: time, slot_fin: time, reservas: List) -> bool:
-    """
-    Verifica si hay conflicto entre un slot y las reservas existentes.
-    """
-    for reserva in reservas:
-        # Verificar solapamiento
-        if (slot_inicio < reserva.hora_fin and slot_fin > reserva.hora_inicio):
-            return True
-    return False
-
-# Funciones helper para eliminar código duplicado
-async def get_horario_base_proveedor(
-    db: AsyncSession,
-    proveedor_id: int,
-    dia_semana: int
-) -> Optional[HorarioTrabajoModel]:
-    """Obtiene el horario base del proveedor para un día de la semana"""
-    horario_query = select(HorarioTrabajoModel).where(
-        and_(
-            HorarioTrabajoModel.id_proveedor == proveedor_id,
-            HorarioTrabajoModel.dia_semana == dia_semana,
-            HorarioTrabajoModel.activo == True
-        )
-    )
-    horario_result = await db.execute(horario_query)
-    return horario_result.scalar_one_or_none()
-
-async def get_excepcion_horario(
+async def calcular_slots_cacheados(
     db: AsyncSession,
     proveedor_id: int,
-    fecha: date
-) -> Optional[ExcepcionHorarioModel]:
-    """Obtiene la excepción de horario para un proveedor en una fecha específica"""
-    excepcion_query = select(ExcepcionHorarioModel).where(
-        and_(
-            ExcepcionHorarioModel.id_proveedor == proveedor_id,
-            ExcepcionHorarioModel.fecha == fecha
-        )
+    servicio_id: Optional[int],
+    fecha_inicio: date,
+    fecha_fin: date,
+    duracion_minutos: int
+) -> List[Slot]:
+    """Slots libres del rango desde el cache de disponibilidad o calculados con el motor"""
+    async def calcular() -> List[Slot]:
+        datos = await cargar_datos_rango(db, proveedor_id, fecha_inicio, fecha_fin, servicio_id=servicio_id)
+        return calcular_slots_rango(datos, fecha_inicio, fecha_fin, duracion_minutos)
+    
+    return await availability_cache.get_slots(
+        proveedor_id, servicio_id, fecha_inicio, fecha_fin, duracion_minutos, calcular
     )
-    excepcion_result = await db.execute(excepcion_query)
-    return excepcion_result.scalar_one_or_none()
-
-def get_horario_efectivo(
-    horario_base: HorarioTrabajoModel,
-    excepcion_dia: Optional[ExcepcionHorarioModel]
-) -> tuple[time, time]:
-    """Determina el horario efectivo considerando excepciones"""
-    if excepcion_dia and excepcion_dia.tipo == TIPO_EXCEPCION_HORARIO_ESPECIAL:
-        return excepcion_dia.hora_inicio, excepcion_dia.hora_fin
-    return horario_base.hora_inicio, horario_base.hora_fin
 
-async def get_reservas_por_proveedor(
-    db: AsyncSession,
-    proveedor_id: int,
-    fecha: date
-) -> List[ReservaModel]:
-    """
-    Obtiene las reservas confirmadas para un proveedor en una fecha.
-    Solo considera reservas confirmadas para que no aparezcan como disponibles.
-    """
-    reservas_query = select(ReservaModel).where(
-        and_(
-            ReservaModel.fecha == fecha,
-            ReservaModel.servicio.has(ServicioModel.id_perfil == proveedor_id),
-            ReservaModel.estado == ESTADO_CONFIRMADA
+def slots_a_respuesta(slots: List[Slot]) -> List[HorarioDisponibleOut]:
+    """Convierte los slots del motor (fecha, inicio, fin en minutos) al schema de respuesta"""
+    return [
+        HorarioDisponibleOut(
+            fecha=fecha,
+            hora_inicio=from_minutes(inicio),
+            hora_fin=from_minutes(fin),
+            disponible=True
         )
-    )
-    reservas_result = await db.execute(reservas_query)
-    return reservas_result.scalars().all()
-
-async def get_reservas_por_servicio(
-    db: AsyncSession,
-    servicio_id: int,
-    fecha: date
-) -> List[ReservaModel]:
-    """
-    Obtiene las reservas confirmadas para un servicio en una fecha.
-    Solo considera reservas confirmadas para que no aparezcan como disponibles.
-    """
-    reservas_query = select(ReservaModel).where(
-        and_(
-            ReservaModel.id_servicio == servicio_id,
-            ReservaModel.fecha == fecha,
-            ReservaModel.estado == ESTADO_CONFIRMADA
-        )
-    )
-    reservas_result = await db.execute(reservas_query)
-    return reservas_result.scalars().all()
-
-def filtrar_slots_disponibles(
-    slots: List[time],
-    reservas_existentes: List[ReservaModel],
-    fecha: date,
-    duracion_minutos: int
-) -> List[HorarioDisponibleOut]:
-    """Filtra los slots disponibles eliminando los que tienen conflictos con reservas"""
-    slots_disponibles = []
-    for slot_inicio in slots:
-        slot_fin = (datetime.combine(date.today(), slot_inicio) + timedelta(minutes=duracion_minutos)).time()
-        
-        if not hay_conflicto_horario(slot_inicio, slot_fin, reservas_existentes):
-            slots_disponibles.append(HorarioDisponibleOut(
-                fecha=fecha,
-                hora_inicio=slot_inicio,
-                hora_fin=slot_fin,
-                disponible=True
-            ))
-    return slots_disponibles
+        for fecha, inicio, fin in slots
+    ]
 
 @router.get(
     "/proveedor/{proveedor_id}",
@@ -182,30 +80,8 @@ async def obtener_horarios_disponibles_proveedor(
     Genera automáticamente los horarios disponibles para un proveedor en una fecha específica.
     """
     try:
-        # 1. Obtener horario base del día de la semana
-        dia_semana = fecha.weekday()
-        horario_base = await get_horario_base_proveedor(db, proveedor_id, dia_semana)
-        
-        if not horario_base:
-            return []
-        
-        # 2. Verificar excepciones para esta fecha
-        excepcion_dia = await get_excepcion_horario(db, proveedor_id, fecha)
-        
-        if excepcion_dia and excepcion_dia.tipo == TIPO_EXCEPCION_CERRADO:
-            return []
-        
-        # 3. Determinar horario efectivo
-        hora_inicio, hora_fin = get_horario_efectivo(horario_base, excepcion_dia)
-        
-        # 4. Generar slots disponibles
-        slots = generar_slots_tiempo(hora_inicio, hora_fin, duracion_minutos)
-        
-        # 5. Obtener reservas existentes para esta fecha
-        reservas_existentes = await get_reservas_por_proveedor(db, proveedor_id, fecha)
-        
-        # 6. Filtrar slots ocupados
-        slots_disponibles = filtrar_slots_disponibles(slots, reservas_existentes, fecha, duracion_minutos)
+        slots = await calcular_slots_cacheados(db, proveedor_id, None, fecha, fecha, duracion_minutos)
+        slots_disponibles = slots_a_respuesta(slots)
         
         logger.info(f"Generados {len(slots_disponibles)} horarios disponibles para proveedor {proveedor_id} en {fecha}")
         return slots_disponibles
@@ -249,32 +125,9 @@ async def obtener_horarios_disponibles_servicio(
                 detail=MSG_SERVICIO_NO_ENCONTRADO
             )
         
-        # 2. Obtener horarios del proveedor
-        proveedor_id = servicio.id_perfil
-        dia_semana = fecha.weekday()
-        
-        horario_base = await get_horario_base_proveedor(db, proveedor_id, dia_semana)
-        
-        if not horario_base:
-            return []
-        
-        # 3. Verificar excepciones
-        excepcion_dia = await get_excepcion_horario(db, proveedor_id, fecha)
-        
-        if excepcion_dia and excepcion_dia.tipo == TIPO_EXCEPCION_CERRADO:
-            return []
-        
-        # 4. Determinar horario efectivo
-        hora_inicio, hora_fin = get_horario_efectivo(horario_base, excepcion_dia)
-        
-        # 5. Generar slots
-        slots = generar_slots_tiempo(hora_inicio, hora_fin, duracion_minutos)
-        
-        # 6. Obtener reservas existentes para este servicio
-        reservas_existentes = await get_reservas_por_servicio(db, servicio_id, fecha)
-        
-        # 7. Filtrar slots ocupados
-        slots_disponibles = filtrar_slots_disponibles(slots, reservas_existentes, fecha, duracion_minutos)
+        # 2. Calcular slots libres con el horario del proveedor y las reservas del servicio
+        slots = await calcular_slots_cacheados(db, servicio.id_perfil, servicio_id, fecha, fecha, duracion_minutos)
+        slots_disponibles = slots_a_respuesta(slots)
         
         logger.info(f"Generados {len(slots_disponibles)} horarios disponibles para servicio {servicio_id} en {fecha}")
         return slots_disponibles
@@ -311,27 +164,16 @@ async def obtener_horarios_rango_fechas(
                 detail=MSG_FECHA_FIN_POSTERIOR
             )
         
-        # Limitar el rango a máximo 30 días
+        # Limitar el rango a máximo MAX_RANGO_DIAS días
         if (fecha_fin - fecha_inicio).days > MAX_RANGO_DIAS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=MSG_RANGO_MAXIMO_DIAS
             )
         
-        todos_horarios = []
-        fecha_actual = fecha_inicio
-        
-        while fecha_actual <= fecha_fin:
-            # Obtener horarios para esta fecha
-            horarios_fecha = await obtener_horarios_disponibles_proveedor(
-                proveedor_id=proveedor_id,
-                fecha=fecha_actual,
-                duracion_minutos=duracion_minutos,
-                current_user=current_user,
-                db=db
-            )
-            todos_horarios.extend(horarios_fecha)
-            fecha_actual += timedelta(days=1)
+        # Tres consultas para todo el rango y un solo barrido de slots (o una lectura del cache)
+        slots = await calcular_slots_cacheados(db, proveedor_id, None, fecha_inicio, fecha_fin, duracion_minutos)
+        todos_horarios = slots_a_respuesta(slots)
         
         logger.info(f"Generados {len(todos_horarios)} horarios disponibles para rango {fecha_inicio} - {fecha_fin}")
         return todos_horarios
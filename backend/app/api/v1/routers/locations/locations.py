@@ -1,19 +1,23 @@
 # app/api/v1/routers/locations/locations.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import List, Literal, Optional
 import logging
-from datetime import datetime
 
-from app.services.direct_db_service import direct_db_service
+from app.services.location_gazetteer import AUTOCOMPLETE_LIMIT_DEFAULT, location_gazetteer
 from app.schemas.empresa.departamento import DepartamentoOut
 from app.schemas.empresa.ciudad import CiudadOut
 from app.schemas.empresa.barrio import BarrioOut
+from app.schemas.empresa.ubicacion import UbicacionSugerenciaOut
 
 # Constantes para mensajes de error
 MSG_ERROR_OBTENER_DEPARTAMENTOS = "Error al obtener departamentos de la base de datos"
 MSG_ERROR_OBTENER_CIUDADES = "Error al obtener ciudades de la base de datos"
 MSG_ERROR_OBTENER_BARRIOS = "Error al obtener barrios de la base de datos"
+MSG_ERROR_BUSCAR_UBICACIONES = "Error al buscar ubicaciones"
+
+# Límites del autocompletado
+AUTOCOMPLETE_LIMIT_MAX = 50
 
 # Logger para errores
 logger = logging.getLogger(__name__)
@@ -29,29 +33,18 @@ router = APIRouter(prefix="/locations", tags=["locations"])
 )
 async def get_departamentos() -> List[DepartamentoOut]:
     """
-    Obtiene todos los departamentos de la base de datos.
+    Obtiene todos los departamentos ordenados por nombre.
     Devuelve una lista vacía si no hay departamentos disponibles.
-    Usa direct_db_service para evitar problemas con PgBouncer.
+    Se sirven desde el gazetteer en memoria (location_gazetteer), sin consultar la base de datos.
     """
     try:
-        conn = await direct_db_service.get_connection()
-        try:
-            query = "SELECT id_departamento, nombre, created_at FROM departamento ORDER BY nombre"
-            rows = await conn.fetch(query)
-            
-            departamentos = [
-                DepartamentoOut(
-                    id_departamento=row['id_departamento'],
-                    nombre=row['nombre'],
-                    created_at=row['created_at']
-                )
-                for row in rows
-            ]
-            
-            logger.info(f"✅ Encontrados {len(departamentos)} departamentos")
-            return departamentos
-        finally:
-            await direct_db_service.pool.release(conn)
+        departamentos = [
+            DepartamentoOut.model_validate(departamento)
+            for departamento in await location_gazetteer.get_departamentos()
+        ]
+        
+        logger.debug(f"✅ Encontrados {len(departamentos)} departamentos")
+        return departamentos
     except Exception as e:
         logger.error(f"{MSG_ERROR_OBTENER_DEPARTAMENTOS}: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -70,41 +63,18 @@ async def get_ciudades_por_departamento(
     id_departamento: int
 ) -> List[CiudadOut]:
     """
-    Obtiene todas las ciudades de un departamento por su ID.
+    Obtiene todas las ciudades de un departamento por su ID, ordenadas por nombre.
     Devuelve una lista vacía si no hay ciudades para el departamento.
-    Usa direct_db_service para evitar problemas con PgBouncer.
+    Se sirven desde el gazetteer en memoria (location_gazetteer), sin consultar la base de datos.
     """
     try:
-        logger.info(f"🔍 Buscando ciudades para departamento ID: {id_departamento}")
+        ciudades = [
+            CiudadOut.model_validate(ciudad)
+            for ciudad in await location_gazetteer.get_ciudades(id_departamento)
+        ]
         
-        conn = await direct_db_service.get_connection()
-        try:
-            query = """
-                SELECT id_ciudad, nombre, id_departamento, created_at 
-                FROM ciudad 
-                WHERE id_departamento = $1 
-                ORDER BY nombre
-            """
-            rows = await conn.fetch(query, id_departamento)
-            
-            ciudades = [
-                CiudadOut(
-                    id_ciudad=row['id_ciudad'],
-                    nombre=row['nombre'],
-                    id_departamento=row['id_departamento'],
-                    created_at=row['created_at']
-                )
-                for row in rows
-            ]
-            
-            logger.info(f"✅ Encontradas {len(ciudades)} ciudades para departamento ID {id_departamento}")
-            if ciudades:
-                nombres_ciudades = [c.nombre for c in ciudades]
-                logger.debug(f"📋 Ciudades encontradas: {nombres_ciudades}")
-            
-            return ciudades
-        finally:
-            await direct_db_service.pool.release(conn)
+        logger.debug(f"✅ Encontradas {len(ciudades)} ciudades para departamento ID {id_departamento}")
+        return ciudades
     except Exception as e:
         logger.error(f"{MSG_ERROR_OBTENER_CIUDADES}: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -123,37 +93,49 @@ async def get_barrios_por_ciudad(
     id_ciudad: int
 ) -> List[BarrioOut]:
     """
-    Obtiene todos los barrios de una ciudad por su ID.
+    Obtiene todos los barrios de una ciudad por su ID, ordenados por nombre.
     Devuelve una lista vacía si no hay barrios para la ciudad.
-    Usa direct_db_service para evitar problemas con PgBouncer.
+    Se sirven desde el gazetteer en memoria (location_gazetteer), sin consultar la base de datos.
     """
     try:
-        conn = await direct_db_service.get_connection()
-        try:
-            query = """
-                SELECT id_barrio, nombre, id_ciudad 
-                FROM barrio 
-                WHERE id_ciudad = $1 
-                ORDER BY nombre
-            """
-            rows = await conn.fetch(query, id_ciudad)
-            
-            barrios = [
-                BarrioOut(
-                    id_barrio=row['id_barrio'],
-                    nombre=row['nombre'],
-                    id_ciudad=row['id_ciudad']
-                )
-                for row in rows
-            ]
-            
-            logger.info(f"✅ Encontrados {len(barrios)} barrios para ciudad ID {id_ciudad}")
-            return barrios
-        finally:
-            await direct_db_service.pool.release(conn)
+        barrios = [
+            BarrioOut.model_validate(barrio)
+            for barrio in await location_gazetteer.get_barrios(id_ciudad)
+        ]
+        
+        logger.debug(f"✅ Encontrados {len(barrios)} barrios para ciudad ID {id_ciudad}")
+        return barrios
     except Exception as e:
         logger.error(f"{MSG_ERROR_OBTENER_BARRIOS}: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=MSG_ERROR_OBTENER_BARRIOS
-        )
\ No newline at end of file
+        )
+
+
+@router.get(
+    "/buscar",
+    response_model=List[UbicacionSugerenciaOut],
+    status_code=status.HTTP_200_OK,
+    description="Autocompletado de departamentos, ciudades y barrios por prefijo, sin distinguir tildes ni mayúsculas."
+)
+async def buscar_ubicaciones(
+    q: str = Query(..., min_length=1, description="Texto ingresado; coincide con el inicio de cualquier palabra del nombre"),
+    limite: int = Query(AUTOCOMPLETE_LIMIT_DEFAULT, ge=1, le=AUTOCOMPLETE_LIMIT_MAX),
+    tipo: Optional[Literal["departamento", "ciudad", "barrio"]] = Query(None)
+) -> List[UbicacionSugerenciaOut]:
+    """
+    Sugerencias para campos de ubicación: primero las que empiezan con el texto,
+    luego departamentos, ciudades y barrios, cada una con su departamento y ciudad.
+    """
+    try:
+        return [
+            UbicacionSugerenciaOut.model_validate(sugerencia)
+            for sugerencia in await location_gazetteer.autocompletar(q, limite, tipo)
+        ]
+    except Exception as e:
+        logger.error(f"{MSG_ERROR_BUSCAR_UBICACIONES}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=MSG_ERROR_BUSCAR_UBICACIONES
+        )
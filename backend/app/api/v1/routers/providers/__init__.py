@@ -1 +1 @@
-from .providers import router
+# Este archivo permite que el directorio providers sea reconocido como un módulo de Python
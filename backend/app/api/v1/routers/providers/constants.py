@@ -13,6 +13,7 @@ NOMBRE_SUCURSAL_DEFAULT = "Casa Matriz"
 PREFIX_TEMP = "temp://"
 PREFIX_LOCAL = "local://"
 PREFIX_DOCUMENTOS = "documentos/"
+BUCKET_DOCUMENTOS = "documentos"
 DOCUMENT_TYPE_PROVIDER = "provider"
 
 # Constantes para coordenadas
@@ -30,6 +31,7 @@ MSG_CIUDAD_NO_ENCONTRADA = "Ciudad '{ciudad}' no encontrada en el departamento '
 MSG_TIPO_DOCUMENTO_NO_ENCONTRADO = "Tipo de documento '{nombre_tip_documento}' no encontrado"
 MSG_DOCUMENTO_NO_ENCONTRADO = "Documento no encontrado"
 MSG_DOCUMENTO_NO_DISPONIBLE = "Documento no disponible para visualización."
+MSG_ERROR_SUBIENDO_DOCUMENTOS = "No se pudieron subir los documentos: {documentos}"
 MSG_ERROR_INTERNO_SERVIDOR = "Error interno del servidor"
 MSG_ERROR_INESPERADO = "Error inesperado: {error}"
 MSG_ERROR_INESPERADO_SERVICIO = "Error inesperado al proponer el servicio: {error}"
@@ -3,7 +3,7 @@
 Router para endpoints de documentos de proveedores.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import mimetypes
@@ -12,14 +12,15 @@ import urllib.parse
 from app.api.v1.dependencies.auth_user import get_current_user
 from app.api.v1.dependencies.database_supabase import get_async_db
 from app.schemas.auth_user import SupabaseUser
-from app.models.empresa.documento import Documento
-from app.models.empresa.tipo_documento import TipoDocumento
 from app.services.providers.document_service import DocumentService
 from app.repositories.providers.provider_repository import ProviderRepository
+from app.services.direct_db_service import direct_db_service
 from app.supabase.auth_service import supabase_auth
 from app.idrive.idrive_service import idrive_s3_client
+from app.services.document_serving import stream_s3_object
 from app.api.v1.routers.providers.constants import (
     PREFIX_DOCUMENTOS,
+    BUCKET_DOCUMENTOS,
     PREFIX_TEMP,
     MSG_DOCUMENTO_NO_ENCONTRADO,
     MSG_DOCUMENTO_NO_DISPONIBLE,
@@ -28,7 +29,6 @@ from app.api.v1.routers.providers.constants import (
     MSG_SOLICITUD_VERIFICACION_NO_ENCONTRADA,
     VALOR_DEFAULT_TIPO_NO_ENCONTRADO
 )
-from sqlalchemy import select
 
 router = APIRouter(tags=["providers"])  # Sin prefix - el router principal ya lo tiene
 
@@ -72,24 +72,13 @@ def get_content_type_from_filename(file_key: str) -> str:
     return content_type if content_type else 'application/octet-stream'
 
 
-def get_file_from_s3(file_key: str) -> bytes:
-    """Obtiene el archivo desde S3 usando la clave"""
-    print(f"🔍 Intentando acceder a archivo: {file_key}")
-    response = idrive_s3_client.get_object(
-        Bucket='documentos',
-        Key=file_key
-    )
-    file_content = response['Body'].read()
-    print(f"✅ Archivo obtenido exitosamente: {file_key}")
-    return file_content
-
-
 @router.get(
     "/mis-documentos/{documento_id}/servir",
     description="Sirve directamente el archivo de documento del proveedor autenticado."
 )
 async def servir_mi_documento(
     documento_id: int,
+    request: Request,
     token: str = None,
     db: AsyncSession = Depends(get_async_db)
 ):
@@ -132,22 +121,23 @@ async def servir_mi_documento(
             # Extraer clave del archivo desde la URL
             file_key = extract_file_key_from_url(url_completa)
             
-            # Obtener archivo desde S3
-            file_content = get_file_from_s3(file_key)
-            
             # Determinar tipo de contenido
             content_type = get_content_type_from_filename(file_key)
             file_name = file_key.split('/')[-1] if '/' in file_key else file_key
             
-            # Devolver el archivo
-            return Response(
-                content=file_content,
-                media_type=content_type,
-                headers={
-                    "Content-Disposition": f"inline; filename={file_name}"
-                }
+            # Devolver el archivo en streaming desde S3 (soporta Range)
+            return await stream_s3_object(
+                idrive_s3_client,
+                BUCKET_DOCUMENTOS,
+                file_key,
+                file_name,
+                content_type=content_type,
+                range_header=request.headers.get("range"),
+                if_none_match=request.headers.get("if-none-match")
             )
             
+        except HTTPException:
+            raise
         except Exception as s3_error:
             print(f"❌ Error accediendo a S3: {s3_error}")
             print(f"🔍 URL del archivo: {documento.url_archivo}")
@@ -173,43 +163,35 @@ async def servir_mi_documento(
     description="Obtiene los documentos de la solicitud de verificación del proveedor autenticado."
 )
 async def get_mis_documentos(
-    current_user: SupabaseUser = Depends(get_current_user),
-    db: AsyncSession = Depends(get_async_db)
+    current_user: SupabaseUser = Depends(get_current_user)
 ):
     """Obtiene los documentos de la solicitud de verificación del proveedor autenticado"""
 
     try:
-        # Buscar el perfil de empresa del usuario
-        empresa = await ProviderRepository.get_empresa_with_sucursales_orm(db, current_user.id)
-        
-        # Buscar la solicitud de verificación más reciente
-        solicitud = await ProviderRepository.get_latest_verification_request_orm(db, empresa.id_perfil)
+        # Empresa, última solicitud y sus documentos con el tipo en una sola consulta
+        async with direct_db_service.connection() as conn:
+            resultado = await ProviderRepository.get_latest_request_documents(conn, current_user.id)
         
-        # Obtener documentos de la solicitud
-        documentos = await DocumentService.get_documents_by_verification(db, solicitud.id_verificacion)
+        if not resultado:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=MSG_PERFIL_EMPRESA_NO_ENCONTRADO
+            )
+        solicitud = resultado["solicitud"]
+        if not solicitud:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=MSG_SOLICITUD_VERIFICACION_NO_ENCONTRADA
+            )
         
-        # Obtener tipos de documento
-        documentos_detallados = []
-        for doc in documentos:
-            # Obtener tipo de documento
-            tipo_doc_query = select(TipoDocumento).where(TipoDocumento.id_tip_documento == doc.id_tip_documento)
-            tipo_doc_result = await db.execute(tipo_doc_query)
-            tipo_doc = tipo_doc_result.scalars().first()
-            
-            documentos_detallados.append({
-                "id_documento": doc.id_documento,
-                "tipo_documento": tipo_doc.nombre if tipo_doc else VALOR_DEFAULT_TIPO_NO_ENCONTRADO,
-                "es_requerido": tipo_doc.es_requerido if tipo_doc else False,
-                "estado_revision": doc.estado_revision,
-                "url_archivo": doc.url_archivo,
-                "fecha_verificacion": doc.fecha_verificacion,
-                "observacion": doc.observacion,
-                "created_at": doc.created_at
-            })
+        documentos_detallados = [
+            {**doc, "tipo_documento": doc["tipo_documento"] or VALOR_DEFAULT_TIPO_NO_ENCONTRADO}
+            for doc in resultado["documentos"]
+        ]
         
         return {
-            "solicitud_id": solicitud.id_verificacion,
-            "estado": solicitud.estado,
+            "solicitud_id": solicitud["id_verificacion"],
+            "estado": solicitud["estado"],
             "documentos": documentos_detallados
         }
         
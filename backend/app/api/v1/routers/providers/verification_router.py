@@ -4,19 +4,20 @@ Router para endpoints de verificación de proveedores.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.ext.asyncio import AsyncSession
+from types import SimpleNamespace
 from typing import Optional, List
 
 from app.api.v1.dependencies.auth_user import get_current_user
-from app.api.v1.dependencies.database_supabase import get_async_db
 from app.schemas.auth_user import SupabaseUser
+from app.services.direct_db_service import direct_db_service
 from app.services.providers.verification_service import VerificationService
 from app.repositories.providers.provider_repository import ProviderRepository
-from app.services.providers.address_service import AddressService
 from app.services.providers.company_service import CompanyService
 from app.api.v1.routers.providers.constants import (
     MSG_ERROR_INTERNO_SERVIDOR,
-    MSG_ERROR_INESPERADO
+    MSG_ERROR_INESPERADO,
+    MSG_PERFIL_EMPRESA_NO_ENCONTRADO,
+    MSG_SOLICITUD_VERIFICACION_NO_ENCONTRADA
 )
 
 router = APIRouter(tags=["providers"])  # Sin prefix - el router principal ya lo tiene
@@ -75,15 +76,29 @@ async def solicitar_verificacion_completa(
     description="Obtiene los datos de la solicitud de verificación del proveedor autenticado para recuperación."
 )
 async def get_mis_datos_solicitud(
-    current_user: SupabaseUser = Depends(get_current_user),
-    db: AsyncSession = Depends(get_async_db)
+    current_user: SupabaseUser = Depends(get_current_user)
 ):
     """Obtiene los datos de la solicitud de verificación del proveedor autenticado para recuperación"""
     try:
-        empresa = await ProviderRepository.get_empresa_with_sucursales_orm(db, current_user.id)
-        solicitud = await ProviderRepository.get_latest_verification_request_orm(db, empresa.id_perfil)
-        direccion_data = await AddressService.get_direccion_data(db, empresa.id_direccion)
-        sucursal_data = CompanyService.get_sucursal_data(empresa)
+        # Empresa, sucursal, dirección y solicitud en una sola consulta
+        async with direct_db_service.connection() as conn:
+            agregado = await ProviderRepository.get_verification_aggregate(conn, current_user.id)
+        
+        if not agregado:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=MSG_PERFIL_EMPRESA_NO_ENCONTRADO
+            )
+        if not agregado["solicitud"]:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=MSG_SOLICITUD_VERIFICACION_NO_ENCONTRADA
+            )
+        
+        empresa = SimpleNamespace(**agregado["empresa"])
+        solicitud = SimpleNamespace(**agregado["solicitud"])
+        direccion_data = agregado["direccion"]
+        sucursal_data = agregado["sucursal"]
         
         # Construir respuesta
         empresa_data = CompanyService.build_empresa_data(empresa, sucursal_data)
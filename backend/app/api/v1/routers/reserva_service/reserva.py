@@ -10,6 +10,8 @@ from typing import Optional
 from datetime import datetime, time, timedelta, date
 from app.services.direct_db_service import direct_db_service
 from app.services.reserva_notification_service import reserva_notification_service
+from app.services.reserva_booking_service import periodo_reserva, reserva_booking_service
+from app.services.capacidad_diaria_service import registrar_cambio_disponibilidad
 
 logger = logging.getLogger(__name__)
 
@@ -148,7 +150,7 @@ async def obtener_mis_reservas_test(
         )
     finally:
         if 'conn' in locals():
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 # Funciones helper para crear_reserva
 async def verify_service_exists(conn, servicio_id: int) -> dict:
@@ -197,26 +199,25 @@ async def verify_no_duplicate_reservation(
 ) -> None:
     """
     Verifica que el cliente no tenga otra reserva en el mismo horario.
-    Una reserva en el mismo horario es aquella que tiene la misma fecha y horas que se solapan.
-    Dos intervalos [a1, b1] y [a2, b2] se solapan si: a1 < b2 AND b1 > a2
+    Una reserva en el mismo horario es aquella cuyo periodo (fecha + horas) se solapa
+    con el de la nueva: usa el operador && sobre reserva.periodo y el índice GiST (user_id, periodo).
     """
     verificacion_query = """
         SELECT id_reserva, fecha, hora_inicio, hora_fin, estado
         FROM reserva
         WHERE user_id = $1
-        AND fecha = $2
-        AND estado != $3
-        AND hora_inicio < $4
-        AND hora_fin > $5
+        AND periodo && tsrange($2, $3, '[)')
+        AND estado != $4
+        LIMIT 1
     """
     
+    inicio, fin = periodo_reserva(fecha, hora_inicio, hora_fin)
     reserva_existente = await conn.fetchrow(
         verificacion_query,
         user_id,
-        fecha,
-        ESTADO_CANCELADA,  # Excluir reservas canceladas
-        hora_fin,  # $4: hora_fin de la nueva reserva
-        hora_inicio  # $5: hora_inicio de la nueva reserva
+        inicio,
+        fin,
+        ESTADO_CANCELADA  # Excluir reservas canceladas
     )
     
     if reserva_existente:
@@ -226,43 +227,6 @@ async def verify_no_duplicate_reservation(
         )
 
 
-async def verify_no_confirmed_reservation(
-    conn,
-    servicio_id: int,
-    fecha: date,
-    hora_inicio: time,
-    hora_fin: time
-) -> None:
-    """
-    Verifica que no exista una reserva confirmada en el mismo servicio, fecha y horario.
-    Una vez confirmada una reserva en una fecha y horario, no debe aparecer disponible para ningún cliente.
-    Dos intervalos [a1, b1] y [a2, b2] se solapan si: a1 < b2 AND b1 > a2
-    """
-    verificacion_query = """
-        SELECT id_reserva, fecha, hora_inicio, hora_fin, estado
-        FROM reserva
-        WHERE id_servicio = $1
-        AND fecha = $2
-        AND estado = $3
-        AND hora_inicio < $4
-        AND hora_fin > $5
-    """
-    
-    reserva_confirmada = await conn.fetchrow(
-        verificacion_query,
-        servicio_id,
-        fecha,
-        ESTADO_CONFIRMADA,  # Solo verificar reservas confirmadas
-        hora_fin,  # $4: hora_fin de la nueva reserva
-        hora_inicio  # $5: hora_inicio de la nueva reserva
-    )
-    
-    if reserva_confirmada:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"El horario seleccionado (fecha: {fecha.strftime(FORMATO_FECHA_DD_MM_YYYY)}, hora: {hora_inicio.strftime('%H:%M')}) ya está reservado y confirmado por otro cliente. Por favor, selecciona otro horario disponible."
-        )
-
 def validate_and_convert_service_id(id_servicio) -> int:
     """Valida y convierte el ID de servicio a entero"""
     try:
@@ -288,36 +252,6 @@ def calculate_hora_fin(hora_inicio: time) -> time:
     """Calcula la hora fin (1 hora después de la hora de inicio)"""
     return (datetime.combine(date.today(), hora_inicio) + timedelta(hours=1)).time()
 
-async def insert_reserva(
-    conn,
-    servicio_id: int,
-    user_uuid: str,
-    reserva: ReservaIn,
-    hora_inicio: time,
-    hora_fin: time
-) -> dict:
-    """Inserta una nueva reserva en la base de datos"""
-    insert_query = """
-        INSERT INTO reserva (id_servicio, user_id, descripcion, observacion, fecha, hora_inicio, hora_fin, estado)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-        RETURNING id_reserva, id_servicio, user_id, descripcion, observacion, fecha, hora_inicio, hora_fin, estado
-    """
-    
-    nueva_reserva = await conn.fetchrow(
-        insert_query,
-        servicio_id,
-        user_uuid,
-        reserva.descripcion,
-        reserva.observacion,
-        reserva.fecha,
-        hora_inicio,
-        hora_fin,
-        ESTADO_PENDIENTE
-    )
-    
-    logger.info(f"[POST /reservas] Reserva {nueva_reserva['id_reserva']} creada exitosamente")
-    return nueva_reserva
-
 async def send_reservation_notification(conn, reserva_id: int) -> None:
     """Envía notificación por correo cuando se crea una reserva"""
     try:
@@ -346,7 +280,7 @@ async def send_reservation_notification(conn, reserva_id: int) -> None:
             fecha_formatted = notif_data['fecha'].strftime(FORMATO_FECHA_DD_MM_YYYY) if notif_data['fecha'] else ""
             hora_formatted = str(notif_data['hora_inicio']) if notif_data['hora_inicio'] else ""
             
-            reserva_notification_service.notify_reserva_creada(
+            await reserva_notification_service.notify_reserva_creada(
                 reserva_id=notif_data['id_reserva'],
                 servicio_nombre=notif_data['servicio_nombre'],
                 fecha=fecha_formatted,
@@ -425,16 +359,20 @@ async def crear_reserva(
             # NOTA: Se eliminó verify_no_duplicate_reservation para permitir que un cliente
             # pueda reservar múltiples servicios en el mismo horario (diferentes servicios/proveedores)
             
-            # Validar que no exista una reserva confirmada en el mismo servicio, fecha y horario
-            # Esta validación es importante: un servicio específico no puede tener dos reservas confirmadas en el mismo horario
-            await verify_no_confirmed_reservation(
-                conn, servicio_id, reserva.fecha, hora_inicio, hora_fin
+            # Verificar que el horario no esté confirmado por otra reserva e insertar, de forma atómica
+            # (advisory lock por servicio y día dentro de una transacción)
+            nueva_reserva = await reserva_booking_service.crear_reserva(
+                conn,
+                servicio_id,
+                current_user.id,
+                reserva.descripcion,
+                reserva.observacion,
+                reserva.fecha,
+                hora_inicio,
+                hora_fin
             )
             
-            # Insertar reserva
-            nueva_reserva = await insert_reserva(
-                conn, servicio_id, current_user.id, reserva, hora_inicio, hora_fin
-            )
+            await registrar_cambio_disponibilidad(servicio_info['id_perfil'])
             
             # Enviar notificación por correo
             await send_reservation_notification(conn, nueva_reserva['id_reserva'])
@@ -443,7 +381,7 @@ async def crear_reserva(
             return build_reserva_response(nueva_reserva)
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except HTTPException:
         raise
@@ -721,7 +659,7 @@ async def obtener_mis_reservas_detalladas(
             }
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except HTTPException:
         raise
@@ -1087,7 +1025,7 @@ async def obtener_reservas_proveedor(
             }
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except HTTPException:
         raise
@@ -1267,7 +1205,7 @@ async def diagnostico_usuario(
             )
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except Exception as e:
         logger.error(f"[GET /diagnostico-usuario] Error: {str(e)}")
@@ -1383,7 +1321,7 @@ async def obtener_historial_reserva(
     """
     
     try:
-        conn = await direct_db_service.pool.acquire()
+        conn = await direct_db_service.get_connection()
         
         # Verificar que la reserva existe y obtener información
         reserva_query = """
@@ -1453,7 +1391,7 @@ async def obtener_historial_reserva(
             detail=MSG_ERROR_OBTENER_HISTORIAL.format(error=str(e))
         )
     finally:
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
 
 
 # Funciones helper para actualizar_estado_reserva
@@ -1561,7 +1499,7 @@ async def get_notification_data(conn, reserva_id: int) -> Optional[dict]:
     """
     return await conn.fetchrow(notif_query, reserva_id)
 
-def send_reservation_notification_by_estado(
+async def send_reservation_notification_by_estado(
     nuevo_estado: str,
     notif_data: dict,
     fecha_formatted: str,
@@ -1569,7 +1507,7 @@ def send_reservation_notification_by_estado(
 ) -> None:
     """Envía la notificación correspondiente según el nuevo estado"""
     if nuevo_estado == ESTADO_CONFIRMADA:
-        reserva_notification_service.notify_reserva_confirmada(
+        await reserva_notification_service.notify_reserva_confirmada(
             reserva_id=notif_data['id_reserva'],
             servicio_nombre=notif_data['servicio_nombre'],
             fecha=fecha_formatted,
@@ -1580,7 +1518,7 @@ def send_reservation_notification_by_estado(
             proveedor_email=notif_data['proveedor_email']
         )
     elif nuevo_estado == ESTADO_COMPLETADA:
-        reserva_notification_service.notify_reserva_completada(
+        await reserva_notification_service.notify_reserva_completada(
             reserva_id=notif_data['id_reserva'],
             servicio_nombre=notif_data['servicio_nombre'],
             fecha=fecha_formatted,
@@ -1605,7 +1543,7 @@ async def handle_reservation_notification(
                 fecha_formatted = notif_data['fecha'].strftime(FORMATO_FECHA_DD_MM_YYYY) if notif_data['fecha'] else ""
                 hora_formatted = str(notif_data['hora_inicio']) if notif_data['hora_inicio'] else ""
                 
-                send_reservation_notification_by_estado(
+                await send_reservation_notification_by_estado(
                     nuevo_estado,
                     notif_data,
                     fecha_formatted,
@@ -1643,7 +1581,7 @@ async def actualizar_estado_reserva(
     Solo el proveedor del servicio puede cambiar el estado.
     """
     try:
-        conn = await direct_db_service.pool.acquire()
+        conn = await direct_db_service.get_connection()
         
         try:
             # Obtener información de la reserva
@@ -1660,8 +1598,12 @@ async def actualizar_estado_reserva(
             validate_estado_not_same(estado_actual, nuevo_estado)
             validate_estado_transition(estado_actual, nuevo_estado)
             
-            # Actualizar estado de la reserva
-            updated_reserva = await update_reserva_estado(conn, reserva_id, nuevo_estado)
+            # Actualizar estado de la reserva (la confirmación ocupa el horario de forma atómica)
+            if nuevo_estado == ESTADO_CONFIRMADA:
+                updated_reserva = await reserva_booking_service.confirmar_reserva(conn, reserva_id)
+            else:
+                updated_reserva = await update_reserva_estado(conn, reserva_id, nuevo_estado)
+            await registrar_cambio_disponibilidad(reserva_result['id_perfil'])
             
             # Registrar cambio en historial
             try:
@@ -1685,7 +1627,7 @@ async def actualizar_estado_reserva(
             return build_reserva_estado_response(updated_reserva, nuevo_estado, estado_update.observacion)
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except HTTPException:
         raise
@@ -1802,7 +1744,7 @@ async def send_cancellation_notification(
             fecha_formatted = notif_data['fecha'].strftime(FORMATO_FECHA_DD_MM_YYYY) if notif_data['fecha'] else ""
             hora_formatted = str(notif_data['hora_inicio']) if notif_data['hora_inicio'] else ""
             
-            reserva_notification_service.notify_reserva_cancelada(
+            await reserva_notification_service.notify_reserva_cancelada(
                 reserva_id=notif_data['id_reserva'],
                 servicio_nombre=notif_data['servicio_nombre'],
                 fecha=fecha_formatted,
@@ -1856,7 +1798,7 @@ async def cancelar_reserva(
     El motivo de cancelación es obligatorio.
     """
     try:
-        conn = await direct_db_service.pool.acquire()
+        conn = await direct_db_service.get_connection()
         
         try:
             # Obtener información de la reserva
@@ -1872,6 +1814,7 @@ async def cancelar_reserva(
             
             # Cancelar la reserva
             updated_reserva = await cancel_reserva_estado(conn, reserva_id)
+            await registrar_cambio_disponibilidad(reserva_result['id_perfil'])
             
             # Registrar en el historial
             try:
@@ -1900,7 +1843,7 @@ async def cancelar_reserva(
             return build_cancelacion_response(updated_reserva, cancelacion_data.motivo, quien_cancelo)
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except HTTPException:
         raise
@@ -1912,7 +1855,7 @@ async def cancelar_reserva(
             detail=MSG_ERROR_CANCELAR_RESERVA_FORMAT.format(error=str(e))
         )
     finally:
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
 
 
 # Funciones helper para confirmar_reserva
@@ -1924,10 +1867,12 @@ async def get_reserva_basic_info(conn, reserva_id: int) -> dict:
             r.estado as estado_actual, 
             r.user_id as cliente_user_id,
             r.id_servicio,
+            s.id_perfil,
             r.fecha,
             r.hora_inicio,
             r.hora_fin
         FROM reserva r
+        INNER JOIN servicio s ON r.id_servicio = s.id_servicio
         WHERE r.id_reserva = $1
     """
     
@@ -1960,25 +1905,6 @@ def validate_reserva_estado_for_confirmation(estado_actual: str) -> None:
             detail=MSG_NO_POSIBLE_ACCION_ESTADO
         )
 
-async def confirm_reserva_estado(conn, reserva_id: int) -> dict:
-    """Confirma la reserva actualizando su estado"""
-    update_query = """
-        UPDATE reserva 
-        SET estado = $2
-        WHERE id_reserva = $1
-        RETURNING id_reserva, estado, fecha, hora_inicio, hora_fin
-    """
-    
-    updated_reserva = await conn.fetchrow(update_query, reserva_id, ESTADO_CONFIRMADA)
-    
-    if not updated_reserva:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=MSG_ERROR_CONFIRMAR_RESERVA
-        )
-    
-    return updated_reserva
-
 async def send_confirmation_notification(conn, reserva_id: int) -> None:
     """Envía notificación por correo cuando se confirma una reserva"""
     try:
@@ -2007,7 +1933,7 @@ async def send_confirmation_notification(conn, reserva_id: int) -> None:
             fecha_formatted = notif_data['fecha'].strftime(FORMATO_FECHA_DD_MM_YYYY) if notif_data['fecha'] else ""
             hora_formatted = str(notif_data['hora_inicio']) if notif_data['hora_inicio'] else ""
             
-            reserva_notification_service.notify_reserva_confirmada(
+            await reserva_notification_service.notify_reserva_confirmada(
                 reserva_id=notif_data['id_reserva'],
                 servicio_nombre=notif_data['servicio_nombre'],
                 fecha=fecha_formatted,
@@ -2049,7 +1975,7 @@ async def confirmar_reserva(
     Solo se puede confirmar si el estado es 'pendiente'.
     """
     try:
-        conn = await direct_db_service.pool.acquire()
+        conn = await direct_db_service.get_connection()
         
         try:
             # Obtener información de la reserva
@@ -2062,44 +1988,9 @@ async def confirmar_reserva(
             estado_actual = reserva_result['estado_actual']
             validate_reserva_estado_for_confirmation(estado_actual)
             
-            # Obtener información de la reserva para validar conflicto
-            servicio_id = reserva_result.get('id_servicio')
-            fecha_reserva = reserva_result.get('fecha')
-            hora_inicio = reserva_result.get('hora_inicio')
-            hora_fin = reserva_result.get('hora_fin')
-            
-            # Validar que no exista otra reserva confirmada en el mismo servicio, fecha y horario
-            # (excluyendo la reserva actual que se está confirmando)
-            if servicio_id and fecha_reserva and hora_inicio and hora_fin:
-                verificacion_query = """
-                    SELECT id_reserva, fecha, hora_inicio, hora_fin, estado
-                    FROM reserva
-                    WHERE id_servicio = $1
-                    AND fecha = $2
-                    AND estado = $3
-                    AND id_reserva != $4
-                    AND hora_inicio < $5
-                    AND hora_fin > $6
-                """
-                
-                reserva_confirmada = await conn.fetchrow(
-                    verificacion_query,
-                    servicio_id,
-                    fecha_reserva,
-                    ESTADO_CONFIRMADA,
-                    reserva_id,  # Excluir la reserva actual
-                    hora_fin,
-                    hora_inicio
-                )
-                
-                if reserva_confirmada:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"El horario seleccionado (fecha: {fecha_reserva.strftime(FORMATO_FECHA_DD_MM_YYYY)}, hora: {hora_inicio.strftime('%H:%M')}) ya está reservado y confirmado por otro cliente. No se puede confirmar esta reserva."
-                    )
-            
-            # Confirmar la reserva
-            updated_reserva = await confirm_reserva_estado(conn, reserva_id)
+            # Confirmar la reserva si ninguna otra confirmada ocupa el horario (atómico)
+            updated_reserva = await reserva_booking_service.confirmar_reserva(conn, reserva_id)
+            await registrar_cambio_disponibilidad(reserva_result['id_perfil'])
             
             # Registrar en el historial
             try:
@@ -2123,7 +2014,7 @@ async def confirmar_reserva(
             return build_confirmacion_response(updated_reserva)
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except HTTPException:
         raise
@@ -2135,7 +2026,7 @@ async def confirmar_reserva(
             detail=MSG_ERROR_CONFIRMAR_RESERVA_FORMAT.format(error=str(e))
         )
     finally:
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
 
 @router.get(
     "/servicio/{servicio_id}/confirmadas",
@@ -2181,7 +2072,7 @@ async def obtener_reservas_confirmadas_servicio(
             return {"reservas": reservas}
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except Exception as e:
         logger.error(f"❌ [GET /reservas/servicio/{servicio_id}/confirmadas] Error: {str(e)}")
@@ -76,7 +76,7 @@ async def get_all_categories(
             return categories
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except HTTPException:
         raise
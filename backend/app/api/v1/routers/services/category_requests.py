@@ -259,7 +259,7 @@ async def get_my_category_requests(
             formatted_requests = [format_category_request_row(row) for row in rows]
             return formatted_requests
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
     except HTTPException:
         raise
@@ -299,7 +299,7 @@ async def get_all_category_requests_for_admin(
             formatted_requests = [format_category_request_row(row) for row in rows]
             return formatted_requests
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
     except Exception as e:
         print(f"Error obteniendo solicitudes de categorías: {e}")
@@ -24,6 +24,7 @@ from app.models.empresa.perfil_empresa import PerfilEmpresa
 from app.schemas.servicio.service import ServicioUpdate, ServicioCreate, ServicioOut
 from app.schemas.publicar_servicio.tarifa_servicio import TarifaServicioIn, TarifaServicioOut
 from app.services.direct_db_service import direct_db_service
+from app.services.image_pipeline import ImagenInvalidaError, srcset_desde_variantes, variantes_desde_url
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/provider/services", tags=["provider-services"])
@@ -223,7 +224,7 @@ async def get_provider_services(
             
             return servicios_formateados
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except HTTPException:
         raise
@@ -512,7 +513,7 @@ async def get_monedas_options(db: AsyncSession = Depends(get_async_db)):
                 for moneda in monedas
             ]
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     except Exception as e:
         logger.error(f"❌ Error en get_monedas_options: {e}")
         raise HTTPException(
@@ -569,7 +570,7 @@ async def get_tipos_tarifa_options(db: AsyncSession = Depends(get_async_db)):
                 for tipo in tipos_tarifa
             ]
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
     except Exception as e:
         logger.error(f"❌ Error en get_tipos_tarifa_options: {e}")
@@ -675,18 +676,17 @@ async def upload_service_image(
     from app.services.supabase_storage_service import supabase_storage_service
     
     try:
-        # Subir imagen a Supabase Storage en la carpeta servicios/
-        success, public_url = await supabase_storage_service.upload_service_image(
-            file_content=content,
-            file_name=file.filename,
-            content_type=file.content_type
-        )
+        # Subir variantes WebP a Supabase Storage en la carpeta servicios/
+        success, public_url = await supabase_storage_service.upload_service_image(content)
         
         if success and public_url:
             logger.info(f"✅ Imagen subida exitosamente a Supabase Storage: {public_url}")
+            variantes = variantes_desde_url(public_url)
             return {
                 "message": MSG_IMAGEN_SUBIDA,
-                "image_path": public_url
+                "image_path": public_url,
+                "variantes": variantes,
+                "srcset": srcset_desde_variantes(variantes)
             }
         else:
             logger.error("❌ Error subiendo imagen a Supabase Storage")
@@ -695,6 +695,13 @@ async def upload_service_image(
                 detail=MSG_ERROR_SUBIR_IMAGEN_STORAGE
             )
             
+    except HTTPException:
+        raise
+    except ImagenInvalidaError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"❌ Error en upload_service_image: {e}")
         raise HTTPException(
@@ -160,7 +160,7 @@ async def get_service_requests(
                         
                         print(f"✅ Emails obtenidos: {len(emails_dict)} de {len(user_ids)} usuarios")
                 finally:
-                    await direct_db_service.pool.release(conn)
+                    await direct_db_service.release_connection(conn)
             except Exception as e:
                 print(f"⚠️ Error obteniendo emails desde auth.users: {e}")
 
@@ -314,7 +314,7 @@ async def get_all_service_requests_for_admin(
 
             return formatted_requests
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
     except Exception as e:
         print(f"❌ Error en get_all_service_requests_for_admin: {e}")
@@ -541,7 +541,7 @@ async def get_my_service_requests(
 
             return formatted_requests
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
     except HTTPException:
         raise
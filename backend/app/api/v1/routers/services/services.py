@@ -14,6 +14,7 @@ from app.api.v1.dependencies.database_supabase import get_async_db
 from app.models.servicio.service import ServicioModel
 from app.models.publicar_servicio.category import CategoriaModel
 from app.schemas.servicio.service import ServicioOut, ServicioIn, ServicioWithProvider
+from app.services.image_pipeline import srcset_desde_variantes, variantes_desde_url
 
 
 router = APIRouter(prefix="/services", tags=["services"])
@@ -232,6 +233,8 @@ def map_services_with_tarifas(services_data_tuples: list, tarifas_data: list) ->
         service_dict = dict(row)
         service_id = service_dict['id_servicio']
         service_dict['tarifas'] = []
+        service_dict['imagen_variantes'] = variantes_desde_url(service_dict.get('imagen'))
+        service_dict['imagen_srcset'] = srcset_desde_variantes(service_dict['imagen_variantes'])
         services_map_by_id[service_id] = service_dict
     
     # Asignar tarifas
@@ -632,7 +635,7 @@ async def get_services_unified(
             )
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except Exception as e:
         print(f"❌ Error en get_services_unified: {str(e)}")
@@ -751,7 +754,7 @@ async def get_filtered_services(
             )
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except Exception as e:
         print(f"❌ Error en get_filtered_services: {str(e)}")
@@ -812,7 +815,7 @@ async def get_services_by_category(
             # Retornar lista vacía si no hay servicios (comportamiento RESTful normal)
             return services
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     except Exception as e:
         print(f"Error obteniendo servicios por categoría: {e}")
         # Retornar lista vacía en caso de error en lugar de lanzar excepción
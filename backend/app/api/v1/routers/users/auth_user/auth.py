@@ -4,12 +4,14 @@ import uuid
 from sqlalchemy import UUID, select, text
 from sqlalchemy.orm import selectinload
 from app.schemas.auth import SignInIn, SignUpIn, SignUpSuccess, TokenOut, RefreshTokenIn, EmailOnlyIn
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.api.v1.dependencies.auth_user import get_current_user  # dependencia que valida el JWT
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.api.v1.dependencies.auth_user import get_current_user, extract_access_token  # dependencia que valida el JWT
 from app.api.v1.dependencies.database_supabase import get_async_db  # dependencia que proporciona la sesión de DB
-from app.services.rate_limit_service import email_rate_limit_service
+from app.services.rate_limit_service import email_rate_limit_service, get_client_ip, build_rate_limit_exception
 from app.services.direct_db_service import direct_db_service
-from app.supabase.auth_service import supabase_auth, supabase_admin  # cliente Supabase inicializado
+from app.repositories.providers.provider_repository import ProviderRepository
+from app.supabase.async_auth_client import async_auth_client  # cliente asíncrono de Supabase Auth
 from typing import Any, Dict, Union, Optional
 from app.schemas.user import UserProfileAndRolesOut
 from app.schemas.auth_user import SupabaseUser
@@ -25,7 +27,7 @@ from sqlalchemy.orm import joinedload
 from fastapi import File, UploadFile, Form, Query
 import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import asyncio
 from fastapi.responses import JSONResponse
 from app.services.supabase_storage_service import supabase_storage_service
@@ -44,6 +46,7 @@ from sqlalchemy.orm import selectinload
 
 from app.models.empresa.sucursal_empresa import SucursalEmpresa
 from app.services.supabase_storage_service import supabase_storage_service
+from app.services.image_pipeline import ImagenInvalidaError, srcset_desde_variantes, variantes_desde_url
 from app.services.ruc_verification_service import RUCVerificationService
 
 # Configurar logging
@@ -92,15 +95,15 @@ MSG_CONTACTO_ADMIN = f"Para ayuda inmediata: {EMAIL_ADMIN}"  # Se mantiene f-str
 # --- Endpoints de autenticación ---
 
 # Funciones helper para sign_up
-def check_rate_limit(email: str) -> None:
-    """Verifica el rate limit antes de proceder con el registro"""
-    if not email_rate_limit_service.can_send_email(email):
-        remaining_attempts = email_rate_limit_service.get_remaining_attempts(email)
-        next_attempt_time = email_rate_limit_service.get_next_attempt_time(email)
-        
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Has alcanzado el límite de intentos de registro. Intentos restantes: {remaining_attempts}. Próximo intento disponible: {next_attempt_time.strftime('%H:%M') if next_attempt_time else 'N/A'}. Contacta a {EMAIL_ADMIN} para ayuda inmediata."
+async def check_rate_limit(email: str, client_ip: Optional[str] = None) -> None:
+    """Verifica y registra el intento de registro (límite por email y por IP)"""
+    result = await email_rate_limit_service.check_and_record(email, client_ip)
+    if not result.allowed:
+        next_attempt_time = datetime.now() + timedelta(seconds=result.retry_after)
+        
+        raise build_rate_limit_exception(
+            result,
+            f"Has alcanzado el límite de intentos de registro. Intentos restantes: {result.remaining}. Próximo intento disponible: {next_attempt_time.strftime('%H:%M')}. Contacta a {EMAIL_ADMIN} para ayuda inmediata."
         )
 
 def build_signup_data(data: SignUpIn, email_confirm: bool = False) -> dict:
@@ -124,10 +127,10 @@ def build_signup_data(data: SignUpIn, email_confirm: bool = False) -> dict:
     }
     return signup_data
 
-def create_user_in_supabase(signup_data: dict) -> tuple[Any, str, bool]:
+async def create_user_in_supabase(signup_data: dict) -> tuple[Any, str, bool]:
     """Crea el usuario en Supabase Auth usando Admin API para evitar envío automático de correos
     
-    Nota: Usa supabase_admin.auth.admin.create_user() en lugar de sign_up() para evitar
+    Nota: Usa el endpoint admin de creación de usuarios en lugar de sign_up() para evitar
     que Supabase envíe el correo de confirmación automáticamente.
     """
     signup_response = None
@@ -142,13 +145,13 @@ def create_user_in_supabase(signup_data: dict) -> tuple[Any, str, bool]:
         logger.info(f"📧 Email: {signup_data.get('email', 'NO PROPORCIONADO')}")
         logger.info(f"🔐 Password: {'***' if signup_data.get('password') else 'NO PROPORCIONADO'}")
         logger.info(f"📋 User metadata: {signup_data.get('options', {}).get('data', {})}")
-        logger.info(f"🔗 Supabase Admin disponible: {'SÍ' if supabase_admin else 'NO'}")
+        logger.info(f"🔗 Supabase Admin disponible: {'SÍ' if async_auth_client.is_admin_configured else 'NO'}")
         logger.info("=" * 80)
-        logger.info("⏳ Llamando a supabase_admin.auth.admin.create_user()...")
+        logger.info("⏳ Llamando a async_auth_client.create_user()...")
         logger.info("📧 NOTA: No se enviará correo de confirmación automático (usando Admin API)")
         
-        if not supabase_admin:
-            logger.error("❌ supabase_admin no está configurado")
+        if not async_auth_client.is_admin_configured:
+            logger.error("❌ Supabase Admin no está configurado")
             handle_supabase_auth_error("Supabase Admin no configurado")
         
         import time
@@ -163,7 +166,7 @@ def create_user_in_supabase(signup_data: dict) -> tuple[Any, str, bool]:
             "user_metadata": signup_data.get("options", {}).get("data", {})
         }
         
-        signup_response = supabase_admin.auth.admin.create_user(create_user_data)
+        signup_response = await async_auth_client.create_user(create_user_data)
         
         elapsed_time = time.time() - start_time
         logger.info(f"✅ Respuesta recibida de Supabase Auth en {elapsed_time:.2f} segundos")
@@ -201,7 +204,7 @@ def create_user_in_supabase(signup_data: dict) -> tuple[Any, str, bool]:
             logger.warning("⚠️ Error al enviar email de confirmación, verificando si el usuario se creó...")
             email_sent_error = True
             
-            id_user = verify_user_created_despite_email_error(signup_data["email"])
+            id_user = await verify_user_created_despite_email_error(signup_data["email"])
             return signup_response, id_user, email_sent_error
         else:
             # Otro tipo de error de AuthApiError, re-lanzar para manejo general
@@ -222,29 +225,18 @@ def create_user_in_supabase(signup_data: dict) -> tuple[Any, str, bool]:
 
 # Funciones helper para verify_user_created_despite_email_error
 def verify_supabase_admin_configured() -> bool:
-    """Verifica si supabase_admin está configurado"""
-    if not supabase_admin:
-        logger.error("❌ No se puede verificar usuario: supabase_admin no está configurado")
+    """Verifica si Supabase Admin está configurado"""
+    if not async_auth_client.is_admin_configured:
+        logger.error("❌ No se puede verificar usuario: Supabase Admin no está configurado")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=MSG_ERROR_ENVIAR_EMAIL_CONFIRMACION
         )
     return True
 
-def find_user_by_email(auth_users, email: str):
-    """Busca un usuario por email en la lista de usuarios"""
-    if not auth_users:
-        return None
-    
-    email_lower = email.lower()
-    for auth_user in auth_users:
-        if auth_user.email and auth_user.email.lower() == email_lower:
-            return auth_user
-    return None
-
-def process_found_user(found_user) -> str:
+def process_found_user(found_user: dict) -> str:
     """Procesa un usuario encontrado y retorna su ID"""
-    id_user = str(found_user.id)
+    id_user = str(found_user["id"])
     logger.info(f"✅ Usuario encontrado a pesar del error de email: {id_user}")
     logger.warning("⚠️ El usuario se creó correctamente, pero no se pudo enviar el email de confirmación")
     return id_user
@@ -257,17 +249,14 @@ def handle_user_not_found():
         detail=MSG_ERROR_CREAR_USUARIO_EMAIL
     )
 
-def verify_user_created_despite_email_error(email: str) -> str:
+async def verify_user_created_despite_email_error(email: str) -> str:
     """Verifica si el usuario se creó a pesar del error de email"""
     try:
         # Verificar que supabase_admin esté configurado
         verify_supabase_admin_configured()
         
-        # Obtener todos los usuarios y buscar por email
-        auth_users = supabase_admin.auth.admin.list_users()
-        
-        # Buscar el usuario por email
-        found_user = find_user_by_email(auth_users, email)
+        # Buscar el usuario por email en auth.users (list_users solo devuelve la primera página)
+        found_user = await direct_db_service.get_auth_user_by_email(email)
         
         if found_user:
             return process_found_user(found_user)
@@ -283,62 +272,22 @@ def verify_user_created_despite_email_error(email: str) -> str:
             detail="No se pudo enviar el email de confirmación. El usuario puede haberse creado correctamente. Por favor, intenta iniciar sesión o contacta al administrador en b2bseva.notificaciones@gmail.com si el problema persiste."
         )
 
-async def verify_user_profile_with_retries(id_user: str, max_retries: int = 3, retry_delay: float = 0.5) -> Optional[dict]:
-    """Verifica el perfil del usuario con reintentos"""
-    logger.info("⏳ Esperando que el trigger se ejecute...")
-    await asyncio.sleep(1.0)  # Dar tiempo al trigger
-    
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Verificando perfil para usuario {id_user} (intento {attempt + 1}/{max_retries})")
-            
-            user_profile_data = await direct_db_service.check_user_profile(id_user)
-            
-            if user_profile_data:
-                logger.info(f"✅ Perfil encontrado en intento {attempt + 1}")
-                return user_profile_data
-            else:
-                logger.warning(f"⚠️ Perfil no encontrado en intento {attempt + 1}")
-                
-        except Exception as e:
-            logger.error(f"❌ Error en intento {attempt + 1}: {e}")
-            
-            if attempt == max_retries - 1:
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Error de conexión a la base de datos: {str(e)}"
-                )
-        
-        # Esperar antes del siguiente intento
-        if attempt < max_retries - 1:
-            await asyncio.sleep(retry_delay * (1.2 ** attempt))
-            logger.info(f"⏳ Esperando {retry_delay * (1.2 ** attempt):.1f}s antes del siguiente intento...")
-    
-    return None
-
-async def create_user_profile_manually(id_user: str, data: SignUpIn) -> dict:
-    """Crea el perfil del usuario manualmente si el trigger no lo hizo"""
-    logger.warning("⚠️ Trigger no creó el perfil, creando manualmente...")
-    
+async def create_user_profile_in_transaction(id_user: str, data: SignUpIn) -> dict:
+    """
+    Crea el perfil (estado INACTIVO) y el rol 'Cliente' del usuario recién creado en una
+    transacción. El trigger handle_new_auth_user corre en la misma transacción que el
+    alta en auth.users, así que no hay que esperarlo: si ya creó las filas, el upsert
+    solo confirma el estado.
+    """
     try:
-        await direct_db_service.create_user_profile(
+        return await direct_db_service.ensure_user_profile_and_role(
             user_id=id_user,
             nombre_persona=data.nombre_persona,
             nombre_empresa=data.nombre_empresa,
             ruc=data.ruc
         )
-        
-        logger.info("✅ Perfil creado manualmente")
-        return {
-            "id": id_user,
-            "nombre_persona": data.nombre_persona,
-            "nombre_empresa": data.nombre_empresa,
-            "ruc": data.ruc,
-            "estado": ESTADO_ACTIVO
-        }
-        
     except Exception as e:
-        logger.error(f"❌ Error creando perfil manualmente: {e}")
+        logger.error(f"❌ Error creando perfil y rol del usuario {id_user}: {e}")
         raise HTTPException(
             status_code=500, 
             detail=f"Error: No se pudo crear el perfil del usuario. Error: {str(e)}"
@@ -397,6 +346,7 @@ def configure_refresh_token_cookie(response: JSONResponse, refresh_token: str) -
     description="Crea un usuario en Supabase Auth. Requiere subir constancia de RUC para verificación. El usuario queda INACTIVO hasta que se apruebe el RUC."
 )
 async def sign_up(
+    request: Request,
     email: str = Form(...),
     password: str = Form(...),
     nombre_persona: str = Form(...),
@@ -440,7 +390,7 @@ async def sign_up(
             )
         
         # Verificar rate limit antes de proceder
-        check_rate_limit(data.email)
+        await check_rate_limit(data.email, get_client_ip(request))
         
         # Construir datos de signup (NO enviar email de confirmación)
         signup_data = build_signup_data(data, email_confirm=False)
@@ -451,7 +401,7 @@ async def sign_up(
         logger.info(f"🔐 Password presente: {'SÍ' if signup_data.get('password') else 'NO'}")
         logger.info(f"📧 Email confirm: {signup_data.get('email_confirm', 'NO PROPORCIONADO')}")
         logger.info(f"📋 Options: {signup_data.get('options', {})}")
-        logger.info(f"🔗 Supabase Auth cliente disponible: {'SÍ' if supabase_auth else 'NO'}")
+        logger.info(f"🔗 Supabase Auth cliente disponible: {'SÍ' if async_auth_client.is_configured else 'NO'}")
         logger.info("=" * 80)
         logger.info(f"Enviando datos a Supabase Auth (sin confirmación de email)")
         
@@ -463,7 +413,7 @@ async def sign_up(
             start_time = time.time()
             
             signup_response, id_user, email_sent_error = await asyncio.wait_for(
-                asyncio.to_thread(create_user_in_supabase, signup_data),
+                create_user_in_supabase(signup_data),
                 timeout=90.0  # 90 segundos de timeout (más que el timeout interno de httpx de 60s)
             )
             
@@ -518,20 +468,9 @@ async def sign_up(
                 detail=MSG_ERROR_CREAR_USUARIO
             )
         
-        # Verificar perfil del usuario con reintentos
-        user_profile = await verify_user_profile_with_retries(id_user)
-        
-        # Si no se encontró el perfil, crear manualmente (estado=INACTIVO)
-        if not user_profile:
-            user_profile = await create_user_profile_manually(id_user, data)
-        
-        # El trigger handle_new_auth_user ya crea el usuario con estado INACTIVO
-        # Solo actualizamos manualmente si el perfil fue creado manualmente (fallback)
-        if not user_profile or user_profile.get('estado') != 'INACTIVO':
-            logger.warning(f"⚠️ El trigger no estableció estado INACTIVO, actualizando manualmente...")
-            await RUCVerificationService.actualizar_estado_usuario(uuid.UUID(id_user), "INACTIVO")
-        
-        logger.info(f"✅ Usuario {id_user} creado con estado INACTIVO (por trigger o manualmente)")
+        # Perfil INACTIVO y rol 'Cliente' en una transacción (sin esperar al trigger)
+        await create_user_profile_in_transaction(id_user, data)
+        logger.info(f"✅ Usuario {id_user} creado con estado INACTIVO y rol asignado")
         
         # Crear verificación de RUC
         try:
@@ -546,8 +485,6 @@ async def sign_up(
             # No fallar el registro si falla la verificación, pero loguear el error
             # El admin podrá crear la verificación manualmente si es necesario
         
-        # Confiar en el trigger para el rol
-        logger.info("✅ Perfil verificado. El trigger asignará el rol automáticamente.")
         logger.info(f"Registro completado exitosamente para usuario: {id_user}")
         logger.info("⚠️ Usuario INACTIVO hasta que se apruebe el RUC")
         
@@ -594,6 +531,9 @@ async def sign_up(
         # porque ahora lo manejamos antes del try-except general
         
         handle_supabase_auth_error(e)
+    except HTTPException:
+        # Validación (400) y rate limit (429) se propagan sin convertirse en 500
+        raise
     except SQLAlchemyError as e:
         logger.error(f"Error de base de datos: {e}")
         raise HTTPException(
@@ -644,7 +584,7 @@ async def verify_user_status_in_db(email: str) -> tuple[Optional[str], Optional[
                 print(f"⚠️ Usuario con email {email} no encontrado en tabla users")
                 return None, None
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
     except HTTPException:
         raise  # Re-lanzar HTTPException para mantener el comportamiento
@@ -653,14 +593,11 @@ async def verify_user_status_in_db(email: str) -> tuple[Optional[str], Optional[
         # Si hay error en la consulta, permitir continuar (fallback)
         return None, None
 
-def authenticate_with_supabase(email: str, password: str) -> Any:
-    """Autentica el usuario en Supabase Auth"""
+async def authenticate_with_supabase(email: str, password: str) -> Any:
+    """Autentica el usuario en Supabase Auth (sin bloquear el event loop)"""
     print("✅ Estado verificado, procediendo con autenticación en Supabase")
     print(f"🔍 Llamando a Supabase Auth con email: {email}")
-    signin_response = supabase_auth.auth.sign_in_with_password({
-        "email": email,
-        "password": password
-    })
+    signin_response = await async_auth_client.sign_in_with_password(email, password)
     print(f"🔍 Respuesta de Supabase recibida: {signin_response}")
     
     if signin_response.user is None or not signin_response.session:
@@ -668,12 +605,12 @@ def authenticate_with_supabase(email: str, password: str) -> Any:
     
     return signin_response
 
-def verify_user_status_after_auth(user_id: Optional[str], user_estado: Optional[str]) -> None:
+async def verify_user_status_after_auth(signin_response: Any, user_id: Optional[str], user_estado: Optional[str]) -> None:
     """Verificación adicional del estado del usuario después de la autenticación"""
     if user_id and user_estado and user_estado != ESTADO_ACTIVO:
-        # Si por alguna razón llega aquí, invalidar la sesión inmediatamente
+        # Si por alguna razón llega aquí, invalidar la sesión recién creada inmediatamente
         try:
-            supabase_auth.auth.sign_out()
+            await async_auth_client.sign_out(signin_response.session.access_token)
         except Exception:
             pass
         raise HTTPException(
@@ -715,10 +652,10 @@ async def sign_in(data: SignInIn, db: AsyncSession = Depends(get_async_db)) -> J
         user_id, user_estado = await verify_user_status_in_db(data.email)
         
         # Autenticación en Supabase Auth
-        signin_response = authenticate_with_supabase(data.email, data.password)
+        signin_response = await authenticate_with_supabase(data.email, data.password)
         
         # Verificación adicional del estado (doble verificación)
-        verify_user_status_after_auth(user_id, user_estado)
+        await verify_user_status_after_auth(signin_response, user_id, user_estado)
 
         # Construir y retornar respuesta
         return build_signin_response(signin_response)
@@ -803,9 +740,7 @@ async def refresh_token(data: RefreshTokenIn) -> TokenOut:
     """
     try:
         # Intenta refrescar la sesión usando el refresh_token proporcionado
-        refresh_response = supabase_auth.auth.refresh_session({
-            "refresh_token": data.refresh_token
-        })
+        refresh_response = await async_auth_client.refresh_session(data.refresh_token)
 
         # Supabase Auth lanza AuthApiError si el refresh_token es inválido o expiró.
         # Sin embargo, si la respuesta es exitosa pero la sesión está ausente,
@@ -848,10 +783,7 @@ async def resend_confirmation_email(data: EmailOnlyIn):
     Re-envia un correo de confirmacion de email para verificar la cuenta del usuario.
     """
     try:
-        supabase_auth.auth.resend({
-            "type": TYPE_SIGNUP,
-            "email": data.email
-        })
+        await async_auth_client.resend(data.email, type=TYPE_SIGNUP)
         
         return {
             "message": f"📧 Se ha enviado un nuevo correo de confirmación a {data.email}. Por favor, revisa tu bandeja de entrada y haz clic en el enlace para activar tu cuenta. Si no encuentras el correo, revisa también tu carpeta de spam.",
@@ -883,25 +815,26 @@ async def check_email_confirmation(email: str):
     Verifica si el email del usuario está confirmado.
     """
     try:
-        # Obtener información del usuario desde Supabase Auth
-        user_response = supabase_auth.auth.admin.get_user_by_email(email)
+        # Obtener información del usuario desde auth.users (list_users solo devuelve la primera página)
+        user = await direct_db_service.get_auth_user_by_email(email)
         
-        if not user_response.user:
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=MSG_USUARIO_NO_ENCONTRADO
             )
         
-        user = user_response.user
-        is_confirmed = user.email_confirmed_at is not None
+        is_confirmed = user["email_confirmed_at"] is not None
         
         return {
             "email": email,
             "is_confirmed": is_confirmed,
-            "confirmed_at": user.email_confirmed_at,
+            "confirmed_at": user["email_confirmed_at"],
             "message": "Email confirmado" if is_confirmed else "Email pendiente de confirmación"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -930,16 +863,18 @@ async def get_rate_limit_status():
 
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
-async def logout(current_user: SupabaseUser = Depends(get_current_user)):
+async def logout(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+    current_user: SupabaseUser = Depends(get_current_user)
+):
     """
     Revoca el refresh token del usuario (deslogueo) y termina su sesión activa.
     """
     try:
-        # Intenta cerrar la sesión del usuario actual.
-        # Supabase suele manejar esto invalidando el refresh token.
-        # El resultado de sign_out es a menudo None si es exitoso y no hay errores.
-        # supabase_auth.sign_out()
-        supabase_auth.auth.sign_out()
+        # Cierra las sesiones del usuario dueño del token de la petición
+        # (Supabase invalida sus refresh tokens).
+        await async_auth_client.sign_out(extract_access_token(request, credentials))
 
 
         # Si la operación fue exitosa y no lanzó una excepción,
@@ -1037,7 +972,7 @@ async def get_verificacion_ruc_estado(current_user: SupabaseUser = Depends(get_c
                 "comentario": verificacion_result['comentario']
             }
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     except Exception as e:
         logger.error(f"Error obteniendo estado de verificación de RUC: {str(e)}")
         raise HTTPException(
@@ -1096,9 +1031,9 @@ async def get_verificacion_ruc_datos(
             
             # Obtener email desde Supabase Auth
             user_email = None
-            if supabase_admin:
+            if async_auth_client.is_admin_configured:
                 try:
-                    auth_user = supabase_admin.auth.admin.get_user_by_id(str(verificacion_result['user_id']))
+                    auth_user = await async_auth_client.get_user_by_id(str(verificacion_result['user_id']))
                     if auth_user and auth_user.user:
                         user_email = auth_user.user.email
                 except Exception as e:
@@ -1113,7 +1048,7 @@ async def get_verificacion_ruc_datos(
                 "token_valido": True
             }
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     except HTTPException:
         raise
     except Exception as e:
@@ -1191,9 +1126,9 @@ async def reenviar_verificacion_ruc(
                 )
             
             # Validar que el email coincida con el usuario original
-            if supabase_admin:
+            if async_auth_client.is_admin_configured:
                 try:
-                    auth_user = supabase_admin.auth.admin.get_user_by_id(user_id_str)
+                    auth_user = await async_auth_client.get_user_by_id(user_id_str)
                     if auth_user and auth_user.user:
                         email_original = auth_user.user.email
                         if email.lower() != email_original.lower():
@@ -1239,7 +1174,7 @@ async def reenviar_verificacion_ruc(
                 "id_verificacion_ruc": id_verificacion_ruc
             }
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     except HTTPException:
         raise
     except Exception as e:
@@ -1321,7 +1256,7 @@ async def get_verificacion_estado(current_user: SupabaseUser = Depends(get_curre
             }
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except Exception as e:
         print(f"❌ Error obteniendo estado de verificación: {str(e)}")
@@ -1432,12 +1367,14 @@ async def upload_profile_photo(
             )
         
         
-        # Subir imagen a Supabase Storage en la carpeta perfiles/
-        success, public_url = await supabase_storage_service.upload_profile_image(
-            file_content=file_content,
-            file_name=file.filename,
-            content_type=file.content_type
-        )
+        # Subir variantes WebP a Supabase Storage en la carpeta perfiles/
+        try:
+            success, public_url = await supabase_storage_service.upload_profile_image(file_content, current_user.id)
+        except ImagenInvalidaError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         
         if not success or not public_url:
             raise HTTPException(
@@ -1449,13 +1386,16 @@ async def upload_profile_photo(
         
         # Usar la URL pública de Supabase Storage
         relative_path = public_url
+        variantes = variantes_desde_url(public_url)
         
         print(f"✅ Foto de perfil guardada: {relative_path}")
         
         return {
             "success": True,
             "mensaje": "Foto de perfil subida exitosamente",
-            "image_path": relative_path
+            "image_path": relative_path,
+            "variantes": variantes,
+            "srcset": srcset_desde_variantes(variantes)
         }
         
     except HTTPException:
@@ -1518,254 +1458,6 @@ MSG_NO_ENCONTRADO_PERFIL_EMPRESA = "No se encontró perfil de empresa para este
 MSG_NO_ENCONTRADA_SOLICITUD_VERIFICACION = "No se encontró solicitud de verificación"
 
 # Funciones helper para get_verificacion_datos
-async def get_empresa_profile(user_id: str) -> dict:
-    """
-    Obtiene el perfil de empresa del usuario.
-    Usa direct_db_service para evitar problemas con PgBouncer.
-    Retorna un diccionario con los datos de la empresa.
-    """
-    conn = None
-    try:
-        conn = await direct_db_service.get_connection()
-        
-        empresa_query = """
-            SELECT 
-                pe.id_perfil,
-                pe.razon_social,
-                pe.nombre_fantasia,
-                pe.estado,
-                pe.verificado,
-                pe.fecha_inicio,
-                pe.fecha_fin,
-                pe.id_direccion,
-                pe.user_id
-            FROM perfil_empresa pe
-            WHERE pe.user_id = $1
-            LIMIT 1
-        """
-        empresa_row = await conn.fetchrow(empresa_query, user_id)
-        
-        if not empresa_row:
-            print(f"⚠️ No se encontró perfil de empresa para usuario {user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=MSG_NO_ENCONTRADO_PERFIL_EMPRESA
-            )
-        
-        empresa_dict = dict(empresa_row)
-        print(f"✅ Empresa encontrada: {empresa_dict['razon_social']}")
-        return empresa_dict
-    finally:
-        if conn:
-            await direct_db_service.pool.release(conn)
-
-async def get_latest_verification_request(id_perfil: int) -> Optional[dict]:
-    """
-    Obtiene la solicitud de verificación más reciente.
-    Usa direct_db_service para evitar problemas con PgBouncer.
-    Retorna un diccionario con los datos de la solicitud o None si no existe.
-    """
-    conn = None
-    try:
-        conn = await direct_db_service.get_connection()
-        
-        solicitud_query = """
-            SELECT 
-                id_verificacion,
-                id_perfil,
-                estado,
-                fecha_solicitud,
-                fecha_revision,
-                comentario,
-                created_at
-            FROM verificacion_solicitud
-            WHERE id_perfil = $1
-            ORDER BY created_at DESC
-            LIMIT 1
-        """
-        solicitud_row = await conn.fetchrow(solicitud_query, id_perfil)
-        
-        if not solicitud_row:
-            print(f"⚠️ No se encontró solicitud de verificación para perfil {id_perfil}")
-            return None
-        
-        solicitud_dict = dict(solicitud_row)
-        print(f"✅ Solicitud encontrada: {solicitud_dict['estado']}")
-        return solicitud_dict
-    finally:
-        if conn:
-            await direct_db_service.pool.release(conn)
-
-async def get_direccion_data(id_direccion: Optional[int]) -> Optional[dict]:
-    """
-    Obtiene los datos de dirección.
-    Usa direct_db_service para evitar problemas con PgBouncer.
-    """
-    if not id_direccion:
-        return None
-    
-    conn = None
-    try:
-        conn = await direct_db_service.get_connection()
-        
-        direccion_query = """
-            SELECT 
-                d.calle,
-                d.numero,
-                d.referencia,
-                dep.nombre as departamento,
-                c.nombre as ciudad,
-                b.nombre as barrio
-            FROM direccion d
-            LEFT JOIN departamento dep ON d.id_departamento = dep.id_departamento
-            LEFT JOIN ciudad c ON d.id_ciudad = c.id_ciudad
-            LEFT JOIN barrio b ON d.id_barrio = b.id_barrio
-            WHERE d.id_direccion = $1
-        """
-        
-        direccion_row = await conn.fetchrow(direccion_query, id_direccion)
-        
-        if not direccion_row:
-            return None
-        
-        return dict(direccion_row)
-    finally:
-        if conn:
-            await direct_db_service.pool.release(conn)
-
-async def get_sucursal_data(id_perfil: int) -> Optional[dict]:
-    """
-    Obtiene los datos de la sucursal principal.
-    Usa direct_db_service para evitar problemas con PgBouncer.
-    """
-    conn = None
-    try:
-        conn = await direct_db_service.get_connection()
-        
-        sucursal_query = """
-            SELECT nombre, telefono, email
-            FROM sucursal_empresa
-            WHERE id_perfil = $1
-            ORDER BY created_at ASC
-            LIMIT 1
-        """
-        sucursal_row = await conn.fetchrow(sucursal_query, id_perfil)
-        
-        if not sucursal_row:
-            print("⚠️ No se encontraron sucursales para esta empresa")
-            return None
-        
-        sucursal_data = dict(sucursal_row)
-        print(f"✅ Sucursal encontrada: {sucursal_data['nombre']}")
-        print(f"✅ Datos de sucursal: {sucursal_data}")
-        return sucursal_data
-    finally:
-        if conn:
-            await direct_db_service.pool.release(conn)
-
-async def get_documentos_data(id_verificacion: int) -> list[dict]:
-    """
-    Obtiene los documentos de la solicitud de verificación.
-    Usa direct_db_service para evitar problemas con PgBouncer.
-    """
-    conn = None
-    try:
-        conn = await direct_db_service.get_connection()
-        
-        documentos_query = """
-            SELECT 
-                d.id_documento,
-                d.id_verificacion,
-                d.id_tip_documento,
-                d.estado_revision,
-                d.url_archivo,
-                d.fecha_verificacion,
-                d.observacion,
-                d.created_at,
-                td.tipo_documento as tipo_documento_nombre,
-                td.es_requerido
-            FROM documento d
-            LEFT JOIN tipo_documento td ON d.id_tip_documento = td.id_tip_documento
-            WHERE d.id_verificacion = $1
-            ORDER BY d.created_at ASC
-        """
-        documentos_rows = await conn.fetch(documentos_query, id_verificacion)
-        
-        documentos_data = []
-        for row in documentos_rows:
-            tipo_doc_nombre = row['tipo_documento_nombre'] if row['tipo_documento_nombre'] else f"Tipo {row['id_tip_documento']}"
-            es_requerido = row['es_requerido'] if row['es_requerido'] is not None else False
-            documentos_data.append({
-                "id_documento": row['id_documento'],
-                "tipo_documento": tipo_doc_nombre,
-                "es_requerido": es_requerido,
-                "estado_revision": row['estado_revision'],
-                "url_archivo": row['url_archivo'],
-                "fecha_verificacion": row['fecha_verificacion'],
-                "observacion": row['observacion'],
-                "created_at": row['created_at']
-            })
-        
-        return documentos_data
-    finally:
-        if conn:
-            await direct_db_service.pool.release(conn)
-
-async def get_all_documentos_by_perfil(id_perfil: int) -> list[dict]:
-    """
-    Obtiene todos los documentos del perfil, buscando el más reciente de cada tipo
-    de documento de todas las solicitudes de verificación del perfil.
-    Usa direct_db_service para evitar problemas con PgBouncer.
-    """
-    conn = None
-    try:
-        conn = await direct_db_service.get_connection()
-        
-        # Obtener el documento más reciente de cada tipo para este perfil
-        documentos_query = """
-            SELECT DISTINCT ON (d.id_tip_documento)
-                d.id_documento,
-                d.id_verificacion,
-                d.id_tip_documento,
-                d.estado_revision,
-                d.url_archivo,
-                d.fecha_verificacion,
-                d.observacion,
-                d.created_at,
-                td.tipo_documento as tipo_documento_nombre,
-                td.es_requerido
-            FROM documento d
-            LEFT JOIN tipo_documento td ON d.id_tip_documento = td.id_tip_documento
-            JOIN verificacion_solicitud vs ON d.id_verificacion = vs.id_verificacion
-            WHERE vs.id_perfil = $1
-            ORDER BY d.id_tip_documento, d.created_at DESC
-        """
-        documentos_rows = await conn.fetch(documentos_query, id_perfil)
-        
-        documentos_data = []
-        for row in documentos_rows:
-            tipo_doc_nombre = row['tipo_documento_nombre'] if row['tipo_documento_nombre'] else f"Tipo {row['id_tip_documento']}"
-            es_requerido = row['es_requerido'] if row['es_requerido'] is not None else False
-            documentos_data.append({
-                "id_documento": row['id_documento'],
-                "tipo_documento": tipo_doc_nombre,
-                "es_requerido": es_requerido,
-                "estado_revision": row['estado_revision'],
-                "url_archivo": row['url_archivo'],
-                "fecha_verificacion": row['fecha_verificacion'],
-                "observacion": row['observacion'],
-                "created_at": row['created_at']
-            })
-        
-        print(f"📄 Documentos recuperados para perfil {id_perfil}: {len(documentos_data)}")
-        for doc in documentos_data:
-            print(f"  - {doc['tipo_documento']}: {doc['url_archivo'] if doc['url_archivo'] else 'Sin URL'}")
-        
-        return documentos_data
-    finally:
-        if conn:
-            await direct_db_service.pool.release(conn)
-
 def build_empresa_dict(empresa: dict, direccion_data: Optional[dict], sucursal_data: Optional[dict]) -> dict:
     """Construye el diccionario de datos de empresa"""
     return {
@@ -1835,22 +1527,23 @@ async def get_verificacion_datos(
     try:
         print(f"🔍 Obteniendo datos de verificación para usuario: {current_user.id}")
         
-        # Obtener perfil de empresa
-        empresa = await get_empresa_profile(current_user.id)
-        
-        # Obtener solicitud de verificación más reciente (puede ser None)
-        solicitud = await get_latest_verification_request(empresa["id_perfil"])
+        # Empresa, solicitud, dirección, sucursal y documentos en una sola consulta y una conexión
+        async with direct_db_service.connection() as conn:
+            agregado = await ProviderRepository.get_verification_aggregate(conn, current_user.id)
         
-        # Obtener datos de dirección
-        direccion_data = await get_direccion_data(empresa.get("id_direccion"))
-        
-        # Obtener datos de sucursal
-        sucursal_data = await get_sucursal_data(empresa["id_perfil"])
+        if not agregado:
+            print(f"⚠️ No se encontró perfil de empresa para usuario {current_user.id}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=MSG_NO_ENCONTRADO_PERFIL_EMPRESA
+            )
         
-        # Obtener documentos de todas las solicitudes del perfil (el más reciente de cada tipo)
-        documentos_data = []
-        if empresa.get("id_perfil"):
-            documentos_data = await get_all_documentos_by_perfil(empresa["id_perfil"])
+        empresa = agregado["empresa"]
+        solicitud = agregado["solicitud"]
+        direccion_data = agregado["direccion"]
+        sucursal_data = agregado["sucursal"]
+        # Documento más reciente de cada tipo entre todas las solicitudes del perfil
+        documentos_data = agregado["documentos"]
         
         # Construir diccionarios de respuesta
         empresa_dict = build_empresa_dict(empresa, direccion_data, sucursal_data)
@@ -1,13 +1,12 @@
 # app/api/v1/routers/admin_router.py
 
 from datetime import datetime, timezone
-import httpx
 import mimetypes
 import traceback
 import secrets
 import string
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -33,11 +32,17 @@ from app.schemas.empresa.verificacion_solicitud import VerificacionSolicitudOut
 from app.schemas.user import UserProfileAndRolesOut
 from app.api.v1.dependencies.auth_user import get_admin_user, get_current_user
 from app.services.direct_db_service import direct_db_service
+from app.services.verificacion_admin_service import (
+    verificacion_admin_service,
+    COLA_LIMITE_DEFAULT,
+    COLA_LIMITE_MAX,
+)
 from app.services.date_service import DateService
+from app.services.document_serving import serve_local_file, stream_http_url, stream_s3_object
 from app.supabase.auth_service import supabase_admin, supabase_auth
 from app.api.v1.dependencies.local_storage import local_storage_service
-from app.core.config import IDRIVE_BUCKET_NAME
-from app.idrive.idrive_service import idrive_s3_client
+from app.core.config import IDRIVE_BUCKET_NAME, DOCUMENT_DELIVERY_MODE
+from app.idrive.idrive_service import idrive_s3_client, idrive_service
 
 # Constantes para valores por defecto
 VALOR_DEFAULT_NO_DISPONIBLE = "No disponible"
@@ -49,12 +54,17 @@ VALOR_DEFAULT_TIPO_NO_ENCONTRADO = "Tipo no encontrado"
 # Constantes para estados
 ESTADO_PENDIENTE = "pendiente"
 
+# Entrega de documentos de iDrive: redirect a URL prefirmada o proxy en streaming por la API
+MODO_ENTREGA_REDIRECT = "redirect"
+MODO_ENTREGA_PROXY = "proxy"
+MODO_ENTREGA_PATTERN = f"^({MODO_ENTREGA_REDIRECT}|{MODO_ENTREGA_PROXY})$"
+
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 @router.get(
     "/verificaciones/todas",
-    description="Obtiene todas las solicitudes de verificación (aprobadas, rechazadas y pendientes) para estadísticas."
+    description="Obtiene todas las solicitudes de verificación (aprobadas, rechazadas y pendientes). Para estadísticas usar /admin/verificaciones/stats."
 )
 async def get_todas_solicitudes_verificacion(
     admin_user: UserProfileAndRolesOut = Depends(get_admin_user),
@@ -95,6 +105,47 @@ async def get_todas_solicitudes_verificacion(
         )
 
 
+@router.get(
+    "/verificaciones/stats",
+    description="Estadísticas de solicitudes de verificación por estado, con conteos de hoy y de los últimos 7 y 30 días."
+)
+async def get_estadisticas_verificacion(
+    admin_user: UserProfileAndRolesOut = Depends(get_admin_user)
+):
+    """Conteos agregados en la base de datos (reemplaza contar /verificaciones/todas en el frontend)"""
+    try:
+        return await verificacion_admin_service.obtener_estadisticas()
+    except Exception as e:
+        print(f"❌ ERROR: Error obteniendo estadísticas de verificación: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo estadísticas de verificación: {str(e)}"
+        )
+
+
+@router.get(
+    "/verificaciones/cola",
+    description="Cola paginada de solicitudes de verificación (más recientes primero). Pasar next_cursor para la página siguiente."
+)
+async def get_cola_verificaciones(
+    estado: str = Query(ESTADO_PENDIENTE, pattern="^(pendiente|aprobada|rechazada)$", description="Estado de las solicitudes"),
+    limite: int = Query(COLA_LIMITE_DEFAULT, ge=1, le=COLA_LIMITE_MAX, description="Solicitudes por página"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    admin_user: UserProfileAndRolesOut = Depends(get_admin_user)
+):
+    """Empresa, contacto, email y cantidad de documentos de cada solicitud en una sola consulta"""
+    try:
+        return await verificacion_admin_service.obtener_cola(estado=estado, limite=limite, cursor=cursor)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ ERROR: Error obteniendo cola de verificaciones: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo cola de verificaciones: {str(e)}"
+        )
+
+
 # Funciones helper para get_solicitudes_pendientes
 async def get_empresa_by_perfil_id(db: AsyncSession, perfil_id: int) -> Optional[PerfilEmpresa]:
     """Obtiene la empresa por ID de perfil"""
@@ -246,32 +297,18 @@ async def get_solicitudes_pendientes(
                     pe.fecha_inicio,
                     pe.fecha_fin,
                     pe.user_id,
-                    u.nombre_persona AS nombre_contacto
+                    u.nombre_persona AS nombre_contacto,
+                    au.email AS email_contacto
                 FROM verificacion_solicitud vs
                 LEFT JOIN perfil_empresa pe ON vs.id_perfil = pe.id_perfil
                 LEFT JOIN users u ON pe.user_id = u.id
+                LEFT JOIN auth.users au ON pe.user_id = au.id
                 WHERE vs.estado = $1
                 ORDER BY vs.created_at DESC
             """
             
             solicitudes_rows = await conn.fetch(query, ESTADO_PENDIENTE)
             
-            # Obtener todos los user_ids únicos para consultar Supabase Auth
-            user_ids = [str(row['user_id']) for row in solicitudes_rows if row['user_id']]
-            emails_dict = {}
-            
-            if user_ids:
-                try:
-                    for user_id in user_ids:
-                        try:
-                            auth_user = supabase_admin.auth.admin.get_user_by_id(user_id)
-                            if auth_user and auth_user.user and auth_user.user.email:
-                                emails_dict[user_id] = auth_user.user.email
-                        except Exception as e:
-                            print(f"Error obteniendo email para usuario {user_id}: {e}")
-                except Exception as e:
-                    print(f"Error obteniendo emails desde Supabase: {e}")
-            
             # Obtener todos los documentos para todas las solicitudes
             verificacion_ids = [row['id_verificacion'] for row in solicitudes_rows]
             documentos_dict = {}
@@ -315,8 +352,7 @@ async def get_solicitudes_pendientes(
             # Construir respuesta
             solicitudes_data = []
             for row in solicitudes_rows:
-                user_id_str = str(row['user_id']) if row['user_id'] else None
-                user_email = emails_dict.get(user_id_str, VALOR_DEFAULT_NO_DISPONIBLE) if user_id_str else VALOR_DEFAULT_NO_DISPONIBLE
+                user_email = row['email_contacto'] or VALOR_DEFAULT_NO_DISPONIBLE
                 user_nombre = row['nombre_contacto'] or VALOR_DEFAULT_NO_DISPONIBLE
                 
                 documentos_detallados = documentos_dict.get(row['id_verificacion'], [])
@@ -344,7 +380,7 @@ async def get_solicitudes_pendientes(
             
             return solicitudes_data
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     except Exception as e:
         print(f"Error obteniendo solicitudes pendientes: {e}")
         raise HTTPException(
@@ -1050,29 +1086,15 @@ def get_content_type_from_filename(nombre_archivo: str, extension: str) -> str:
         return "application/msword"
     return "application/octet-stream"
 
-def serve_local_document(url_archivo: str, nombre_archivo: str) -> StreamingResponse:
-    """Sirve un documento almacenado localmente"""
-    serve_success, serve_message, file_content = local_storage_service.serve_file(url_archivo)
-    
-    if not serve_success or not file_content:
+def serve_local_document(url_archivo: str, nombre_archivo: str) -> FileResponse:
+    """Sirve un documento almacenado localmente (FileResponse: soporta Range y ETag)"""
+    file_path = local_storage_service.get_file_path(url_archivo)
+    if not file_path:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error accediendo al documento local: {serve_message}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento local no encontrado"
         )
-    
-    content_type, _ = mimetypes.guess_type(nombre_archivo)
-    if not content_type:
-        content_type = "application/octet-stream"
-    
-    return StreamingResponse(
-        iter([file_content]),
-        media_type=content_type,
-        headers={
-            "Content-Disposition": f"inline; filename={nombre_archivo}",
-            "Content-Type": content_type,
-            "Content-Length": str(len(file_content))
-        }
-    )
+    return serve_local_file(file_path, nombre_archivo)
 
 def extract_file_key_from_idrive_url(url_archivo: str) -> str:
     """Extrae la clave del archivo desde una URL de iDrive
@@ -1104,96 +1126,70 @@ def extract_file_key_from_idrive_url(url_archivo: str) -> str:
     print(f"🔑 Key extraída: {key}")
     return key
 
-async def download_from_idrive_direct(url_archivo: str) -> bytes:
-    """Intenta descargar desde iDrive usando HTTP directo"""
-    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-        response = await client.get(url_archivo)
-        response.raise_for_status()
-        return response.content
-
-def download_from_idrive_s3(url_archivo: str) -> bytes:
-    """Intenta descargar desde iDrive usando el cliente S3
-    
-    Nota: Esta función es síncrona porque boto3 (idrive_s3_client) es síncrona.
-    Se ejecutará en un thread pool cuando se llame desde una función asíncrona.
-    """
+def redirect_to_presigned_url(url_archivo: str, nombre_archivo: str, content_type: str) -> Optional[RedirectResponse]:
+    """302 a una URL prefirmada de iDrive; None si no se puede firmar (se usa el proxy)"""
     try:
         key = extract_file_key_from_idrive_url(url_archivo)
-        print(f"🔑 Clave extraída de URL: {key}")
-        print(f"📦 Bucket: {IDRIVE_BUCKET_NAME}")
-        response = idrive_s3_client.get_object(Bucket=IDRIVE_BUCKET_NAME, Key=key)
-        content = response['Body'].read()
-        print(f"✅ Documento descargado exitosamente desde S3 ({len(content)} bytes)")
-        return content
     except Exception as e:
-        print(f"❌ Error en download_from_idrive_s3: {str(e)}")
-        print(f"   URL original: {url_archivo}")
-        raise
-
-async def download_from_idrive_with_headers(url_archivo: str) -> bytes:
-    """Intenta descargar desde iDrive usando headers específicos"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'application/pdf,application/octet-stream,*/*',
-        'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-        'Cache-Control': 'no-cache',
-        'Pragma': 'no-cache'
-    }
-    
-    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-        response = await client.get(url_archivo, headers=headers)
-        response.raise_for_status()
-        return response.content
+        print(f"⚠️ No se pudo extraer la clave para la URL prefirmada: {str(e)}")
+        return None
+    presigned_url = idrive_service.generate_presigned_url(key, nombre_archivo, content_type)
+    if not presigned_url:
+        return None
+    # La URL vence: el 302 no debe quedar en cache del navegador
+    return RedirectResponse(presigned_url, status_code=status.HTTP_302_FOUND, headers={"Cache-Control": "no-store"})
+
+async def serve_idrive_document(
+    url_archivo: str,
+    nombre_archivo: str,
+    extension: str,
+    request: Optional[Request] = None,
+    modo: str = DOCUMENT_DELIVERY_MODE
+) -> Response:
+    """Sirve un documento desde iDrive
 
-async def download_idrive_document(url_archivo: str) -> bytes:
-    """Descarga un documento desde iDrive usando múltiples estrategias
-    
     Prioridad:
-    1. Cliente S3 (más confiable, usa credenciales)
-    2. HTTP directo con headers
-    3. HTTP directo simple
+    1. Redirect 302 a una URL prefirmada (modo redirect; el archivo no pasa por la API)
+    2. Cliente S3 en streaming (usa credenciales; pasa Range e If-None-Match a get_object)
+    3. HTTP directo con headers
     """
-    import asyncio
-    # Intentar primero con S3 (más confiable porque usa credenciales)
+    content_type = get_content_type_from_filename(nombre_archivo, extension)
+    if modo == MODO_ENTREGA_REDIRECT:
+        redirect = redirect_to_presigned_url(url_archivo, nombre_archivo, content_type)
+        if redirect:
+            return redirect
+    range_header = request.headers.get("range") if request else None
+    if_none_match = request.headers.get("if-none-match") if request else None
+
     try:
-        return await asyncio.to_thread(download_from_idrive_s3, url_archivo)
+        if not idrive_s3_client:
+            raise Exception("Cliente S3 de iDrive no inicializado")
+        key = extract_file_key_from_idrive_url(url_archivo)
+        return await stream_s3_object(
+            idrive_s3_client, IDRIVE_BUCKET_NAME, key, nombre_archivo,
+            content_type=content_type, range_header=range_header, if_none_match=if_none_match
+        )
+    except HTTPException:
+        raise
     except Exception as e1:
-        print(f"⚠️ Error descargando con S3: {str(e1)}")
-        # Intentar con headers (puede funcionar para algunos casos)
-        try:
-            return await download_from_idrive_with_headers(url_archivo)
-        except Exception as e2:
-            print(f"⚠️ Error descargando con headers: {str(e2)}")
-            # Último intento: HTTP directo
-            try:
-                return await download_from_idrive_direct(url_archivo)
-            except Exception as e3:
-                print(f"❌ Error descargando con HTTP directo: {str(e3)}")
-                # Si todos fallan, relanzar el último error
-                raise e3
-
-async def serve_idrive_document(url_archivo: str, nombre_archivo: str, extension: str) -> StreamingResponse:
-    """Sirve un documento desde iDrive"""
+        print(f"⚠️ Error accediendo con S3: {str(e1)}")
+
     try:
-        content = await download_idrive_document(url_archivo)
-        content_type = get_content_type_from_filename(nombre_archivo, extension)
-        
-        return StreamingResponse(
-            iter([content]),
-            media_type=content_type,
-            headers={
-                "Content-Disposition": f"inline; filename={nombre_archivo}",
-                "Content-Type": content_type,
-                "Content-Length": str(len(content))
-            }
-        )
-    except Exception as e:
+        return await stream_http_url(url_archivo, nombre_archivo, content_type=content_type, range_header=range_header)
+    except Exception as e2:
+        print(f"❌ Error accediendo con HTTP directo: {str(e2)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"No se pudo acceder al documento. Error: {str(e)}"
+            detail=f"No se pudo acceder al documento. Error: {str(e2)}"
         )
 
-async def serve_document_by_storage_type(documento: Documento, nombre_archivo: str, extension: str) -> StreamingResponse:
+async def serve_document_by_storage_type(
+    documento: Documento,
+    nombre_archivo: str,
+    extension: str,
+    request: Optional[Request] = None,
+    modo: str = DOCUMENT_DELIVERY_MODE
+) -> Response:
     """Sirve un documento según su tipo de almacenamiento"""
     url_archivo = documento.url_archivo
     
@@ -1211,7 +1207,7 @@ async def serve_document_by_storage_type(documento: Documento, nombre_archivo: s
             detail="Documento temporal no disponible para descarga."
         )
     elif url_archivo.startswith(('http://', 'https://')):
-        return await serve_idrive_document(url_archivo, nombre_archivo, extension)
+        return await serve_idrive_document(url_archivo, nombre_archivo, extension, request, modo)
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1220,15 +1216,17 @@ async def serve_document_by_storage_type(documento: Documento, nombre_archivo: s
 
 @router.get(
     "/verificaciones/{solicitud_id}/documentos/{documento_id}/servir",
-    description="Sirve directamente el archivo desde el backend."
+    description="Sirve el archivo: 302 a una URL prefirmada de iDrive (por defecto) o proxy en streaming con modo=proxy."
 )
 async def servir_documento(
     solicitud_id: int,
     documento_id: int,
+    request: Request,
     token: str = None,
+    modo: str = Query(DOCUMENT_DELIVERY_MODE, pattern=MODO_ENTREGA_PATTERN, description="redirect: 302 a URL prefirmada; proxy: el archivo pasa por la API"),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Sirve directamente el archivo desde el backend"""
+    """Sirve el archivo: redirect a iDrive tras validar el token de admin, o proxy en streaming"""
     await verify_admin_token(token, db)
     
     await get_solicitud_by_id(db, solicitud_id)
@@ -1242,15 +1240,17 @@ async def servir_documento(
     if '.' in nombre_archivo:
         extension = '.' + nombre_archivo.split('.')[-1]
     
-    return await serve_document_by_storage_type(documento, nombre_archivo, extension)
+    return await serve_document_by_storage_type(documento, nombre_archivo, extension, request, modo)
 
 @router.get(
     "/verificaciones-ruc/{id_verificacion_ruc}/documento/servir",
-    description="Sirve directamente el documento RUC desde el backend con autenticación."
+    description="Sirve el documento RUC con autenticación: 302 a una URL prefirmada de iDrive (por defecto) o proxy en streaming con modo=proxy."
 )
 async def servir_documento_ruc(
     id_verificacion_ruc: int,
+    request: Request,
     token: Optional[str] = Query(None, description="Token de autenticación del administrador (opcional, también se valida con Bearer token)"),
+    modo: str = Query(DOCUMENT_DELIVERY_MODE, pattern=MODO_ENTREGA_PATTERN, description="redirect: 302 a URL prefirmada; proxy: el archivo pasa por la API"),
     admin_user: UserProfileAndRolesOut = Depends(get_admin_user),
     db: AsyncSession = Depends(get_async_db)
 ):
@@ -1306,7 +1306,7 @@ async def servir_documento_ruc(
         
         # Usar la misma lógica de servir documento
         # La función serve_document_by_storage_type espera un objeto con atributo url_archivo
-        return await serve_document_by_storage_type(documento_ruc, nombre_archivo, extension)
+        return await serve_document_by_storage_type(documento_ruc, nombre_archivo, extension, request, modo)
         
     except HTTPException:
         raise
@@ -1320,7 +1320,7 @@ async def servir_documento_ruc(
         )
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 # ========================================
 # GESTIÓN DE USUARIOS
@@ -1826,7 +1826,7 @@ async def get_all_users(
             return response_data
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except Exception as e:
         print(f"❌ Error obteniendo usuarios: {e}")
@@ -2314,7 +2314,7 @@ async def get_available_roles(
             }
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except Exception as e:
         print(f"❌ Error obteniendo roles: {e}")
@@ -3053,7 +3053,7 @@ async def get_reporte_usuarios_activos(
             return build_report_response(usuarios_con_roles, statistics)
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except Exception as e:
         print(f"❌ Error generando reporte de usuarios: {e}")
@@ -3138,7 +3138,7 @@ async def get_reporte_proveedores_verificados(
             }
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except Exception as e:
         print(f"Error generando reporte de proveedores verificados: {e}")
@@ -3415,7 +3415,7 @@ async def get_reporte_solicitudes_proveedores(
             solicitudes_detalladas = await process_all_solicitudes(conn, solicitudes)
             return build_solicitudes_report_response(solicitudes_detalladas)
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     except Exception as e:
         print(f"Error generando reporte de solicitudes: {e}")
         import traceback
@@ -3534,7 +3534,7 @@ async def get_reporte_servicios(
             }
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except Exception as e:
         print(f"Error generando reporte de servicios: {e}")
@@ -3792,7 +3792,7 @@ async def get_reporte_reservas_proveedores(
             return response
             
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
     except Exception as e:
         print(f"❌ Error generando reporte de reservas de proveedores: {e}")
@@ -3909,7 +3909,7 @@ async def get_reporte_reservas(
             
             return build_reservas_response(reservas_detalladas)
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
     except Exception as e:
         print(f"Error generando reporte de reservas: {e}")
@@ -3975,7 +3975,7 @@ async def get_reporte_calificaciones(
                 })
         
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
         return {
             "total_calificaciones": len(calificaciones_detalladas),
@@ -4048,7 +4048,7 @@ async def get_reporte_calificaciones_proveedores(
                 })
         
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
         return {
             "total_calificaciones_proveedores": len(calificaciones_detalladas),
@@ -4453,7 +4453,7 @@ async def get_verificaciones_ruc_pendientes(
             
         finally:
             if conn:
-                await direct_db_service.pool.release(conn)
+                await direct_db_service.release_connection(conn)
         
     except Exception as e:
         print(f"❌ Error obteniendo verificaciones de RUC pendientes: {e}")
@@ -4703,7 +4703,7 @@ async def aprobar_verificacion_ruc(
         )
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 
 @router.post(
@@ -4863,5 +4863,5 @@ async def rechazar_verificacion_ruc(
         )
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
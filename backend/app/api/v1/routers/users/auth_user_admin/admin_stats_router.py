@@ -13,6 +13,11 @@ from app.models.empresa.perfil_empresa import PerfilEmpresa
 from app.models.empresa.verificacion_solicitud import VerificacionSolicitud
 from app.schemas.user import UserProfileAndRolesOut
 from app.services.direct_db_service import direct_db_service
+from app.core.redis_config import redis_cache, cache_key
+from app.services.availability_cache import availability_cache
+from app.services.location_gazetteer import location_gazetteer
+from app.services.scheduler_service import scheduler_service
+from app.services.storage_health import storage_health
 
 
 
@@ -158,18 +163,18 @@ async def get_dashboard_stats(
         start_time = time.time()
         
         # Clave de cache única para estadísticas del dashboard
-        #cache_key_str = cache_key("dashboard", "stats")
+        cache_key_str = cache_key("dashboard", "stats")
         
         # Intentar obtener del cache Redis
-        '''
         cached_result = await redis_cache.get(cache_key_str)
         if cached_result is not None:
             end_time = time.time()
             cache_time = (end_time - start_time) * 1000
             print(f"🚀 Cache hit - Tiempo: {cache_time:.2f}ms")
+            cached_result["cached"] = True
             return cached_result
         
-        print(f"🔍 Cache miss - Consultando base de datos...")'''
+        print(f"🔍 Cache miss - Consultando base de datos...")
         
         # OPTIMIZACIÓN: Usar una sola consulta SQL con subconsultas para máximo rendimiento
         # Usar direct_db_service para evitar problemas con PgBouncer
@@ -215,7 +220,7 @@ async def get_dashboard_stats(
             }
             
             # Guardar en cache Redis por 5 minutos (300 segundos)
-            #await redis_cache.set(cache_key_str, response_data, ttl=300)
+            await redis_cache.set(cache_key_str, response_data, ttl=300)
             
             end_time = time.time()
             query_time = (end_time - start_time) * 1000
@@ -225,7 +230,7 @@ async def get_dashboard_stats(
             
             return response_data
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except Exception as e:
         print(f"❌ Error obteniendo estadísticas del dashboard: {e}")
@@ -249,7 +254,7 @@ async def clear_dashboard_cache(
         return {
             "message": "Cache limpiado exitosamente",
             "deleted_keys": deleted_keys,
-            "cleared_by": admin_user.name
+            "cleared_by": admin_user.nombre_persona
         }
         
     except Exception as e:
@@ -257,4 +262,40 @@ async def clear_dashboard_cache(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error limpiando cache: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get(
+    "/cache/metrics",
+    description="Métricas del cache de la aplicación (hits, misses, hit ratio)"
+)
+async def get_cache_metrics(
+    admin_user: UserProfileAndRolesOut = Depends(get_admin_user)
+):
+    """Devuelve las métricas acumuladas del cache en este worker"""
+    metrics = redis_cache.get_metrics()
+    metrics["disponibilidad"] = availability_cache.get_metrics()
+    metrics["ubicaciones"] = location_gazetteer.get_metrics()
+    return metrics
+
+
+@router.get(
+    "/scheduler/metrics",
+    description="Estado del planificador de tareas periódicas y tiempos de ejecución por tarea"
+)
+async def get_scheduler_metrics(
+    admin_user: UserProfileAndRolesOut = Depends(get_admin_user)
+):
+    """Métricas del planificador en este worker (solo el líder ejecuta las tareas)"""
+    return scheduler_service.get_metrics()
+
+
+@router.get(
+    "/storage/metrics",
+    description="Estado cacheado de los backends de almacenamiento y latencia de subidas por backend"
+)
+async def get_storage_metrics(
+    admin_user: UserProfileAndRolesOut = Depends(get_admin_user)
+):
+    """Salud y contadores de subidas (iDrive, Supabase, local) en este worker"""
+    return storage_health.get_metrics()
@@ -191,7 +191,7 @@ async def migrate_model(
             logger.warning(f"⚠️ Error al contar servicios en BD: {e}")
         finally:
             if conn:
-                await direct_db_service.pool.release(conn)
+                await direct_db_service.release_connection(conn)
         
         # Determinar si necesita reindexación:
         # 1. Si no hay servicios indexados (total_objects == 0)
@@ -641,7 +641,7 @@ async def _fallback_search_normal(query: str, limit: int):
             logger.info(f"✅ Fallback: {len(resultados)} resultados encontrados")
             return resultados
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     except Exception as e:
         logger.error(f"❌ Error en fallback: {str(e)}")
         return []
@@ -53,7 +53,7 @@ async def sync_single_service(service_id: int):
         """
         
         service = await conn.fetchrow(query, service_id)
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
         
         if not service:
             raise HTTPException(status_code=404, detail="Servicio no encontrado")
@@ -121,7 +121,7 @@ async def sync_services_background():
         """
         
         services = await conn.fetch(query)
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
         
         logger.info(f"📊 Sincronizando {len(services)} servicios...")
         
@@ -183,7 +183,7 @@ async def search_servicios_public(
         search_term = f"%{query}%"
         result = await conn.fetch(search_query, search_term, limit)
         
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
         
         # Convertir a formato esperado
         resultados = []
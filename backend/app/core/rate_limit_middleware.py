@@ -0,0 +1,214 @@
+"""
+Middleware ASGI de rate limiting por ruta.
+
+Cada política limita una ruta (o prefijo) con un token bucket GCRA por IP o
+por usuario. Al exceder el límite responde 429 con Retry-After. Los contadores
+usan el mismo backend que rate_limit_service (Redis compartido entre workers
+si está configurado), por lo que el límite es global y no por proceso.
+
+Las políticas por defecto pueden reemplazarse o ampliarse con la variable de
+entorno RATE_LIMIT_POLICIES (lista JSON con los campos de RateLimitPolicy).
+"""
+import json
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional
+from urllib.parse import parse_qs
+
+import jwt
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import RATE_LIMIT_ENABLED, RATE_LIMIT_POLICIES, SUPABASE_JWT_SECRET
+from app.services.rate_limit_service import GCRARateLimiter, RateLimitResult, build_gcra_backend, resolve_client_ip
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+KEY_BY_IP = "ip"
+KEY_BY_USER = "user"
+MSG_DEMASIADAS_SOLICITUDES = "Demasiadas solicitudes. Intenta nuevamente en unos segundos."
+HEADER_RETRY_AFTER = b"retry-after"
+HEADER_LIMIT = b"x-ratelimit-limit"
+HEADER_REMAINING = b"x-ratelimit-remaining"
+JWT_ALGORITHMS = ["HS256"]
+JWT_AUDIENCE = "authenticated"
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Política de rate limiting para una ruta"""
+    name: str
+    path: str  # ruta exacta o prefijo terminado en "*"
+    limit: int
+    period: int  # segundos
+    methods: Optional[FrozenSet[str]] = None  # None = todos los métodos
+    key_by: str = KEY_BY_IP  # "ip" o "user" (usuario del JWT verificado, IP si no hay token válido)
+    query_param: Optional[str] = None  # solo aplica si el parámetro está presente
+
+    def matches(self, method: str, path: str, query: Dict[str, List[str]]) -> bool:
+        if self.methods is not None and method not in self.methods:
+            return False
+        if self.path.endswith("*"):
+            if not path.startswith(self.path[:-1]):
+                return False
+        elif path.rstrip("/") != self.path.rstrip("/"):
+            return False
+        if self.query_param is not None and not any(query.get(self.query_param, [])):
+            return False
+        return True
+
+
+DEFAULT_POLICIES: List[RateLimitPolicy] = [
+    # Búsqueda semántica: cada consulta calcula un embedding
+    RateLimitPolicy("weaviate_search_public", "/api/v1/weaviate/search-public", 30, 60, frozenset({"GET"})),
+    # Reindexado completo del catálogo
+    RateLimitPolicy("weaviate_index_public", "/api/v1/weaviate/index-servicios-public", 2, 3600, frozenset({"POST"})),
+    # Búsqueda por texto sobre el catálogo (ILIKE sobre el pool de DirectDBService)
+    RateLimitPolicy("services_search", "/api/v1/services/services", 60, 60, frozenset({"GET"}), query_param="search"),
+    RateLimitPolicy("services_filtered_search", "/api/v1/services/filtered", 60, 60, frozenset({"GET"}), query_param="search"),
+    # Fuerza bruta de credenciales
+    RateLimitPolicy("auth_signin", "/api/v1/auth/signin", 10, 60, frozenset({"POST"})),
+]
+
+
+def load_policies(raw: Optional[str] = RATE_LIMIT_POLICIES) -> List[RateLimitPolicy]:
+    """Políticas por defecto combinadas con las de RATE_LIMIT_POLICIES (mismo nombre reemplaza)"""
+    policies = {policy.name: policy for policy in DEFAULT_POLICIES}
+    if raw:
+        try:
+            for item in json.loads(raw):
+                methods = item.get("methods")
+                policies[item["name"]] = RateLimitPolicy(
+                    name=item["name"],
+                    path=item["path"],
+                    limit=int(item["limit"]),
+                    period=int(item["period"]),
+                    methods=frozenset(m.upper() for m in methods) if methods else None,
+                    key_by=item.get("key_by", KEY_BY_IP),
+                    query_param=item.get("query_param"),
+                )
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"❌ RATE_LIMIT_POLICIES inválido, usando políticas por defecto: {e}")
+            return list(DEFAULT_POLICIES)
+    return list(policies.values())
+
+
+def _get_header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _client_ip(scope: Scope) -> str:
+    """Misma resolución que get_client_ip: solo las entradas de X-Forwarded-For agregadas por proxies de confianza"""
+    client = scope.get("client")
+    ip = resolve_client_ip(_get_header(scope, b"x-forwarded-for"), client[0] if client else None)
+    return ip or "unknown"
+
+
+def _verified_user_id(token: str, jwt_secret: Optional[str]) -> Optional[str]:
+    """sub de un JWT de Supabase con firma y vencimiento verificados localmente (None si no se puede verificar)"""
+    if not jwt_secret:
+        return None
+    try:
+        claims = jwt.decode(token, jwt_secret, algorithms=JWT_ALGORITHMS, audience=JWT_AUDIENCE)
+    except jwt.PyJWTError:
+        return None
+    sub = claims.get("sub")
+    return str(sub) if sub else None
+
+
+def _client_key(scope: Scope, key_by: str, jwt_secret: Optional[str] = None) -> str:
+    """
+    Identificador del cliente. Con key_by=user se usa el id del usuario del JWT verificado;
+    un token inválido, vencido o sin secreto configurado cuenta por IP (inventar tokens no
+    da cupos nuevos).
+    """
+    if key_by == KEY_BY_USER:
+        authorization = _get_header(scope, b"authorization")
+        if authorization and authorization.lower().startswith("bearer "):
+            user_id = _verified_user_id(authorization[7:].strip(), jwt_secret)
+            if user_id:
+                return "user:" + user_id
+    return "ip:" + _client_ip(scope)
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI que aplica las políticas de rate limiting"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: Optional[List[RateLimitPolicy]] = None,
+        backend=None,
+        enabled: bool = RATE_LIMIT_ENABLED,
+        jwt_secret: Optional[str] = SUPABASE_JWT_SECRET
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.jwt_secret = jwt_secret
+        self.policies = policies if policies is not None else load_policies()
+        backend = backend if backend is not None else build_gcra_backend()
+        self.limiters: Dict[str, GCRARateLimiter] = {
+            policy.name: GCRARateLimiter(f"route:{policy.name}", policy.limit, policy.period, backend)
+            for policy in self.policies
+        }
+        if not jwt_secret and any(policy.key_by == KEY_BY_USER for policy in self.policies):
+            logger.warning("⚠️ SUPABASE_JWT_SECRET no configurado: las políticas por usuario cuentan por IP")
+
+    def _match(self, scope: Scope) -> Optional[RateLimitPolicy]:
+        method = scope.get("method", "GET")
+        path = scope.get("path", "")
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1")) if scope.get("query_string") else {}
+        for policy in self.policies:
+            if policy.matches(method, path, query):
+                return policy
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        policy = self._match(scope)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            result = await self.limiters[policy.name].hit(_client_key(scope, policy.key_by, self.jwt_secret))
+        except Exception as e:
+            # Si el backend no responde se deja pasar la petición (fail-open)
+            logger.warning(f"⚠️ Rate limit no disponible para {policy.name}: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if not result.allowed:
+            logger.warning(f"⚠️ Rate limit excedido en {policy.name} para {_client_ip(scope)}")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": MSG_DEMASIADAS_SOLICITUDES},
+                headers={
+                    "Retry-After": str(max(1, math.ceil(result.retry_after))),
+                    "X-RateLimit-Limit": str(result.limit),
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, self._send_with_headers(send, result))
+
+    @staticmethod
+    def _send_with_headers(send: Send, result: RateLimitResult) -> Send:
+        async def wrapped(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((HEADER_LIMIT, str(result.limit).encode()))
+                headers.append((HEADER_REMAINING, str(result.remaining).encode()))
+                message["headers"] = headers
+            await send(message)
+        return wrapped
@@ -0,0 +1,446 @@
+"""
+Subsistema de cache asíncrono con backends intercambiables.
+
+- InMemoryLRUBackend: LRU en memoria del proceso (desarrollo y tests)
+- RedisBackend: Redis compartido entre workers (producción, requiere REDIS_URL)
+
+CacheService agrega namespacing, TTLs, serialización JSON, protección contra
+estampidas (single-flight) y métricas. Los routers pueden cachear un endpoint
+con el decorador `cached`.
+"""
+import abc
+import asyncio
+import fnmatch
+import functools
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import REDIS_URL, CACHE_NAMESPACE, CACHE_DEFAULT_TTL, CACHE_MAX_ENTRIES
+from app.schemas.auth_user import SupabaseUser
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional, json estándar como respaldo
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+KEY_SEPARATOR = ":"
+REDIS_SCAN_BATCH = 500
+TIPOS_CLAVE_SIMPLES = (str, int, float, bool, date, dt_time, UUID, Decimal, type(None))
+# Dependencias que no cambian el resultado y la clave por defecto omite (sesión/conexión de base de datos)
+TIPOS_CLAVE_OMITIDOS = (AsyncSession, asyncpg.Connection)
+MSG_ARGUMENTO_SIN_CLAVE = (
+    "@cached({namespace}) no puede incluir el argumento {argumento} ({tipo}) en la clave; "
+    "pasar key_builder para no compartir el resultado entre peticiones distintas"
+)
+# Origen del valor devuelto por get_or_set_with_source
+SOURCE_HIT = "hit"
+SOURCE_LOAD = "load"
+SOURCE_COALESCED = "coalesced"
+
+
+# ========================================
+# SERIALIZACIÓN
+# ========================================
+
+def _json_default(value: Any) -> Any:
+    """Convierte tipos no nativos de JSON (fechas, Decimal, UUID, modelos Pydantic)"""
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Tipo no serializable para cache: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa un valor a bytes JSON (orjson si está disponible)"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default)
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(raw: bytes) -> Any:
+    """Deserializa bytes JSON producidos por `dumps`"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def cache_key(*parts: Any) -> str:
+    """Construye una clave de cache a partir de sus partes: cache_key("dashboard", "stats")"""
+    return KEY_SEPARATOR.join(str(part) for part in parts)
+
+
+# ========================================
+# BACKENDS
+# ========================================
+
+class CacheBackend(abc.ABC):
+    """Interfaz asíncrona que deben implementar los backends de cache (valores en bytes)"""
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def delete(self, *keys: str) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def clear_pattern(self, pattern: str) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """Guarda el valor solo si la clave no existe (atómico). Devuelve True si lo guardó"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        """Incrementa un contador atómicamente; el TTL se fija al crear la clave"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryLRUBackend(CacheBackend):
+    """Backend LRU en memoria con expiración por TTL (local al proceso)"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # clave -> (expira_en monotónico o None, valor)
+        self._data: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+
+    def _get_entry(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._get_entry(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._data.pop(key, None) is not None:
+                deleted += 1
+        return deleted
+
+    async def clear_pattern(self, pattern: str) -> int:
+        matching = [key for key in self._data if fnmatch.fnmatchcase(key, pattern)]
+        for key in matching:
+            del self._data[key]
+        return len(matching)
+
+    async def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        if self._get_entry(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        current = self._get_entry(key)
+        if current is None:
+            counter = amount
+            await self.set(key, str(counter).encode(), ttl)
+        else:
+            counter = int(current) + amount
+            expires_at, _ = self._data[key]
+            self._data[key] = (expires_at, str(counter).encode())
+        return counter
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend(CacheBackend):
+    """Backend Redis compartido entre procesos (redis.asyncio)"""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis_asyncio
+
+        self.client = redis_asyncio.from_url(url, decode_responses=False)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        await self.client.set(key, value, ex=ttl or None)
+
+    async def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return await self.client.delete(*keys)
+
+    async def clear_pattern(self, pattern: str) -> int:
+        deleted = 0
+        batch: List[bytes] = []
+        async for key in self.client.scan_iter(match=pattern, count=REDIS_SCAN_BATCH):
+            batch.append(key)
+            if len(batch) >= REDIS_SCAN_BATCH:
+                deleted += await self.client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await self.client.unlink(*batch)
+        return deleted
+
+    async def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        return bool(await self.client.set(key, value, ex=ttl or None, nx=True))
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        counter = int(await self.client.incrby(key, amount))
+        if ttl and counter == amount:
+            # Clave recién creada: fijar expiración (compatible con Redis < 7, sin EXPIRE NX)
+            await self.client.expire(key, ttl)
+        return counter
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# ========================================
+# SERVICIO DE CACHE
+# ========================================
+
+class CacheService:
+    """Cache con namespace, TTL, single-flight y métricas sobre un CacheBackend"""
+
+    def __init__(self, backend: CacheBackend, namespace: str = CACHE_NAMESPACE, default_ttl: int = CACHE_DEFAULT_TTL):
+        self.backend = backend
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        # Cargas en curso por clave completa (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._metrics: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "deletes": 0,
+            "loads": 0,
+            "coalesced": 0,
+            "errors": 0,
+        }
+
+    def _full_key(self, key: str) -> str:
+        return f"{self.namespace}{KEY_SEPARATOR}{key}" if self.namespace else key
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Obtiene un valor; ante fallas del backend se comporta como un miss"""
+        try:
+            raw = await self.backend.get(self._full_key(key))
+        except Exception as e:
+            self._metrics["errors"] += 1
+            logger.warning(f"⚠️ Error leyendo cache '{key}': {e}")
+            raw = None
+        if raw is None:
+            self._metrics["misses"] += 1
+            return default
+        self._metrics["hits"] += 1
+        return loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Guarda un valor con TTL en segundos (por defecto default_ttl)"""
+        try:
+            await self.backend.set(self._full_key(key), dumps(value), ttl if ttl is not None else self.default_ttl)
+            self._metrics["sets"] += 1
+            return True
+        except Exception as e:
+            self._metrics["errors"] += 1
+            logger.warning(f"⚠️ Error guardando cache '{key}': {e}")
+            return False
+
+    async def delete(self, *keys: str) -> int:
+        """Elimina claves exactas del namespace"""
+        try:
+            deleted = await self.backend.delete(*(self._full_key(key) for key in keys))
+            self._metrics["deletes"] += deleted
+            return deleted
+        except Exception as e:
+            self._metrics["errors"] += 1
+            logger.warning(f"⚠️ Error eliminando claves de cache {keys}: {e}")
+            return 0
+
+    async def clear_pattern(self, pattern: str) -> int:
+        """Elimina las claves del namespace que coinciden con un patrón glob ("dashboard:*")"""
+        try:
+            deleted = await self.backend.clear_pattern(self._full_key(pattern))
+            self._metrics["deletes"] += deleted
+            return deleted
+        except Exception as e:
+            self._metrics["errors"] += 1
+            logger.warning(f"⚠️ Error limpiando patrón de cache '{pattern}': {e}")
+            return 0
+
+    async def get_or_set(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int] = None) -> Any:
+        """
+        Devuelve el valor cacheado o lo calcula con `loader`.
+        Las peticiones concurrentes para la misma clave esperan a una única carga.
+        """
+        value, _ = await self.get_or_set_with_source(key, loader, ttl)
+        return value
+
+    async def get_or_set_with_source(
+        self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int] = None
+    ) -> Tuple[Any, str]:
+        """
+        Igual que get_or_set, pero indica de dónde salió el valor: SOURCE_HIT (cache),
+        SOURCE_LOAD (esta llamada ejecutó `loader`) o SOURCE_COALESCED (esperó la carga
+        en curso de otra petición)
+        """
+        sentinel = object()
+        value = await self.get(key, sentinel)
+        if value is not sentinel:
+            return value, SOURCE_HIT
+
+        full_key = self._full_key(key)
+        pending = self._inflight.get(full_key)
+        if pending is not None:
+            self._metrics["coalesced"] += 1
+            return await asyncio.shield(pending), SOURCE_COALESCED
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            self._metrics["loads"] += 1
+            value = await loader()
+            await self.set(key, value, ttl)
+            future.set_result(value)
+            return value, SOURCE_LOAD
+        except Exception as e:
+            future.set_exception(e)
+            # Evitar "Future exception was never retrieved" si nadie más esperaba
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(full_key, None)
+            if not future.done():
+                future.cancel()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas acumuladas del proceso actual"""
+        lookups = self._metrics["hits"] + self._metrics["misses"]
+        metrics: Dict[str, Any] = dict(self._metrics)
+        metrics["backend"] = self.backend.name
+        metrics["namespace"] = self.namespace
+        metrics["hit_ratio"] = round(self._metrics["hits"] / lookups, 4) if lookups else 0.0
+        metrics["inflight"] = len(self._inflight)
+        return metrics
+
+    def reset_metrics(self) -> None:
+        for name in self._metrics:
+            self._metrics[name] = 0
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def _default_key_builder(namespace: str, func: Callable, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """
+    Clave basada en el nombre de la función y sus argumentos: los simples van tal cual, el
+    usuario autenticado (SupabaseUser) por su id y la sesión/conexión de base de datos se omite.
+    Cualquier otro argumento lanza TypeError en lugar de omitirse en silencio.
+    """
+    parts: List[Any] = [func.__name__]
+    argumentos = [(None, arg) for arg in args] + [(name, kwargs[name]) for name in sorted(kwargs)]
+    for name, value in argumentos:
+        if isinstance(value, TIPOS_CLAVE_OMITIDOS):
+            continue
+        if isinstance(value, SupabaseUser):
+            value = f"user:{value.id}"
+        elif not isinstance(value, TIPOS_CLAVE_SIMPLES):
+            raise TypeError(MSG_ARGUMENTO_SIN_CLAVE.format(
+                namespace=namespace, argumento=name or "posicional", tipo=type(value).__name__
+            ))
+        parts.append(value if name is None else f"{name}={value}")
+    return cache_key(*parts)
+
+
+def cached(
+    namespace: str,
+    ttl: Optional[int] = None,
+    key_builder: Optional[Callable[..., str]] = None,
+    cache: Optional[CacheService] = None,
+):
+    """
+    Decorador para cachear el resultado de una corrutina (endpoints incluidos).
+    Sin key_builder la clave incluye los argumentos simples y el id del usuario
+    autenticado; otros argumentos (p. ej. Request) requieren un key_builder.
+
+    Ejemplo:
+        @router.get("/categorias")
+        @cached("categorias", ttl=600)
+        async def listar_categorias(db = Depends(get_async_db)): ...
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            service = cache or redis_cache
+            if key_builder is not None:
+                suffix = key_builder(*args, **kwargs)
+            else:
+                suffix = _default_key_builder(namespace, func, args, kwargs)
+            return await service.get_or_set(cache_key(namespace, suffix), lambda: func(*args, **kwargs), ttl)
+        return wrapper
+    return decorator
+
+
+def build_backend(max_entries: int = CACHE_MAX_ENTRIES) -> CacheBackend:
+    """Redis si REDIS_URL está configurado, LRU en memoria en caso contrario"""
+    if REDIS_URL:
+        try:
+            backend = RedisBackend(REDIS_URL)
+            logger.info("✅ Cache configurado con backend Redis")
+            return backend
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo configurar Redis, usando cache en memoria: {e}")
+    return InMemoryLRUBackend(max_entries=max_entries)
+
+
+def is_shared_backend(backend: CacheBackend) -> bool:
+    """True si el backend es visible para todos los workers (no local al proceso)"""
+    return not isinstance(backend, InMemoryLRUBackend)
+
+
+# Instancia global del cache
+redis_cache = CacheService(build_backend())
@@ -0,0 +1,62 @@
+"""
+Almacén de estado compartido entre workers.
+
+Reemplaza los diccionarios en memoria de los servicios (códigos de
+restablecimiento, intentos de email, notificaciones enviadas) para que la
+aplicación pueda correr con varios procesos. Usa Redis cuando REDIS_URL está
+configurado y un backend en memoria (solo válido con un worker o en tests)
+en caso contrario.
+
+A diferencia del cache, los errores del backend se propagan: perder estado
+silenciosamente cambiaría el comportamiento de la aplicación.
+"""
+import logging
+from typing import Any, Optional
+
+from app.core.config import SHARED_STATE_NAMESPACE, SHARED_STATE_MAX_ENTRIES
+from app.core.redis_config import CacheBackend, KEY_SEPARATOR, build_backend, dumps, loads, is_shared_backend
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStateStore:
+    """Almacén clave/valor con TTL y operaciones atómicas sobre un CacheBackend"""
+
+    def __init__(self, backend: CacheBackend, namespace: str = SHARED_STATE_NAMESPACE):
+        self.backend = backend
+        self.namespace = namespace
+
+    def _full_key(self, key: str) -> str:
+        return f"{self.namespace}{KEY_SEPARATOR}{key}"
+
+    @property
+    def is_shared(self) -> bool:
+        """True si el estado es visible para todos los workers"""
+        return is_shared_backend(self.backend)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        raw = await self.backend.get(self._full_key(key))
+        return default if raw is None else loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        await self.backend.set(self._full_key(key), dumps(value), ttl)
+
+    async def add(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Guarda solo si la clave no existe. Devuelve False si ya existía"""
+        return await self.backend.add(self._full_key(key), dumps(value), ttl)
+
+    async def exists(self, key: str) -> bool:
+        return await self.backend.get(self._full_key(key)) is not None
+
+    async def delete(self, key: str) -> bool:
+        return await self.backend.delete(self._full_key(key)) > 0
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        return await self.backend.incr(self._full_key(key), amount, ttl)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+# Instancia global del almacén de estado
+shared_store = SharedStateStore(build_backend(max_entries=SHARED_STATE_MAX_ENTRIES))
@@ -1,8 +1,19 @@
 """
 Eventos de inicialización de la aplicación
 """
+import asyncio
 import logging
+import os
 from app.services.direct_db_service import direct_db_service
+from app.core.redis_config import redis_cache
+from app.core.shared_store import shared_store
+from app.supabase.async_auth_client import async_auth_client
+from app.services.scheduler_service import scheduler_service
+from app.services.scheduled_jobs import registrar_jobs
+from app.idrive.idrive_service import idrive_service
+from app.services.supabase_storage_service import supabase_storage_service
+from app.services.image_pipeline import image_pipeline
+from app.services.location_gazetteer import location_gazetteer
 
 logger = logging.getLogger(__name__)
 
@@ -11,22 +22,63 @@ async def startup_events():
     try:
         logger.info("🚀 Inicializando servicios de la aplicación...")
         
-        # Inicializar pool de conexiones del direct_db_service
+        # Con varios workers el estado en memoria no se comparte entre procesos
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+        if workers > 1 and not shared_store.is_shared:
+            logger.warning(f"⚠️ {workers} workers sin REDIS_URL: el estado compartido quedará local a cada proceso")
+        
+        # Precalentar el pool de conexiones compartido (ORM + direct_db_service)
         await direct_db_service._ensure_pool()
         
+        # Verificar los buckets una sola vez; las subidas usan el estado cacheado
+        await verificar_almacenamiento()
+        
+        # Departamentos, ciudades y barrios en memoria (si falla se cargan en la primera consulta)
+        try:
+            await location_gazetteer.cargar()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo precargar el gazetteer de ubicaciones: {e}")
+        
+        # Tareas periódicas (solo las ejecuta el worker que tiene el lease)
+        registrar_jobs(scheduler_service)
+        await scheduler_service.start()
+        
         logger.info("✅ Servicios inicializados exitosamente")
     except Exception as e:
         logger.error(f"❌ Error inicializando servicios: {e}")
         raise
 
+async def verificar_almacenamiento():
+    """Sondea iDrive y Supabase Storage en paralelo; un backend caído no impide arrancar"""
+    tareas = [supabase_storage_service.ensure_bucket()]
+    if idrive_service.client:
+        tareas.append(asyncio.to_thread(idrive_service.ensure_healthy))
+    resultados = await asyncio.gather(*tareas, return_exceptions=True)
+    for resultado in resultados:
+        if isinstance(resultado, Exception):
+            logger.warning(f"⚠️ Error verificando almacenamiento: {resultado}")
+
 async def shutdown_events():
     """Eventos de limpieza al cerrar la aplicación"""
     try:
         logger.info("🔄 Cerrando servicios de la aplicación...")
         
-        # Cerrar pool de conexiones del direct_db_service
+        # Detener el planificador antes de cerrar el pool (libera el lease)
+        await scheduler_service.stop()
+        
+        # Cerrar el pool de conexiones compartido
         await direct_db_service.close_pool()
         
+        # Cerrar conexiones del backend de cache y del estado compartido
+        await redis_cache.close()
+        await shared_store.close()
+        
+        # Cerrar las conexiones keep-alive con Supabase Auth
+        await async_auth_client.close()
+        
+        # Terminar los procesos del pipeline de imágenes
+        image_pipeline.close()
+        
         logger.info("✅ Servicios cerrados exitosamente")
     except Exception as e:
         logger.error(f"❌ Error cerrando servicios: {e}")
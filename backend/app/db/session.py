@@ -1,10 +1,5 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.orm.session import engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from app.core.config import DATABASE_URL_LOCAL
+# Sesiones de base de datos: reutiliza el engine único de app.supabase.db.db_supabase
+# (no se crea un pool propio para no multiplicar las conexiones a la BD)
+from app.supabase.db.db_supabase import async_engine as engine, AsyncSessionLocal
 
-engine = create_async_engine(DATABASE_URL_LOCAL, echo=True)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    
\ No newline at end of file
+SessionLocal = AsyncSessionLocal
@@ -1,10 +1,24 @@
 import boto3
 import logging
-from typing import Optional, Tuple, Dict, Any
-from app.core.config import IDRIVE_ENDPOINT_URL, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, IDRIVE_BUCKET_NAME, AWS_REGION
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+import time
+from typing import Optional, Tuple, Dict, Any, BinaryIO, Callable
+from app.core.config import (
+    IDRIVE_ENDPOINT_URL,
+    AWS_ACCESS_KEY_ID,
+    AWS_SECRET_ACCESS_KEY,
+    IDRIVE_BUCKET_NAME,
+    AWS_REGION,
+    IDRIVE_PRESIGNED_URL_TTL,
+)
+from app.services.document_serving import content_disposition
+from app.services.storage_health import BACKEND_IDRIVE, storage_health
 
 # Constantes
 AWS_SERVICE_S3 = "s3"
+# SigV4 también para las URLs prefirmadas (boto3 usa SigV2 por defecto al prefirmar en S3)
+S3_SIGNATURE_VERSION = "s3v4"
 MSG_FALTAN_CREDENCIALES_IDRIVE = "❌ Faltan credenciales de iDrive"
 MSG_CLIENTE_IDRIVE_INICIALIZADO = "✅ Cliente iDrive inicializado correctamente"
 MSG_CLIENTE_NO_INICIALIZADO = "Cliente no inicializado"
@@ -27,6 +41,15 @@ ERROR_INVALID_ACCESS_KEY_ID = "InvalidAccessKeyId"
 TEST_KEY_CONNECTION = "test_connection.txt"
 TEST_CONTENT_IDRIVE = b"Test de conexion iDrive2"
 CONTENT_TYPE_KEY = "ContentType"
+S3_OPERATION_GET_OBJECT = "get_object"
+# La URL prefirmada en cache se renueva cuando le quedan menos de estos segundos
+PRESIGNED_URL_RENEW_MARGIN = 60
+PRESIGNED_URL_CACHE_MAX = 1000
+# upload_fileobj: desde este tamaño se usa multipart, con partes de MULTIPART_CHUNKSIZE
+# subidas por MULTIPART_MAX_CONCURRENCY hilos (mínimo de S3 por parte: 5 MiB)
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+MULTIPART_MAX_CONCURRENCY = 4
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +62,13 @@ class IDriveService:
         self.endpoint_url = IDRIVE_ENDPOINT_URL
         self.access_key = AWS_ACCESS_KEY_ID
         self.secret_key = AWS_SECRET_ACCESS_KEY
+        # (key, nombre, content_type) -> (url, vencimiento en time.monotonic())
+        self._presigned_cache: Dict[Tuple[str, Optional[str], Optional[str]], Tuple[str, float]] = {}
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNKSIZE,
+            max_concurrency=MULTIPART_MAX_CONCURRENCY
+        )
         self._initialize_client()
     
     def _initialize_client(self):
@@ -53,7 +83,8 @@ class IDriveService:
                 aws_access_key_id=self.access_key,
                 aws_secret_access_key=self.secret_key,
                 endpoint_url=self.endpoint_url,
-                region_name=AWS_REGION  # iDrive2 requiere región (configurable desde variables de entorno)
+                region_name=AWS_REGION,  # iDrive2 requiere región (configurable desde variables de entorno)
+                config=Config(signature_version=S3_SIGNATURE_VERSION)
             )
             logger.info(MSG_CLIENTE_IDRIVE_INICIALIZADO)
         except Exception as e:
@@ -100,37 +131,68 @@ class IDriveService:
             else:
                 return False, MSG_ERROR_CONEXION.format(error_msg=error_msg)
     
+    def ensure_healthy(self) -> Tuple[bool, str]:
+        """
+        Estado del bucket desde el cache de salud. Solo ejecuta test_connection al
+        arrancar, después de una subida fallida o cuando vence un resultado negativo.
+        """
+        health = storage_health.backend(BACKEND_IDRIVE)
+        if health.necesita_sondeo():
+            ok, mensaje = self.test_connection()
+            health.registrar_sondeo(ok, mensaje)
+        return bool(health.sano), health.mensaje or ""
+    
     def upload_file(self, file_content: bytes, file_key: str, content_type: str = None) -> Tuple[bool, str, Optional[str]]:
         """Sube un archivo a iDrive con manejo de errores"""
+        extra_args = {CONTENT_TYPE_KEY: content_type} if content_type else {}
+        return self._upload(file_key, lambda: self.client.put_object(
+            Bucket=self.bucket_name,
+            Key=file_key,
+            Body=file_content,
+            **extra_args
+        ))
+    
+    def upload_fileobj(self, fileobj: BinaryIO, file_key: str, content_type: str = None) -> Tuple[bool, str, Optional[str]]:
+        """
+        Sube un archivo desde un objeto tipo archivo sin cargarlo completo en memoria.
+        boto3 lo lee por partes y, desde MULTIPART_THRESHOLD, usa multipart upload en
+        varios hilos. Es bloqueante: desde código async llamarlo con asyncio.to_thread.
+        """
+        extra_args = {CONTENT_TYPE_KEY: content_type} if content_type else None
+        return self._upload(file_key, lambda: self.client.upload_fileobj(
+            fileobj,
+            self.bucket_name,
+            file_key,
+            ExtraArgs=extra_args,
+            Config=self.transfer_config
+        ))
+    
+    def _upload(self, file_key: str, subir: Callable[[], Any]) -> Tuple[bool, str, Optional[str]]:
+        """Verifica el estado cacheado del bucket, ejecuta la subida y registra su latencia"""
+        health = storage_health.backend(BACKEND_IDRIVE)
+        inicio = time.perf_counter()
         try:
             if not self.client:
                 return False, MSG_CLIENTE_NO_INICIALIZADO, None
             
-            # Verificar conexión antes de subir
-            connection_ok, connection_msg = self.test_connection()
+            # Estado cacheado del bucket (no se sondea en cada subida)
+            connection_ok, connection_msg = self.ensure_healthy()
             if not connection_ok:
                 return False, MSG_ERROR_CONEXION.format(error_msg=connection_msg), None
             
-            # Subir archivo
-            extra_args = {}
-            if content_type:
-                extra_args[CONTENT_TYPE_KEY] = content_type
-            
-            self.client.put_object(
-                Bucket=self.bucket_name,
-                Key=file_key,
-                Body=file_content,
-                **extra_args
-            )
+            inicio = time.perf_counter()
+            subir()
             
             # Generar URL del archivo
             file_url = f"{self.endpoint_url}/{self.bucket_name}/{file_key}"
+            health.registrar_subida((time.perf_counter() - inicio) * 1000, True)
             logger.info(f"✅ {MSG_ARCHIVO_SUBIDO_EXITOSAMENTE}: {file_key}")
             
             return True, MSG_ARCHIVO_SUBIDO_EXITOSAMENTE, file_url
             
         except Exception as e:
             error_msg = str(e)
+            health.registrar_subida((time.perf_counter() - inicio) * 1000, False, error_msg)
             logger.error(f"❌ Error subiendo archivo {file_key}: {error_msg}")
             
             if ERROR_ACCESS_DENIED in error_msg:
@@ -142,6 +204,51 @@ class IDriveService:
         """Genera la URL pública del archivo"""
         return f"{self.endpoint_url}/{self.bucket_name}/{file_key}"
     
+    def generate_presigned_url(
+        self,
+        file_key: str,
+        nombre_archivo: Optional[str] = None,
+        content_type: Optional[str] = None,
+        expires_in: int = IDRIVE_PRESIGNED_URL_TTL
+    ) -> Optional[str]:
+        """URL GET firmada de corta duración para que el navegador descargue directo de iDrive.
+
+        Se reutiliza la misma URL hasta poco antes de que venza, así el navegador puede
+        aprovechar su cache entre aperturas del mismo documento. Firmar es local (sin red).
+        """
+        if not self.client:
+            return None
+
+        cache_key = (file_key, nombre_archivo, content_type)
+        ahora = time.monotonic()
+        cached = self._presigned_cache.get(cache_key)
+        if cached and cached[1] - PRESIGNED_URL_RENEW_MARGIN > ahora:
+            return cached[0]
+
+        params = {"Bucket": self.bucket_name, "Key": file_key}
+        if nombre_archivo:
+            params["ResponseContentDisposition"] = content_disposition(nombre_archivo)
+        if content_type:
+            params["ResponseContentType"] = content_type
+        try:
+            url = self.client.generate_presigned_url(S3_OPERATION_GET_OBJECT, Params=params, ExpiresIn=expires_in)
+        except Exception as e:
+            logger.error(f"❌ Error generando URL prefirmada para {file_key}: {str(e)}")
+            return None
+
+        if len(self._presigned_cache) >= PRESIGNED_URL_CACHE_MAX:
+            self._purge_presigned_cache(ahora)
+        self._presigned_cache[cache_key] = (url, ahora + expires_in)
+        return url
+
+    def _purge_presigned_cache(self, ahora: float) -> None:
+        """Descarta las URLs vencidas; si el cache sigue lleno lo vacía"""
+        vencidas = [k for k, (_, vence) in self._presigned_cache.items() if vence - PRESIGNED_URL_RENEW_MARGIN <= ahora]
+        for k in vencidas:
+            del self._presigned_cache[k]
+        if len(self._presigned_cache) >= PRESIGNED_URL_CACHE_MAX:
+            self._presigned_cache.clear()
+
     def delete_file(self, file_key: str) -> Tuple[bool, str]:
         """Elimina un archivo de iDrive"""
         try:
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.startup import startup_events, shutdown_events
+from app.core.rate_limit_middleware import RateLimitMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
@@ -106,6 +107,11 @@ app = FastAPI(
 )
 
 
+# Rate limiting de endpoints públicos costosos.
+# Se registra antes que CORS para quedar dentro de él: las respuestas 429 llevan headers CORS
+# y los preflight OPTIONS no consumen cupo.
+app.add_middleware(RateLimitMiddleware)
+
 # Configurar CORS para permitir comunicación con el frontend
 #es mejor que el middleware CORS esté lo más arriba posible en la pila de middlewares
 # de lo contrario, algunas solicitudes podrían no ser manejadas correctamente.
@@ -224,6 +230,7 @@ async def health_check():
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "database": db_status,
+            "db_pool": direct_db_service.get_pool_metrics(),
             "uptime": "active"
         }
     except Exception as e:
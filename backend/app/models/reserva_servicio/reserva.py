@@ -2,9 +2,9 @@
 from typing import Optional
 from uuid import UUID, uuid4
 from datetime import date, time
-from sqlalchemy import Column, String, ForeignKey, Date, BigInteger, Time
+from sqlalchemy import Column, Computed, String, ForeignKey, Date, BigInteger, Time
 from sqlalchemy.orm import Mapped, relationship
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import TSRANGE, UUID as PG_UUID
 from typing import TYPE_CHECKING
 
 from app.supabase.db.db_supabase import Base
@@ -28,6 +28,17 @@ class ReservaModel(Base):
     hora_fin: Mapped[time] = Column(Time, nullable=False)
     
     estado: Mapped[str] = Column(String(20), nullable=False, default="pendiente")
+
+    # Columna generada [fecha + hora_inicio, fecha + hora_fin) (migrations/add_periodo_reserva.sql),
+    # termina al día siguiente si la reserva cruza la medianoche. Solo lectura.
+    periodo = Column(
+        TSRANGE,
+        Computed(
+            "tsrange(fecha + hora_inicio, fecha + hora_fin + CASE WHEN hora_fin <= hora_inicio "
+            "THEN INTERVAL '1 day' ELSE INTERVAL '0 days' END, '[)')",
+            persisted=True
+        )
+    )
     
     # ELIMINADO: id_disponibilidad (ya no se necesita)
     
@@ -5,16 +5,13 @@ Centraliza todas las consultas a la base de datos.
 Capa de Acceso a Datos (Data Access Layer).
 """
 
+import json
 import uuid
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 import asyncpg
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 
 from app.services.direct_db_service import direct_db_service
-from app.models.empresa.perfil_empresa import PerfilEmpresa
-from app.models.empresa.verificacion_solicitud import VerificacionSolicitud
+from app.services.location_gazetteer import location_gazetteer
 from app.api.v1.routers.providers.constants import (
     MSG_PERFIL_USUARIO_NO_ENCONTRADO,
     MSG_RAZON_SOCIAL_NO_CONFIGURADA,
@@ -24,6 +21,145 @@ from app.api.v1.routers.providers.constants import (
 )
 from fastapi import HTTPException, status
 
+# Agregado de verificación de un usuario en un solo round trip: perfil de empresa, última
+# solicitud, dirección, sucursal principal y el documento más reciente de cada tipo.
+# Cada CTE parte de `empresa`, así que si el usuario no tiene perfil todo el documento es null.
+VERIFICATION_AGGREGATE_QUERY = """
+    WITH empresa AS (
+        SELECT
+            pe.id_perfil,
+            pe.razon_social,
+            pe.nombre_fantasia,
+            pe.estado,
+            pe.verificado,
+            pe.fecha_inicio,
+            pe.fecha_fin,
+            pe.id_direccion,
+            pe.user_id
+        FROM perfil_empresa pe
+        WHERE pe.user_id = $1
+        LIMIT 1
+    ),
+    ultima_solicitud AS (
+        SELECT
+            vs.id_verificacion,
+            vs.id_perfil,
+            vs.estado,
+            vs.fecha_solicitud,
+            vs.fecha_revision,
+            vs.comentario,
+            vs.created_at
+        FROM verificacion_solicitud vs
+        JOIN empresa e ON vs.id_perfil = e.id_perfil
+        ORDER BY vs.created_at DESC
+        LIMIT 1
+    ),
+    direccion_empresa AS (
+        SELECT
+            d.calle,
+            d.numero,
+            d.referencia,
+            dep.nombre AS departamento,
+            c.nombre AS ciudad,
+            b.nombre AS barrio
+        FROM direccion d
+        JOIN empresa e ON d.id_direccion = e.id_direccion
+        LEFT JOIN departamento dep ON d.id_departamento = dep.id_departamento
+        LEFT JOIN ciudad c ON d.id_ciudad = c.id_ciudad
+        LEFT JOIN barrio b ON d.id_barrio = b.id_barrio
+    ),
+    sucursal_principal AS (
+        SELECT s.nombre, s.telefono, s.email
+        FROM sucursal_empresa s
+        JOIN empresa e ON s.id_perfil = e.id_perfil
+        ORDER BY s.created_at ASC
+        LIMIT 1
+    ),
+    documentos_recientes AS (
+        SELECT DISTINCT ON (d.id_tip_documento)
+            d.id_documento,
+            d.id_tip_documento,
+            COALESCE(td.tipo_documento, 'Tipo ' || d.id_tip_documento) AS tipo_documento,
+            COALESCE(td.es_requerido, false) AS es_requerido,
+            d.estado_revision,
+            d.url_archivo,
+            d.fecha_verificacion,
+            d.observacion,
+            d.created_at
+        FROM documento d
+        JOIN verificacion_solicitud vs ON d.id_verificacion = vs.id_verificacion
+        JOIN empresa e ON vs.id_perfil = e.id_perfil
+        LEFT JOIN tipo_documento td ON d.id_tip_documento = td.id_tip_documento
+        ORDER BY d.id_tip_documento, d.created_at DESC
+    )
+    SELECT json_build_object(
+        'empresa', (SELECT row_to_json(e) FROM empresa e),
+        'solicitud', (SELECT row_to_json(s) FROM ultima_solicitud s),
+        'direccion', (SELECT row_to_json(d) FROM direccion_empresa d),
+        'sucursal', (SELECT row_to_json(s) FROM sucursal_principal s),
+        'documentos', COALESCE(
+            (
+                SELECT json_agg(
+                    json_build_object(
+                        'id_documento', doc.id_documento,
+                        'tipo_documento', doc.tipo_documento,
+                        'es_requerido', doc.es_requerido,
+                        'estado_revision', doc.estado_revision,
+                        'url_archivo', doc.url_archivo,
+                        'fecha_verificacion', doc.fecha_verificacion,
+                        'observacion', doc.observacion,
+                        'created_at', doc.created_at
+                    ) ORDER BY doc.id_tip_documento
+                )
+                FROM documentos_recientes doc
+            ),
+            '[]'::json
+        )
+    )
+"""
+
+
+# Documentos de la última solicitud de verificación del usuario con el nombre de su tipo,
+# en un solo round trip. empresa y solicitud vienen en null si no existen.
+LATEST_REQUEST_DOCUMENTS_QUERY = """
+    WITH empresa AS (
+        SELECT pe.id_perfil
+        FROM perfil_empresa pe
+        WHERE pe.user_id = $1
+        LIMIT 1
+    ),
+    ultima_solicitud AS (
+        SELECT vs.id_verificacion, vs.estado
+        FROM verificacion_solicitud vs
+        JOIN empresa e ON vs.id_perfil = e.id_perfil
+        ORDER BY vs.created_at DESC
+        LIMIT 1
+    )
+    SELECT json_build_object(
+        'empresa', (SELECT row_to_json(e) FROM empresa e),
+        'solicitud', (SELECT row_to_json(s) FROM ultima_solicitud s),
+        'documentos', COALESCE(
+            (
+                SELECT json_agg(
+                    json_build_object(
+                        'id_documento', d.id_documento,
+                        'tipo_documento', td.tipo_documento,
+                        'es_requerido', COALESCE(td.es_requerido, false),
+                        'estado_revision', d.estado_revision,
+                        'url_archivo', d.url_archivo,
+                        'fecha_verificacion', d.fecha_verificacion,
+                        'observacion', d.observacion,
+                        'created_at', d.created_at
+                    ) ORDER BY d.id_documento
+                )
+                FROM documento d
+                JOIN ultima_solicitud s ON d.id_verificacion = s.id_verificacion
+                LEFT JOIN tipo_documento td ON d.id_tip_documento = td.id_tip_documento
+            ),
+            '[]'::json
+        )
+    )
+"""
 
 class ProviderRepository:
     """
@@ -73,7 +209,7 @@ class ProviderRepository:
             return user_profile
         finally:
             if conn:
-                await direct_db_service.pool.release(conn)
+                await direct_db_service.release_connection(conn)
 
     @staticmethod
     async def validate_company_uniqueness(
@@ -118,93 +254,41 @@ class ProviderRepository:
             return None
         finally:
             if conn:
-                await direct_db_service.pool.release(conn)
+                await direct_db_service.release_connection(conn)
 
     @staticmethod
     async def find_location_data(direccion_data: dict) -> tuple:
         """
-        Busca y valida departamento, ciudad y barrio.
-        Retorna objetos con estructura compatible con los modelos ORM.
+        Busca y valida departamento, ciudad y barrio en el gazetteer en memoria
+        (sin distinguir tildes ni mayúsculas, sin consultar la base de datos).
+        Retorna objetos con los mismos atributos que los modelos ORM.
         """
-        conn = None
-        try:
-            conn = await direct_db_service.get_connection()
-            
-            # Buscar departamento
-            dept_query = "SELECT id_departamento, nombre, created_at FROM departamento WHERE nombre = $1"
-            dept_row = await conn.fetchrow(dept_query, direccion_data['departamento'])
-            
-            if not dept_row:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=MSG_DEPARTAMENTO_NO_ENCONTRADO.format(departamento=direccion_data['departamento'])
-                )
-            
-            # Crear objeto departamento compatible
-            departamento = type('Departamento', (), {
-                'id_departamento': dept_row['id_departamento'],
-                'nombre': dept_row['nombre'],
-                'created_at': dept_row['created_at']
-            })()
-            
-            # Buscar ciudad
-            ciudad_query = """
-                SELECT id_ciudad, nombre, id_departamento, created_at 
-                FROM ciudad 
-                WHERE nombre = $1 AND id_departamento = $2
-            """
-            ciudad_row = await conn.fetchrow(
-                ciudad_query, 
-                direccion_data['ciudad'], 
-                departamento.id_departamento
+        departamento = await location_gazetteer.buscar_departamento(direccion_data['departamento'])
+        if not departamento:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=MSG_DEPARTAMENTO_NO_ENCONTRADO.format(departamento=direccion_data['departamento'])
             )
-            
-            if not ciudad_row:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=MSG_CIUDAD_NO_ENCONTRADA.format(
-                        ciudad=direccion_data['ciudad'], 
-                        departamento=direccion_data['departamento']
-                    )
-                )
-            
-            # Crear objeto ciudad compatible
-            ciudad = type('Ciudad', (), {
-                'id_ciudad': ciudad_row['id_ciudad'],
-                'nombre': ciudad_row['nombre'],
-                'id_departamento': ciudad_row['id_departamento'],
-                'created_at': ciudad_row['created_at']
-            })()
-            
-            # Buscar barrio (opcional)
-            barrio = None
-            barrio_value = direccion_data.get('barrio')
-            if barrio_value and isinstance(barrio_value, str) and barrio_value.strip():
-                barrio_query = """
-                    SELECT id_barrio, nombre, id_ciudad 
-                    FROM barrio 
-                    WHERE nombre = $1 AND id_ciudad = $2
-                """
-                barrio_row = await conn.fetchrow(
-                    barrio_query,
-                    direccion_data['barrio'],
-                    ciudad.id_ciudad
+        
+        ciudad = await location_gazetteer.buscar_ciudad(direccion_data['ciudad'], departamento.id_departamento)
+        if not ciudad:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=MSG_CIUDAD_NO_ENCONTRADA.format(
+                    ciudad=direccion_data['ciudad'], 
+                    departamento=direccion_data['departamento']
                 )
-                
-                if barrio_row:
-                    # Crear objeto barrio compatible
-                    barrio = type('Barrio', (), {
-                        'id_barrio': barrio_row['id_barrio'],
-                        'nombre': barrio_row['nombre'],
-                        'id_ciudad': barrio_row['id_ciudad']
-                    })()
-                else:
-                    print(f"⚠️ Barrio '{direccion_data['barrio']}' no encontrado, continuando sin barrio")
-            
-            return departamento, ciudad, barrio
-        finally:
-            if conn:
-                await direct_db_service.pool.release(conn)
+            )
+        
+        # Buscar barrio (opcional)
+        barrio = None
+        barrio_value = direccion_data.get('barrio')
+        if barrio_value and isinstance(barrio_value, str) and barrio_value.strip():
+            barrio = await location_gazetteer.buscar_barrio(barrio_value, ciudad.id_ciudad)
+            if not barrio:
+                print(f"⚠️ Barrio '{direccion_data['barrio']}' no encontrado, continuando sin barrio")
+        
+        return departamento, ciudad, barrio
 
     @staticmethod
     async def get_tipo_documento_by_name(conn: asyncpg.Connection, nombre_tip_documento: str) -> Optional[dict]:
@@ -228,6 +312,38 @@ class ProviderRepository:
         
         return {'id_tip_documento': tipo_doc_row['id_tip_documento']}
 
+    @staticmethod
+    async def get_tipos_documento_by_names(conn: asyncpg.Connection, nombres_tip_documento: List[str]) -> Dict[str, int]:
+        """Obtiene los ids de varios tipos de documento en una consulta: {nombre: id_tip_documento}"""
+        rows = await conn.fetch("""
+            SELECT id_tip_documento, tipo_documento FROM tipo_documento WHERE tipo_documento = ANY($1::text[])
+        """, list(set(nombres_tip_documento)))
+        tipos = {row['tipo_documento']: row['id_tip_documento'] for row in rows}
+        
+        faltantes = [nombre for nombre in nombres_tip_documento if nombre not in tipos]
+        if faltantes:
+            # Resolver el primero faltante con el método individual (mismo error 400 con los tipos disponibles)
+            await ProviderRepository.get_tipo_documento_by_name(conn, faltantes[0])
+        
+        return tipos
+
+    @staticmethod
+    async def get_existing_documents(
+        conn: asyncpg.Connection,
+        id_perfil: int,
+        ids_tip_documento: List[int]
+    ) -> Dict[int, int]:
+        """Último documento de cada tipo para un perfil: {id_tip_documento: id_documento}"""
+        rows = await conn.fetch("""
+            SELECT DISTINCT ON (d.id_tip_documento) d.id_tip_documento, d.id_documento
+            FROM documento d
+            JOIN verificacion_solicitud vs ON d.id_verificacion = vs.id_verificacion
+            WHERE vs.id_perfil = $1 AND d.id_tip_documento = ANY($2::bigint[])
+            ORDER BY d.id_tip_documento, d.created_at DESC
+        """, id_perfil, list(set(ids_tip_documento)))
+        
+        return {row['id_tip_documento']: row['id_documento'] for row in rows}
+
     @staticmethod
     async def get_existing_document(
         conn: asyncpg.Connection,
@@ -247,44 +363,36 @@ class ProviderRepository:
         return dict(doc_existente) if doc_existente else None
 
     @staticmethod
-    async def get_empresa_with_sucursales_orm(
-        db: AsyncSession,
-        user_id: str
-    ) -> PerfilEmpresa:
-        """Obtiene el perfil de empresa del usuario con relación de sucursales usando ORM"""
-        empresa_query = select(PerfilEmpresa).options(
-            selectinload(PerfilEmpresa.sucursal_empresa)
-        ).where(PerfilEmpresa.user_id == uuid.UUID(user_id))
-        empresa_result = await db.execute(empresa_query)
-        empresa = empresa_result.scalars().first()
+    async def get_verification_aggregate(conn: asyncpg.Connection, user_id: str) -> Optional[dict]:
+        """
+        Obtiene empresa, última solicitud, dirección, sucursal principal y documentos del usuario
+        en una sola consulta (VERIFICATION_AGGREGATE_QUERY).
+        Retorna None si el usuario no tiene perfil de empresa; solicitud, dirección y sucursal
+        pueden venir en None y documentos como lista vacía.
+        """
+        agregado = await conn.fetchval(VERIFICATION_AGGREGATE_QUERY, user_id)
+        # asyncpg entrega json como texto salvo que la conexión tenga un codec registrado
+        if isinstance(agregado, str):
+            agregado = json.loads(agregado)
         
-        if not empresa:
-            from app.api.v1.routers.providers.constants import MSG_PERFIL_EMPRESA_NO_ENCONTRADO
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=MSG_PERFIL_EMPRESA_NO_ENCONTRADO
-            )
-        return empresa
+        if not agregado or not agregado.get("empresa"):
+            return None
+        return agregado
 
     @staticmethod
-    async def get_latest_verification_request_orm(
-        db: AsyncSession,
-        perfil_id: int
-    ) -> VerificacionSolicitud:
-        """Obtiene la solicitud de verificación más reciente para un perfil usando ORM"""
-        solicitud_query = select(VerificacionSolicitud).where(
-            VerificacionSolicitud.id_perfil == perfil_id
-        ).order_by(VerificacionSolicitud.created_at.desc())
-        solicitud_result = await db.execute(solicitud_query)
-        solicitud = solicitud_result.scalars().first()
+    async def get_latest_request_documents(conn: asyncpg.Connection, user_id: str) -> Optional[dict]:
+        """
+        Obtiene la última solicitud de verificación del usuario y sus documentos con el tipo
+        en una sola consulta (LATEST_REQUEST_DOCUMENTS_QUERY).
+        Retorna None si el usuario no tiene perfil de empresa; solicitud puede venir en None.
+        """
+        resultado = await conn.fetchval(LATEST_REQUEST_DOCUMENTS_QUERY, user_id)
+        if isinstance(resultado, str):
+            resultado = json.loads(resultado)
         
-        if not solicitud:
-            from app.api.v1.routers.providers.constants import MSG_SOLICITUD_VERIFICACION_NO_ENCONTRADA
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=MSG_SOLICITUD_VERIFICACION_NO_ENCONTRADA
-            )
-        return solicitud
+        if not resultado or not resultado.get("empresa"):
+            return None
+        return resultado
 
     # ========== MÉTODOS DE ESCRITURA (INSERT/UPDATE) ==========
     # Estos métodos ejecutan SQL directamente - pertenecen a la capa de acceso a datos
@@ -449,6 +557,20 @@ class ProviderRepository:
             VALUES ($1, $2, $3, $4)
         """, id_verificacion, id_tip_documento, url_archivo, estado_revision)
 
+    @staticmethod
+    async def create_documents(
+        conn: asyncpg.Connection,
+        documentos: Sequence[Tuple[int, int, str, str]]
+    ) -> None:
+        """
+        Crea varios documentos en un solo executemany.
+        Cada fila: (id_verificacion, id_tip_documento, url_archivo, estado_revision).
+        """
+        await conn.executemany("""
+            INSERT INTO documento (id_verificacion, id_tip_documento, url_archivo, estado_revision)
+            VALUES ($1, $2, $3, $4)
+        """, documentos)
+
     @staticmethod
     async def update_document(
         conn: asyncpg.Connection,
@@ -469,6 +591,22 @@ class ProviderRepository:
             WHERE id_documento = $5
         """, url_archivo, estado_revision, fecha_verificacion, id_verificacion, id_documento)
 
+    @staticmethod
+    async def update_documents(
+        conn: asyncpg.Connection,
+        documentos: Sequence[Tuple]
+    ) -> None:
+        """
+        Actualiza varios documentos existentes en un solo executemany.
+        Cada fila: (url_archivo, estado_revision, fecha_verificacion, id_verificacion, id_documento).
+        """
+        await conn.executemany("""
+            UPDATE documento 
+            SET url_archivo = $1, estado_revision = $2, observacion = NULL,
+                fecha_verificacion = $3, id_verificacion = $4
+            WHERE id_documento = $5
+        """, documentos)
+
     @staticmethod
     async def get_approved_ruc_for_user(
         conn: asyncpg.Connection,
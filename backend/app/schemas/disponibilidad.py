@@ -1,7 +1,7 @@
 # backend/app/schemas/disponibilidad.py
 from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, date, time
+from typing import List, Optional
 
 class DisponibilidadIn(BaseModel):
     """
@@ -40,3 +40,19 @@ class DisponibilidadUpdate(BaseModel):
     disponible: Optional[bool] = None
     precio_adicional: Optional[float] = Field(None, ge=0)
     observaciones: Optional[str] = Field(None, max_length=500)
+
+class ServicioConDisponibilidadOut(BaseModel):
+    """
+    Schema para un servicio con horarios libres en la ventana de búsqueda.
+    """
+    id_servicio: int
+    nombre: str
+    id_categoria: Optional[int]
+    id_perfil: int
+    razon_social: Optional[str]
+    departamento: Optional[str]
+    ciudad: Optional[str]
+    primera_fecha: date
+    primer_slot: time
+    slots_libres: int
+    fechas: List[date]
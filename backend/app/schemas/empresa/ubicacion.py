@@ -0,0 +1,24 @@
+# app/schemas/ubicacion.py
+
+from typing import Optional
+from pydantic import BaseModel
+
+
+class UbicacionSugerenciaOut(BaseModel):
+
+    '''
+    Este modelo se utiliza para serializar una sugerencia del autocompletado de ubicaciones
+    (departamento, ciudad o barrio) junto con los nombres de sus niveles superiores.
+    '''
+
+    tipo: str
+    id: int
+    nombre: str
+    id_departamento: int
+    departamento: str
+    id_ciudad: Optional[int] = None
+    ciudad: Optional[str] = None
+
+    class Config:
+        # Habilita la construcción desde objetos con atributos (SugerenciaUbicacion)
+        from_attributes = True
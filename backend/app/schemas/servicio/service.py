@@ -1,6 +1,6 @@
 # app/schemas/servicio.py
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 class ServicioIn(BaseModel):
@@ -74,6 +74,9 @@ class ServicioWithProvider(BaseModel):
     codigo_iso_moneda: Optional[str] = None  # Código ISO de la moneda (ej: PYG, USD)
     nombre_moneda: Optional[str] = None  # Nombre de la moneda (ej: Guaraní, Dólar)
     simbolo_moneda: Optional[str] = None  # Símbolo de la moneda (ej: ₲, $)
+    # Variantes WebP de la imagen ({ancho: URL}) y srcset listo para <img>; None en imágenes anteriores al pipeline
+    imagen_variantes: Optional[Dict[int, str]] = None
+    imagen_srcset: Optional[str] = None
     # Tarifas del servicio
     tarifas: List[TarifaServicio] = []
 
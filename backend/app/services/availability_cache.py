@@ -0,0 +1,113 @@
+"""
+Cache de disponibilidad (slots libres) por proveedor, servicio y rango de fechas.
+
+Los slots dependen de horario_trabajo, excepciones_horario y reserva, que cambian
+mucho menos de lo que se consultan. Cada proveedor tiene una generación (un
+token que nunca se repite) que forma parte de la clave; los endpoints que
+modifican esas tablas la reemplazan, así todas las entradas del proveedor quedan
+obsoletas a la vez sin recorrer claves (ni SCAN en Redis). Una carga que empezó
+antes de la invalidación guarda su resultado con la generación anterior y nadie
+vuelve a leerlo. El TTL solo cubre cambios hechos fuera de la API.
+"""
+import logging
+import time
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import AVAILABILITY_CACHE_TTL
+from app.core.redis_config import SOURCE_COALESCED, SOURCE_LOAD, CacheService, cache_key, redis_cache
+from app.services.availability_engine import Slot
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+AVAILABILITY_CACHE_PREFIX = "disponibilidad"
+GENERATION_KEY = "gen"
+ALL_SERVICES = "todos"
+NO_EXPIRY = 0
+
+
+class AvailabilityCache:
+    """Slots libres cacheados con invalidación por proveedor y métricas de aciertos"""
+
+    def __init__(self, cache: CacheService = redis_cache, ttl: int = AVAILABILITY_CACHE_TTL):
+        self.cache = cache
+        self.ttl = ttl
+        self._metrics: Dict[str, int] = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+    @staticmethod
+    def _generation_key(proveedor_id: int) -> str:
+        return cache_key(AVAILABILITY_CACHE_PREFIX, proveedor_id, GENERATION_KEY)
+
+    async def _new_generation(self, proveedor_id: int) -> int:
+        """Nueva generación para el proveedor: las entradas con otra generación dejan de leerse"""
+        generation = time.time_ns()
+        await self.cache.set(self._generation_key(proveedor_id), generation, ttl=NO_EXPIRY)
+        return generation
+
+    async def _generation(self, proveedor_id: int) -> int:
+        generation = await self.cache.get(self._generation_key(proveedor_id))
+        if generation is None:
+            # Sin generación (primer uso o desalojada del LRU): nunca se reutiliza un valor anterior
+            generation = await self._new_generation(proveedor_id)
+        return generation
+
+    async def get_slots(
+        self,
+        proveedor_id: int,
+        servicio_id: Optional[int],
+        fecha_inicio: date,
+        fecha_fin: date,
+        duracion: int,
+        loader: Callable[[], Awaitable[List[Slot]]]
+    ) -> List[Slot]:
+        """
+        Devuelve los slots del rango desde el cache o los calcula con `loader`.
+        Sin servicio_id la entrada corresponde a la disponibilidad de todo el proveedor.
+        """
+        generation = await self._generation(proveedor_id)
+        key = cache_key(
+            AVAILABILITY_CACHE_PREFIX,
+            proveedor_id,
+            generation,
+            servicio_id if servicio_id is not None else ALL_SERVICES,
+            fecha_inicio.isoformat(),
+            fecha_fin.isoformat(),
+            duracion
+        )
+        stored, source = await self.cache.get_or_set_with_source(key, loader, self.ttl)
+        if source == SOURCE_LOAD:
+            self._metrics["misses"] += 1
+            return stored
+        if source == SOURCE_COALESCED:
+            # Esperó la carga de otra petición: no se leyó del cache, no cuenta como acierto
+            self._metrics["coalesced"] += 1
+        else:
+            self._metrics["hits"] += 1
+        # Desde el backend llegan como listas JSON: [fecha ISO, inicio, fin]
+        return [
+            (fecha if isinstance(fecha, date) else date.fromisoformat(fecha), inicio, fin)
+            for fecha, inicio, fin in stored
+        ]
+
+    async def invalidate_provider(self, proveedor_id: int) -> None:
+        """Deja obsoletas todas las entradas del proveedor (horarios, excepciones o reservas cambiaron)"""
+        generation = await self._new_generation(proveedor_id)
+        self._metrics["invalidations"] += 1
+        logger.debug(f"🗑️ Cache de disponibilidad invalidado para proveedor {proveedor_id} (generación {generation})")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas acumuladas del proceso actual"""
+        lookups = self._metrics["hits"] + self._metrics["misses"] + self._metrics["coalesced"]
+        metrics: Dict[str, Any] = dict(self._metrics)
+        metrics["hit_ratio"] = round(self._metrics["hits"] / lookups, 4) if lookups else 0.0
+        metrics["ttl"] = self.ttl
+        return metrics
+
+    def reset_metrics(self) -> None:
+        for name in self._metrics:
+            self._metrics[name] = 0
+
+
+# Instancia global del servicio
+availability_cache = AvailabilityCache()
@@ -0,0 +1,236 @@
+"""
+Motor de disponibilidad por rango de fechas.
+
+Núcleo común de los routers horarios_disponibles y disponibilidades. Carga la
+plantilla semanal (horario_trabajo), las excepciones y las reservas confirmadas
+de todo el rango en tres consultas, y calcula los slots libres de cada día con
+un barrido sobre intervalos ordenados (en minutos desde las 00:00):
+O(slots + reservas) por día en lugar de comparar cada slot con cada reserva.
+
+Los slots se representan como tuplas (fecha, inicio, fin) hasta que cada router
+los serializa a su schema de respuesta.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.horario_trabajo import HorarioTrabajoModel, ExcepcionHorarioModel
+from app.models.reserva_servicio.reserva import ReservaModel
+from app.models.servicio.service import ServicioModel
+from app.services.reserva_booking_service import fechas_periodo, periodo_reserva
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+TIPO_EXCEPCION_CERRADO = "cerrado"
+TIPO_EXCEPCION_HORARIO_ESPECIAL = "horario_especial"
+ESTADO_CONFIRMADA = "confirmada"
+MINUTOS_POR_DIA = 24 * 60
+
+Intervalo = Tuple[int, int]  # [inicio, fin) en minutos desde las 00:00
+Slot = Tuple[date, int, int]  # (fecha, inicio, fin) en minutos
+
+
+def to_minutes(value: time) -> int:
+    """Minutos desde las 00:00 (ignora segundos)"""
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(minutes: int) -> time:
+    """Hora a partir de minutos desde las 00:00 (24:00 se representa como 23:59:59)"""
+    if minutes >= MINUTOS_POR_DIA:
+        return time(23, 59, 59)
+    return time(minutes // 60, minutes % 60)
+
+
+def merge_intervals(intervals: Iterable[Intervalo]) -> List[Intervalo]:
+    """Ordena y fusiona intervalos solapados o contiguos"""
+    merged: List[Intervalo] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slot_starts(start: int, end: int, duracion: int, ocupados: List[Intervalo]) -> List[int]:
+    """
+    Inicios de los slots de la grilla [start, end) con paso `duracion` que no se
+    solapan con ningún intervalo ocupado. `ocupados` debe estar ordenado y fusionado.
+    """
+    libres: List[int] = []
+    j = 0
+    n = len(ocupados)
+    slot = start
+    while slot + duracion <= end:
+        slot_fin = slot + duracion
+        # Descartar intervalos ocupados que terminan antes de este slot
+        while j < n and ocupados[j][1] <= slot:
+            j += 1
+        if j >= n or ocupados[j][0] >= slot_fin:
+            libres.append(slot)
+        slot = slot_fin
+    return libres
+
+
+def intervalos_reserva(fecha: date, hora_inicio: time, hora_fin: time) -> List[Tuple[date, Intervalo]]:
+    """
+    Intervalo que ocupa una reserva en cada día de su periodo: una reserva de 23:30 a
+    00:30 ocupa (1410, 1440) de su fecha y (0, 30) del día siguiente.
+    """
+    inicio, fin = periodo_reserva(fecha, hora_inicio, hora_fin)
+    intervalos: List[Tuple[date, Intervalo]] = []
+    for dia in fechas_periodo(fecha, hora_inicio, hora_fin):
+        comienzo_dia = datetime.combine(dia, time.min)
+        desde = max(inicio, comienzo_dia) - comienzo_dia
+        hasta = min(fin, comienzo_dia + timedelta(days=1)) - comienzo_dia
+        intervalos.append((dia, (int(desde.total_seconds()) // 60, int(hasta.total_seconds()) // 60)))
+    return intervalos
+
+
+@dataclass
+class DatosRango:
+    """Entradas del cálculo de disponibilidad para un proveedor y rango de fechas"""
+    horarios: Dict[int, Intervalo] = field(default_factory=dict)  # dia_semana -> horario base
+    excepciones: Dict[date, Tuple[str, Optional[Intervalo]]] = field(default_factory=dict)
+    reservas: Dict[date, List[Intervalo]] = field(default_factory=dict)  # ya fusionadas
+
+
+def horario_efectivo(datos: DatosRango, fecha: date) -> Optional[Intervalo]:
+    """Horario del día aplicando excepciones (None si no se trabaja)"""
+    base = datos.horarios.get(fecha.weekday())
+    if base is None:
+        return None
+    excepcion = datos.excepciones.get(fecha)
+    if excepcion is not None:
+        tipo, intervalo = excepcion
+        if tipo == TIPO_EXCEPCION_CERRADO:
+            return None
+        if tipo == TIPO_EXCEPCION_HORARIO_ESPECIAL and intervalo is not None:
+            return intervalo
+    return base
+
+
+def construir_datos_rango(
+    horarios: Iterable[Any],
+    excepciones: Iterable[Any] = (),
+    reservas: Iterable[Any] = ()
+) -> DatosRango:
+    """
+    Arma las entradas del cálculo a partir de filas de la base de datos (Row de
+    SQLAlchemy o Record de asyncpg, desempaquetables como tuplas):
+    horarios (dia_semana, hora_inicio, hora_fin), excepciones (fecha, tipo,
+    hora_inicio, hora_fin) y reservas (fecha, hora_inicio, hora_fin).
+    Si hay varios horarios para el mismo día prevalece el último. Las reservas que
+    cruzan la medianoche bloquean el final de su fecha y el comienzo del día siguiente.
+    """
+    datos = DatosRango()
+    for dia_semana, hora_inicio, hora_fin in horarios:
+        datos.horarios[dia_semana] = (to_minutes(hora_inicio), to_minutes(hora_fin))
+    for fecha, tipo, hora_inicio, hora_fin in excepciones:
+        intervalo = (to_minutes(hora_inicio), to_minutes(hora_fin)) if hora_inicio and hora_fin else None
+        datos.excepciones[fecha] = (tipo, intervalo)
+    por_fecha: Dict[date, List[Intervalo]] = {}
+    for fecha, hora_inicio, hora_fin in reservas:
+        for dia, intervalo in intervalos_reserva(fecha, hora_inicio, hora_fin):
+            por_fecha.setdefault(dia, []).append(intervalo)
+    datos.reservas = {fecha: merge_intervals(intervalos) for fecha, intervalos in por_fecha.items()}
+    return datos
+
+
+def calcular_slots_rango(datos: DatosRango, fecha_inicio: date, fecha_fin: date, duracion: int) -> List[Slot]:
+    """Slots libres de todo el rango en una sola pasada"""
+    slots: List[Slot] = []
+    fecha = fecha_inicio
+    un_dia = timedelta(days=1)
+    while fecha <= fecha_fin:
+        intervalo = horario_efectivo(datos, fecha)
+        if intervalo is not None:
+            inicio, fin = intervalo
+            for slot in free_slot_starts(inicio, fin, duracion, datos.reservas.get(fecha, [])):
+                slots.append((fecha, slot, slot + duracion))
+        fecha += un_dia
+    return slots
+
+
+async def cargar_datos_rango(
+    db: AsyncSession,
+    proveedor_id: int,
+    fecha_inicio: date,
+    fecha_fin: date,
+    servicio_id: Optional[int] = None
+) -> DatosRango:
+    """
+    Carga horarios, excepciones y reservas confirmadas del rango (tres consultas).
+    Las reservas se buscan por solapamiento de periodo, así entra también la del día
+    anterior que termina después de la medianoche. Con servicio_id solo se consideran las reservas de ese servicio; si no, las de
+    todos los servicios del proveedor.
+    """
+    horarios_result = await db.execute(
+        select(
+            HorarioTrabajoModel.dia_semana,
+            HorarioTrabajoModel.hora_inicio,
+            HorarioTrabajoModel.hora_fin
+        ).where(
+            and_(
+                HorarioTrabajoModel.id_proveedor == proveedor_id,
+                HorarioTrabajoModel.activo == True
+            )
+        ).order_by(HorarioTrabajoModel.id_horario)
+    )
+    horarios = horarios_result.all()
+    if not horarios:
+        return DatosRango()
+
+    excepciones_result = await db.execute(
+        select(
+            ExcepcionHorarioModel.fecha,
+            ExcepcionHorarioModel.tipo,
+            ExcepcionHorarioModel.hora_inicio,
+            ExcepcionHorarioModel.hora_fin
+        ).where(
+            and_(
+                ExcepcionHorarioModel.id_proveedor == proveedor_id,
+                ExcepcionHorarioModel.fecha >= fecha_inicio,
+                ExcepcionHorarioModel.fecha <= fecha_fin
+            )
+        )
+    )
+
+    reservas_query = select(
+        ReservaModel.fecha,
+        ReservaModel.hora_inicio,
+        ReservaModel.hora_fin
+    ).where(
+        and_(
+            ReservaModel.periodo.op("&&")(func.tsrange(
+                datetime.combine(fecha_inicio, time.min),
+                datetime.combine(fecha_fin + timedelta(days=1), time.min),
+                literal("[)")
+            )),
+            ReservaModel.estado == ESTADO_CONFIRMADA
+        )
+    )
+    if servicio_id is not None:
+        reservas_query = reservas_query.where(ReservaModel.id_servicio == servicio_id)
+    else:
+        reservas_query = reservas_query.join(
+            ServicioModel, ReservaModel.id_servicio == ServicioModel.id_servicio
+        ).where(ServicioModel.id_perfil == proveedor_id)
+    reservas_result = await db.execute(reservas_query)
+
+    # Si hay varios horarios para el mismo día, prevalece el más reciente (mayor id_horario)
+    datos = construir_datos_rango(horarios, excepciones_result.all(), reservas_result.all())
+    logger.debug(
+        f"📅 Disponibilidad proveedor {proveedor_id} {fecha_inicio}..{fecha_fin}: "
+        f"{len(datos.horarios)} días base, {len(datos.excepciones)} excepciones, {len(datos.reservas)} días con reservas"
+    )
+    return datos
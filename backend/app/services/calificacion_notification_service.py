@@ -8,14 +8,18 @@ from typing import Optional
 from datetime import datetime
 import os
 from app.services.gmail_smtp_service import gmail_smtp_service
+from app.core.shared_store import shared_store
 
 logger = logging.getLogger(__name__)
 
+# Prefijo y retención de las marcas de notificación enviada (anti-spam)
+SENT_NOTIFICATION_KEY_PREFIX = "calificacion_notif"
+SENT_NOTIFICATION_TTL_SECONDS = 30 * 24 * 3600
+
 class CalificacionNotificationService:
     """Servicio para envío de notificaciones de calificaciones por correo"""
     
     def __init__(self):
-        self._sent_notifications = set()  # Cache para evitar duplicados
         self.frontend_url = os.getenv("FRONTEND_URL", "https://frontend-production-ee3b.up.railway.app")
     
     def _get_frontend_links(self) -> dict:
@@ -60,7 +64,7 @@ class CalificacionNotificationService:
         else:
             return "no recomendaría"
     
-    def _send_notification(
+    async def _send_notification(
         self,
         to_email: str,
         subject: str,
@@ -78,8 +82,9 @@ class CalificacionNotificationService:
             text_content: Contenido texto plano
             notification_key: Clave única para evitar duplicados
         """
-        # Anti-spam: verificar si ya se envió
-        if notification_key in self._sent_notifications:
+        # Anti-spam: marcar como enviada de forma atómica antes de enviar (un solo worker gana)
+        sent_key = f"{SENT_NOTIFICATION_KEY_PREFIX}:{notification_key}"
+        if not await shared_store.add(sent_key, datetime.now().isoformat(), ttl=SENT_NOTIFICATION_TTL_SECONDS):
             logger.info(f"⚠️ Notificación ya enviada: {notification_key}")
             return False
         
@@ -92,22 +97,23 @@ class CalificacionNotificationService:
             )
             
             if result:
-                self._sent_notifications.add(notification_key)
                 logger.info(f"✅ Email enviado a {to_email}: {subject}")
                 return True
             else:
                 logger.error(f"❌ Error enviando email a {to_email}")
-                return False
                 
         except Exception as e:
             logger.error(f"❌ Excepción enviando email: {e}")
-            return False
+        
+        # El envío falló: liberar la marca para que un reintento pueda enviarla
+        await shared_store.delete(sent_key)
+        return False
     
     # ========================================
     # CALIFICACIÓN DE CLIENTE A PROVEEDOR
     # ========================================
     
-    def notify_calificacion_a_proveedor(
+    async def notify_calificacion_a_proveedor(
         self,
         reserva_id: int,
         servicio_nombre: str,
@@ -257,7 +263,7 @@ class CalificacionNotificationService:
         SEVA Empresas - Reserva #{reserva_id}
         """
         
-        self._send_notification(
+        await self._send_notification(
             to_email=proveedor_email,
             subject=subject,
             html_content=html_content,
@@ -269,7 +275,7 @@ class CalificacionNotificationService:
     # CALIFICACIÓN DE PROVEEDOR A CLIENTE
     # ========================================
     
-    def notify_calificacion_a_cliente(
+    async def notify_calificacion_a_cliente(
         self,
         reserva_id: int,
         servicio_nombre: str,
@@ -407,7 +413,7 @@ class CalificacionNotificationService:
         SEVA Empresas - Reserva #{reserva_id}
         """
         
-        self._send_notification(
+        await self._send_notification(
             to_email=cliente_email,
             subject=subject,
             html_content=html_content,
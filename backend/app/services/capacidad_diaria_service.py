@@ -0,0 +1,211 @@
+"""
+Capacidad libre precalculada por servicio y día (tabla capacidad_diaria_servicio).
+
+Permite responder "qué servicios tienen horarios libres el martes por la mañana"
+con una sola consulta indexada en lugar de calcular la disponibilidad de cada
+servicio. Cuando cambian los horarios, las excepciones o las reservas de un
+proveedor se recalcula en segundo plano todo su horizonte con el motor de
+disponibilidad; la tarea diaria capacidad_diaria del planificador (o el script
+scripts/refresh_capacidad_diaria.py) lo recalcula para todos los proveedores
+(el horizonte avanza un día cada día).
+"""
+import asyncio
+import logging
+from datetime import date, time, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import asyncpg
+
+from app.core.config import CAPACITY_HORIZON_DAYS
+from app.services.availability_cache import availability_cache
+from app.services.availability_engine import Slot, calcular_slots_rango, construir_datos_rango, from_minutes
+from app.services.direct_db_service import direct_db_service
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+# Misma grilla que /disponibilidades/servicio/{id}/disponibles
+DURACION_SLOT_CAPACIDAD = 60
+CAPACITY_LOCK_PREFIX = "capacidad_diaria"
+HORAS_POR_DIA = 24
+
+HORARIOS_PROVEEDOR_QUERY = """
+    SELECT dia_semana, hora_inicio, hora_fin
+    FROM horario_trabajo
+    WHERE id_proveedor = $1 AND activo = true
+    ORDER BY id_horario
+"""
+
+EXCEPCIONES_PROVEEDOR_QUERY = """
+    SELECT fecha, tipo, hora_inicio, hora_fin
+    FROM excepciones_horario
+    WHERE id_proveedor = $1 AND fecha >= $2 AND fecha <= $3
+"""
+
+SERVICIOS_PROVEEDOR_QUERY = """
+    SELECT id_servicio
+    FROM servicio
+    WHERE id_perfil = $1 AND estado = true
+"""
+
+RESERVAS_PROVEEDOR_QUERY = """
+    SELECT r.id_servicio, r.fecha, r.hora_inicio, r.hora_fin
+    FROM reserva r
+    JOIN servicio s ON r.id_servicio = s.id_servicio
+    WHERE s.id_perfil = $1
+    AND r.periodo && tsrange($2::date, $3::date + 1, '[)')
+    AND r.estado = 'confirmada'
+"""
+
+DELETE_CAPACIDAD_QUERY = """
+    DELETE FROM capacidad_diaria_servicio
+    WHERE id_proveedor = $1
+"""
+
+INSERT_CAPACIDAD_QUERY = """
+    INSERT INTO capacidad_diaria_servicio (id_servicio, fecha, id_proveedor, slots_libres, horas_libres, primer_slot)
+    VALUES ($1, $2, $3, $4, $5, $6)
+"""
+
+PROVEEDORES_CON_HORARIO_QUERY = """
+    SELECT DISTINCT id_proveedor
+    FROM horario_trabajo
+    WHERE activo = true
+"""
+
+FilaCapacidad = Tuple[int, date, int, int, int, time]  # id_servicio, fecha, id_proveedor, slots, máscara, primer slot
+
+
+def mascara_horas(hora_desde: int, hora_hasta: int) -> int:
+    """Máscara de bits de las horas [hora_desde, hora_hasta) para filtrar horas_libres"""
+    hora_desde = max(0, hora_desde)
+    hora_hasta = min(HORAS_POR_DIA, hora_hasta)
+    if hora_hasta <= hora_desde:
+        return 0
+    return ((1 << (hora_hasta - hora_desde)) - 1) << hora_desde
+
+
+def resumir_slots(servicio_id: int, proveedor_id: int, slots: List[Slot]) -> List[FilaCapacidad]:
+    """Una fila por día con slots libres: cantidad, máscara de horas y primer slot"""
+    por_fecha: Dict[date, List[int]] = {}
+    for fecha, inicio, _fin in slots:
+        por_fecha.setdefault(fecha, []).append(inicio)
+    filas: List[FilaCapacidad] = []
+    for fecha, inicios in por_fecha.items():
+        mascara = 0
+        for inicio in inicios:
+            mascara |= 1 << (inicio // 60)
+        filas.append((servicio_id, fecha, proveedor_id, len(inicios), mascara, from_minutes(min(inicios))))
+    return filas
+
+
+class CapacidadDiariaService:
+    """Mantiene capacidad_diaria_servicio sincronizada con horarios y reservas"""
+
+    def __init__(self, horizonte_dias: int = CAPACITY_HORIZON_DAYS):
+        self.horizonte_dias = horizonte_dias
+        self._en_curso: Dict[int, asyncio.Task] = {}
+        self._pendientes: Set[int] = set()
+
+    def horizonte(self, hoy: Optional[date] = None) -> Tuple[date, date]:
+        """Días cubiertos por la tabla: desde mañana (como /disponibles) hasta el horizonte"""
+        hoy = hoy or date.today()
+        return hoy + timedelta(days=1), hoy + timedelta(days=self.horizonte_dias)
+
+    async def calcular_filas(self, conn: asyncpg.Connection, proveedor_id: int) -> List[FilaCapacidad]:
+        """Capacidad de todos los servicios activos del proveedor en el horizonte (cuatro consultas)"""
+        fecha_inicio, fecha_fin = self.horizonte()
+        horarios = await conn.fetch(HORARIOS_PROVEEDOR_QUERY, proveedor_id)
+        if not horarios:
+            return []
+        servicios = await conn.fetch(SERVICIOS_PROVEEDOR_QUERY, proveedor_id)
+        if not servicios:
+            return []
+        excepciones = await conn.fetch(EXCEPCIONES_PROVEEDOR_QUERY, proveedor_id, fecha_inicio, fecha_fin)
+        reservas = await conn.fetch(RESERVAS_PROVEEDOR_QUERY, proveedor_id, fecha_inicio, fecha_fin)
+
+        reservas_por_servicio: Dict[int, List[tuple]] = {}
+        for row in reservas:
+            reservas_por_servicio.setdefault(row['id_servicio'], []).append(
+                (row['fecha'], row['hora_inicio'], row['hora_fin'])
+            )
+
+        filas: List[FilaCapacidad] = []
+        for servicio in servicios:
+            servicio_id = servicio['id_servicio']
+            datos = construir_datos_rango(horarios, excepciones, reservas_por_servicio.get(servicio_id, []))
+            slots = calcular_slots_rango(datos, fecha_inicio, fecha_fin, DURACION_SLOT_CAPACIDAD)
+            filas.extend(resumir_slots(servicio_id, proveedor_id, slots))
+        return filas
+
+    async def recalcular_proveedor(self, conn: asyncpg.Connection, proveedor_id: int) -> int:
+        """
+        Reemplaza las filas del proveedor en una transacción. El advisory lock serializa
+        recálculos concurrentes del mismo proveedor (por ejemplo desde otro worker).
+        """
+        async with conn.transaction():
+            await conn.execute(
+                "SELECT pg_advisory_xact_lock(hashtextextended($1, 0))",
+                f"{CAPACITY_LOCK_PREFIX}:{proveedor_id}"
+            )
+            filas = await self.calcular_filas(conn, proveedor_id)
+            await conn.execute(DELETE_CAPACIDAD_QUERY, proveedor_id)
+            if filas:
+                await conn.executemany(INSERT_CAPACIDAD_QUERY, filas)
+        logger.debug(f"📊 Capacidad diaria recalculada para proveedor {proveedor_id}: {len(filas)} días con slots libres")
+        return len(filas)
+
+    async def recalcular_todos(self, conn: asyncpg.Connection) -> Dict[str, int]:
+        """Recalcula todos los proveedores con horario activo (refresco diario del horizonte)"""
+        proveedores = await conn.fetch(PROVEEDORES_CON_HORARIO_QUERY)
+        filas = 0
+        for row in proveedores:
+            filas += await self.recalcular_proveedor(conn, row['id_proveedor'])
+        # Proveedores que ya no tienen horario activo
+        await conn.execute("""
+            DELETE FROM capacidad_diaria_servicio c
+            WHERE NOT EXISTS (
+                SELECT 1 FROM horario_trabajo h WHERE h.id_proveedor = c.id_proveedor AND h.activo = true
+            )
+        """)
+        await conn.execute("DELETE FROM capacidad_diaria_servicio WHERE fecha < $1", self.horizonte()[0])
+        return {"proveedores": len(proveedores), "filas": filas}
+
+    async def _recalcular_en_segundo_plano(self, proveedor_id: int) -> None:
+        """Recalcula hasta que no queden cambios pendientes del proveedor"""
+        try:
+            while True:
+                self._pendientes.discard(proveedor_id)
+                try:
+                    async with direct_db_service.connection() as conn:
+                        await self.recalcular_proveedor(conn, proveedor_id)
+                except Exception as e:
+                    logger.error(f"❌ Error recalculando capacidad diaria del proveedor {proveedor_id}: {e}")
+                    return
+                if proveedor_id not in self._pendientes:
+                    return
+        finally:
+            self._en_curso.pop(proveedor_id, None)
+
+    def programar_recalculo(self, proveedor_id: int) -> None:
+        """
+        Programa el recálculo del proveedor sin demorar la petición. Si ya hay uno en
+        curso, se repite una sola vez al terminar (agrupa ráfagas de cambios).
+        """
+        if proveedor_id in self._en_curso:
+            self._pendientes.add(proveedor_id)
+            return
+        self._en_curso[proveedor_id] = asyncio.create_task(self._recalcular_en_segundo_plano(proveedor_id))
+
+
+async def registrar_cambio_disponibilidad(proveedor_id: int) -> None:
+    """
+    Punto único a llamar cuando cambian horarios, excepciones o reservas de un proveedor:
+    invalida el cache de slots y programa el recálculo de su capacidad diaria.
+    """
+    await availability_cache.invalidate_provider(proveedor_id)
+    capacidad_diaria_service.programar_recalculo(proveedor_id)
+
+
+# Instancia global del servicio
+capacidad_diaria_service = CapacidadDiariaService()
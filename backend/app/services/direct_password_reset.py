@@ -9,9 +9,15 @@ import logging
 from app.core.config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
 from supabase import create_client, Client
 from app.services.gmail_smtp_service import gmail_smtp_service
+from app.core.shared_store import shared_store
 
 logger = logging.getLogger(__name__)
 
+# Prefijo de claves en el almacén compartido
+RESET_CODE_KEY_PREFIX = "direct_password_reset"
+# Tiempo que se conserva el registro (un código verificado sigue activo tras expirar)
+RESET_CODE_RETENTION_SECONDS = 900
+
 class DirectPasswordResetService:
     """Servicio directo para restablecimiento de contraseña"""
     
@@ -20,8 +26,7 @@ class DirectPasswordResetService:
         self.supabase_key = SUPABASE_SERVICE_ROLE_KEY
         self.supabase: Client = None
         
-        # Almacenamiento temporal de códigos (en producción usar Redis)
-        self.reset_codes: Dict[str, Dict] = {}
+        # Los códigos viven en el almacén compartido (Redis con varios workers)
         self.code_expiry_seconds = 60  # 60 segundos como solicitado
         
         if self.supabase_url and self.supabase_key:
@@ -35,6 +40,22 @@ class DirectPasswordResetService:
         """Genera un código aleatorio de 4 dígitos"""
         return f"{secrets.randbelow(10000):04d}"
     
+    def _key(self, email: str) -> str:
+        return f"{RESET_CODE_KEY_PREFIX}:{email}"
+    
+    async def get_reset_data(self, email: str) -> Optional[Dict]:
+        """Obtiene el registro de restablecimiento de un email (expires_at como datetime) o None"""
+        reset_data = await shared_store.get(self._key(email))
+        if reset_data is None:
+            return None
+        reset_data["expires_at"] = datetime.fromisoformat(reset_data["expires_at"])
+        if reset_data.get("verified_at"):
+            reset_data["verified_at"] = datetime.fromisoformat(reset_data["verified_at"])
+        return reset_data
+    
+    async def _save_reset_data(self, email: str, reset_data: Dict) -> None:
+        await shared_store.set(self._key(email), reset_data, ttl=RESET_CODE_RETENTION_SECONDS)
+    
     async def send_reset_code(self, email: str) -> Dict:
         """
         Genera y envía código de restablecimiento por Gmail SMTP
@@ -67,12 +88,12 @@ class DirectPasswordResetService:
             expires_at = datetime.now() + timedelta(seconds=self.code_expiry_seconds)
             
             # Almacenar código
-            self.reset_codes[email] = {
+            await self._save_reset_data(email, {
                 "code": code,
                 "expires_at": expires_at,
                 "attempts": 0,
                 "max_attempts": 5
-            }
+            })
             
             # Enviar código por Gmail SMTP
             email_sent = gmail_smtp_service.send_password_reset_code(
@@ -91,7 +112,7 @@ class DirectPasswordResetService:
                 }
             else:
                 # Si falla el envío, limpiar el código
-                del self.reset_codes[email]
+                await shared_store.delete(self._key(email))
                 logger.error(f"❌ Error enviando código a {email}")
                 return {
                     "success": False,
@@ -105,7 +126,7 @@ class DirectPasswordResetService:
                 "message": "Error interno del servidor"
             }
     
-    def verify_reset_code(self, email: str, code: str) -> Dict:
+    async def verify_reset_code(self, email: str, code: str) -> Dict:
         """
         Verifica el código de restablecimiento
         
@@ -118,18 +139,17 @@ class DirectPasswordResetService:
         """
         try:
             # Verificar si existe el código para este email
-            if email not in self.reset_codes:
+            reset_data = await self.get_reset_data(email)
+            if reset_data is None:
                 return {
                     "success": False,
                     "message": "No hay código de restablecimiento para este email"
                 }
             
-            reset_data = self.reset_codes[email]
-            
             # Verificar expiración
             if datetime.now() > reset_data["expires_at"]:
                 # Limpiar código expirado
-                del self.reset_codes[email]
+                await shared_store.delete(self._key(email))
                 return {
                     "success": False,
                     "message": "El código ha expirado. Solicita uno nuevo.",
@@ -139,7 +159,7 @@ class DirectPasswordResetService:
             # Verificar intentos máximos
             if reset_data["attempts"] >= reset_data["max_attempts"]:
                 # Limpiar código por demasiados intentos
-                del self.reset_codes[email]
+                await shared_store.delete(self._key(email))
                 return {
                     "success": False,
                     "message": "Demasiados intentos fallidos. Solicita un nuevo código.",
@@ -151,6 +171,7 @@ class DirectPasswordResetService:
                 # Código correcto - marcar como verificado
                 reset_data["verified"] = True
                 reset_data["verified_at"] = datetime.now()
+                await self._save_reset_data(email, reset_data)
                 
                 logger.info(f"✅ Código verificado correctamente para {email}")
                 return {
@@ -160,6 +181,7 @@ class DirectPasswordResetService:
             else:
                 # Código incorrecto - incrementar intentos
                 reset_data["attempts"] += 1
+                await self._save_reset_data(email, reset_data)
                 remaining_attempts = reset_data["max_attempts"] - reset_data["attempts"]
                 
                 logger.warning(f"⚠️ Código incorrecto para {email}. Intentos restantes: {remaining_attempts}")
@@ -176,14 +198,13 @@ class DirectPasswordResetService:
                 "message": "Error interno del servidor"
             }
     
-    def is_code_verified(self, email: str) -> bool:
+    async def is_code_verified(self, email: str) -> bool:
         """Verifica si el código ha sido verificado correctamente"""
         try:
-            if email not in self.reset_codes:
+            reset_data = await self.get_reset_data(email)
+            if reset_data is None:
                 return False
             
-            reset_data = self.reset_codes[email]
-            
             # Verificar si está verificado
             is_verified = reset_data.get("verified", False)
             
@@ -193,7 +214,7 @@ class DirectPasswordResetService:
             
             # Si no está verificado, verificar expiración
             if datetime.now() > reset_data["expires_at"]:
-                del self.reset_codes[email]
+                await shared_store.delete(self._key(email))
                 return False
             
             return False
@@ -202,11 +223,10 @@ class DirectPasswordResetService:
             logger.error(f"❌ Error en is_code_verified para {email}: {str(e)}")
             return False
     
-    def clear_reset_code(self, email: str) -> None:
+    async def clear_reset_code(self, email: str) -> None:
         """Limpia el código de restablecimiento"""
         try:
-            if email in self.reset_codes:
-                del self.reset_codes[email]
+            if await shared_store.delete(self._key(email)):
                 logger.info(f"🧹 Código de restablecimiento limpiado para {email}")
         except Exception as e:
             logger.error(f"❌ Error limpiando código para {email}: {str(e)}")
@@ -272,7 +292,7 @@ class DirectPasswordResetService:
                 gmail_smtp_service.send_password_reset_success(email)
                 
                 # Limpiar código de restablecimiento
-                self.clear_reset_code(email)
+                await self.clear_reset_code(email)
                 
                 logger.info(f"✅ Contraseña actualizada para {email}")
                 return {
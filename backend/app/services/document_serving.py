@@ -0,0 +1,171 @@
+"""
+Entrega de documentos (iDrive/S3, URL HTTP o disco local) sin cargarlos en memoria.
+
+El cuerpo de get_object se lee por bloques en un hilo (boto3 es síncrono) y se
+envía con StreamingResponse, así que cada descarga ocupa un bloque de memoria y
+no el archivo completo. Los encabezados Range e If-None-Match se pasan a S3, que
+responde 206 / 304; ETag, Last-Modified y Content-Range se copian a la respuesta.
+Los archivos locales se sirven con FileResponse (Range, ETag y sendfile cuando el
+servidor ASGI lo soporta).
+"""
+import asyncio
+import logging
+import mimetypes
+from datetime import timezone
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import quote
+
+import httpx
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+CHUNK_SIZE = 256 * 1024
+HTTP_TIMEOUT = httpx.Timeout(30.0, read=60.0)
+CONTENT_TYPE_DEFAULT = "application/octet-stream"
+# Campos de get_object que se copian como encabezados de la respuesta
+S3_HEADERS = {
+    "ContentLength": "Content-Length",
+    "ContentRange": "Content-Range",
+    "ETag": "ETag",
+    "CacheControl": "Cache-Control",
+}
+# Encabezados que se copian desde un origen HTTP (fallback sin credenciales S3)
+HTTP_PASSTHROUGH_HEADERS = ("content-length", "content-range", "content-encoding", "etag", "last-modified")
+HTTP_FALLBACK_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "application/pdf,application/octet-stream,*/*",
+}
+
+
+def content_disposition(nombre_archivo: str, tipo: str = "inline") -> str:
+    """Content-Disposition válido también con espacios y acentos (RFC 6266)"""
+    nombre_quoted = quote(nombre_archivo)
+    if nombre_quoted != nombre_archivo:
+        return f"{tipo}; filename*=utf-8''{nombre_quoted}"
+    return f'{tipo}; filename="{nombre_archivo}"'
+
+
+def guess_content_type(nombre_archivo: str) -> str:
+    content_type, _ = mimetypes.guess_type(nombre_archivo)
+    return content_type or CONTENT_TYPE_DEFAULT
+
+
+async def iter_streaming_body(body: Any, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Lee un StreamingBody de botocore por bloques sin bloquear el event loop"""
+    try:
+        while True:
+            chunk = await asyncio.to_thread(body.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
+
+
+def s3_response_headers(obj: Dict[str, Any], nombre_archivo: str) -> Dict[str, str]:
+    headers = {"Accept-Ranges": "bytes", "Content-Disposition": content_disposition(nombre_archivo)}
+    for campo, header in S3_HEADERS.items():
+        if obj.get(campo) is not None:
+            headers[header] = str(obj[campo])
+    if obj.get("LastModified") is not None:
+        # botocore usa tzutc de dateutil; format_datetime(usegmt=True) exige datetime.timezone.utc
+        headers["Last-Modified"] = format_datetime(obj["LastModified"].astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+async def stream_s3_object(
+    client: Any,
+    bucket: str,
+    key: str,
+    nombre_archivo: str,
+    content_type: Optional[str] = None,
+    range_header: Optional[str] = None,
+    if_none_match: Optional[str] = None
+) -> Response:
+    """
+    Respuesta en streaming de un objeto S3. Con Range devuelve 206 y con un
+    If-None-Match que coincide devuelve 304; un rango fuera del archivo es 416.
+    El resto de errores de S3 se propagan para que el llamador decida el fallback.
+    """
+    params = {"Bucket": bucket, "Key": key}
+    if range_header:
+        params["Range"] = range_header
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+
+    try:
+        obj = await asyncio.to_thread(client.get_object, **params)
+    except ClientError as e:
+        codigo = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if codigo == status.HTTP_304_NOT_MODIFIED:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": if_none_match})
+        if codigo == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Rango solicitado fuera del documento"
+            )
+        raise
+
+    return StreamingResponse(
+        iter_streaming_body(obj["Body"]),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if obj.get("ContentRange") else status.HTTP_200_OK,
+        media_type=content_type or obj.get("ContentType") or guess_content_type(nombre_archivo),
+        headers=s3_response_headers(obj, nombre_archivo)
+    )
+
+
+async def stream_http_url(
+    url: str,
+    nombre_archivo: str,
+    content_type: Optional[str] = None,
+    range_header: Optional[str] = None
+) -> Response:
+    """Respuesta en streaming desde una URL HTTP (fallback cuando S3 no está disponible)"""
+    client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, follow_redirects=True)
+    headers = dict(HTTP_FALLBACK_HEADERS)
+    if range_header:
+        headers["Range"] = range_header
+    try:
+        upstream = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+        upstream.raise_for_status()
+    except Exception:
+        await client.aclose()
+        raise
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            # aiter_raw: los bytes tal como llegan, coherentes con Content-Length/Content-Encoding copiados
+            async for chunk in upstream.aiter_raw(CHUNK_SIZE):
+                yield chunk
+        finally:
+            await upstream.aclose()
+            await client.aclose()
+
+    response_headers = {"Accept-Ranges": "bytes", "Content-Disposition": content_disposition(nombre_archivo)}
+    for header in HTTP_PASSTHROUGH_HEADERS:
+        if header in upstream.headers:
+            response_headers[header] = upstream.headers[header]
+    return StreamingResponse(
+        body(),
+        status_code=upstream.status_code,
+        media_type=content_type or upstream.headers.get("content-type") or guess_content_type(nombre_archivo),
+        headers=response_headers
+    )
+
+
+def serve_local_file(path: Path, nombre_archivo: str, content_type: Optional[str] = None) -> FileResponse:
+    """Archivo local con FileResponse: Range/206, ETag y Last-Modified los resuelve Starlette"""
+    if not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archivo no encontrado")
+    return FileResponse(
+        path,
+        media_type=content_type or guess_content_type(nombre_archivo),
+        filename=nombre_archivo,
+        content_disposition_type="inline"
+    )
@@ -0,0 +1,134 @@
+"""
+Procesamiento de imágenes subidas (servicios y fotos de perfil).
+
+La imagen se decodifica con Pillow en un ProcessPoolExecutor (decodificar y
+redimensionar es CPU puro y bloquearía el event loop), se aplica la orientación
+EXIF y se descartan todos los metadatos (EXIF con GPS, ICC, comentarios). Se
+generan variantes WebP de IMAGE_VARIANT_WIDTHS píxeles de ancho sin agrandar
+nunca la imagen: la variante mayor ("canónica") mide min(ancho original, 1200).
+
+Las variantes se guardan en {carpeta}/{sha256 del original}/{ancho}.webp, así
+una subida idéntica reutiliza los archivos existentes. Como los anchos se
+derivan del ancho canónico, el mapa de variantes (y el srcset) se reconstruye
+a partir de la URL guardada en la base de datos sin columnas adicionales.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import IMAGE_PROCESS_WORKERS, IMAGE_WEBP_QUALITY
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+IMAGE_VARIANT_WIDTHS = (160, 480, 1200)
+IMAGE_MAX_PIXELS = 40_000_000  # límite ante "decompression bombs" (p. ej. 8000 x 5000)
+IMAGE_WEBP_METHOD = 4  # 0 = rápido ... 6 = más compresión
+EXTENSION_VARIANTE = "webp"
+MIME_TYPE_WEBP = "image/webp"
+# Ruta de una variante: .../{carpeta}/{sha256}/{ancho}.webp
+PATRON_URL_VARIANTE = re.compile(r"/(?P<hash>[0-9a-f]{64})/(?P<ancho>\d+)\.webp$")
+MSG_IMAGEN_INVALIDA = "El archivo no es una imagen válida"
+MSG_IMAGEN_DEMASIADO_GRANDE = "La imagen supera el máximo de {max_pixels} píxeles"
+
+
+class ImagenInvalidaError(ValueError):
+    """El contenido no se pudo decodificar como imagen o excede los límites"""
+
+
+def content_hash(file_content: bytes) -> str:
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def anchos_variantes(ancho_canonico: int) -> List[int]:
+    """Anchos generados para una imagen cuya variante mayor mide ancho_canonico"""
+    return [ancho for ancho in IMAGE_VARIANT_WIDTHS if ancho < ancho_canonico] + [ancho_canonico]
+
+
+def _modo_destino(imagen: Image.Image) -> str:
+    tiene_alfa = imagen.mode in ("RGBA", "LA", "PA") or "transparency" in imagen.info
+    return "RGBA" if tiene_alfa else "RGB"
+
+
+def procesar_imagen(file_content: bytes) -> Dict[int, bytes]:
+    """
+    Decodifica la imagen y devuelve {ancho: bytes WebP} sin metadatos.
+    Función de módulo para poder ejecutarse en el ProcessPoolExecutor.
+    """
+    try:
+        imagen = Image.open(io.BytesIO(file_content))
+        if imagen.width * imagen.height > IMAGE_MAX_PIXELS:
+            raise ImagenInvalidaError(MSG_IMAGEN_DEMASIADO_GRANDE.format(max_pixels=IMAGE_MAX_PIXELS))
+        # JPEG: decodificar directamente a escala reducida (1/2, 1/4, 1/8) si sobra resolución
+        ancho_maximo = IMAGE_VARIANT_WIDTHS[-1]
+        imagen.draft(imagen.mode, (ancho_maximo, ancho_maximo))
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen = imagen.convert(_modo_destino(imagen))
+    except ImagenInvalidaError:
+        raise
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImagenInvalidaError(MSG_IMAGEN_INVALIDA) from e
+
+    variantes = {}
+    for ancho in anchos_variantes(min(imagen.width, ancho_maximo)):
+        if ancho < imagen.width:
+            alto = max(1, round(imagen.height * ancho / imagen.width))
+            variante = imagen.resize((ancho, alto), Image.Resampling.LANCZOS)
+        else:
+            variante = imagen.copy()
+        # Sin EXIF/ICC/XMP: Pillow copia info entre imágenes derivadas
+        variante.info = {}
+        salida = io.BytesIO()
+        variante.save(salida, format="WEBP", quality=IMAGE_WEBP_QUALITY, method=IMAGE_WEBP_METHOD)
+        variantes[ancho] = salida.getvalue()
+    return variantes
+
+
+def variantes_desde_url(url: Optional[str]) -> Optional[Dict[int, str]]:
+    """{ancho: URL} a partir de la URL de la variante canónica; None para imágenes anteriores al pipeline"""
+    if not url:
+        return None
+    match = PATRON_URL_VARIANTE.search(url.split("?")[0])
+    if not match:
+        return None
+    base = url[:match.start("ancho")]
+    return {ancho: f"{base}{ancho}.{EXTENSION_VARIANTE}" for ancho in anchos_variantes(int(match.group("ancho")))}
+
+
+def srcset_desde_variantes(variantes: Optional[Dict[int, str]]) -> Optional[str]:
+    if not variantes:
+        return None
+    return ", ".join(f"{url} {ancho}w" for ancho, url in sorted(variantes.items()))
+
+
+class ImagePipeline:
+    """Ejecuta procesar_imagen en un pool de procesos compartido por la aplicación"""
+
+    def __init__(self, max_workers: int = IMAGE_PROCESS_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Se crea al primer uso: los workers de uvicorn no levantan procesos si nunca suben imágenes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def procesar(self, file_content: bytes) -> Dict[int, bytes]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), procesar_imagen, file_content)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instancia global del servicio
+image_pipeline = ImagePipeline()
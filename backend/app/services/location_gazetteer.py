@@ -0,0 +1,304 @@
+"""
+Gazetteer de ubicaciones: departamentos, ciudades y barrios en memoria.
+
+Las tres tablas son chicas y casi estáticas, pero se consultaban en cada
+request (listados de /locations y find_location_data al registrar un
+proveedor). Se cargan una vez por worker en diccionarios indexados por nombre
+normalizado (sin tildes, minúsculas, espacios colapsados): "Asuncion",
+"ASUNCIÓN" y "asunción" resuelven al mismo id en O(1).
+
+El autocompletado busca por prefijo en una lista ordenada de claves
+normalizadas con bisect; cada palabra del nombre es una clave, así "lore"
+encuentra "San Lorenzo".
+
+Cambios: un trigger incrementa ubicaciones_version
+(migrations/create_ubicaciones_version.sql). Cada worker consulta esa fila
+como mucho una vez cada GAZETTEER_CHECK_SECONDS, en segundo plano y sin
+demorar la petición en curso, y recarga las tablas solo si la versión cambió.
+La recarga arma un índice nuevo y lo reemplaza de una vez: las lecturas nunca
+ven un índice a medio cargar.
+"""
+import asyncio
+import bisect
+import logging
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+
+from app.core.config import GAZETTEER_CHECK_SECONDS
+from app.services.direct_db_service import direct_db_service
+
+logger = logging.getLogger(__name__)
+
+# Consultas de carga (el orden de los listados se resuelve en memoria)
+DEPARTAMENTOS_QUERY = "SELECT id_departamento, nombre, created_at FROM departamento"
+CIUDADES_QUERY = "SELECT id_ciudad, nombre, id_departamento, created_at FROM ciudad"
+BARRIOS_QUERY = "SELECT id_barrio, nombre, id_ciudad FROM barrio"
+VERSION_QUERY = "SELECT version FROM ubicaciones_version WHERE id = 1"
+
+# Tipos de sugerencia; ante empates se listan en este orden
+TIPO_DEPARTAMENTO = "departamento"
+TIPO_CIUDAD = "ciudad"
+TIPO_BARRIO = "barrio"
+PRIORIDAD_TIPO = {TIPO_DEPARTAMENTO: 0, TIPO_CIUDAD: 1, TIPO_BARRIO: 2}
+AUTOCOMPLETE_LIMIT_DEFAULT = 10
+
+
+def normalizar_nombre(nombre: str) -> str:
+    """Clave de comparación: sin tildes ni diéresis, en minúsculas y con espacios simples"""
+    descompuesto = unicodedata.normalize("NFKD", nombre)
+    sin_marcas = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_marcas.casefold().split())
+
+
+@dataclass(frozen=True)
+class UbicacionDepartamento:
+    id_departamento: int
+    nombre: str
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class UbicacionCiudad:
+    id_ciudad: int
+    nombre: str
+    id_departamento: int
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class UbicacionBarrio:
+    id_barrio: int
+    nombre: str
+    id_ciudad: int
+
+
+@dataclass(frozen=True)
+class SugerenciaUbicacion:
+    """Resultado del autocompletado con su jerarquía, para mostrarlo sin ambigüedad"""
+    tipo: str
+    id: int
+    nombre: str
+    id_departamento: int
+    departamento: str
+    id_ciudad: Optional[int] = None
+    ciudad: Optional[str] = None
+
+
+def _por_nombre(items: List[Any]) -> List[Any]:
+    return sorted(items, key=lambda item: normalizar_nombre(item.nombre))
+
+
+class _IndiceUbicaciones:
+    """Snapshot de las tres tablas con sus índices; no se modifica después de construirse"""
+
+    def __init__(
+        self,
+        departamentos: List[UbicacionDepartamento],
+        ciudades: List[UbicacionCiudad],
+        barrios: List[UbicacionBarrio],
+        version: Optional[int]
+    ):
+        self.version = version
+        self.departamentos = _por_nombre(departamentos)
+        self.departamento_por_id = {d.id_departamento: d for d in departamentos}
+        self.ciudad_por_id = {c.id_ciudad: c for c in ciudades}
+        self.barrio_por_id = {b.id_barrio: b for b in barrios}
+
+        self.departamento_por_nombre: Dict[str, UbicacionDepartamento] = {}
+        for departamento in self.departamentos:
+            self.departamento_por_nombre.setdefault(normalizar_nombre(departamento.nombre), departamento)
+
+        self.ciudades_por_departamento: Dict[int, List[UbicacionCiudad]] = {}
+        self.ciudad_por_nombre: Dict[Tuple[int, str], UbicacionCiudad] = {}
+        for ciudad in _por_nombre(ciudades):
+            self.ciudades_por_departamento.setdefault(ciudad.id_departamento, []).append(ciudad)
+            self.ciudad_por_nombre.setdefault((ciudad.id_departamento, normalizar_nombre(ciudad.nombre)), ciudad)
+
+        self.barrios_por_ciudad: Dict[int, List[UbicacionBarrio]] = {}
+        self.barrio_por_nombre: Dict[Tuple[int, str], UbicacionBarrio] = {}
+        for barrio in _por_nombre(barrios):
+            self.barrios_por_ciudad.setdefault(barrio.id_ciudad, []).append(barrio)
+            self.barrio_por_nombre.setdefault((barrio.id_ciudad, normalizar_nombre(barrio.nombre)), barrio)
+
+        # Autocompletado: (clave, tipo, id, nombre normalizado) ordenado, una clave por cada palabra del nombre
+        claves = []
+        for tipo, por_id in (
+            (TIPO_DEPARTAMENTO, self.departamento_por_id),
+            (TIPO_CIUDAD, self.ciudad_por_id),
+            (TIPO_BARRIO, self.barrio_por_id),
+        ):
+            for id_item, item in por_id.items():
+                nombre = normalizar_nombre(item.nombre)
+                palabras = nombre.split(" ")
+                for i in range(len(palabras)):
+                    claves.append((" ".join(palabras[i:]), tipo, id_item, nombre))
+        claves.sort()
+        self.claves = claves
+
+    def coincidencias(self, prefijo: str) -> Dict[Tuple[str, int], str]:
+        """{(tipo, id): nombre normalizado} de los items con alguna palabra que empieza con el prefijo"""
+        encontrados: Dict[Tuple[str, int], str] = {}
+        inicio = bisect.bisect_left(self.claves, (prefijo,))
+        for clave, tipo, id_item, nombre in self.claves[inicio:]:
+            if not clave.startswith(prefijo):
+                break
+            encontrados[(tipo, id_item)] = nombre
+        return encontrados
+
+    def sugerencia(self, tipo: str, id_item: int) -> Optional[SugerenciaUbicacion]:
+        """Sugerencia con departamento y ciudad; None si falta algún padre (datos huérfanos)"""
+        ciudad = None
+        if tipo == TIPO_DEPARTAMENTO:
+            item = self.departamento_por_id[id_item]
+            departamento = item
+        elif tipo == TIPO_CIUDAD:
+            item = self.ciudad_por_id[id_item]
+            departamento = self.departamento_por_id.get(item.id_departamento)
+        else:
+            item = self.barrio_por_id[id_item]
+            ciudad = self.ciudad_por_id.get(item.id_ciudad)
+            if not ciudad:
+                return None
+            departamento = self.departamento_por_id.get(ciudad.id_departamento)
+        if not departamento:
+            return None
+        return SugerenciaUbicacion(
+            tipo=tipo,
+            id=id_item,
+            nombre=item.nombre,
+            id_departamento=departamento.id_departamento,
+            departamento=departamento.nombre,
+            id_ciudad=ciudad.id_ciudad if ciudad else None,
+            ciudad=ciudad.nombre if ciudad else None
+        )
+
+
+class LocationGazetteer:
+    """Departamentos, ciudades y barrios en memoria con recarga por versión"""
+
+    def __init__(self, check_interval: int = GAZETTEER_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._indice: Optional[_IndiceUbicaciones] = None
+        self._verificado_en = 0.0
+        self._lock = asyncio.Lock()
+        self._verificacion: Optional[asyncio.Task] = None
+        self._metrics: Dict[str, int] = {"cargas": 0, "verificaciones": 0}
+
+    @staticmethod
+    async def _leer_version(conn: asyncpg.Connection) -> Optional[int]:
+        try:
+            return await conn.fetchval(VERSION_QUERY)
+        except asyncpg.UndefinedTableError:
+            # Sin la migración no hay versión: cada verificación recarga las tablas
+            return None
+
+    async def cargar(self) -> None:
+        """Lee las tres tablas en una conexión y reemplaza el índice"""
+        async with direct_db_service.connection() as conn:
+            # La versión se lee antes que las tablas: un cambio intermedio provoca otra recarga, nunca se pierde
+            version = await self._leer_version(conn)
+            departamentos = [UbicacionDepartamento(**dict(row)) for row in await conn.fetch(DEPARTAMENTOS_QUERY)]
+            ciudades = [UbicacionCiudad(**dict(row)) for row in await conn.fetch(CIUDADES_QUERY)]
+            barrios = [UbicacionBarrio(**dict(row)) for row in await conn.fetch(BARRIOS_QUERY)]
+
+        self._indice = _IndiceUbicaciones(departamentos, ciudades, barrios, version)
+        self._verificado_en = time.monotonic()
+        self._metrics["cargas"] += 1
+        logger.info(
+            f"🗺️ Gazetteer cargado: {len(departamentos)} departamentos, {len(ciudades)} ciudades, "
+            f"{len(barrios)} barrios (versión {version})"
+        )
+
+    async def _verificar_cambios(self) -> None:
+        try:
+            async with direct_db_service.connection() as conn:
+                version = await self._leer_version(conn)
+            self._metrics["verificaciones"] += 1
+            if version is None or version != self._indice.version:
+                async with self._lock:
+                    await self.cargar()
+        except Exception as e:
+            # Se sigue sirviendo el índice anterior; se reintenta en el próximo intervalo
+            logger.warning(f"⚠️ No se pudo verificar la versión de ubicaciones: {e}")
+
+    async def _indice_actual(self) -> _IndiceUbicaciones:
+        if self._indice is None:
+            async with self._lock:
+                if self._indice is None:
+                    await self.cargar()
+        elif time.monotonic() - self._verificado_en >= self.check_interval:
+            if self._verificacion is None or self._verificacion.done():
+                self._verificado_en = time.monotonic()
+                self._verificacion = asyncio.create_task(self._verificar_cambios())
+        return self._indice
+
+    # ========== LISTADOS JERÁRQUICOS ==========
+
+    async def get_departamentos(self) -> List[UbicacionDepartamento]:
+        return list((await self._indice_actual()).departamentos)
+
+    async def get_ciudades(self, id_departamento: int) -> List[UbicacionCiudad]:
+        return list((await self._indice_actual()).ciudades_por_departamento.get(id_departamento, []))
+
+    async def get_barrios(self, id_ciudad: int) -> List[UbicacionBarrio]:
+        return list((await self._indice_actual()).barrios_por_ciudad.get(id_ciudad, []))
+
+    # ========== RESOLUCIÓN POR NOMBRE (sin tildes ni mayúsculas) ==========
+
+    async def buscar_departamento(self, nombre: str) -> Optional[UbicacionDepartamento]:
+        return (await self._indice_actual()).departamento_por_nombre.get(normalizar_nombre(nombre))
+
+    async def buscar_ciudad(self, nombre: str, id_departamento: int) -> Optional[UbicacionCiudad]:
+        return (await self._indice_actual()).ciudad_por_nombre.get((id_departamento, normalizar_nombre(nombre)))
+
+    async def buscar_barrio(self, nombre: str, id_ciudad: int) -> Optional[UbicacionBarrio]:
+        return (await self._indice_actual()).barrio_por_nombre.get((id_ciudad, normalizar_nombre(nombre)))
+
+    # ========== AUTOCOMPLETADO ==========
+
+    async def autocompletar(
+        self,
+        texto: str,
+        limite: int = AUTOCOMPLETE_LIMIT_DEFAULT,
+        tipo: Optional[str] = None
+    ) -> List[SugerenciaUbicacion]:
+        """
+        Ubicaciones cuyo nombre (o alguna de sus palabras) empieza con `texto`.
+        Primero las que empiezan con el texto completo, luego por tipo y por nombre.
+        """
+        prefijo = normalizar_nombre(texto)
+        if not prefijo:
+            return []
+        indice = await self._indice_actual()
+
+        ordenados = sorted(
+            (not nombre.startswith(prefijo), PRIORIDAD_TIPO[tipo_item], nombre, tipo_item, id_item)
+            for (tipo_item, id_item), nombre in indice.coincidencias(prefijo).items()
+            if tipo is None or tipo_item == tipo
+        )
+        sugerencias = []
+        for *_, tipo_item, id_item in ordenados:
+            sugerencia = indice.sugerencia(tipo_item, id_item)
+            if sugerencia:
+                sugerencias.append(sugerencia)
+                if len(sugerencias) >= limite:
+                    break
+        return sugerencias
+
+    def get_metrics(self) -> Dict[str, Any]:
+        indice = self._indice
+        metrics: Dict[str, Any] = dict(self._metrics)
+        metrics["version"] = indice.version if indice else None
+        metrics["departamentos"] = len(indice.departamento_por_id) if indice else 0
+        metrics["ciudades"] = len(indice.ciudad_por_id) if indice else 0
+        metrics["barrios"] = len(indice.barrio_por_id) if indice else 0
+        return metrics
+
+
+# Instancia global del servicio
+location_gazetteer = LocationGazetteer()
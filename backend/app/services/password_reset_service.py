@@ -7,17 +7,43 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict
 import logging
 from app.services.email_service import email_service
+from app.core.shared_store import shared_store
 
 logger = logging.getLogger(__name__)
 
+# Prefijo de claves en el almacén compartido
+RESET_CODE_KEY_PREFIX = "password_reset"
+# Tiempo que se conserva el registro (cubre el código verificado hasta cambiar la contraseña)
+RESET_CODE_RETENTION_SECONDS = 900
+
 class PasswordResetService:
     """Servicio para manejo de códigos de restablecimiento de contraseña"""
     
     def __init__(self):
-        # Almacenamiento temporal de códigos (en producción usar Redis)
-        self.reset_codes: Dict[str, Dict] = {}
+        # Los códigos viven en el almacén compartido (Redis con varios workers)
         self.code_expiry_minutes = 1  # 1 minuto = 60 segundos
     
+    def _key(self, email: str) -> str:
+        return f"{RESET_CODE_KEY_PREFIX}:{email}"
+    
+    async def get_reset_data(self, email: str) -> Optional[Dict]:
+        """
+        Obtiene el registro de restablecimiento de un email
+        
+        Returns:
+            Dict con code, expires_at (datetime), attempts, max_attempts y verified, o None
+        """
+        reset_data = await shared_store.get(self._key(email))
+        if reset_data is None:
+            return None
+        reset_data["expires_at"] = datetime.fromisoformat(reset_data["expires_at"])
+        if reset_data.get("verified_at"):
+            reset_data["verified_at"] = datetime.fromisoformat(reset_data["verified_at"])
+        return reset_data
+    
+    async def _save_reset_data(self, email: str, reset_data: Dict) -> None:
+        await shared_store.set(self._key(email), reset_data, ttl=RESET_CODE_RETENTION_SECONDS)
+    
     def generate_reset_code(self) -> str:
         """
         Genera un código aleatorio de 4 dígitos
@@ -45,12 +71,12 @@ class PasswordResetService:
             expires_at = datetime.now() + timedelta(minutes=self.code_expiry_minutes)
             
             # Almacenar código
-            self.reset_codes[email] = {
+            await self._save_reset_data(email, {
                 "code": code,
                 "expires_at": expires_at,
                 "attempts": 0,
                 "max_attempts": 3
-            }
+            })
             
             # Enviar email
             email_sent = await email_service.send_password_reset_code(
@@ -68,8 +94,7 @@ class PasswordResetService:
                 }
             else:
                 # Limpiar código si no se pudo enviar el email
-                if email in self.reset_codes:
-                    del self.reset_codes[email]
+                await shared_store.delete(self._key(email))
                 
                 logger.error(f"❌ Error enviando código a {email}")
                 return {
@@ -84,7 +109,7 @@ class PasswordResetService:
                 "message": "Error interno del servidor"
             }
     
-    def verify_reset_code(self, email: str, code: str) -> Dict:
+    async def verify_reset_code(self, email: str, code: str) -> Dict:
         """
         Verifica el código de restablecimiento
         
@@ -97,18 +122,17 @@ class PasswordResetService:
         """
         try:
             # Verificar si existe el código para este email
-            if email not in self.reset_codes:
+            reset_data = await self.get_reset_data(email)
+            if reset_data is None:
                 return {
                     "success": False,
                     "message": "No hay código de restablecimiento para este email"
                 }
             
-            reset_data = self.reset_codes[email]
-            
             # Verificar expiración
             if datetime.now() > reset_data["expires_at"]:
                 # Limpiar código expirado
-                del self.reset_codes[email]
+                await shared_store.delete(self._key(email))
                 return {
                     "success": False,
                     "message": "El código ha expirado. Solicita uno nuevo.",
@@ -118,7 +142,7 @@ class PasswordResetService:
             # Verificar intentos máximos
             if reset_data["attempts"] >= reset_data["max_attempts"]:
                 # Limpiar código por demasiados intentos
-                del self.reset_codes[email]
+                await shared_store.delete(self._key(email))
                 return {
                     "success": False,
                     "message": "Demasiados intentos fallidos. Solicita un nuevo código.",
@@ -130,6 +154,7 @@ class PasswordResetService:
                 # Código correcto - marcar como verificado
                 reset_data["verified"] = True
                 reset_data["verified_at"] = datetime.now()
+                await self._save_reset_data(email, reset_data)
                 
                 logger.info(f"✅ Código verificado correctamente para {email}")
                 return {
@@ -139,6 +164,7 @@ class PasswordResetService:
             else:
                 # Código incorrecto - incrementar intentos
                 reset_data["attempts"] += 1
+                await self._save_reset_data(email, reset_data)
                 remaining_attempts = reset_data["max_attempts"] - reset_data["attempts"]
                 
                 logger.warning(f"⚠️ Código incorrecto para {email}. Intentos restantes: {remaining_attempts}")
@@ -155,7 +181,7 @@ class PasswordResetService:
                 "message": "Error interno del servidor"
             }
     
-    def is_code_verified(self, email: str) -> bool:
+    async def is_code_verified(self, email: str) -> bool:
         """
         Verifica si el código ha sido verificado correctamente
         
@@ -166,14 +192,13 @@ class PasswordResetService:
             bool: True si el código está verificado y no ha expirado
         """
         try:
-            if email not in self.reset_codes:
+            reset_data = await self.get_reset_data(email)
+            if reset_data is None:
                 return False
             
-            reset_data = self.reset_codes[email]
-            
             # Verificar expiración
             if datetime.now() > reset_data["expires_at"]:
-                del self.reset_codes[email]
+                await shared_store.delete(self._key(email))
                 return False
             
             # Verificar si está verificado
@@ -183,7 +208,7 @@ class PasswordResetService:
             logger.error(f"❌ Error en is_code_verified para {email}: {str(e)}")
             return False
     
-    def clear_reset_code(self, email: str) -> None:
+    async def clear_reset_code(self, email: str) -> None:
         """
         Limpia el código de restablecimiento
         
@@ -191,8 +216,7 @@ class PasswordResetService:
             email: Email del usuario
         """
         try:
-            if email in self.reset_codes:
-                del self.reset_codes[email]
+            if await shared_store.delete(self._key(email)):
                 logger.info(f"🧹 Código de restablecimiento limpiado para {email}")
         except Exception as e:
             logger.error(f"❌ Error limpiando código para {email}: {str(e)}")
@@ -217,37 +241,6 @@ class PasswordResetService:
         except Exception as e:
             logger.error(f"❌ Error en send_password_change_confirmation para {email}: {str(e)}")
             return False
-    
-    def cleanup_expired_codes(self) -> None:
-        """
-        Limpia códigos expirados (llamar periódicamente)
-        """
-        try:
-            current_time = datetime.now()
-            expired_emails = []
-            
-            for email, reset_data in self.reset_codes.items():
-                if current_time > reset_data["expires_at"]:
-                    expired_emails.append(email)
-            
-            for email in expired_emails:
-                del self.reset_codes[email]
-            
-            if expired_emails:
-                logger.info(f"🧹 Limpiados {len(expired_emails)} códigos expirados")
-                
-        except Exception as e:
-            logger.error(f"❌ Error en cleanup_expired_codes: {str(e)}")
 
 # Instancia global del servicio
 password_reset_service = PasswordResetService()
-
-# Tarea de limpieza periódica
-async def cleanup_task():
-    """Tarea que limpia códigos expirados cada 5 minutos"""
-    while True:
-        try:
-            await asyncio.sleep(300)  # 5 minutos
-            password_reset_service.cleanup_expired_codes()
-        except Exception as e:
-            logger.error(f"❌ Error en cleanup_task: {str(e)}")
@@ -4,9 +4,8 @@ Servicio para gestión de direcciones de proveedores.
 """
 
 import asyncpg
-from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
 from app.models.empresa.direccion import Direccion
@@ -75,45 +74,3 @@ class AddressService:
                 raise
         
         return nueva_direccion
-
-
-    @staticmethod
-    async def get_direccion_data(db: AsyncSession, direccion_id: int) -> Optional[dict]:
-        """Obtiene los datos de dirección con sus relaciones usando ORM"""
-        if not direccion_id:
-            return None
-        
-        from app.models.empresa.departamento import Departamento
-        from app.models.empresa.ciudad import Ciudad
-        from sqlalchemy.orm import selectinload
-        
-        direccion_query = select(Direccion).options(
-            selectinload(Direccion.departamento).selectinload(Departamento.ciudad).selectinload(Ciudad.barrio)
-        ).where(Direccion.id_direccion == direccion_id)
-        direccion_result = await db.execute(direccion_query)
-        direccion = direccion_result.scalars().first()
-        
-        if not direccion or not direccion.departamento:
-            return None
-        
-        # Extraer datos de ciudad y barrio
-        ciudad_data = None
-        barrio_data = None
-        
-        if direccion.departamento.ciudad and len(direccion.departamento.ciudad) > 0:
-            ciudad = direccion.departamento.ciudad[0]
-            ciudad_data = {"nombre": ciudad.nombre}
-            
-            if ciudad.barrio and len(ciudad.barrio) > 0:
-                barrio = ciudad.barrio[0]
-                barrio_data = {"nombre": barrio.nombre}
-        
-        return {
-            "calle": direccion.calle,
-            "numero": direccion.numero,
-            "referencia": direccion.referencia,
-            "departamento": direccion.departamento.nombre,
-            "ciudad": ciudad_data["nombre"] if ciudad_data else None,
-            "barrio": barrio_data["nombre"] if barrio_data else None
-        }
-
@@ -58,29 +58,6 @@ class CompanyService:
         
         await db.flush()
 
-    @staticmethod
-    def get_sucursal_data(empresa: PerfilEmpresa) -> Optional[dict]:
-        """Obtiene los datos de la sucursal principal de la empresa"""
-        print(f"🔍 Sucursales encontradas: {len(empresa.sucursal_empresa) if empresa.sucursal_empresa else 0}")
-        
-        if not empresa.sucursal_empresa:
-            print("⚠️ No se encontraron sucursales para esta empresa")
-            return None
-        
-        print(f"🔍 Lista de sucursales: {[s.nombre for s in empresa.sucursal_empresa]}")
-        sucursal = empresa.sucursal_empresa[0]
-        
-        if not sucursal:
-            print("⚠️ No se encontró sucursal principal")
-            return None
-        
-        print(f"✅ Sucursal encontrada: {sucursal.nombre}")
-        return {
-            "nombre": sucursal.nombre,
-            "telefono": sucursal.telefono,
-            "email": sucursal.email
-        }
-
     @staticmethod
     def build_empresa_data(empresa: PerfilEmpresa, sucursal_data: Optional[dict]) -> dict:
         """Construye los datos de empresa para la respuesta"""
@@ -3,6 +3,8 @@
 Servicio para gestión de documentos de proveedores.
 """
 
+import asyncio
+from dataclasses import dataclass
 from typing import List, Optional
 import uuid
 import asyncpg
@@ -10,17 +12,31 @@ from fastapi import HTTPException, status, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.config import DOCUMENT_UPLOAD_CONCURRENCY
 from app.models.empresa.documento import Documento
 from app.models.empresa.verificacion_solicitud import VerificacionSolicitud
 from app.models.empresa.tipo_documento import TipoDocumento
 from app.repositories.providers.provider_repository import ProviderRepository
+from app.services.date_service import DateService
 from app.services.storage_service import storage_service
 from app.api.v1.routers.providers.constants import (
     ESTADO_PENDIENTE,
-    DOCUMENT_TYPE_PROVIDER
+    DOCUMENT_TYPE_PROVIDER,
+    MSG_ERROR_SUBIENDO_DOCUMENTOS
 )
 
 
+@dataclass
+class DocumentoSubido:
+    """Resultado de subir un documento (se usa para escribir las filas o compensar)"""
+    nombre_tip_documento: str
+    nombre_archivo: str
+    file_key: str
+    file_url: Optional[str] = None
+    storage_type: Optional[str] = None
+    error: Optional[str] = None
+
+
 class DocumentService:
     """Servicio para gestión de documentos"""
     
@@ -36,76 +52,123 @@ class DocumentService:
     ) -> None:
         """
         Procesa y sube los documentos.
-        Lógica de negocio: sube archivos usando StorageService (iDrive/Local con fallback).
-        Acceso a datos: delega al repositorio para guardar en BD.
+        Lógica de negocio: sube los archivos en paralelo (máximo DOCUMENT_UPLOAD_CONCURRENCY)
+        usando StorageService (iDrive/Local con fallback), en streaming desde el archivo
+        temporal del UploadFile.
+        Acceso a datos: las filas se escriben en lote solo si todas las subidas salieron bien;
+        si algo falla se eliminan los archivos ya subidos y se propaga el error.
         """
         if not documentos:
             print("⚠️ No hay documentos nuevos para procesar")
             return
         
-        for index, file in enumerate(documentos):
-            nombre_tip_documento = nombres_tip_documento[index]
-            
-            # 1. Obtener tipo de documento (repositorio)
-            tipo_doc_data = await ProviderRepository.get_tipo_documento_by_name(
-                conn, nombre_tip_documento
-            )
-            id_tip_documento = tipo_doc_data['id_tip_documento']
-            
-            # 2. Subir archivo usando servicio de almacenamiento (lógica de negocio)
-            file_content = await file.read()
-            file_key = storage_service.generate_file_key(
-                razon_social=razon_social,
-                tipo_documento=nombre_tip_documento,
-                original_filename=file.filename
-            )
-            
-            # Subir archivo con fallback automático
-            file_url = storage_service.upload_document(
-                file_content=file_content,
-                file_key=file_key,
-                document_type=DOCUMENT_TYPE_PROVIDER,
-                fallback_to_temp=True,
-                fallback_suffix=f"{current_user_id}_{id_tip_documento}"
+        nombres = nombres_tip_documento[:len(documentos)]
+        
+        # 1. Tipos de documento y documentos previos del perfil (una consulta cada uno)
+        tipos = await ProviderRepository.get_tipos_documento_by_names(conn, nombres)
+        existentes = {}
+        if id_perfil_existente:
+            existentes = await ProviderRepository.get_existing_documents(
+                conn, id_perfil_existente, list(tipos.values())
             )
-            
-            print(f"✅ Archivo procesado: {file_url}")
-            
-            # 3. Verificar si existe documento previo (repositorio)
-            doc_existente = None
-            if id_perfil_existente:
-                doc_existente = await ProviderRepository.get_existing_document(
-                    conn, id_perfil_existente, id_tip_documento
-                )
-            
-            # 4. Guardar en BD (repositorio - acceso a datos)
-            if doc_existente:
-                # Actualizar documento existente
-                print(f"🔄 Actualizando documento existente: {nombre_tip_documento}")
-                from app.services.date_service import DateService
-                fecha_verificacion = DateService.now_for_database()
-                await ProviderRepository.update_document(
-                    conn, doc_existente['id_documento'], file_url, 
-                    ESTADO_PENDIENTE, fecha_verificacion, id_verificacion
+        
+        # 2. Subir archivos en paralelo (lógica de negocio)
+        subidos = await DocumentService.upload_documents(documentos, nombres, razon_social)
+        fallidos = [doc for doc in subidos if doc.error]
+        if fallidos:
+            await DocumentService.delete_uploaded(subidos)
+            for doc in fallidos:
+                print(f"❌ Error subiendo {doc.nombre_archivo}: {doc.error}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=MSG_ERROR_SUBIENDO_DOCUMENTOS.format(
+                    documentos=", ".join(doc.nombre_archivo for doc in fallidos)
                 )
+            )
+        
+        # 3. Guardar en BD en lote (repositorio - acceso a datos)
+        fecha_verificacion = DateService.now_for_database()
+        nuevos, actualizados = [], []
+        for doc in subidos:
+            id_tip_documento = tipos[doc.nombre_tip_documento]
+            print(f"✅ Archivo procesado: {doc.file_url}")
+            if id_tip_documento in existentes:
+                print(f"🔄 Actualizando documento existente: {doc.nombre_tip_documento}")
+                actualizados.append((
+                    doc.file_url, ESTADO_PENDIENTE, fecha_verificacion,
+                    id_verificacion, existentes[id_tip_documento]
+                ))
             else:
-                # Crear nuevo documento
-                print(f"➕ Creando nuevo documento: {nombre_tip_documento}")
-                await ProviderRepository.create_document(
-                    conn, id_verificacion, id_tip_documento, file_url, ESTADO_PENDIENTE
+                print(f"➕ Creando nuevo documento: {doc.nombre_tip_documento}")
+                nuevos.append((id_verificacion, id_tip_documento, doc.file_url, ESTADO_PENDIENTE))
+        
+        try:
+            if actualizados:
+                await ProviderRepository.update_documents(conn, actualizados)
+            if nuevos:
+                await ProviderRepository.create_documents(conn, nuevos)
+        except Exception:
+            # La transacción revierte las filas; los archivos hay que borrarlos a mano
+            await DocumentService.delete_uploaded(subidos)
+            raise
+
+    @staticmethod
+    async def upload_documents(
+        documentos: List[UploadFile],
+        nombres_tip_documento: List[str],
+        razon_social: str
+    ) -> List[DocumentoSubido]:
+        """
+        Sube los documentos con concurrencia acotada. Cada subida corre en un hilo
+        (boto3 es síncrono) y lee el SpooledTemporaryFile del UploadFile por partes.
+        Los errores quedan en el resultado: se espera a que terminen todas las subidas
+        antes de compensar, porque un hilo en curso no se puede cancelar.
+        """
+        semaforo = asyncio.Semaphore(DOCUMENT_UPLOAD_CONCURRENCY)
+        
+        async def subir(file: UploadFile, nombre_tip_documento: str) -> DocumentoSubido:
+            doc = DocumentoSubido(
+                nombre_tip_documento=nombre_tip_documento,
+                nombre_archivo=file.filename,
+                file_key=storage_service.generate_file_key(
+                    razon_social=razon_social,
+                    tipo_documento=nombre_tip_documento,
+                    original_filename=file.filename
                 )
+            )
+            async with semaforo:
+                try:
+                    await file.seek(0)
+                    success, message, file_url, storage_type = await asyncio.to_thread(
+                        storage_service.upload_fileobj_with_fallback,
+                        file.file, doc.file_key, DOCUMENT_TYPE_PROVIDER, file.content_type
+                    )
+                except Exception as e:
+                    success, message, file_url, storage_type = False, str(e), None, None
+            if success:
+                doc.file_url, doc.storage_type = file_url, storage_type
+            else:
+                doc.error = message
+            return doc
+        
+        async with asyncio.TaskGroup() as tg:
+            tareas = [
+                tg.create_task(subir(file, nombre))
+                for file, nombre in zip(documentos, nombres_tip_documento)
+            ]
+        return [tarea.result() for tarea in tareas]
 
     @staticmethod
-    async def get_documents_by_verification(
-        db: AsyncSession,
-        id_verificacion: int
-    ) -> List[Documento]:
-        """Obtiene todos los documentos de una solicitud de verificación usando ORM"""
-        documentos_query = select(Documento).where(
-            Documento.id_verificacion == id_verificacion
-        )
-        documentos_result = await db.execute(documentos_query)
-        return documentos_result.scalars().all()
+    async def delete_uploaded(subidos: List[DocumentoSubido]) -> None:
+        """Compensación: elimina en paralelo los archivos que sí se llegaron a subir"""
+        a_eliminar = [doc for doc in subidos if doc.file_url]
+        if not a_eliminar:
+            return
+        print(f"🧹 Eliminando {len(a_eliminar)} archivo(s) subido(s) por error en la solicitud")
+        await asyncio.gather(*(
+            asyncio.to_thread(storage_service.delete_uploaded_file, doc.file_url, doc.file_key, doc.storage_type)
+            for doc in a_eliminar
+        ), return_exceptions=True)
 
     @staticmethod
     async def get_document_by_id(
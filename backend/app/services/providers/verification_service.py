@@ -225,7 +225,7 @@ class VerificationService:
                 
         finally:
             if conn:
-                await direct_db_service.pool.release(conn)
+                await direct_db_service.release_connection(conn)
 
     @staticmethod
     def build_solicitud_data(solicitud: VerificacionSolicitud) -> dict:
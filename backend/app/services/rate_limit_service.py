@@ -1,69 +1,256 @@
 """
-Servicio para manejar rate limiting de emails
+Servicio de rate limiting (GCRA) para emails, IPs y endpoints.
+
+GCRA (Generic Cell Rate Algorithm) equivale a un token bucket: por cada clave
+solo se guarda un número (TAT, "theoretical arrival time"), así que cada
+verificación es O(1) y el estado de una clave desaparece cuando su cubo se
+vuelve a llenar. Con Redis configurado el estado se comparte entre workers
+mediante un script Lua atómico; sin Redis se usa un backend local acotado.
 """
-import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import math
+import time
 import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from app.core.config import TRUSTED_PROXY_HOPS
+from app.core.redis_config import RedisBackend
+from app.core.shared_store import shared_store
 
 logger = logging.getLogger(__name__)
 
+# Constantes
+RATE_LIMIT_KEY_PREFIX = "ratelimit"
+LOCAL_MAX_KEYS = 100_000
+LOCAL_SWEEP_INTERVAL_SECONDS = 60
+HEADER_X_FORWARDED_FOR = "x-forwarded-for"
+HEADER_RETRY_AFTER = "Retry-After"
+EMAIL_ADMIN = "b2bseva.notificaciones@gmail.com"
+
+# Script GCRA atómico. Usa el reloj de Redis para que todos los workers coincidan.
+GCRA_LUA = """
+local emission = tonumber(ARGV[1])
+local dvt = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local consume = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then tat = now end
+local new_tat = tat + emission * cost
+local allowed = 0
+if now >= new_tat - dvt then
+    allowed = 1
+    if consume == 1 then
+        redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+    end
+end
+return {allowed, tostring(tat - now), tostring(new_tat - now)}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Resultado de una verificación de rate limit"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # segundos hasta el próximo intento permitido (0 si se permitió)
+    reset_after: float  # segundos hasta que el cubo vuelva a estar lleno
+
+
+class LocalGCRABackend:
+    """Estado GCRA en memoria del proceso, acotado y con desalojo global periódico"""
+
+    def __init__(self, max_keys: int = LOCAL_MAX_KEYS, sweep_interval: float = LOCAL_SWEEP_INTERVAL_SECONDS):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._tats: Dict[str, float] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def _sweep(self, now: float) -> None:
+        """Elimina las claves cuyo cubo ya está lleno (equivalen a una clave nueva)"""
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        # Si aún se excede el máximo, descartar las claves más antiguas
+        overflow = len(self._tats) - self.max_keys
+        if overflow > 0:
+            for key in list(self._tats)[:overflow]:
+                del self._tats[key]
+        self._next_sweep = now + self.sweep_interval
+
+    async def apply(self, key: str, emission: float, dvt: float, cost: int, consume: bool) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        if now >= self._next_sweep or len(self._tats) > self.max_keys:
+            self._sweep(now)
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + emission * cost
+        allowed = now >= new_tat - dvt
+        if allowed and consume:
+            # Reinsertar para mantener el orden de inserción como orden de actividad
+            self._tats.pop(key, None)
+            self._tats[key] = new_tat
+        return allowed, tat - now, new_tat - now
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class RedisGCRABackend:
+    """Estado GCRA compartido en Redis (script Lua atómico)"""
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(GCRA_LUA)
+
+    async def apply(self, key: str, emission: float, dvt: float, cost: int, consume: bool) -> Tuple[bool, float, float]:
+        allowed, tat_offset, new_tat_offset = await self._script(
+            keys=[key], args=[emission, dvt, cost, 1 if consume else 0]
+        )
+        return bool(int(allowed)), float(tat_offset), float(new_tat_offset)
+
+
+def build_gcra_backend():
+    """Backend compartido si el almacén de estado usa Redis, local en caso contrario"""
+    if isinstance(shared_store.backend, RedisBackend):
+        return RedisGCRABackend(shared_store.backend.client)
+    return LocalGCRABackend()
+
+
+class GCRARateLimiter:
+    """Limita a `limit` eventos por `period` segundos por clave, con ráfaga de hasta `limit`"""
+
+    def __init__(self, name: str, limit: int, period: float, backend=None):
+        if limit <= 0 or period <= 0:
+            raise ValueError("limit y period deben ser positivos")
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.emission_interval = period / limit
+        self.backend = backend if backend is not None else build_gcra_backend()
+
+    def _key(self, key: str) -> str:
+        return f"{RATE_LIMIT_KEY_PREFIX}:{self.name}:{key}"
+
+    async def _apply(self, key: str, cost: int, consume: bool) -> RateLimitResult:
+        allowed, tat_offset, new_tat_offset = await self.backend.apply(
+            self._key(key), self.emission_interval, self.period, cost, consume
+        )
+        if allowed:
+            remaining = int((self.period - new_tat_offset) / self.emission_interval + 1e-9)
+            return RateLimitResult(True, self.limit, remaining, 0.0, new_tat_offset)
+        retry_after = new_tat_offset - self.period
+        return RateLimitResult(False, self.limit, 0, max(retry_after, 0.0), tat_offset)
+
+    async def hit(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Consume `cost` unidades si hay capacidad"""
+        return await self._apply(key, cost, consume=True)
+
+    async def peek(self, key: str) -> RateLimitResult:
+        """Consulta si se permitiría un evento, sin consumirlo"""
+        return await self._apply(key, 1, consume=False)
+
+
+def resolve_client_ip(
+    forwarded_for: Optional[str],
+    peer: Optional[str],
+    trusted_hops: int = TRUSTED_PROXY_HOPS
+) -> Optional[str]:
+    """
+    IP del cliente detrás de `trusted_hops` proxies de confianza.
+    Cada proxy agrega a X-Forwarded-For la dirección de quien se le conectó, así que la IP real
+    es la entrada número `trusted_hops` desde la derecha; las de la izquierda las escribe el
+    cliente y no se usan. Sin proxies (0) o con menos entradas de las esperadas se usa `peer`.
+    """
+    if trusted_hops > 0 and forwarded_for:
+        entries = [entry.strip() for entry in forwarded_for.split(",") if entry.strip()]
+        if len(entries) >= trusted_hops:
+            return entries[-trusted_hops]
+    return peer
+
+
+def get_client_ip(request: Optional[Request]) -> Optional[str]:
+    """IP del cliente, tomando de X-Forwarded-For solo lo que agregó el proxy de Railway"""
+    if request is None:
+        return None
+    return resolve_client_ip(
+        request.headers.get(HEADER_X_FORWARDED_FOR),
+        request.client.host if request.client else None
+    )
+
+
+def build_rate_limit_exception(result: RateLimitResult, detail: str) -> HTTPException:
+    """HTTPException 429 con el header Retry-After correspondiente"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={HEADER_RETRY_AFTER: str(max(1, math.ceil(result.retry_after)))}
+    )
+
+
 class EmailRateLimitService:
-    """Servicio para manejar rate limiting de emails"""
-    
-    def __init__(self):
-        # Cache en memoria para tracking de rate limits
-        self.email_attempts: Dict[str, list] = {}
-        self.rate_limit_window = 3600  # 1 hora en segundos
-        self.max_attempts = 3  # Máximo 3 intentos por hora por email
-        
-    def _clean_old_attempts(self, email: str):
-        """Limpiar intentos antiguos del cache"""
-        now = datetime.now()
-        if email in self.email_attempts:
-            self.email_attempts[email] = [
-                attempt_time for attempt_time in self.email_attempts[email]
-                if (now - attempt_time).total_seconds() < self.rate_limit_window
-            ]
-    
-    def can_send_email(self, email: str) -> bool:
+    """Servicio para manejar rate limiting de emails (por email y por IP)"""
+
+    def __init__(self, scope: str = "email", max_attempts: int = 3, rate_limit_window: int = 3600, max_attempts_per_ip: int = 10):
+        self.rate_limit_window = rate_limit_window  # 1 hora en segundos
+        self.max_attempts = max_attempts  # Máximo 3 intentos por hora por email
+        self.max_attempts_per_ip = max_attempts_per_ip
+        self.email_limiter = GCRARateLimiter(f"{scope}:email", max_attempts, rate_limit_window)
+        self.ip_limiter = GCRARateLimiter(f"{scope}:ip", max_attempts_per_ip, rate_limit_window)
+
+    async def check_and_record(self, email: str, client_ip: Optional[str] = None) -> RateLimitResult:
+        """Verifica y registra un intento; bloquea si se excede el límite del email o de la IP"""
+        if client_ip:
+            ip_result = await self.ip_limiter.hit(client_ip)
+            if not ip_result.allowed:
+                logger.warning(f"⚠️ Rate limit por IP excedido ({self.ip_limiter.name}): {client_ip}")
+                return ip_result
+        result = await self.email_limiter.hit(email.lower())
+        if result.allowed:
+            logger.info(f"📧 Registrado intento de email para {email}")
+        else:
+            logger.warning(f"⚠️ Rate limit por email excedido ({self.email_limiter.name}): {email}")
+        return result
+
+    async def can_send_email(self, email: str) -> bool:
         """Verificar si se puede enviar un email"""
-        self._clean_old_attempts(email)
-        
-        if email not in self.email_attempts:
-            return True
-            
-        return len(self.email_attempts[email]) < self.max_attempts
-    
-    def record_email_attempt(self, email: str):
+        return (await self.email_limiter.peek(email.lower())).allowed
+
+    async def record_email_attempt(self, email: str):
         """Registrar un intento de envío de email"""
-        if email not in self.email_attempts:
-            self.email_attempts[email] = []
-        
-        self.email_attempts[email].append(datetime.now())
+        await self.email_limiter.hit(email.lower())
         logger.info(f"📧 Registrado intento de email para {email}")
-    
-    def get_remaining_attempts(self, email: str) -> int:
+
+    async def get_remaining_attempts(self, email: str) -> int:
         """Obtener intentos restantes"""
-        self._clean_old_attempts(email)
-        
-        if email not in self.email_attempts:
-            return self.max_attempts
-            
-        return max(0, self.max_attempts - len(self.email_attempts[email]))
-    
-    def get_next_attempt_time(self, email: str) -> Optional[datetime]:
+        result = await self.email_limiter.peek(email.lower())
+        # peek simula un intento: si se permite, ese intento también está disponible
+        return result.remaining + 1 if result.allowed else 0
+
+    async def get_next_attempt_time(self, email: str) -> Optional[datetime]:
         """Obtener el tiempo del próximo intento permitido"""
-        self._clean_old_attempts(email)
-        
-        if email not in self.email_attempts or len(self.email_attempts[email]) < self.max_attempts:
+        result = await self.email_limiter.peek(email.lower())
+        if result.allowed:
             return None
-            
-        # El próximo intento será cuando expire el primer intento
-        oldest_attempt = min(self.email_attempts[email])
-        return oldest_attempt + timedelta(seconds=self.rate_limit_window)
-
-# Instancia global del servicio
-email_rate_limit_service = EmailRateLimitService()
+        return datetime.now() + timedelta(seconds=result.retry_after)
 
+    async def enforce(self, email: str, client_ip: Optional[str] = None, detail: Optional[str] = None) -> None:
+        """Registra el intento y lanza 429 con Retry-After si se excede el límite"""
+        result = await self.check_and_record(email, client_ip)
+        if not result.allowed:
+            next_attempt_time = datetime.now() + timedelta(seconds=result.retry_after)
+            raise build_rate_limit_exception(
+                result,
+                detail or f"Demasiados intentos. Próximo intento disponible: {next_attempt_time.strftime('%H:%M')}. Contacta a {EMAIL_ADMIN} para ayuda inmediata."
+            )
 
+# Instancias globales del servicio
+email_rate_limit_service = EmailRateLimitService()
+password_reset_rate_limit_service = EmailRateLimitService(
+    scope="password_reset",
+    max_attempts=5,
+    rate_limit_window=900,
+    max_attempts_per_ip=20
+)
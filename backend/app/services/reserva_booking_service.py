@@ -0,0 +1,193 @@
+"""
+Servicio de reserva atómica de horarios.
+
+Un horario de un servicio queda ocupado cuando tiene una reserva confirmada.
+Todas las operaciones que pueden ocupar un horario (crear una reserva y
+confirmarla) se ejecutan en una transacción que toma un advisory lock por
+servicio y por cada día que cubre la reserva (en orden, para no provocar
+deadlocks) antes de verificar solapamientos y escribir. Así dos peticiones
+concurrentes no pueden pasar la verificación a la vez: la segunda espera al
+commit de la primera y ve su resultado.
+
+Los solapamientos se buscan con la columna generada reserva.periodo (tsrange)
+y sus índices GiST (migrations/add_periodo_reserva.sql).
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+import asyncpg
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_CONFIRMADA = "confirmada"
+FORMATO_FECHA_DD_MM_YYYY = "%d/%m/%Y"
+SLOT_LOCK_PREFIX = "reserva_slot"
+
+MSG_HORARIO_OCUPADO = "El horario seleccionado (fecha: {fecha}, hora: {hora}) ya está reservado y confirmado por otro cliente. Por favor, selecciona otro horario disponible."
+MSG_HORARIO_OCUPADO_CONFIRMAR = "El horario seleccionado (fecha: {fecha}, hora: {hora}) ya está reservado y confirmado por otro cliente. No se puede confirmar esta reserva."
+MSG_RESERVA_NO_PENDIENTE = "La reserva ya no está pendiente"
+
+CONFIRMED_OVERLAP_QUERY = """
+    SELECT id_reserva
+    FROM reserva
+    WHERE id_servicio = $1
+    AND estado = $2
+    AND periodo && tsrange($3, $4, '[)')
+    AND ($5::int IS NULL OR id_reserva != $5)
+    LIMIT 1
+"""
+
+INSERT_RESERVA_QUERY = """
+    INSERT INTO reserva (id_servicio, user_id, descripcion, observacion, fecha, hora_inicio, hora_fin, estado)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    RETURNING id_reserva, id_servicio, user_id, descripcion, observacion, fecha, hora_inicio, hora_fin, estado
+"""
+
+RESERVA_SLOT_QUERY = """
+    SELECT id_reserva, id_servicio, fecha, hora_inicio, hora_fin, estado
+    FROM reserva
+    WHERE id_reserva = $1
+"""
+
+CONFIRMAR_RESERVA_QUERY = """
+    UPDATE reserva
+    SET estado = $2
+    WHERE id_reserva = $1 AND estado = $3
+    RETURNING id_reserva, estado, fecha, hora_inicio, hora_fin
+"""
+
+
+def periodo_reserva(fecha: date, hora_inicio: time, hora_fin: time) -> Tuple[datetime, datetime]:
+    """
+    Límites [inicio, fin) de una reserva, calculados igual que la columna reserva.periodo:
+    si hora_fin no es posterior a hora_inicio la reserva termina al día siguiente.
+    """
+    inicio = datetime.combine(fecha, hora_inicio)
+    fin = datetime.combine(fecha, hora_fin)
+    if hora_fin <= hora_inicio:
+        fin += timedelta(days=1)
+    return inicio, fin
+
+
+def fechas_periodo(fecha: date, hora_inicio: time, hora_fin: time) -> List[date]:
+    """Días que toca el periodo [inicio, fin), en orden: dos si la reserva cruza la medianoche"""
+    inicio, fin = periodo_reserva(fecha, hora_inicio, hora_fin)
+    # fin es exclusivo: una reserva que termina a las 00:00 no ocupa el día siguiente
+    ultimo = (fin - timedelta(microseconds=1)).date()
+    return [inicio.date() + timedelta(days=i) for i in range((ultimo - inicio.date()).days + 1)]
+
+
+class ReservaBookingService:
+    """Crea y confirma reservas sin carreras entre peticiones concurrentes"""
+
+    @staticmethod
+    def slot_lock_key(servicio_id: int, fecha: date) -> str:
+        """Clave del advisory lock: un lock por servicio y día (cubre cualquier solapamiento de horas)"""
+        return f"{SLOT_LOCK_PREFIX}:{servicio_id}:{fecha.isoformat()}"
+
+    async def _lock_slot(self, conn: asyncpg.Connection, servicio_id: int, fecha: date, hora_inicio: time, hora_fin: time) -> None:
+        """
+        Advisory locks transaccionales (se liberan al terminar la transacción) de cada día
+        que cubre la reserva. Una reserva de 23:30 a 00:30 compite también con las del día
+        siguiente; tomarlos en orden de fecha evita deadlocks entre reservas vecinas.
+        """
+        for dia in fechas_periodo(fecha, hora_inicio, hora_fin):
+            await conn.execute(
+                "SELECT pg_advisory_xact_lock(hashtextextended($1, 0))",
+                self.slot_lock_key(servicio_id, dia)
+            )
+
+    async def _ensure_slot_free(
+        self,
+        conn: asyncpg.Connection,
+        servicio_id: int,
+        fecha: date,
+        hora_inicio: time,
+        hora_fin: time,
+        mensaje: str,
+        excluir_reserva_id: Optional[int] = None
+    ) -> None:
+        """Lanza 409 si otra reserva confirmada se solapa con [hora_inicio, hora_fin)"""
+        inicio, fin = periodo_reserva(fecha, hora_inicio, hora_fin)
+        conflicto = await conn.fetchrow(
+            CONFIRMED_OVERLAP_QUERY,
+            servicio_id,
+            ESTADO_CONFIRMADA,
+            inicio,
+            fin,
+            excluir_reserva_id
+        )
+        if conflicto:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=mensaje.format(
+                    fecha=fecha.strftime(FORMATO_FECHA_DD_MM_YYYY),
+                    hora=hora_inicio.strftime('%H:%M')
+                )
+            )
+
+    async def crear_reserva(
+        self,
+        conn: asyncpg.Connection,
+        servicio_id: int,
+        user_id: str,
+        descripcion: str,
+        observacion: Optional[str],
+        fecha: date,
+        hora_inicio: time,
+        hora_fin: time
+    ) -> asyncpg.Record:
+        """Inserta una reserva pendiente si el horario no está confirmado por otra reserva"""
+        async with conn.transaction():
+            await self._lock_slot(conn, servicio_id, fecha, hora_inicio, hora_fin)
+            await self._ensure_slot_free(conn, servicio_id, fecha, hora_inicio, hora_fin, MSG_HORARIO_OCUPADO)
+            nueva_reserva = await conn.fetchrow(
+                INSERT_RESERVA_QUERY,
+                servicio_id,
+                user_id,
+                descripcion,
+                observacion,
+                fecha,
+                hora_inicio,
+                hora_fin,
+                ESTADO_PENDIENTE
+            )
+        logger.info(f"📅 Reserva {nueva_reserva['id_reserva']} creada para servicio {servicio_id} el {fecha}")
+        return nueva_reserva
+
+    async def confirmar_reserva(self, conn: asyncpg.Connection, reserva_id: int) -> asyncpg.Record:
+        """
+        Confirma una reserva pendiente si ninguna otra reserva confirmada ocupa su horario.
+        Solo una de varias confirmaciones concurrentes del mismo horario puede ganar.
+        """
+        async with conn.transaction():
+            reserva = await conn.fetchrow(RESERVA_SLOT_QUERY, reserva_id)
+            if reserva is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reserva no encontrada")
+            if reserva['fecha'] and reserva['hora_inicio'] and reserva['hora_fin']:
+                await self._lock_slot(
+                    conn, reserva['id_servicio'], reserva['fecha'], reserva['hora_inicio'], reserva['hora_fin']
+                )
+                await self._ensure_slot_free(
+                    conn,
+                    reserva['id_servicio'],
+                    reserva['fecha'],
+                    reserva['hora_inicio'],
+                    reserva['hora_fin'],
+                    MSG_HORARIO_OCUPADO_CONFIRMAR,
+                    excluir_reserva_id=reserva_id
+                )
+            # La condición sobre el estado evita confirmar dos veces o confirmar una reserva cancelada en paralelo
+            confirmada = await conn.fetchrow(CONFIRMAR_RESERVA_QUERY, reserva_id, ESTADO_CONFIRMADA, ESTADO_PENDIENTE)
+            if confirmada is None:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=MSG_RESERVA_NO_PENDIENTE)
+        logger.info(f"✅ Reserva {reserva_id} confirmada")
+        return confirmada
+
+
+# Instancia global del servicio
+reserva_booking_service = ReservaBookingService()
@@ -7,9 +7,14 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 import os
 from app.services.gmail_smtp_service import gmail_smtp_service
+from app.core.shared_store import shared_store
 
 logger = logging.getLogger(__name__)
 
+# Prefijo y retención de las marcas de notificación enviada (anti-duplicados)
+SENT_NOTIFICATION_KEY_PREFIX = "reserva_notif"
+SENT_NOTIFICATION_TTL_SECONDS = 30 * 24 * 3600
+
 class ReservaNotificationService:
     """Servicio para envío de notificaciones de reservas por correo"""
     
@@ -20,9 +25,8 @@ class ReservaNotificationService:
         # URL base del frontend
         self.frontend_url = os.getenv("FRONTEND_URL", "https://frontend-production-ee3b.up.railway.app")
         
-        # Cache de notificaciones enviadas para evitar duplicados
-        # Formato: {reserva_id}:{evento} -> timestamp
-        self._sent_notifications = {}
+        # Las notificaciones enviadas se marcan en el almacén compartido para evitar duplicados
+        # Formato: reserva_notif:{reserva_id}:{evento} -> timestamp
     
     def _replace_placeholders(self, template: str, data: Dict[str, Any]) -> str:
         """
@@ -41,7 +45,7 @@ class ReservaNotificationService:
             result = result.replace(placeholder, str(value) if value else "")
         return result
     
-    def _check_and_mark_sent(self, reserva_id: int, evento: str) -> bool:
+    async def _check_and_mark_sent(self, reserva_id: int, evento: str) -> bool:
         """
         Verifica si ya se envió una notificación para este evento
         Si no se envió, la marca como enviada
@@ -53,14 +57,13 @@ class ReservaNotificationService:
         Returns:
             True si ya se envió, False si es la primera vez
         """
-        key = f"{reserva_id}:{evento}"
+        key = f"{SENT_NOTIFICATION_KEY_PREFIX}:{reserva_id}:{evento}"
         
-        if key in self._sent_notifications:
+        # Marcar como enviada de forma atómica (un solo worker gana)
+        marked = await shared_store.add(key, datetime.now().isoformat(), ttl=SENT_NOTIFICATION_TTL_SECONDS)
+        if not marked:
             logger.warning(f"⚠️ Notificación ya enviada: {key}")
             return True
-        
-        # Marcar como enviada
-        self._sent_notifications[key] = datetime.now().isoformat()
         return False
     
     def _generate_links(self, reserva_id: int) -> Dict[str, str]:
@@ -128,7 +131,7 @@ class ReservaNotificationService:
     # 1) CREAR RESERVA (Pendiente)
     # ========================================
     
-    def notify_reserva_creada(
+    async def notify_reserva_creada(
         self,
         reserva_id: int,
         servicio_nombre: str,
@@ -144,7 +147,7 @@ class ReservaNotificationService:
         Destinatarios: Cliente y Proveedor
         """
         # Verificar si ya se envió
-        if self._check_and_mark_sent(reserva_id, "crear"):
+        if await self._check_and_mark_sent(reserva_id, "crear"):
             return False
         
         logger.info(f"📧 Enviando notificación de reserva creada #{reserva_id}")
@@ -236,7 +239,7 @@ class ReservaNotificationService:
     # 2) CONFIRMAR RESERVA (Confirmada)
     # ========================================
     
-    def notify_reserva_confirmada(
+    async def notify_reserva_confirmada(
         self,
         reserva_id: int,
         servicio_nombre: str,
@@ -252,7 +255,7 @@ class ReservaNotificationService:
         Destinatarios: Cliente y Proveedor
         """
         # Verificar si ya se envió
-        if self._check_and_mark_sent(reserva_id, "confirmar"):
+        if await self._check_and_mark_sent(reserva_id, "confirmar"):
             return False
         
         logger.info(f"📧 Enviando notificación de reserva confirmada #{reserva_id}")
@@ -338,7 +341,7 @@ class ReservaNotificationService:
     # 3) COMPLETAR RESERVA (Completada)
     # ========================================
     
-    def notify_reserva_completada(
+    async def notify_reserva_completada(
         self,
         reserva_id: int,
         servicio_nombre: str,
@@ -354,7 +357,7 @@ class ReservaNotificationService:
         Destinatarios: Cliente, Proveedor, y Admin (CC)
         """
         # Verificar si ya se envió
-        if self._check_and_mark_sent(reserva_id, "completar"):
+        if await self._check_and_mark_sent(reserva_id, "completar"):
             return False
         
         logger.info(f"📧 Enviando notificación de reserva completada #{reserva_id}")
@@ -538,7 +541,7 @@ class ReservaNotificationService:
     # 4) CANCELACIÓN MANUAL (Cancelada)
     # ========================================
     
-    def notify_reserva_cancelada(
+    async def notify_reserva_cancelada(
         self,
         reserva_id: int,
         servicio_nombre: str,
@@ -555,7 +558,7 @@ class ReservaNotificationService:
         Destinatarios: Cliente y Proveedor
         """
         # Verificar si ya se envió
-        if self._check_and_mark_sent(reserva_id, "cancelar"):
+        if await self._check_and_mark_sent(reserva_id, "cancelar"):
             return False
         
         logger.info(f"📧 Enviando notificación de reserva cancelada #{reserva_id}")
@@ -645,7 +648,7 @@ class ReservaNotificationService:
     # 5) CANCELACIÓN AUTOMÁTICA
     # ========================================
     
-    def notify_reserva_cancelada_automatica(
+    async def notify_reserva_cancelada_automatica(
         self,
         reserva_id: int,
         servicio_nombre: str,
@@ -661,7 +664,7 @@ class ReservaNotificationService:
         Destinatarios: Cliente y Proveedor
         """
         # Verificar si ya se envió
-        if self._check_and_mark_sent(reserva_id, "cancelar_auto"):
+        if await self._check_and_mark_sent(reserva_id, "cancelar_auto"):
             return False
         
         logger.info(f"📧 Enviando notificación de cancelación automática #{reserva_id}")
@@ -138,7 +138,7 @@ class RUCVerificationService:
             )
         finally:
             if conn:
-                await direct_db_service.pool.release(conn)
+                await direct_db_service.release_connection(conn)
     
     @staticmethod
     async def actualizar_estado_usuario(user_id: UUID, estado: str) -> None:
@@ -164,5 +164,5 @@ class RUCVerificationService:
             raise
         finally:
             if conn:
-                await direct_db_service.pool.release(conn)
+                await direct_db_service.release_connection(conn)
 
@@ -0,0 +1,140 @@
+"""
+Tareas periódicas registradas en el planificador (scheduler_service).
+
+- reservas_vencidas: cancela las reservas pendientes cuyo horario ya empezó sin
+  que el proveedor las confirmara y avisa a cliente y proveedor.
+- verificaciones_ruc_vencidas: cuenta las verificaciones de RUC pendientes que
+  superaron su fecha límite de 72 horas hábiles (el estado "vencido" se calcula
+  al leer; aquí solo se alerta).
+- capacidad_diaria: recalcula capacidad_diaria_servicio una vez por fecha de
+  Paraguay para que el horizonte avance un día cada día.
+
+Los barridos son UPDATE ... RETURNING por lotes sobre índices parciales
+(migrations/create_scheduler_lease.sql) y son idempotentes.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+from app.core.config import SCHEDULER_SWEEP_BATCH_SIZE, SCHEDULER_SWEEP_INTERVAL_SECONDS
+from app.services.capacidad_diaria_service import capacidad_diaria_service
+from app.services.date_service import DateService
+from app.services.reserva_notification_service import reserva_notification_service
+from app.services.scheduler_service import SchedulerService
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+FORMATO_FECHA_DD_MM_YYYY = "%d/%m/%Y"
+
+CANCELAR_RESERVAS_VENCIDAS_QUERY = """
+    UPDATE reserva r
+    SET estado = 'cancelada'
+    WHERE r.id_reserva IN (
+        SELECT id_reserva
+        FROM reserva
+        WHERE estado = 'pendiente' AND lower(periodo) <= $1
+        ORDER BY lower(periodo)
+        LIMIT $2
+        FOR UPDATE SKIP LOCKED
+    )
+    AND r.estado = 'pendiente'
+    RETURNING r.id_reserva
+"""
+
+NOTIFICACION_RESERVAS_QUERY = """
+    SELECT
+        r.id_reserva,
+        s.nombre AS servicio_nombre,
+        r.fecha,
+        r.hora_inicio,
+        u_cliente.nombre_persona AS cliente_nombre,
+        au_cliente.email AS cliente_email,
+        u_prov.nombre_persona AS proveedor_nombre,
+        au_prov.email AS proveedor_email
+    FROM public.reserva r
+    JOIN public.servicio s ON r.id_servicio = s.id_servicio
+    JOIN public.perfil_empresa pe ON s.id_perfil = pe.id_perfil
+    JOIN public.users u_cliente ON r.user_id = u_cliente.id
+    JOIN auth.users au_cliente ON r.user_id = au_cliente.id
+    JOIN public.users u_prov ON pe.user_id = u_prov.id
+    JOIN auth.users au_prov ON pe.user_id = au_prov.id
+    WHERE r.id_reserva = ANY($1::bigint[])
+"""
+
+VERIFICACIONES_RUC_VENCIDAS_QUERY = """
+    SELECT COUNT(*)
+    FROM verificacion_ruc
+    WHERE estado = 'pendiente' AND fecha_limite_verificacion < NOW()
+"""
+
+
+async def _notificar_cancelacion_automatica(conn: asyncpg.Connection, reserva_ids: List[int]) -> None:
+    """Avisa a cliente y proveedor de cada reserva cancelada (un error no detiene el barrido)"""
+    try:
+        filas = await conn.fetch(NOTIFICACION_RESERVAS_QUERY, reserva_ids)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudieron obtener los datos de notificación de reservas canceladas: {e}")
+        return
+    for fila in filas:
+        try:
+            await reserva_notification_service.notify_reserva_cancelada_automatica(
+                reserva_id=fila['id_reserva'],
+                servicio_nombre=fila['servicio_nombre'],
+                fecha=fila['fecha'].strftime(FORMATO_FECHA_DD_MM_YYYY) if fila['fecha'] else "",
+                hora=str(fila['hora_inicio']) if fila['hora_inicio'] else "",
+                cliente_nombre=fila['cliente_nombre'] or "Cliente",
+                cliente_email=fila['cliente_email'],
+                proveedor_nombre=fila['proveedor_nombre'] or "Proveedor",
+                proveedor_email=fila['proveedor_email']
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Error notificando la cancelación automática de la reserva {fila['id_reserva']}: {e}")
+
+
+async def cancelar_reservas_vencidas(
+    conn: asyncpg.Connection,
+    ahora: Optional[datetime] = None,
+    tamano_lote: int = SCHEDULER_SWEEP_BATCH_SIZE
+) -> int:
+    """
+    Cancela por lotes las reservas pendientes cuyo horario ya empezó. Cada lote es
+    una transacción corta; SKIP LOCKED evita esperar a una confirmación en curso.
+    Las reservas pendientes no ocupan horario, así que la disponibilidad no cambia.
+    
+    reserva.periodo guarda hora local de Paraguay sin zona: se compara con la hora
+    GMT-3 (el reloj del servidor está en UTC).
+    """
+    ahora = ahora or DateService.now().replace(tzinfo=None)
+    total = 0
+    while True:
+        async with conn.transaction():
+            filas = await conn.fetch(CANCELAR_RESERVAS_VENCIDAS_QUERY, ahora, tamano_lote)
+        if filas:
+            reserva_ids = [fila['id_reserva'] for fila in filas]
+            logger.info(f"🕒 {len(reserva_ids)} reservas pendientes canceladas automáticamente")
+            await _notificar_cancelacion_automatica(conn, reserva_ids)
+        total += len(filas)
+        if len(filas) < tamano_lote:
+            return total
+
+
+async def contar_verificaciones_ruc_vencidas(conn: asyncpg.Connection) -> int:
+    """Verificaciones de RUC pendientes fuera de plazo (alerta para los administradores)"""
+    vencidas = await conn.fetchval(VERIFICACIONES_RUC_VENCIDAS_QUERY)
+    if vencidas:
+        logger.warning(f"⚠️ {vencidas} verificaciones de RUC pendientes superaron las 72 horas hábiles")
+    return vencidas
+
+
+async def refrescar_capacidad_diaria(conn: asyncpg.Connection) -> Dict[str, Any]:
+    return await capacidad_diaria_service.recalcular_todos(conn)
+
+
+def registrar_jobs(scheduler: SchedulerService) -> None:
+    """Registra las tareas periódicas de la aplicación"""
+    scheduler.register("reservas_vencidas", SCHEDULER_SWEEP_INTERVAL_SECONDS, cancelar_reservas_vencidas)
+    scheduler.register("verificaciones_ruc_vencidas", SCHEDULER_SWEEP_INTERVAL_SECONDS, contar_verificaciones_ruc_vencidas)
+    scheduler.register_daily("capacidad_diaria", refrescar_capacidad_diaria)
@@ -0,0 +1,236 @@
+"""
+Planificador de tareas periódicas dentro de la aplicación.
+
+Cada worker arranca el planificador desde el lifespan, pero solo el que tiene el
+lease en la tabla scheduler_lease ejecuta las tareas. El lease se renueva en
+cada ciclo con un INSERT ... ON CONFLICT condicionado a que el dueño sea el
+mismo worker o a que el lease anterior haya vencido, así que si el líder muere
+otro worker lo reemplaza tras SCHEDULER_LEASE_SECONDS. No se usan advisory
+locks de sesión porque con un pooler en modo transacción no sobreviven entre
+sentencias.
+
+Las tareas deben ser idempotentes: si una tarda más que el lease, otro worker
+podría ejecutarla en paralelo durante un ciclo.
+
+Las tareas diarias se ejecutan una vez por fecha de Paraguay (GMT-3): la fecha de
+la última ejecución exitosa queda en scheduler_ejecucion_diaria, así un reinicio,
+un deploy o un cambio de líder no las repiten en el mismo día.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, Optional
+
+import asyncpg
+
+from app.core.config import SCHEDULER_ENABLED, SCHEDULER_LEASE_SECONDS, SCHEDULER_TICK_SECONDS
+from app.services.date_service import DateService
+from app.services.direct_db_service import direct_db_service
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+SCHEDULER_LEASE_NAME = "scheduler"
+REINTENTO_TAREA_DIARIA = 15 * 60  # segundos entre intentos de una tarea diaria que falló
+
+ACQUIRE_LEASE_QUERY = """
+    INSERT INTO scheduler_lease (nombre, owner, expira_en)
+    VALUES ($1, $2, NOW() + make_interval(secs => $3))
+    ON CONFLICT (nombre) DO UPDATE
+    SET owner = EXCLUDED.owner, expira_en = EXCLUDED.expira_en
+    WHERE scheduler_lease.owner = EXCLUDED.owner OR scheduler_lease.expira_en < NOW()
+    RETURNING owner
+"""
+
+RELEASE_LEASE_QUERY = """
+    DELETE FROM scheduler_lease
+    WHERE nombre = $1 AND owner = $2
+"""
+
+ULTIMA_EJECUCION_DIARIA_QUERY = """
+    SELECT fecha FROM scheduler_ejecucion_diaria WHERE nombre = $1
+"""
+
+REGISTRAR_EJECUCION_DIARIA_QUERY = """
+    INSERT INTO scheduler_ejecucion_diaria (nombre, fecha, ejecutado_en)
+    VALUES ($1, $2, NOW())
+    ON CONFLICT (nombre) DO UPDATE
+    SET fecha = EXCLUDED.fecha, ejecutado_en = EXCLUDED.ejecutado_en
+"""
+
+JobFunc = Callable[[asyncpg.Connection], Awaitable[Any]]
+ConnectionFactory = Callable[[], AsyncContextManager[asyncpg.Connection]]
+
+
+@dataclass
+class ScheduledJob:
+    """Tarea periódica y sus métricas de ejecución"""
+    nombre: str
+    intervalo: float  # segundos entre ejecuciones (entre intentos si es diaria)
+    funcion: JobFunc
+    diaria: bool = False  # una ejecución exitosa por fecha de Paraguay
+    ultima_fecha: Optional[date] = None  # fecha de la última ejecución diaria registrada
+    proxima_ejecucion: float = 0.0  # time.monotonic(); 0 = en el próximo ciclo como líder
+    ejecuciones: int = 0
+    errores: int = 0
+    duracion_total_ms: float = 0.0
+    duracion_maxima_ms: float = 0.0
+    ultima_duracion_ms: Optional[float] = None
+    ultima_ejecucion: Optional[str] = None
+    ultimo_resultado: Any = None
+    ultimo_error: Optional[str] = None
+
+    def registrar(self, duracion_ms: float, resultado: Any = None, error: Optional[str] = None) -> None:
+        self.ejecuciones += 1
+        self.duracion_total_ms += duracion_ms
+        self.duracion_maxima_ms = max(self.duracion_maxima_ms, duracion_ms)
+        self.ultima_duracion_ms = duracion_ms
+        self.ultima_ejecucion = datetime.now(timezone.utc).isoformat()
+        if error is None:
+            self.ultimo_resultado = resultado
+        else:
+            self.errores += 1
+            self.ultimo_error = error
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "intervalo_segundos": self.intervalo,
+            "diaria": self.diaria,
+            "ultima_fecha": self.ultima_fecha.isoformat() if self.ultima_fecha else None,
+            "ejecuciones": self.ejecuciones,
+            "errores": self.errores,
+            "ultima_duracion_ms": round(self.ultima_duracion_ms, 2) if self.ultima_duracion_ms is not None else None,
+            "duracion_media_ms": round(self.duracion_total_ms / self.ejecuciones, 2) if self.ejecuciones else None,
+            "duracion_maxima_ms": round(self.duracion_maxima_ms, 2),
+            "ultima_ejecucion": self.ultima_ejecucion,
+            "ultimo_resultado": self.ultimo_resultado,
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+class SchedulerService:
+    """Ejecuta tareas periódicas en un único worker elegido por lease en Postgres"""
+
+    def __init__(
+        self,
+        lease_seconds: float = SCHEDULER_LEASE_SECONDS,
+        tick_seconds: float = SCHEDULER_TICK_SECONDS,
+        connection_factory: Optional[ConnectionFactory] = None,
+        lease_name: str = SCHEDULER_LEASE_NAME
+    ):
+        self.lease_seconds = lease_seconds
+        self.tick_seconds = tick_seconds
+        self.lease_name = lease_name
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._connection_factory = connection_factory or direct_db_service.connection
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.es_lider = False
+        self._task: Optional[asyncio.Task] = None
+        self._detener = asyncio.Event()
+
+    def register(self, nombre: str, intervalo: float, funcion: JobFunc) -> None:
+        """Registra una tarea; se ejecuta por primera vez en el primer ciclo como líder"""
+        self.jobs[nombre] = ScheduledJob(nombre=nombre, intervalo=intervalo, funcion=funcion)
+
+    def register_daily(self, nombre: str, funcion: JobFunc, reintento: float = REINTENTO_TAREA_DIARIA) -> None:
+        """Registra una tarea diaria: corre al cambiar la fecha de Paraguay y reintenta cada `reintento` si falla"""
+        self.jobs[nombre] = ScheduledJob(nombre=nombre, intervalo=reintento, funcion=funcion, diaria=True)
+
+    async def _pendiente_hoy(self, conn: asyncpg.Connection, job: ScheduledJob, hoy: date) -> bool:
+        """True si la tarea diaria todavía no se ejecutó con éxito en la fecha `hoy` (por ningún líder)"""
+        if job.ultima_fecha is None or job.ultima_fecha < hoy:
+            job.ultima_fecha = await conn.fetchval(ULTIMA_EJECUCION_DIARIA_QUERY, job.nombre)
+        return job.ultima_fecha is None or job.ultima_fecha < hoy
+
+    async def _renovar_lease(self, conn: asyncpg.Connection) -> bool:
+        """Adquiere o renueva el lease. True si este worker es el líder"""
+        owner = await conn.fetchval(ACQUIRE_LEASE_QUERY, self.lease_name, self.owner, float(self.lease_seconds))
+        es_lider = owner == self.owner
+        if es_lider != self.es_lider:
+            logger.info(f"👑 Planificador {self.owner}: {'es líder' if es_lider else 'dejó de ser líder'}")
+        self.es_lider = es_lider
+        return es_lider
+
+    async def _ejecutar(self, conn: asyncpg.Connection, job: ScheduledJob, hoy: Optional[date] = None) -> None:
+        inicio = time.perf_counter()
+        try:
+            resultado = await job.funcion(conn)
+            if job.diaria:
+                await conn.execute(REGISTRAR_EJECUCION_DIARIA_QUERY, job.nombre, hoy)
+                job.ultima_fecha = hoy
+            job.registrar((time.perf_counter() - inicio) * 1000, resultado=resultado)
+            logger.info(f"⏱️ Tarea {job.nombre} completada en {job.ultima_duracion_ms:.0f} ms: {resultado}")
+        except Exception as e:
+            job.registrar((time.perf_counter() - inicio) * 1000, error=str(e))
+            logger.error(f"❌ Error en la tarea {job.nombre}: {e}")
+        job.proxima_ejecucion = time.monotonic() + job.intervalo
+
+    async def tick(self) -> None:
+        """Un ciclo: renueva el lease y, si es líder, ejecuta las tareas vencidas"""
+        async with self._connection_factory() as conn:
+            if not await self._renovar_lease(conn):
+                return
+            hoy = DateService.now().date()
+            for job in list(self.jobs.values()):
+                if time.monotonic() < job.proxima_ejecucion:
+                    continue
+                if job.diaria and not await self._pendiente_hoy(conn, job, hoy):
+                    continue
+                # Renovar antes de cada tarea: una tarea larga no debe dejar vencer el lease de las siguientes
+                if not await self._renovar_lease(conn):
+                    return
+                await self._ejecutar(conn, job, hoy)
+
+    async def _loop(self) -> None:
+        while not self._detener.is_set():
+            try:
+                await self.tick()
+            except Exception as e:
+                self.es_lider = False
+                logger.error(f"❌ Error en el ciclo del planificador: {e}")
+            try:
+                await asyncio.wait_for(self._detener.wait(), timeout=self.tick_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        if not SCHEDULER_ENABLED:
+            logger.info("⏸️ Planificador deshabilitado (SCHEDULER_ENABLED=false)")
+            return
+        if self._task is not None:
+            return
+        self._detener = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"🗓️ Planificador iniciado ({len(self.jobs)} tareas, owner {self.owner})")
+
+    async def stop(self) -> None:
+        """Detiene el ciclo y libera el lease para que otro worker tome el relevo sin esperar"""
+        if self._task is None:
+            return
+        self._detener.set()
+        await self._task
+        self._task = None
+        if self.es_lider:
+            try:
+                async with self._connection_factory() as conn:
+                    await conn.execute(RELEASE_LEASE_QUERY, self.lease_name, self.owner)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo liberar el lease del planificador: {e}")
+            self.es_lider = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "owner": self.owner,
+            "es_lider": self.es_lider,
+            "activo": self._task is not None,
+            "jobs": {nombre: job.metricas() for nombre, job in self.jobs.items()},
+        }
+
+
+# Instancia global del servicio
+scheduler_service = SchedulerService()
@@ -0,0 +1,122 @@
+"""
+Estado de salud y métricas de subida de los backends de almacenamiento (iDrive, Supabase, local).
+
+Los buckets se verifican una vez al arrancar y el resultado queda en memoria:
+  - sano: las subidas van directo al backend, sin sondeos previos
+  - caído: se responde error de inmediato (y el llamador usa su fallback) hasta
+    que vence STORAGE_HEALTH_TTL_SECONDS; ahí se vuelve a sondear
+  - desconocido: todavía no se verificó o falló una subida; la próxima subida sondea
+Una subida fallida es la única forma de que un backend sano vuelva a sondearse.
+Cada worker lleva su propio estado y contadores.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.core.config import STORAGE_HEALTH_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+BACKEND_IDRIVE = "idrive"
+BACKEND_SUPABASE = "supabase"
+BACKEND_LOCAL = "local"
+ESTADO_SANO = "sano"
+ESTADO_CAIDO = "caido"
+ESTADO_DESCONOCIDO = "desconocido"
+
+
+@dataclass
+class StorageBackendHealth:
+    """Resultado del último sondeo de un backend y contadores de sus subidas"""
+    nombre: str
+    ttl: float = STORAGE_HEALTH_TTL_SECONDS
+    sano: Optional[bool] = None  # None = desconocido
+    mensaje: Optional[str] = None
+    verificado_en: Optional[float] = None  # time.monotonic() del último sondeo
+    ultima_verificacion: Optional[str] = None
+    sondeos: int = 0
+    subidas: int = 0
+    errores: int = 0
+    duracion_total_ms: float = 0.0
+    duracion_maxima_ms: float = 0.0
+    ultima_duracion_ms: Optional[float] = None
+    ultimo_error: Optional[str] = None
+
+    @property
+    def estado(self) -> str:
+        if self.sano is None:
+            return ESTADO_DESCONOCIDO
+        return ESTADO_SANO if self.sano else ESTADO_CAIDO
+
+    def necesita_sondeo(self) -> bool:
+        """Sondear si el estado es desconocido o si un resultado negativo ya venció"""
+        if self.sano is None or self.verificado_en is None:
+            return True
+        if self.sano:
+            return False
+        return time.monotonic() - self.verificado_en >= self.ttl
+
+    def registrar_sondeo(self, sano: bool, mensaje: Optional[str] = None) -> None:
+        self.sondeos += 1
+        self.sano = sano
+        self.mensaje = mensaje
+        self.verificado_en = time.monotonic()
+        self.ultima_verificacion = datetime.now(timezone.utc).isoformat()
+        if sano:
+            logger.info(f"✅ Almacenamiento {self.nombre} verificado")
+        else:
+            logger.warning(f"⚠️ Almacenamiento {self.nombre} no disponible: {mensaje}")
+
+    def registrar_subida(self, duracion_ms: float, exito: bool, error: Optional[str] = None) -> None:
+        """Contabiliza una subida; si falló, el próximo intento vuelve a sondear el backend"""
+        self.subidas += 1
+        self.duracion_total_ms += duracion_ms
+        self.duracion_maxima_ms = max(self.duracion_maxima_ms, duracion_ms)
+        self.ultima_duracion_ms = duracion_ms
+        if not exito:
+            self.errores += 1
+            self.ultimo_error = error
+            self.sano = None
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "estado": self.estado,
+            "mensaje": self.mensaje,
+            "ultima_verificacion": self.ultima_verificacion,
+            "sondeos": self.sondeos,
+            "subidas": self.subidas,
+            "errores": self.errores,
+            "duracion_promedio_ms": round(self.duracion_total_ms / self.subidas, 2) if self.subidas else None,
+            "duracion_maxima_ms": round(self.duracion_maxima_ms, 2),
+            "ultima_duracion_ms": round(self.ultima_duracion_ms, 2) if self.ultima_duracion_ms is not None else None,
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+class StorageHealthRegistry:
+    """Estado por backend de almacenamiento, compartido por los servicios de subida"""
+
+    def __init__(self, ttl: float = STORAGE_HEALTH_TTL_SECONDS):
+        self.ttl = ttl
+        self.backends: Dict[str, StorageBackendHealth] = {}
+
+    def backend(self, nombre: str) -> StorageBackendHealth:
+        if nombre not in self.backends:
+            self.backends[nombre] = StorageBackendHealth(nombre=nombre, ttl=self.ttl)
+        return self.backends[nombre]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "ttl_segundos": self.ttl,
+            "backends": {nombre: backend.metricas() for nombre, backend in self.backends.items()},
+        }
+
+    def reset(self) -> None:
+        self.backends.clear()
+
+
+# Instancia global del servicio
+storage_health = StorageHealthRegistry()
@@ -5,13 +5,15 @@ Capa de Lógica de Negocio - Maneja la subida de archivos a diferentes proveedor
 """
 
 import logging
+import time
 import uuid
-from typing import Tuple, Optional
+from typing import Tuple, Optional, BinaryIO
 from fastapi import HTTPException, status
 
 from app.idrive.idrive_service import idrive_service
 from app.api.v1.dependencies.local_storage import local_storage_service
 from app.api.v1.routers.providers.constants import PREFIX_TEMP
+from app.services.storage_health import BACKEND_IDRIVE, BACKEND_LOCAL, storage_health
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +63,42 @@ class StorageService:
         
         return self._upload_to_local(file_content, filename, document_type)
     
+    def upload_fileobj_with_fallback(
+        self,
+        fileobj: BinaryIO,
+        filename: str,
+        document_type: str = "provider",
+        content_type: Optional[str] = None
+    ) -> Tuple[bool, str, str, str]:
+        """
+        Igual que upload_file_with_fallback pero en streaming desde un archivo
+        (p. ej. el SpooledTemporaryFile de un UploadFile). Bloqueante: usar asyncio.to_thread.
+        - Retorna: (success, message, file_url, storage_type)
+        """
+        idrive_success, idrive_message, idrive_url = self.idrive_service.upload_fileobj(
+            fileobj, filename, content_type
+        )
+        if idrive_success:
+            return True, idrive_message, idrive_url, "idrive"
+        
+        logger.warning(f"⚠️ iDrive falló: {idrive_message}")
+        logger.info("🔄 Cambiando a almacenamiento local como fallback")
+        # El almacenamiento local trabaja con bytes: solo en el fallback se lee el archivo completo
+        fileobj.seek(0)
+        return self._upload_to_local(fileobj.read(), filename, document_type)
+    
+    def delete_uploaded_file(self, file_url: str, file_key: str, storage_type: str) -> bool:
+        """Elimina un archivo recién subido (compensación cuando falla el resto de la operación)"""
+        if storage_type == "idrive":
+            success, message = self.idrive_service.delete_file(file_key)
+        elif storage_type == "local":
+            success, message = self.local_storage.delete_file(file_url)
+        else:
+            return False
+        if not success:
+            logger.warning(f"⚠️ No se pudo eliminar {file_url}: {message}")
+        return success
+    
     def _upload_to_local(
         self, 
         file_content: bytes, 
@@ -68,6 +106,8 @@ class StorageService:
         document_type: str
     ) -> Tuple[bool, str, str, str]:
         """Sube archivo a almacenamiento local"""
+        health = storage_health.backend(BACKEND_LOCAL)
+        inicio = time.perf_counter()
         try:
             # Usar el método que maneja estructura de directorios
             if document_type == "provider" and "/" in filename:
@@ -81,6 +121,7 @@ class StorageService:
                     file_content, filename, document_type
                 )
             
+            health.registrar_subida((time.perf_counter() - inicio) * 1000, success, None if success else message)
             if success:
                 logger.info("✅ Archivo guardado localmente como fallback")
                 return True, f"{message} (fallback)", file_url, "local"
@@ -90,6 +131,7 @@ class StorageService:
                 
         except Exception as e:
             error_msg = str(e)
+            health.registrar_subida((time.perf_counter() - inicio) * 1000, False, error_msg)
             logger.error(f"❌ Error en fallback local: {error_msg}")
             return False, f"Error en fallback local: {error_msg}", "", "none"
     
@@ -182,6 +224,8 @@ class StorageService:
         # Probar iDrive
         try:
             idrive_ok, idrive_msg = self.idrive_service.test_connection()
+            # El diagnóstico también actualiza el estado cacheado que usan las subidas
+            storage_health.backend(BACKEND_IDRIVE).registrar_sondeo(idrive_ok, idrive_msg)
             results["idrive"]["status"] = "ok" if idrive_ok else "error"
             results["idrive"]["message"] = idrive_msg
         except Exception as e:
@@ -2,12 +2,21 @@
 Servicio de almacenamiento de imágenes usando Supabase Storage
 """
 import os
-import uuid
 import asyncio
+import time
 from typing import Optional, Tuple
 import logging
 from app.core.config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
 from supabase import create_client, Client
+from app.services.storage_health import BACKEND_SUPABASE, storage_health
+from app.services.image_pipeline import (
+    EXTENSION_VARIANTE,
+    MIME_TYPE_WEBP,
+    anchos_variantes,
+    content_hash,
+    image_pipeline,
+    variantes_desde_url,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +38,18 @@ MSG_ERROR_CREANDO_BUCKET = "❌ Error creando bucket: {error}"
 MSG_INICIALIZANDO_BUCKET = "🔧 Inicializando automáticamente el bucket '{bucket}'..."
 MSG_BUCKET_CREADO_AUTOMATICAMENTE = "✅ Bucket '{bucket}' creado automáticamente"
 MSG_ERROR_AUTO_INITIALIZE = "❌ Error en auto_initialize: {error}"
+MSG_BUCKET_NO_VERIFICADO = "No se pudo verificar el bucket '{bucket}'"
+MSG_BUCKET_NO_DISPONIBLE = "❌ Bucket '{bucket}' no disponible, se omite la subida"
 MSG_CARPETA_CREADA_AUTOMATICAMENTE = "✅ Carpeta '{folder}' creada automáticamente"
 MSG_CARPETA_YA_EXISTE = "✅ Carpeta '{folder}' ya existe"
 MSG_NO_SE_PUDO_CREAR_CARPETA = "⚠️ No se pudo crear carpeta '{folder}': {error}"
 MSG_ERROR_CREANDO_CARPETAS = "❌ Error creando carpetas: {error}"
 MSG_IMAGEN_SUBIDA_EXITOSAMENTE = "✅ Imagen subida exitosamente: {url}"
 MSG_ERROR_SUBIENDO_IMAGEN = "❌ Error subiendo imagen a Supabase Storage"
-MSG_ERROR_UPLOAD_IMAGE = "❌ Error en upload_image: {error}"
+MSG_ERROR_UPLOAD_IMAGE = "❌ Error subiendo imagen: {error}"
+MSG_IMAGEN_DEDUPLICADA = "♻️ Imagen ya existente (mismo contenido), se reutiliza: {url}"
+MSG_ERROR_LISTANDO_VARIANTES = "⚠️ No se pudo listar '{prefijo}': {error}"
+MSG_IMAGEN_COMPARTIDA = "♻️ Imagen de servicio direccionada por contenido, se conserva (puede usarla otro servicio): {path}"
 MSG_ELIMINANDO_ARCHIVO = "🔍 Eliminando archivo: {path}"
 MSG_IMAGEN_ELIMINADA_EXITOSAMENTE = "✅ Imagen eliminada exitosamente: {path}"
 MSG_ERROR_ELIMINANDO_IMAGEN = "❌ Error eliminando imagen: {path}"
@@ -50,7 +64,6 @@ CONTENIDO_CARPETA_DUMMY = b"Carpeta creada automaticamente"
 TEXTO_ALREADY_EXISTS = "already exists"
 
 # Constantes de tipos MIME
-MIME_TYPE_JPEG = "image/jpeg"
 MIME_TYPE_PLAIN = "text/plain"
 TIPOS_MIME_PERMITIDOS = ["image/jpeg", "image/png", "image/webp", "image/gif"]
 
@@ -60,13 +73,15 @@ OPCION_FILE_SIZE_LIMIT = "file_size_limit"
 OPCION_ALLOWED_MIME_TYPES = "allowed_mime_types"
 OPCION_CONTENT_TYPE = "content-type"
 OPCION_CACHE_CONTROL = "cache-control"
+OPCION_UPSERT = "upsert"
 
 # Constantes de valores
 VALOR_TRUE = True
 VALOR_FALSE = False
 LIMITE_ARCHIVO_50MB = 52428800  # 50MB
 LIMITE_ARCHIVO_5MB = 5242880  # 5MB
-CACHE_CONTROL_3600 = "3600"
+# Las variantes por hash nunca cambian de contenido
+CACHE_CONTROL_INMUTABLE = "31536000"
 
 # Constantes de carpetas
 CARPETAS_DEFAULT = [CARPETA_SERVICIOS, CARPETA_PERFILES]
@@ -79,6 +94,8 @@ class SupabaseStorageService:
         self.supabase_key = SUPABASE_SERVICE_ROLE_KEY
         self.supabase: Client = None
         self.bucket_name = BUCKET_NAME_IMAGENES  # Bucket para imágenes de servicios
+        # Evita que varias subidas simultáneas verifiquen el bucket a la vez
+        self._ensure_lock = asyncio.Lock()
         
         if self.supabase_url and self.supabase_key:
             try:
@@ -164,6 +181,21 @@ class SupabaseStorageService:
             logger.error(MSG_ERROR_AUTO_INITIALIZE.format(error=str(e)))
             return False
     
+    async def ensure_bucket(self) -> bool:
+        """
+        Verifica el bucket (auto_initialize) una sola vez y luego responde desde el
+        cache de salud; vuelve a verificar tras una subida fallida.
+        """
+        health = storage_health.backend(BACKEND_SUPABASE)
+        if not health.necesita_sondeo():
+            return bool(health.sano)
+        
+        async with self._ensure_lock:
+            if health.necesita_sondeo():
+                ok = await self.auto_initialize()
+                health.registrar_sondeo(ok, None if ok else MSG_BUCKET_NO_VERIFICADO.format(bucket=self.bucket_name))
+        return bool(health.sano)
+    
     async def create_folders(self) -> bool:
         """
         Crear carpetas automáticamente en el bucket
@@ -201,72 +233,101 @@ class SupabaseStorageService:
             logger.error(MSG_ERROR_CREANDO_CARPETAS.format(error=str(e)))
             return False
     
-    async def upload_image(self, file_content: bytes, file_name: str, content_type: str = MIME_TYPE_JPEG, folder: str = CARPETA_SERVICIOS) -> Tuple[bool, Optional[str]]:
+    async def upload_processed_image(self, file_content: bytes, folder: str) -> Tuple[bool, Optional[str]]:
         """
-        Subir una imagen al storage de Supabase
+        Sube las variantes WebP de una imagen (ver app.services.image_pipeline) en
+        {folder}/{sha256}/{ancho}.webp. Si ese hash ya existe no se procesa ni se sube
+        nada. Devuelve la URL pública de la variante canónica (la más grande).
         
-        Args:
-            file_content: Contenido del archivo en bytes
-            file_name: Nombre del archivo
-            content_type: Tipo de contenido (MIME type)
-            folder: Carpeta donde subir (servicios, perfiles, documentos)
-        
-        Returns:
-            Tuple[bool, Optional[str]]: (éxito, URL_publica)
+        Raises:
+            ImagenInvalidaError: si el contenido no es una imagen válida
         """
+        if not self.supabase:
+            logger.error(MSG_CLIENTE_SUPABASE_NO_CONFIGURADO)
+            return VALOR_FALSE, None
+        if not await self.ensure_bucket():
+            logger.error(MSG_BUCKET_NO_DISPONIBLE.format(bucket=self.bucket_name))
+            return VALOR_FALSE, None
+        
+        prefijo = f"{folder}{SEPARADOR_RUTA}{content_hash(file_content)}"
+        ancho_existente = await self._find_canonical_width(prefijo)
+        if ancho_existente:
+            public_url = await self._public_url(f"{prefijo}{SEPARADOR_RUTA}{ancho_existente}.{EXTENSION_VARIANTE}")
+            logger.info(MSG_IMAGEN_DEDUPLICADA.format(url=public_url))
+            return VALOR_TRUE, public_url
+        
+        variantes = await image_pipeline.procesar(file_content)
+        # upsert: dos subidas simultáneas del mismo contenido escriben los mismos bytes
+        resultados = await asyncio.gather(*(
+            self._upload_object(
+                f"{prefijo}{SEPARADOR_RUTA}{ancho}.{EXTENSION_VARIANTE}", contenido,
+                MIME_TYPE_WEBP, CACHE_CONTROL_INMUTABLE, upsert=True
+            )
+            for ancho, contenido in variantes.items()
+        ))
+        if not all(resultados):
+            logger.error(MSG_ERROR_SUBIENDO_IMAGEN)
+            return VALOR_FALSE, None
+        
+        public_url = await self._public_url(f"{prefijo}{SEPARADOR_RUTA}{max(variantes)}.{EXTENSION_VARIANTE}")
+        logger.info(MSG_IMAGEN_SUBIDA_EXITOSAMENTE.format(url=public_url))
+        return VALOR_TRUE, public_url
+    
+    async def _find_canonical_width(self, prefijo: str) -> Optional[int]:
+        """Ancho de la variante canónica ya subida para un hash, o None si no existe"""
         try:
-            if not self.supabase:
-                logger.error(MSG_CLIENTE_SUPABASE_NO_CONFIGURADO)
-                return False, None
-            
-            # Asegurar que el bucket existe
-            await self.create_bucket_if_not_exists()
-            
-            # Generar nombre único para el archivo
-            file_extension = os.path.splitext(file_name)[1]
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            
-            # Crear ruta con carpeta
-            file_path = f"{folder}{SEPARADOR_RUTA}{unique_filename}"
-            
-            # Subir el archivo (ejecutar llamada síncrona en thread separado)
+            archivos = await asyncio.to_thread(self.supabase.storage.from_(self.bucket_name).list, prefijo)
+        except Exception as e:
+            logger.warning(MSG_ERROR_LISTANDO_VARIANTES.format(prefijo=prefijo, error=str(e)))
+            return None
+        anchos = [
+            int(nombre.split(".")[0]) for nombre in (archivo.get("name", "") for archivo in archivos or [])
+            if nombre.endswith(f".{EXTENSION_VARIANTE}") and nombre.split(".")[0].isdigit()
+        ]
+        # Solo se reutiliza si están todas las variantes (una subida anterior pudo quedar a medias)
+        if anchos and set(anchos_variantes(max(anchos))) <= set(anchos):
+            return max(anchos)
+        return None
+    
+    async def _upload_object(self, file_path: str, file_content: bytes, content_type: str, cache_control: str, upsert: bool = False) -> bool:
+        """Sube un objeto al bucket y registra la latencia en el estado de salud de Supabase"""
+        health = storage_health.backend(BACKEND_SUPABASE)
+        opciones = {OPCION_CONTENT_TYPE: content_type, OPCION_CACHE_CONTROL: cache_control}
+        if upsert:
+            opciones[OPCION_UPSERT] = "true"
+        inicio = time.perf_counter()
+        try:
+            # Ejecutar llamada síncrona en thread separado
             result = await asyncio.to_thread(
                 self.supabase.storage.from_(self.bucket_name).upload,
                 file_path,
                 file_content,
-                {
-                    OPCION_CONTENT_TYPE: content_type,
-                    OPCION_CACHE_CONTROL: CACHE_CONTROL_3600
-                }
+                opciones
             )
-            
-            if result:
-                # Obtener URL pública (ejecutar llamada síncrona en thread separado)
-                public_url = await asyncio.to_thread(
-                    self.supabase.storage.from_(self.bucket_name).get_public_url,
-                    file_path
-                )
-                logger.info(MSG_IMAGEN_SUBIDA_EXITOSAMENTE.format(url=public_url))
-                return VALOR_TRUE, public_url
-            else:
-                logger.error(MSG_ERROR_SUBIENDO_IMAGEN)
-                return VALOR_FALSE, None
-                
         except Exception as e:
+            health.registrar_subida((time.perf_counter() - inicio) * 1000, False, str(e))
             logger.error(MSG_ERROR_UPLOAD_IMAGE.format(error=str(e)))
-            return VALOR_FALSE, None
+            return VALOR_FALSE
+        health.registrar_subida((time.perf_counter() - inicio) * 1000, bool(result), None if result else MSG_ERROR_SUBIENDO_IMAGEN)
+        return bool(result)
     
-    async def upload_service_image(self, file_content: bytes, file_name: str, content_type: str = MIME_TYPE_JPEG) -> Tuple[bool, Optional[str]]:
-        """Subir imagen de servicio a la carpeta servicios/"""
-        # Inicializar automáticamente si no está configurado
-        await self.auto_initialize()
-        return await self.upload_image(file_content, file_name, content_type, CARPETA_SERVICIOS)
+    async def _public_url(self, file_path: str) -> str:
+        # Obtener URL pública (ejecutar llamada síncrona en thread separado)
+        return await asyncio.to_thread(
+            self.supabase.storage.from_(self.bucket_name).get_public_url,
+            file_path
+        )
     
-    async def upload_profile_image(self, file_content: bytes, file_name: str, content_type: str = MIME_TYPE_JPEG) -> Tuple[bool, Optional[str]]:
-        """Subir imagen de perfil a la carpeta perfiles/"""
-        # Inicializar automáticamente si no está configurado
-        await self.auto_initialize()
-        return await self.upload_image(file_content, file_name, content_type, CARPETA_PERFILES)
+    async def upload_service_image(self, file_content: bytes) -> Tuple[bool, Optional[str]]:
+        """Subir imagen de servicio (variantes WebP) a la carpeta servicios/"""
+        return await self.upload_processed_image(file_content, CARPETA_SERVICIOS)
+    
+    async def upload_profile_image(self, file_content: bytes, user_id: str) -> Tuple[bool, Optional[str]]:
+        """
+        Subir foto de perfil (variantes WebP) a perfiles/{user_id}/. El hash se agrupa por
+        usuario: al borrar o cambiar su foto solo se eliminan sus propias variantes
+        """
+        return await self.upload_processed_image(file_content, f"{CARPETA_PERFILES}{SEPARADOR_RUTA}{user_id}")
     
     
     async def delete_image(self, file_path: str) -> bool:
@@ -294,12 +355,22 @@ class SupabaseStorageService:
                 if len(path_parts) > 1:
                     # Remover query parameters si existen
                     full_path = path_parts[1].split('?')[0]
-                    logger.info(MSG_ELIMINANDO_ARCHIVO.format(path=full_path))
+                    rutas = [full_path]
+                    
+                    # Imagen del pipeline: se eliminan todas sus variantes
+                    variantes = variantes_desde_url(file_path)
+                    if variantes:
+                        if full_path.startswith(f"{CARPETA_SERVICIOS}{SEPARADOR_RUTA}"):
+                            # Por la deduplicación, otro servicio puede apuntar al mismo hash
+                            logger.info(MSG_IMAGEN_COMPARTIDA.format(path=full_path))
+                            return VALOR_TRUE
+                        rutas = [url.split(PREFIJO_IMAGENES)[1].split('?')[0] for url in variantes.values()]
+                    logger.info(MSG_ELIMINANDO_ARCHIVO.format(path=", ".join(rutas)))
                     
-                    # Eliminar el archivo usando la ruta completa (ejecutar llamada síncrona en thread separado)
+                    # Eliminar los archivos usando la ruta completa (ejecutar llamada síncrona en thread separado)
                     result = await asyncio.to_thread(
                         self.supabase.storage.from_(self.bucket_name).remove,
-                        [full_path]
+                        rutas
                     )
                     
                     if result:
@@ -0,0 +1,176 @@
+"""
+Estadísticas y cola de solicitudes de verificación para el panel de administración.
+
+Las estadísticas salen de un solo GROUP BY estado con conteos por rango de fechas,
+en lugar de traer todas las filas para contarlas en el frontend. La cola se pagina
+por keyset sobre (fecha_solicitud, id_verificacion) y resuelve empresa, contacto,
+email (auth.users) y cantidad de documentos en la misma consulta, sin llamadas a
+Supabase Auth por fila.
+"""
+import base64
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.services.date_service import DateService
+from app.services.direct_db_service import direct_db_service
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+COLA_LIMITE_DEFAULT = 20
+COLA_LIMITE_MAX = 100
+CURSOR_SEPARADOR = "|"
+ESTADOS_VERIFICACION = ("pendiente", "aprobada", "rechazada")
+VALOR_DEFAULT_NO_DISPONIBLE = "No disponible"
+VALOR_DEFAULT_EMPRESA_NO_ENCONTRADA = "Empresa no encontrada"
+VALOR_DEFAULT_NA = "N/A"
+
+ESTADISTICAS_QUERY = """
+    SELECT
+        estado,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE fecha_solicitud >= $1) AS hoy,
+        COUNT(*) FILTER (WHERE fecha_solicitud >= $2) AS ultimos_7_dias,
+        COUNT(*) FILTER (WHERE fecha_solicitud >= $3) AS ultimos_30_dias,
+        MIN(fecha_solicitud) AS mas_antigua
+    FROM verificacion_solicitud
+    GROUP BY estado
+"""
+
+COLA_QUERY = """
+    SELECT
+        vs.id_verificacion,
+        vs.fecha_solicitud,
+        vs.fecha_revision,
+        vs.estado,
+        vs.comentario,
+        vs.id_perfil,
+        vs.created_at,
+        pe.razon_social AS nombre_empresa,
+        pe.nombre_fantasia,
+        pe.verificado,
+        pe.estado AS estado_empresa,
+        u.nombre_persona AS nombre_contacto,
+        au.email AS email_contacto,
+        COALESCE(docs.total, 0) AS total_documentos,
+        COALESCE(docs.pendientes, 0) AS documentos_pendientes
+    FROM verificacion_solicitud vs
+    LEFT JOIN perfil_empresa pe ON vs.id_perfil = pe.id_perfil
+    LEFT JOIN users u ON pe.user_id = u.id
+    LEFT JOIN auth.users au ON pe.user_id = au.id
+    LEFT JOIN LATERAL (
+        SELECT
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE d.estado_revision = 'pendiente') AS pendientes
+        FROM documento d
+        WHERE d.id_verificacion = vs.id_verificacion
+    ) docs ON true
+    WHERE vs.estado = $1
+    AND ($2::timestamptz IS NULL OR (vs.fecha_solicitud, vs.id_verificacion) < ($2::timestamptz, $3::bigint))
+    ORDER BY vs.fecha_solicitud DESC, vs.id_verificacion DESC
+    LIMIT $4
+"""
+
+
+def encode_cursor(fecha_solicitud: datetime, id_verificacion: int) -> str:
+    """Cursor opaco con la clave de orden de la última fila de la página"""
+    raw = f"{fecha_solicitud.isoformat()}{CURSOR_SEPARADOR}{id_verificacion}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        fecha, id_verificacion = base64.urlsafe_b64decode(cursor.encode()).decode().split(CURSOR_SEPARADOR)
+        return datetime.fromisoformat(fecha), int(id_verificacion)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginación inválido")
+
+
+def limites_fechas(ahora: datetime) -> Tuple[datetime, datetime, datetime]:
+    """Inicio de hoy (hora de Paraguay), hace 7 días y hace 30 días"""
+    inicio_hoy = ahora.replace(hour=0, minute=0, second=0, microsecond=0)
+    return inicio_hoy, ahora - timedelta(days=7), ahora - timedelta(days=30)
+
+
+class VerificacionAdminService:
+    """Consultas agregadas y paginadas sobre verificacion_solicitud"""
+
+    async def obtener_estadisticas(self) -> Dict[str, Any]:
+        """Conteos por estado, totales y por rango de fechas (una sola consulta)"""
+        ahora = DateService.now()
+        async with direct_db_service.connection() as conn:
+            rows = await conn.fetch(ESTADISTICAS_QUERY, *limites_fechas(ahora))
+
+        vacio = {"total": 0, "hoy": 0, "ultimos_7_dias": 0, "ultimos_30_dias": 0, "mas_antigua": None}
+        por_estado: Dict[str, Dict[str, Any]] = {estado: dict(vacio) for estado in ESTADOS_VERIFICACION}
+        for row in rows:
+            por_estado[row["estado"]] = {
+                "total": row["total"],
+                "hoy": row["hoy"],
+                "ultimos_7_dias": row["ultimos_7_dias"],
+                "ultimos_30_dias": row["ultimos_30_dias"],
+                "mas_antigua": row["mas_antigua"],
+            }
+
+        total = sum(e["total"] for e in por_estado.values())
+        aprobadas = por_estado["aprobada"]["total"]
+        resueltas = aprobadas + por_estado["rechazada"]["total"]
+        return {
+            "total": total,
+            "pendientes": por_estado["pendiente"]["total"],
+            "aprobadas": aprobadas,
+            "rechazadas": por_estado["rechazada"]["total"],
+            "tasa_aprobacion": round(aprobadas / resueltas * 100) if resueltas else 0,
+            "por_estado": por_estado,
+            "generado_en": ahora,
+        }
+
+    async def obtener_cola(
+        self,
+        estado: str = "pendiente",
+        limite: int = COLA_LIMITE_DEFAULT,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Página de solicitudes más recientes primero; next_cursor es None en la última página"""
+        limite = max(1, min(limite, COLA_LIMITE_MAX))
+        fecha_cursor, id_cursor = decode_cursor(cursor) if cursor else (None, None)
+
+        async with direct_db_service.connection() as conn:
+            # Se pide una fila extra para saber si hay otra página
+            rows = await conn.fetch(COLA_QUERY, estado, fecha_cursor, id_cursor, limite + 1)
+
+        hay_mas = len(rows) > limite
+        rows = rows[:limite]
+        items: List[Dict[str, Any]] = [
+            {
+                "id_verificacion": row["id_verificacion"],
+                "fecha_solicitud": row["fecha_solicitud"],
+                "fecha_revision": row["fecha_revision"],
+                "estado": row["estado"],
+                "comentario": row["comentario"],
+                "id_perfil": row["id_perfil"],
+                "created_at": row["created_at"],
+                "nombre_empresa": row["nombre_empresa"] or VALOR_DEFAULT_EMPRESA_NO_ENCONTRADA,
+                "nombre_fantasia": row["nombre_fantasia"] or VALOR_DEFAULT_NA,
+                "nombre_contacto": row["nombre_contacto"] or VALOR_DEFAULT_NO_DISPONIBLE,
+                "email_contacto": row["email_contacto"] or VALOR_DEFAULT_NO_DISPONIBLE,
+                "verificado": row["verificado"] or False,
+                "estado_empresa": row["estado_empresa"] or VALOR_DEFAULT_NA,
+                "total_documentos": row["total_documentos"],
+                "documentos_pendientes": row["documentos_pendientes"],
+            }
+            for row in rows
+        ]
+        ultima = rows[-1] if rows else None
+        return {
+            "items": items,
+            "limite": limite,
+            "next_cursor": encode_cursor(ultima["fecha_solicitud"], ultima["id_verificacion"]) if hay_mas else None,
+        }
+
+
+# Instancia global del servicio
+verificacion_admin_service = VerificacionAdminService()
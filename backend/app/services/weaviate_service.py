@@ -538,7 +538,7 @@ class WeaviateService:
                         except Exception as e:
                             logger.warning(f"⚠️ No se pudo verificar el conteo durante la indexación: {str(e)}")
             
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
             
             # Verificar el conteo final después de la indexación
             logger.info(f"✅ Indexación de servicios completada: {servicios_indexados} exitosos, {servicios_fallidos} fallidos de {total_servicios} totales")
@@ -0,0 +1,162 @@
+"""
+Cliente asíncrono de Supabase Auth (GoTrue) sobre un httpx.AsyncClient compartido.
+
+El cliente síncrono de supabase-py bloquea el event loop durante cada llamada
+de red (login, refresh, validación del token) y además guarda la sesión en el
+propio cliente, que es global. Este adaptador no guarda estado: cada método
+recibe el token que necesita, reutiliza conexiones keep-alive y traduce los
+errores HTTP con los helpers de gotrue, así que el resto del código sigue
+capturando AuthApiError y usando handle_supabase_auth_error.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+import httpx
+from gotrue.errors import AuthApiError
+from gotrue.helpers import handle_exception, model_validate, parse_auth_response, parse_user_response
+from gotrue.types import AuthResponse, User, UserResponse
+
+from app.core.config import (
+    SUPABASE_URL,
+    SUPABASE_ANON_KEY,
+    SUPABASE_SERVICE_ROLE_KEY,
+    SUPABASE_AUTH_MAX_CONNECTIONS,
+    SUPABASE_AUTH_MAX_KEEPALIVE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+AUTH_PATH = "auth/v1"
+API_VERSION_HEADER = "X-Supabase-Api-Version"
+API_VERSION = "2024-01-01"
+SUPABASE_AUTH_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+KEEPALIVE_EXPIRY_SECONDS = 30.0
+# GoTrue responde 401/403/404 al cerrar una sesión que ya no existe: se considera cerrada
+SIGN_OUT_IGNORED_STATUS = (401, 403, 404)
+
+
+class AsyncSupabaseAuth:
+    """Llamadas a GoTrue (públicas con la anon key y admin con la service role key)"""
+
+    def __init__(
+        self,
+        url: Optional[str] = SUPABASE_URL,
+        anon_key: Optional[str] = SUPABASE_ANON_KEY,
+        service_role_key: Optional[str] = SUPABASE_SERVICE_ROLE_KEY,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.base_url = f"{url.rstrip('/')}/{AUTH_PATH}" if url else None
+        self.anon_key = anon_key
+        self.service_role_key = service_role_key
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.base_url and self.anon_key)
+
+    @property
+    def is_admin_configured(self) -> bool:
+        return bool(self.base_url and self.service_role_key)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartido; se crea en el primer uso dentro del event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=SUPABASE_AUTH_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=SUPABASE_AUTH_MAX_CONNECTIONS,
+                    max_keepalive_connections=SUPABASE_AUTH_MAX_KEEPALIVE,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+                ),
+                transport=self._transport
+            )
+        return self._client
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        admin: bool = False,
+        jwt: Optional[str] = None,
+        body: Optional[Dict[str, Any]] = None,
+        query: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Petición a GoTrue; los errores HTTP se convierten en AuthApiError como en supabase-py"""
+        api_key = self.service_role_key if admin else self.anon_key
+        if not self.base_url or not api_key:
+            raise RuntimeError(f"Supabase Auth {'Admin ' if admin else ''}no configurado")
+        headers = {
+            "apikey": api_key,
+            "Authorization": f"Bearer {jwt or api_key}",
+            API_VERSION_HEADER: API_VERSION,
+        }
+        try:
+            response = await self._get_client().request(
+                method, f"{self.base_url}/{path}", headers=headers, json=body, params=query
+            )
+            response.raise_for_status()
+        except Exception as e:
+            raise handle_exception(e)
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    # --- Sesiones de usuario ---
+
+    async def sign_in_with_password(self, email: str, password: str) -> AuthResponse:
+        data = await self._request(
+            "POST", "token", query={"grant_type": "password"}, body={"email": email, "password": password}
+        )
+        return parse_auth_response(data)
+
+    async def refresh_session(self, refresh_token: str) -> AuthResponse:
+        data = await self._request(
+            "POST", "token", query={"grant_type": "refresh_token"}, body={"refresh_token": refresh_token}
+        )
+        return parse_auth_response(data)
+
+    async def sign_out(self, access_token: str, scope: str = "global") -> None:
+        """Revoca las sesiones del usuario dueño del token"""
+        try:
+            await self._request("POST", "logout", jwt=access_token, query={"scope": scope})
+        except AuthApiError as e:
+            if e.status not in SIGN_OUT_IGNORED_STATUS:
+                raise
+
+    async def get_user(self, jwt: str) -> UserResponse:
+        """Valida el access token y devuelve el usuario"""
+        return parse_user_response(await self._request("GET", "user", jwt=jwt))
+
+    async def resend(self, email: str, type: str = "signup") -> None:
+        await self._request("POST", "resend", body={"email": email, "type": type})
+
+    # --- Administración (service role key) ---
+
+    async def create_user(self, attributes: Dict[str, Any]) -> UserResponse:
+        return parse_user_response(await self._request("POST", "admin/users", admin=True, body=attributes))
+
+    async def get_user_by_id(self, user_id: str) -> UserResponse:
+        return parse_user_response(await self._request("GET", f"admin/users/{user_id}", admin=True))
+
+    async def update_user_by_id(self, user_id: str, attributes: Dict[str, Any]) -> UserResponse:
+        return parse_user_response(await self._request("PUT", f"admin/users/{user_id}", admin=True, body=attributes))
+
+    async def delete_user(self, user_id: str) -> None:
+        await self._request("DELETE", f"admin/users/{user_id}", admin=True)
+
+    async def list_users(self, page: Optional[int] = None, per_page: Optional[int] = None) -> List[User]:
+        query = {k: v for k, v in {"page": page, "per_page": per_page}.items() if v is not None}
+        data = await self._request("GET", "admin/users", admin=True, query=query)
+        return [model_validate(User, user) for user in (data or {}).get("users", [])]
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Instancia global del cliente
+async_auth_client = AsyncSupabaseAuth()
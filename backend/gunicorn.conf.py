@@ -0,0 +1,25 @@
+"""
+Configuración de Gunicorn para el modo multi-worker (workers Uvicorn).
+
+Uso: gunicorn app.main:app -c gunicorn.conf.py
+
+Requiere REDIS_URL: el estado compartido (códigos de restablecimiento,
+rate limits, notificaciones enviadas) debe vivir fuera del proceso.
+Cada worker crea su propio pool asyncpg en el lifespan, por lo que el total
+de conexiones a la base es workers × tamaño máximo del pool.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+# Un worker por núcleo: la app es asíncrona y no necesita la regla 2n+1
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Sin preload: los pools y clientes se crean dentro de cada worker
+preload_app = False
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
@@ -83,7 +83,7 @@ async def main():
     finally:
         # Cerrar conexión
         if 'conn' in locals():
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,33 @@
+-- Migración: Periodo de la reserva como rango de tiempo indexado
+-- Columna generada periodo = [fecha + hora_inicio, fecha + hora_fin) para buscar solapamientos con
+-- el operador && y un índice GiST en lugar de comparar fecha, hora_inicio y hora_fin por separado.
+-- Si hora_fin no es posterior a hora_inicio la reserva termina al día siguiente (servicios que
+-- cruzan la medianoche); la aplicación calcula los límites igual (reserva_booking_service.periodo_reserva).
+-- Agregar una columna STORED reescribe la tabla: ejecutar en una ventana de poco tráfico.
+
+-- Igualdad sobre id_servicio / user_id dentro de índices GiST
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE reserva
+    ADD COLUMN IF NOT EXISTS periodo TSRANGE
+    GENERATED ALWAYS AS (
+        tsrange(
+            fecha + hora_inicio,
+            fecha + hora_fin + CASE WHEN hora_fin <= hora_inicio THEN INTERVAL '1 day' ELSE INTERVAL '0 days' END,
+            '[)'
+        )
+    ) STORED;
+
+-- Horario ocupado de un servicio (reserva atómica, disponibilidad y capacidad diaria)
+CREATE INDEX IF NOT EXISTS idx_reserva_servicio_periodo ON reserva USING GIST (id_servicio, periodo);
+
+-- Reservas solapadas del mismo cliente
+CREATE INDEX IF NOT EXISTS idx_reserva_usuario_periodo ON reserva USING GIST (user_id, periodo);
+
+-- Opcional: garantía en la base de datos de que dos reservas confirmadas del mismo servicio no se
+-- solapan (la aplicación ya lo asegura con advisory locks). Falla si existen solapamientos previos.
+-- ALTER TABLE reserva ADD CONSTRAINT reserva_confirmada_sin_solapamiento
+--     EXCLUDE USING GIST (id_servicio WITH =, periodo WITH &&) WHERE (estado = 'confirmada');
+
+-- Comentarios
+COMMENT ON COLUMN reserva.periodo IS 'Rango [inicio, fin) de la reserva; generado a partir de fecha, hora_inicio y hora_fin';
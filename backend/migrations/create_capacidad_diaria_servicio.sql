@@ -0,0 +1,28 @@
+-- Migración: Tabla de capacidad libre por servicio y día
+-- Resumen precalculado de los slots libres de cada servicio (horario_trabajo + excepciones_horario
+-- - reservas confirmadas) para buscar servicios disponibles en una fecha con una sola consulta.
+-- La mantiene la aplicación (CapacidadDiariaService) al cambiar horarios o reservas y el script
+-- scripts/refresh_capacidad_diaria.py, que recalcula todo el horizonte (ejecutar a diario).
+-- Solo se guardan los días con al menos un slot libre.
+
+CREATE TABLE IF NOT EXISTS capacidad_diaria_servicio (
+    id_servicio BIGINT NOT NULL REFERENCES servicio(id_servicio) ON DELETE CASCADE,
+    fecha DATE NOT NULL,
+    id_proveedor BIGINT NOT NULL,
+    slots_libres SMALLINT NOT NULL,
+    horas_libres INTEGER NOT NULL,
+    primer_slot TIME NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id_servicio, fecha)
+);
+
+-- Búsqueda por rango de fechas
+CREATE INDEX IF NOT EXISTS idx_capacidad_diaria_fecha ON capacidad_diaria_servicio(fecha, id_servicio);
+
+-- Recálculo por proveedor
+CREATE INDEX IF NOT EXISTS idx_capacidad_diaria_proveedor ON capacidad_diaria_servicio(id_proveedor, fecha);
+
+-- Comentarios
+COMMENT ON TABLE capacidad_diaria_servicio IS 'Capacidad libre precalculada por servicio y día (slots de 60 minutos)';
+COMMENT ON COLUMN capacidad_diaria_servicio.horas_libres IS 'Máscara de bits: el bit h indica un slot libre que empieza entre las h:00 y las h:59';
+COMMENT ON COLUMN capacidad_diaria_servicio.primer_slot IS 'Hora de inicio del primer slot libre del día';
@@ -0,0 +1,28 @@
+-- Migración: Lease del planificador de tareas periódicas
+-- Todos los workers intentan renovar el lease en cada ciclo; solo el dueño vigente ejecuta las
+-- tareas (app/services/scheduler_service.py). Si el líder deja de renovarlo, otro worker lo toma
+-- cuando vence expira_en.
+
+CREATE TABLE IF NOT EXISTS scheduler_lease (
+    nombre VARCHAR(50) PRIMARY KEY,
+    owner VARCHAR(200) NOT NULL,
+    expira_en TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Fecha (Paraguay) de la última ejecución exitosa de cada tarea diaria: un reinicio o un cambio
+-- de líder no la repite en el mismo día
+CREATE TABLE IF NOT EXISTS scheduler_ejecucion_diaria (
+    nombre VARCHAR(50) PRIMARY KEY,
+    fecha DATE NOT NULL,
+    ejecutado_en TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Barrido de reservas pendientes cuyo horario ya empezó (requiere add_periodo_reserva.sql)
+CREATE INDEX IF NOT EXISTS idx_reserva_pendiente_inicio ON reserva (lower(periodo)) WHERE estado = 'pendiente';
+
+-- Verificaciones de RUC pendientes fuera de plazo
+CREATE INDEX IF NOT EXISTS idx_verificacion_ruc_pendiente_limite ON verificacion_ruc (fecha_limite_verificacion) WHERE estado = 'pendiente';
+
+-- Comentarios
+COMMENT ON TABLE scheduler_lease IS 'Lease de liderazgo del planificador de tareas entre workers';
+COMMENT ON TABLE scheduler_ejecucion_diaria IS 'Última fecha en que se ejecutó cada tarea diaria del planificador';
@@ -0,0 +1,38 @@
+-- Migración: Versión de las tablas de ubicación (departamento, ciudad, barrio)
+-- El gazetteer en memoria (app/services/location_gazetteer.py) consulta esta fila periódicamente y
+-- recarga las tablas solo cuando la versión cambió. Un trigger por sentencia la incrementa ante
+-- cualquier cambio, también los hechos fuera de la API (SQL Editor, seeds).
+
+CREATE TABLE IF NOT EXISTS ubicaciones_version (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO ubicaciones_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION incrementar_version_ubicaciones()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE ubicaciones_version SET version = version + 1, updated_at = NOW() WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_version_ubicaciones ON departamento;
+CREATE TRIGGER trg_version_ubicaciones
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON departamento
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_ubicaciones();
+
+DROP TRIGGER IF EXISTS trg_version_ubicaciones ON ciudad;
+CREATE TRIGGER trg_version_ubicaciones
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON ciudad
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_ubicaciones();
+
+DROP TRIGGER IF EXISTS trg_version_ubicaciones ON barrio;
+CREATE TRIGGER trg_version_ubicaciones
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON barrio
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_ubicaciones();
+
+-- Comentarios
+COMMENT ON TABLE ubicaciones_version IS 'Versión de departamento/ciudad/barrio para invalidar el gazetteer en memoria';
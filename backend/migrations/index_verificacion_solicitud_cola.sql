@@ -0,0 +1,10 @@
+-- Migración: Índice para la cola paginada de verificaciones
+-- GET /admin/verificaciones/cola pagina por keyset sobre (fecha_solicitud, id_verificacion)
+-- filtrando por estado (app/services/verificacion_admin_service.py). Con este índice cada
+-- página es un recorrido acotado del índice, sin ordenar toda la tabla.
+
+CREATE INDEX IF NOT EXISTS idx_verificacion_solicitud_cola
+    ON verificacion_solicitud (estado, fecha_solicitud DESC, id_verificacion DESC);
+
+-- Conteo de documentos por solicitud (el modelo lo declara, se asegura por si la tabla se creó a mano)
+CREATE INDEX IF NOT EXISTS idx_documento_id_verificacion ON documento (id_verificacion);
@@ -0,0 +1,63 @@
+-- ============================================================
+-- Migración: Trigger de registro idempotente
+-- ============================================================
+-- El endpoint /auth/signup ahora crea el perfil (public.users) y el rol
+-- 'Cliente' (public.usuario_rol) en su propia transacción justo después de
+-- crear el usuario en Supabase Auth, en lugar de esperar y consultar hasta
+-- que aparezca el perfil creado por el trigger. El trigger se mantiene para
+-- usuarios creados por otras vías; con ON CONFLICT DO NOTHING ambos caminos
+-- pueden ejecutarse sin errores en cualquier orden.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.handle_new_auth_user()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $function$
+DECLARE
+    user_metadata JSONB;
+    user_ruc TEXT;
+    user_nombre TEXT;
+    user_empresa TEXT;
+BEGIN
+    -- Obtener metadata del usuario de Supabase Auth
+    user_metadata := NEW.raw_user_meta_data;
+
+    -- Extraer datos de la metadata
+    user_nombre := COALESCE(user_metadata->>'nombre_persona', 'Usuario');
+    user_empresa := user_metadata->>'nombre_empresa';
+    user_ruc := user_metadata->>'ruc';
+
+    -- El usuario queda INACTIVO hasta que se apruebe el RUC
+    INSERT INTO public.users (
+        id,
+        nombre_persona,
+        nombre_empresa,
+        ruc,
+        estado
+    ) VALUES (
+        NEW.id,
+        user_nombre,
+        user_empresa,
+        user_ruc,
+        'INACTIVO'
+    )
+    ON CONFLICT (id) DO NOTHING;
+
+    -- Asignar el rol "Cliente"
+    INSERT INTO public.usuario_rol (id_usuario, id_rol)
+    SELECT NEW.id, id FROM public.rol WHERE nombre = 'Cliente'
+    ON CONFLICT (id_usuario, id_rol) DO NOTHING;
+
+    RETURN NEW;
+EXCEPTION
+    WHEN OTHERS THEN
+        RAISE WARNING 'Error creando perfil de usuario: %', SQLERRM;
+        RETURN NEW;
+END;
+$function$;
+
+-- Comentario explicativo
+COMMENT ON FUNCTION public.handle_new_auth_user() IS
+'Crea el perfil de usuario en public.users (estado INACTIVO) y el rol Cliente cuando se crea un usuario en Supabase Auth.
+Idempotente: el endpoint de registro hace el mismo upsert en su propia transacción.';
@@ -154,7 +154,7 @@ async def reindex_services():
             
             return True
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
     except Exception as e:
         print(f"❌ Error en re-indexación: {e}")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark: logins concurrentes y latencia de otras rutas del mismo worker.
+
+Levanta un GoTrue simulado en localhost (cada login tarda LATENCIA_GOTRUE) y
+una aplicación FastAPI con dos variantes de login dentro de un handler async:
+el cliente síncrono de gotrue (como antes) y el cliente asíncrono
+(app.supabase.async_auth_client). Mientras se lanzan N logins simultáneos se
+mide la latencia de GET /ping. Con el cliente síncrono cada login bloquea el
+event loop y /ping espera; con el asíncrono no debería cambiar.
+
+No necesita Supabase ni base de datos.
+
+Uso:
+    python scripts/benchmark_auth_concurrency.py [logins] [latencia_ms]
+"""
+
+import sys
+import os
+import asyncio
+import socket
+import statistics
+import threading
+import time
+import uuid
+from typing import Dict, List
+
+# Agregar el directorio raíz del backend al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from gotrue import SyncGoTrueClient
+
+from app.supabase.async_auth_client import AsyncSupabaseAuth, AUTH_PATH
+
+LOGINS_DEFAULT = 200
+LATENCIA_GOTRUE_MS_DEFAULT = 50
+INTERVALO_PING = 0.01
+STUB_KEY = "stub-anon-key"
+
+
+def crear_gotrue_simulado(latencia: float) -> FastAPI:
+    """GoTrue mínimo: POST /auth/v1/token devuelve una sesión tras `latencia` segundos"""
+    stub = FastAPI()
+
+    @stub.post(f"/{AUTH_PATH}/token")
+    async def token(body: Dict):
+        await asyncio.sleep(latencia)
+        return {
+            "access_token": uuid.uuid4().hex,
+            "refresh_token": uuid.uuid4().hex,
+            "expires_in": 3600,
+            "token_type": "bearer",
+            "user": {
+                "id": str(uuid.uuid4()),
+                "aud": "authenticated",
+                "email": body.get("email"),
+                "app_metadata": {},
+                "user_metadata": {},
+                "created_at": "2025-01-01T00:00:00Z",
+            },
+        }
+
+    return stub
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(app: FastAPI, port: int) -> uvicorn.Server:
+    """Servidor uvicorn en un hilo aparte (su propio event loop)"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def crear_app(stub_url: str) -> FastAPI:
+    """Aplicación con el login síncrono (anterior), el asíncrono y una ruta ajena al login"""
+    app = FastAPI()
+    cliente_async = AsyncSupabaseAuth(url=stub_url, anon_key=STUB_KEY, service_role_key=STUB_KEY)
+    cliente_sync = SyncGoTrueClient(
+        url=f"{stub_url}/{AUTH_PATH}",
+        headers={"apikey": STUB_KEY},
+        auto_refresh_token=False,
+        persist_session=False,
+    )
+
+    @app.post("/login/sync")
+    async def login_sync():
+        # Igual que el handler anterior: llamada bloqueante dentro de async def
+        cliente_sync.sign_in_with_password({"email": "bench@example.com", "password": "x"})
+        return {"ok": True}
+
+    @app.post("/login/async")
+    async def login_async():
+        await cliente_async.sign_in_with_password("bench@example.com", "x")
+        return {"ok": True}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def medir(base_url: str, modo: str, logins: int) -> Dict[str, float]:
+    """Lanza `logins` logins simultáneos y mide /ping mientras tanto"""
+    latencias_ping: List[float] = []
+    limites = httpx.Limits(max_connections=logins + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limites) as client:
+        await client.get("/ping")
+        terminado = asyncio.Event()
+
+        async def sondear():
+            while not terminado.is_set():
+                inicio = time.perf_counter()
+                await client.get("/ping")
+                latencias_ping.append((time.perf_counter() - inicio) * 1000)
+                await asyncio.sleep(INTERVALO_PING)
+
+        sonda = asyncio.create_task(sondear())
+        inicio = time.perf_counter()
+        await asyncio.gather(*(client.post(f"/login/{modo}") for _ in range(logins)))
+        total = time.perf_counter() - inicio
+        terminado.set()
+        await sonda
+
+    latencias_ping.sort()
+    return {
+        "logins_s": total,
+        "ping_p50_ms": statistics.median(latencias_ping),
+        "ping_p99_ms": latencias_ping[min(len(latencias_ping) - 1, int(len(latencias_ping) * 0.99))],
+        "ping_max_ms": latencias_ping[-1],
+    }
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else LOGINS_DEFAULT
+    latencia_ms = float(sys.argv[2]) if len(sys.argv) > 2 else LATENCIA_GOTRUE_MS_DEFAULT
+
+    stub_port, app_port = puerto_libre(), puerto_libre()
+    stub = iniciar_servidor(crear_gotrue_simulado(latencia_ms / 1000), stub_port)
+    app = iniciar_servidor(crear_app(f"http://127.0.0.1:{stub_port}"), app_port)
+    try:
+        print(f"📊 {logins} logins simultáneos, GoTrue simulado con {latencia_ms:.0f} ms por login\n")
+        print(f"{'cliente':<10}{'logins (s)':>12}{'/ping p50 (ms)':>16}{'/ping p99 (ms)':>16}{'/ping max (ms)':>16}")
+        for modo in ("sync", "async"):
+            r = asyncio.run(medir(f"http://127.0.0.1:{app_port}", modo, logins))
+            print(
+                f"{modo:<10}{r['logins_s']:>12.2f}{r['ping_p50_ms']:>16.1f}"
+                f"{r['ping_p99_ms']:>16.1f}{r['ping_max_ms']:>16.1f}"
+            )
+    finally:
+        app.should_exit = True
+        stub.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
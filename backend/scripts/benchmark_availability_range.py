@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cálculo de horarios disponibles por rango de fechas.
+
+Compara, con datos sintéticos de un proveedor, el cálculo anterior (tres
+consultas por día y cada slot comparado con cada reserva) con el motor de
+disponibilidad (tres consultas para todo el rango y un barrido sobre
+intervalos ordenados). El costo de red se estima como consultas × RTT.
+
+Uso:
+    python scripts/benchmark_availability_range.py [rtt_ms] [reservas_por_dia]
+"""
+
+import sys
+import os
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta, time as time_type
+from typing import Dict, List, Tuple
+
+# Agregar el directorio raíz del backend al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.availability_engine import (
+    DatosRango,
+    TIPO_EXCEPCION_CERRADO,
+    calcular_slots_rango,
+    from_minutes,
+    merge_intervals,
+)
+
+RANGOS_DIAS = (30, 90)
+DURACIONES_MINUTOS = (15, 60)
+RTT_MS_DEFAULT = 20.0
+RESERVAS_POR_DIA_DEFAULT = 12
+ITERACIONES = 20
+CONSULTAS_POR_DIA_ANTERIOR = 3
+CONSULTAS_MOTOR = 3
+FECHA_INICIO = date(2030, 1, 7)
+
+
+def generar_datos(dias: int, reservas_por_dia: int) -> DatosRango:
+    """Proveedor de lunes a sábado 08:00-20:00, un día cerrado por semana y reservas aleatorias"""
+    rnd = random.Random(42)
+    datos = DatosRango(horarios={dia: (8 * 60, 20 * 60) for dia in range(6)})
+    for offset in range(dias + 1):
+        fecha = FECHA_INICIO + timedelta(days=offset)
+        if offset % 7 == 3:
+            datos.excepciones[fecha] = (TIPO_EXCEPCION_CERRADO, None)
+        reservas = []
+        for _ in range(reservas_por_dia):
+            inicio = rnd.randrange(8 * 60, 19 * 60, 15)
+            reservas.append((inicio, inicio + rnd.choice((30, 45, 60))))
+        datos.reservas[fecha] = merge_intervals(reservas)
+    return datos
+
+
+def calculo_anterior(datos: DatosRango, fecha_inicio: date, fecha_fin: date, duracion: int) -> List[Tuple[date, time_type, time_type]]:
+    """Réplica del algoritmo anterior: slots como datetime y comparación contra cada reserva"""
+    reservas_por_fecha: Dict[date, List[Tuple[time_type, time_type]]] = {
+        fecha: [(from_minutes(ini), from_minutes(fin)) for ini, fin in intervalos]
+        for fecha, intervalos in datos.reservas.items()
+    }
+    resultado = []
+    fecha = fecha_inicio
+    while fecha <= fecha_fin:
+        base = datos.horarios.get(fecha.weekday())
+        excepcion = datos.excepciones.get(fecha)
+        if base is not None and not (excepcion and excepcion[0] == TIPO_EXCEPCION_CERRADO):
+            actual = datetime.combine(fecha, from_minutes(base[0]))
+            fin = datetime.combine(fecha, from_minutes(base[1]))
+            while actual + timedelta(minutes=duracion) <= fin:
+                slot_ini = actual.time()
+                slot_fin = (actual + timedelta(minutes=duracion)).time()
+                conflicto = any(
+                    slot_ini < reserva_fin and slot_fin > reserva_ini
+                    for reserva_ini, reserva_fin in reservas_por_fecha.get(fecha, [])
+                )
+                if not conflicto:
+                    resultado.append((fecha, slot_ini, slot_fin))
+                actual += timedelta(minutes=duracion)
+        fecha += timedelta(days=1)
+    return resultado
+
+
+def medir(func, *args) -> Tuple[float, int]:
+    """Tiempo medio de CPU en ms y cantidad de slots generados"""
+    muestras = []
+    cantidad = 0
+    for _ in range(ITERACIONES):
+        started = time.perf_counter()
+        cantidad = len(func(*args))
+        muestras.append((time.perf_counter() - started) * 1000)
+    return statistics.mean(muestras), cantidad
+
+
+def main():
+    rtt_ms = float(sys.argv[1]) if len(sys.argv) > 1 else RTT_MS_DEFAULT
+    reservas_por_dia = int(sys.argv[2]) if len(sys.argv) > 2 else RESERVAS_POR_DIA_DEFAULT
+    print(f"📊 RTT estimado {rtt_ms:.0f} ms, {reservas_por_dia} reservas por día, {ITERACIONES} iteraciones\n")
+    print(f"{'días':>5}{'slot':>6}{'slots':>8}{'CPU ant. (ms)':>15}{'CPU motor (ms)':>16}"
+          f"{'consultas':>12}{'total ant. (ms)':>17}{'total motor (ms)':>18}")
+
+    for dias in RANGOS_DIAS:
+        datos = generar_datos(dias, reservas_por_dia)
+        fecha_fin = FECHA_INICIO + timedelta(days=dias)
+        for duracion in DURACIONES_MINUTOS:
+            cpu_anterior, slots_anterior = medir(calculo_anterior, datos, FECHA_INICIO, fecha_fin, duracion)
+            cpu_motor, slots_motor = medir(calcular_slots_rango, datos, FECHA_INICIO, fecha_fin, duracion)
+            assert slots_anterior == slots_motor, "los dos cálculos deben devolver los mismos slots"
+
+            consultas_anterior = CONSULTAS_POR_DIA_ANTERIOR * (dias + 1)
+            total_anterior = cpu_anterior + consultas_anterior * rtt_ms
+            total_motor = cpu_motor + CONSULTAS_MOTOR * rtt_ms
+            print(
+                f"{dias:>5}{duracion:>6}{slots_motor:>8}{cpu_anterior:>15.2f}{cpu_motor:>16.2f}"
+                f"{f'{consultas_anterior}→{CONSULTAS_MOTOR}':>12}{total_anterior:>17.1f}{total_motor:>18.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
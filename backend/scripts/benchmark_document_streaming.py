@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoria al servir N descargas grandes en paralelo.
+
+Crea un archivo temporal de prueba y lo sirve desde una aplicación FastAPI con
+uvicorn de tres formas:
+  - anterior: get_object + Body.read() completo y respuesta de un solo bloque
+  - s3:       app.services.document_serving.stream_s3_object (bloques en un hilo)
+  - local:    serve_local_file (FileResponse)
+El "S3" es un cliente que abre el archivo temporal y lo devuelve como
+StreamingBody de botocore, así que no se necesitan credenciales. Mide el pico
+de memoria asignada por Python (tracemalloc) y el tiempo total de las descargas.
+
+Uso:
+    python scripts/benchmark_document_streaming.py [descargas] [tamaño_mb]
+"""
+
+import sys
+import os
+import asyncio
+import socket
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict
+
+# Agregar el directorio raíz del backend al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import uvicorn
+from botocore.response import StreamingBody
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.services.document_serving import serve_local_file, stream_s3_object
+
+DESCARGAS_DEFAULT = 50
+TAMANO_MB_DEFAULT = 20
+BLOQUE_CLIENTE = 64 * 1024
+NOMBRE_ARCHIVO = "documento.pdf"
+
+
+class ClienteS3Archivo:
+    """get_object sobre un archivo local: Body es un StreamingBody como el de boto3"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        size = self.path.stat().st_size
+        return {
+            "Body": StreamingBody(open(self.path, "rb"), size),
+            "ContentLength": size,
+            "ContentType": "application/pdf",
+            "ETag": '"benchmark"',
+            "LastModified": datetime.fromtimestamp(self.path.stat().st_mtime, tz=timezone.utc),
+        }
+
+
+def crear_app(path: Path) -> FastAPI:
+    app = FastAPI()
+    cliente = ClienteS3Archivo(path)
+
+    @app.get("/anterior")
+    async def anterior():
+        # Igual que el endpoint anterior: todo el objeto en memoria y un solo bloque
+        obj = await asyncio.to_thread(cliente.get_object, Bucket="documentos", Key=NOMBRE_ARCHIVO)
+        content = obj["Body"].read()
+        return StreamingResponse(iter([content]), media_type="application/pdf",
+                                 headers={"Content-Length": str(len(content))})
+
+    @app.get("/s3")
+    async def s3(request: Request):
+        return await stream_s3_object(cliente, "documentos", NOMBRE_ARCHIVO, NOMBRE_ARCHIVO,
+                                      range_header=request.headers.get("range"))
+
+    @app.get("/local")
+    async def local():
+        return serve_local_file(path, NOMBRE_ARCHIVO)
+
+    return app
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def descargar(client: httpx.AsyncClient, ruta: str) -> int:
+    """Descarga descartando los bloques (el cliente no acumula memoria)"""
+    recibidos = 0
+    async with client.stream("GET", ruta) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_raw(BLOQUE_CLIENTE):
+            recibidos += len(chunk)
+    return recibidos
+
+
+async def medir(base_url: str, ruta: str, descargas: int, tamano: int) -> Dict[str, float]:
+    limites = httpx.Limits(max_connections=descargas)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300.0, limits=limites) as client:
+        tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        recibidos = await asyncio.gather(*(descargar(client, ruta) for _ in range(descargas)))
+        total = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+    assert all(r == tamano for r in recibidos), "descarga incompleta"
+    return {"segundos": total, "pico_mb": pico / 1024 / 1024}
+
+
+def main():
+    descargas = int(sys.argv[1]) if len(sys.argv) > 1 else DESCARGAS_DEFAULT
+    tamano_mb = int(sys.argv[2]) if len(sys.argv) > 2 else TAMANO_MB_DEFAULT
+    tamano = tamano_mb * 1024 * 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / NOMBRE_ARCHIVO
+        with open(path, "wb") as f:
+            bloque = os.urandom(1024 * 1024)
+            for _ in range(tamano_mb):
+                f.write(bloque)
+
+        port = puerto_libre()
+        server = iniciar_servidor(crear_app(path), port)
+        tracemalloc.start()
+        try:
+            print(f"📊 {descargas} descargas paralelas de {tamano_mb} MB\n")
+            print(f"{'modo':<12}{'tiempo (s)':>12}{'pico memoria (MB)':>20}")
+            for ruta in ("/s3", "/local", "/anterior"):
+                r = asyncio.run(medir(f"http://127.0.0.1:{port}", ruta, descargas, tamano))
+                print(f"{ruta.strip('/'):<12}{r['segundos']:>12.2f}{r['pico_mb']:>20.1f}")
+        finally:
+            tracemalloc.stop()
+            server.should_exit = True
+    print(f"\nEl modo anterior necesita ~{descargas} x {tamano_mb} MB; en streaming el pico depende del tamaño de bloque.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark del pipeline de imágenes (app.services.image_pipeline).
+
+1. Throughput: procesa N fotos sintéticas tipo cámara (JPEG) con el
+   ProcessPoolExecutor del pipeline usando 1, 2, ... workers y mide imágenes/s.
+2. Payload del listado: compara los bytes que descarga una página de /services
+   (una imagen por tarjeta) usando los originales contra las variantes WebP de
+   480 px (tarjeta en escritorio) y 160 px (miniatura).
+No sube nada a Supabase ni necesita credenciales.
+
+Uso:
+    python scripts/benchmark_image_pipeline.py [imagenes] [ancho] [alto]
+"""
+
+import sys
+import os
+import asyncio
+import io
+import time
+from typing import Dict, List
+
+# Agregar el directorio raíz del backend al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageFilter
+
+from app.services.image_pipeline import ImagePipeline, procesar_imagen
+
+IMAGENES_DEFAULT = 20  # igual al tamaño de página por defecto del marketplace
+ANCHO_DEFAULT = 4000
+ALTO_DEFAULT = 3000
+CALIDAD_JPEG_CAMARA = 92
+ANCHO_TARJETA = 480
+ANCHO_MINIATURA = 160
+
+
+def foto_sintetica(ancho: int, alto: int, semilla: int) -> bytes:
+    """JPEG con degradado y ruido suavizado: se comprime parecido a una foto real"""
+    ruido = Image.effect_noise((ancho // 4, alto // 4), 60 + semilla % 20).resize((ancho, alto))
+    degradado = Image.linear_gradient("L").resize((ancho, alto))
+    imagen = Image.merge("RGB", (ruido, degradado, ruido.filter(ImageFilter.GaussianBlur(2))))
+    salida = io.BytesIO()
+    imagen.save(salida, format="JPEG", quality=CALIDAD_JPEG_CAMARA)
+    return salida.getvalue()
+
+
+async def procesar_todas(pipeline: ImagePipeline, fotos: List[bytes]) -> List[Dict[int, bytes]]:
+    return await asyncio.gather(*(pipeline.procesar(foto) for foto in fotos))
+
+
+def medir_throughput(fotos: List[bytes], workers: int) -> float:
+    pipeline = ImagePipeline(max_workers=workers)
+    try:
+        # Calentar el pool (arranque de procesos e import de Pillow)
+        asyncio.run(procesar_todas(pipeline, fotos[:workers]))
+        inicio = time.perf_counter()
+        asyncio.run(procesar_todas(pipeline, fotos))
+        return len(fotos) / (time.perf_counter() - inicio)
+    finally:
+        pipeline.close()
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else IMAGENES_DEFAULT
+    ancho = int(sys.argv[2]) if len(sys.argv) > 2 else ANCHO_DEFAULT
+    alto = int(sys.argv[3]) if len(sys.argv) > 3 else ALTO_DEFAULT
+
+    print(f"📸 Generando {cantidad} fotos JPEG de {ancho}x{alto}...")
+    fotos = [foto_sintetica(ancho, alto, i) for i in range(cantidad)]
+
+    print(f"\n⚙️ Throughput del pipeline ({cantidad} imágenes, variantes 160/480/1200 WebP)")
+    print(f"{'workers':<10}{'imágenes/s':>12}")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        print(f"{workers:<10}{medir_throughput(fotos, workers):>12.2f}")
+        workers *= 2
+
+    variantes = [procesar_imagen(foto) for foto in fotos]
+    original = sum(len(foto) for foto in fotos)
+    tarjeta = sum(len(v[ANCHO_TARJETA]) for v in variantes)
+    miniatura = sum(len(v[ANCHO_MINIATURA]) for v in variantes)
+    canonica = sum(len(v[max(v)]) for v in variantes)
+
+    print(f"\n📦 Bytes de imágenes en una página de {cantidad} servicios")
+    print(f"{'versión':<24}{'KB':>12}{'reducción':>12}")
+    for nombre, total in (
+        ("original (anterior)", original),
+        ("WebP 1200 px", canonica),
+        (f"WebP {ANCHO_TARJETA} px (tarjeta)", tarjeta),
+        (f"WebP {ANCHO_MINIATURA} px", miniatura),
+    ):
+        print(f"{nombre:<24}{total / 1024:>12.1f}{(1 - total / original) * 100:>11.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: consultas calientes con y sin caché de prepared statements de asyncpg.
+
+Ejecuta la consulta del catálogo (get_base_query), el listado de reservas del
+proveedor (build_base_query) y la verificación de solapamiento de reservas con
+statement_cache_size=0 (modo seguro para poolers en modo transacción) y con la
+caché activada. Muestra latencias y el tiempo de planificación que reporta
+EXPLAIN ANALYZE para cada consulta.
+
+Debe ejecutarse contra una conexión directa o un pooler en modo sesión: con
+PgBouncer/Supavisor en modo transacción la variante con caché puede fallar.
+
+Uso:
+    python scripts/benchmark_prepared_statements.py [iteraciones]
+"""
+
+import sys
+import os
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, datetime, time as time_type
+from typing import Any, Dict, List, Tuple
+
+# Agregar el directorio raíz del backend al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncpg
+
+from app.core.config import DATABASE_URL, DB_STATEMENT_CACHE_SIZE
+from app.supabase.db.db_supabase import POOLER_MODE, POOLER_MODE_TRANSACTION
+from app.api.v1.routers.services.services import get_base_query
+from app.api.v1.routers.reserva_service.reserva import build_base_query
+
+ITERACIONES_DEFAULT = 200
+ITERACIONES_CALENTAMIENTO = 10
+LIMITE_CATALOGO = 20
+
+VERIFICACION_SOLAPAMIENTO_QUERY = """
+    SELECT id_reserva, fecha, hora_inicio, hora_fin, estado
+    FROM reserva
+    WHERE user_id = $1
+    AND periodo && tsrange($2, $3, '[)')
+    AND estado != $4
+    LIMIT 1
+"""
+
+
+def asyncpg_dsn() -> str:
+    return DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+
+
+async def build_queries(conn: asyncpg.Connection) -> List[Tuple[str, str, Tuple[Any, ...]]]:
+    """Consultas a medir con parámetros reales de la base de datos"""
+    perfil = await conn.fetchrow("SELECT id_perfil FROM servicio WHERE estado = true LIMIT 1")
+    cliente = await conn.fetchrow("SELECT user_id FROM reserva LIMIT 1")
+    queries = [
+        ("catalogo", get_base_query() + f" ORDER BY s.created_at DESC LIMIT {LIMITE_CATALOGO}", ()),
+    ]
+    if perfil:
+        queries.append(("reservas_proveedor", build_base_query([], 1), (perfil["id_perfil"], LIMITE_CATALOGO, 0)))
+    if cliente:
+        queries.append((
+            "solapamiento_reserva",
+            VERIFICACION_SOLAPAMIENTO_QUERY,
+            (
+                cliente["user_id"],
+                datetime.combine(date.today(), time_type(9, 0)),
+                datetime.combine(date.today(), time_type(18, 0)),
+                "cancelada",
+            ),
+        ))
+    return queries
+
+
+async def planning_time_ms(conn: asyncpg.Connection, sql: str, params: Tuple[Any, ...]) -> Tuple[float, float]:
+    """Tiempos de planificación y ejecución de una consulta según EXPLAIN ANALYZE"""
+    plan = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", *params)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Planning Time"], plan[0]["Execution Time"]
+
+
+async def measure(statement_cache_size: int, iterations: int) -> Dict[str, Dict[str, float]]:
+    """Latencia por consulta con el tamaño de caché indicado"""
+    conn = await asyncpg.connect(asyncpg_dsn(), statement_cache_size=statement_cache_size)
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        for name, sql, params in await build_queries(conn):
+            for _ in range(ITERACIONES_CALENTAMIENTO):
+                await conn.fetch(sql, *params)
+            samples = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                await conn.fetch(sql, *params)
+                samples.append((time.perf_counter() - started) * 1000)
+            planning, execution = await planning_time_ms(conn, sql, params)
+            samples.sort()
+            results[name] = {
+                "media_ms": statistics.mean(samples),
+                "p50_ms": samples[len(samples) // 2],
+                "p95_ms": samples[int(len(samples) * 0.95) - 1],
+                "planificacion_ms": planning,
+                "ejecucion_ms": execution,
+            }
+    finally:
+        await conn.close()
+    return results
+
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else ITERACIONES_DEFAULT
+    if POOLER_MODE == POOLER_MODE_TRANSACTION:
+        print("⚠️ DATABASE_URL apunta a un pooler en modo transacción; la variante con caché puede fallar.")
+        print("   Usa la conexión directa o el modo sesión (puerto 5432) para el benchmark.")
+
+    cache_size = DB_STATEMENT_CACHE_SIZE or 100
+    print(f"📊 {iterations} iteraciones por consulta\n")
+    sin_cache = await measure(0, iterations)
+    con_cache = await measure(cache_size, iterations)
+
+    print(f"{'consulta':<22}{'sin caché (ms)':>16}{'con caché (ms)':>16}{'ahorro':>10}{'planificación (ms)':>20}")
+    for name, base in sin_cache.items():
+        cached = con_cache[name]
+        ahorro = (1 - cached["media_ms"] / base["media_ms"]) * 100 if base["media_ms"] else 0.0
+        print(
+            f"{name:<22}{base['media_ms']:>16.2f}{cached['media_ms']:>16.2f}{ahorro:>9.1f}%"
+            f"{base['planificacion_ms']:>20.2f}"
+        )
+    print("\nCon statement_cache_size=0 cada llamada vuelve a planificar la consulta;")
+    print("con caché, tras unas ejecuciones Postgres reutiliza el plan de la sentencia preparada.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latencia del registro (alta en Supabase Auth + perfil y rol).
+
+Para cada iteración crea un usuario de prueba con la Admin API (igual que
+/auth/signup), crea su perfil y rol con la transacción del endpoint y mide,
+sobre el mismo usuario, el flujo anterior (espera fija de 1 s al trigger y
+consulta del perfil). Muestra p50/p99 de ambos flujos y elimina los usuarios
+creados al terminar.
+
+Crea usuarios reales en Supabase Auth: ejecutar solo contra un proyecto de
+pruebas o staging.
+
+Uso:
+    python scripts/benchmark_signup_profile.py [iteraciones]
+"""
+
+import sys
+import os
+import asyncio
+import time
+import uuid
+from typing import Dict, List
+
+# Agregar el directorio raíz del backend al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.schemas.auth import SignUpIn
+from app.services.direct_db_service import direct_db_service
+from app.supabase.async_auth_client import async_auth_client
+from app.api.v1.routers.users.auth_user.auth import (
+    build_signup_data,
+    create_user_in_supabase,
+    create_user_profile_in_transaction,
+)
+
+ITERACIONES_DEFAULT = 20
+ESPERA_TRIGGER_ANTERIOR = 1.0  # segundos que el flujo anterior esperaba antes de consultar el perfil
+PASSWORD_BENCHMARK = "Benchmark#2025"
+PERFIL_QUERY = "SELECT id, nombre_persona, nombre_empresa, ruc, estado FROM users WHERE id = $1"
+
+
+def percentil(samples: List[float], p: float) -> float:
+    ordenadas = sorted(samples)
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p))]
+
+
+async def flujo_anterior(id_user: str) -> None:
+    """Espera fija al trigger y consulta del perfil (comportamiento previo del endpoint)"""
+    await asyncio.sleep(ESPERA_TRIGGER_ANTERIOR)
+    async with direct_db_service.connection() as conn:
+        await conn.fetchrow(PERFIL_QUERY, id_user)
+
+
+async def medir(iteraciones: int) -> Dict[str, List[float]]:
+    tiempos: Dict[str, List[float]] = {"auth": [], "perfil": [], "nuevo": [], "anterior": []}
+    creados: List[str] = []
+    try:
+        for _ in range(iteraciones):
+            data = SignUpIn(
+                email=f"benchmark+{uuid.uuid4().hex[:12]}@example.com",
+                password=PASSWORD_BENCHMARK,
+                nombre_persona="Benchmark",
+                nombre_empresa="Benchmark S.A.",
+                ruc="1234567-8"
+            )
+            inicio = time.perf_counter()
+            _, id_user, _ = await create_user_in_supabase(build_signup_data(data))
+            auth_ms = (time.perf_counter() - inicio) * 1000
+            creados.append(id_user)
+
+            inicio = time.perf_counter()
+            await create_user_profile_in_transaction(id_user, data)
+            perfil_ms = (time.perf_counter() - inicio) * 1000
+
+            inicio = time.perf_counter()
+            await flujo_anterior(id_user)
+            anterior_ms = (time.perf_counter() - inicio) * 1000
+
+            tiempos["auth"].append(auth_ms)
+            tiempos["perfil"].append(perfil_ms)
+            tiempos["nuevo"].append(auth_ms + perfil_ms)
+            tiempos["anterior"].append(auth_ms + anterior_ms)
+    finally:
+        for id_user in creados:
+            try:
+                await async_auth_client.delete_user(id_user)
+            except Exception as e:
+                print(f"⚠️ No se pudo eliminar el usuario de prueba {id_user}: {e}")
+        await direct_db_service.close_pool()
+        await async_auth_client.close()
+    return tiempos
+
+
+async def main():
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else ITERACIONES_DEFAULT
+    print(f"📊 {iteraciones} registros de prueba\n")
+    tiempos = await medir(iteraciones)
+
+    etiquetas = {
+        "auth": "alta en Supabase Auth",
+        "perfil": "perfil + rol (transacción)",
+        "nuevo": "registro actual",
+        "anterior": "registro anterior (espera)",
+    }
+    print(f"{'etapa':<30}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for clave, etiqueta in etiquetas.items():
+        print(f"{etiqueta:<30}{percentil(tiempos[clave], 0.50):>12.1f}{percentil(tiempos[clave], 0.99):>12.1f}")
+    print(f"\nEl flujo anterior nunca baja de {ESPERA_TRIGGER_ANTERIOR * 1000:.0f} ms por la espera fija al trigger;")
+    print("el actual solo suma la transacción de perfil y rol al alta en Supabase Auth.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: generación de slots de /disponibilidades/servicio/{id}/disponibles.
+
+Compara, por petición y con datos sintéticos (30 días, slots de 60 minutos), el
+generador anterior del router de disponibilidades (un dict por slot con dos
+llamadas a datetime.now(), reservas aplicadas comparando cada slot con cada
+reserva y filtros sobre la lista completa) con el motor de disponibilidad
+compartido (tuplas en minutos hasta la serialización final). Informa tiempo de
+CPU y memoria asignada (tracemalloc) por petición.
+
+Uso:
+    python scripts/benchmark_slot_engine.py [iteraciones] [reservas_por_dia]
+"""
+
+import sys
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+# Agregar el directorio raíz del backend al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api.v1.routers.disponibilidad import (
+    DIAS_DISPONIBILIDAD,
+    DURACION_SLOTS_DISPONIBILIDAD,
+    _slots_a_disponibilidades,
+)
+from app.services.availability_engine import calcular_slots_rango, construir_datos_rango, from_minutes
+
+ITERACIONES_DEFAULT = 200
+RESERVAS_POR_DIA_DEFAULT = 4
+SERVICIO_ID = 1
+FECHA_INICIO = date.today() + timedelta(days=1)
+
+
+def generar_filas(reservas_por_dia: int) -> Tuple[List[tuple], List[tuple], List[tuple]]:
+    """Filas como las devuelve la base: lunes a sábado 08:00-18:00, excepciones y reservas aleatorias"""
+    rnd = random.Random(7)
+    horarios = [(dia, from_minutes(8 * 60), from_minutes(18 * 60)) for dia in range(6)]
+    excepciones = []
+    reservas = []
+    for offset in range(DIAS_DISPONIBILIDAD + 1):
+        fecha = FECHA_INICIO + timedelta(days=offset)
+        if offset % 10 == 4:
+            excepciones.append((fecha, "horario_especial", from_minutes(9 * 60), from_minutes(13 * 60)))
+        for _ in range(reservas_por_dia):
+            inicio = rnd.randrange(8 * 60, 17 * 60, 30)
+            reservas.append((fecha, from_minutes(inicio), from_minutes(inicio + 60)))
+    return horarios, excepciones, reservas
+
+
+def generador_anterior(horarios, excepciones, reservas) -> List[Dict[str, Any]]:
+    """Réplica del generador anterior del router (sin su logging por día)"""
+    horarios_map = {dia: {"hora_inicio": ini, "hora_fin": fin} for dia, ini, fin in horarios}
+    excepciones_map = {fecha: {"tipo": tipo, "hora_inicio": ini, "hora_fin": fin} for fecha, tipo, ini, fin in excepciones}
+    reservas_map: Dict[date, List[Dict[str, Any]]] = {}
+    for fecha, ini, fin in reservas:
+        reservas_map.setdefault(fecha, []).append({"hora_inicio": ini, "hora_fin": fin})
+
+    todos = []
+    fecha_actual = FECHA_INICIO
+    fecha_fin = FECHA_INICIO + timedelta(days=DIAS_DISPONIBILIDAD)
+    while fecha_actual <= fecha_fin:
+        base = horarios_map.get(fecha_actual.weekday())
+        if base is None:
+            fecha_actual += timedelta(days=1)
+            continue
+        excepcion = excepciones_map.get(fecha_actual)
+        if excepcion and excepcion["tipo"] == "horario_especial":
+            hora_inicio, hora_fin = excepcion["hora_inicio"], excepcion["hora_fin"]
+        else:
+            hora_inicio, hora_fin = base["hora_inicio"], base["hora_fin"]
+        slots = []
+        actual = datetime.combine(fecha_actual, hora_inicio)
+        final = datetime.combine(fecha_actual, hora_fin)
+        while actual < final:
+            fin_slot = actual + timedelta(minutes=DURACION_SLOTS_DISPONIBILIDAD)
+            if fin_slot > final:
+                break
+            slots.append({
+                "id_servicio": SERVICIO_ID,
+                "fecha_inicio": actual,
+                "fecha_fin": fin_slot,
+                "disponible": True,
+                "precio_adicional": 0,
+                "observaciones": None,
+                "created_at": datetime.now(),
+                "updated_at": datetime.now()
+            })
+            actual = fin_slot
+        for reserva in reservas_map.get(fecha_actual, []):
+            reserva_inicio = datetime.combine(fecha_actual, reserva["hora_inicio"])
+            reserva_fin = datetime.combine(fecha_actual, reserva["hora_fin"])
+            for slot in slots:
+                if slot["fecha_inicio"] < reserva_fin and slot["fecha_fin"] > reserva_inicio:
+                    slot["disponible"] = False
+        todos.extend(slots)
+        fecha_actual += timedelta(days=1)
+    disponibles = [h for h in todos if h["disponible"]]
+    return [h for h in disponibles if h["fecha_inicio"].date() > date.today()]
+
+
+def motor_compartido(horarios, excepciones, reservas) -> List[Dict[str, Any]]:
+    """Motor de disponibilidad y serialización final del router"""
+    datos = construir_datos_rango(horarios, excepciones, reservas)
+    fecha_fin = FECHA_INICIO + timedelta(days=DIAS_DISPONIBILIDAD)
+    slots = calcular_slots_rango(datos, FECHA_INICIO, fecha_fin, DURACION_SLOTS_DISPONIBILIDAD)
+    return _slots_a_disponibilidades(SERVICIO_ID, slots)
+
+
+def medir(func, filas, iterations: int) -> Dict[str, float]:
+    """CPU media por petición y memoria asignada (total y pico) en una petición"""
+    muestras = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func(*filas)
+        muestras.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    resultado = func(*filas)
+    despues = tracemalloc.take_snapshot()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    asignado = sum(stat.size_diff for stat in despues.compare_to(antes, "filename") if stat.size_diff > 0)
+    return {
+        "cpu_ms": statistics.mean(muestras),
+        "asignado_kb": asignado / 1024,
+        "pico_kb": pico / 1024,
+        "slots": len(resultado),
+    }
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else ITERACIONES_DEFAULT
+    reservas_por_dia = int(sys.argv[2]) if len(sys.argv) > 2 else RESERVAS_POR_DIA_DEFAULT
+    filas = generar_filas(reservas_por_dia)
+
+    anterior = medir(generador_anterior, filas, iterations)
+    motor = medir(motor_compartido, filas, iterations)
+    assert anterior["slots"] == motor["slots"], "los dos generadores deben devolver los mismos slots"
+
+    print(f"📊 {iterations} iteraciones, {DIAS_DISPONIBILIDAD} días, {reservas_por_dia} reservas por día, {motor['slots']} slots\n")
+    print(f"{'generador':<14}{'CPU (ms)':>12}{'asignado (KB)':>16}{'pico (KB)':>12}")
+    for nombre, valores in (("anterior", anterior), ("motor", motor)):
+        print(f"{nombre:<14}{valores['cpu_ms']:>12.3f}{valores['asignado_kb']:>16.1f}{valores['pico_kb']:>12.1f}")
+    print(f"\nReducción de CPU: {(1 - motor['cpu_ms'] / anterior['cpu_ms']) * 100:.1f}%")
+    print(f"Reducción de pico de memoria: {(1 - motor['pico_kb'] / anterior['pico_kb']) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,7 @@ async def bulk_insert_departamentos(departamentos: List[Dict[str, Any]]):
         print(f"✅ Insertados {len(departamentos)} departamentos")
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def bulk_insert_ciudades(ciudades: List[Dict[str, Any]]):
     """Inserta ciudades masivamente."""
@@ -56,7 +56,7 @@ async def bulk_insert_ciudades(ciudades: List[Dict[str, Any]]):
         print(f"✅ Insertadas {len(ciudades)} ciudades")
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def bulk_insert_barrios(barrios: List[Dict[str, Any]]):
     """Inserta barrios masivamente."""
@@ -81,7 +81,7 @@ async def bulk_insert_barrios(barrios: List[Dict[str, Any]]):
         print(f"✅ Insertados {len(barrios)} barrios")
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def bulk_insert_categorias(categorias: List[Dict[str, Any]]):
     """Inserta categorías masivamente."""
@@ -97,7 +97,7 @@ async def bulk_insert_categorias(categorias: List[Dict[str, Any]]):
         print(f"✅ Insertadas {len(categorias)} categorías")
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def bulk_insert_tipos_documento(tipos: List[Dict[str, Any]]):
     """Inserta tipos de documento masivamente."""
@@ -119,7 +119,7 @@ async def bulk_insert_tipos_documento(tipos: List[Dict[str, Any]]):
         print(f"✅ Insertados {len(tipos)} tipos de documento")
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def load_data_from_json(file_path: str):
     """Carga datos desde un archivo JSON y los inserta."""
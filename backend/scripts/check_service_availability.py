@@ -63,7 +63,7 @@ async def check_service_availability(servicio_id: int):
             
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 if __name__ == "__main__":
     import argparse
@@ -51,7 +51,7 @@ async def get_table_structure(table_name: str):
         return columns
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_all_tables():
     """Obtiene todas las tablas de la base de datos."""
@@ -68,7 +68,7 @@ async def get_all_tables():
         return [row['table_name'] for row in rows]
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def export_structure():
     """Exporta la estructura de todas las tablas."""
@@ -49,7 +49,7 @@ async def index_all_services():
         """
         
         services = await conn.fetch(query)
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
         
         total_services = len(services)
         print(f"📊 Servicios encontrados en BD: {total_services}\n")
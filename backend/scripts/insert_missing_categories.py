@@ -14,7 +14,7 @@ async def insert_categories():
         print("✅ Categorías Eventos y Limpieza insertadas")
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 if __name__ == "__main__":
     asyncio.run(insert_categories())
@@ -48,7 +48,7 @@ async def get_services_without_availability() -> List[Dict[str, Any]]:
         return [dict(service) for service in services]
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_existing_availability_pattern() -> Dict[str, Any]:
     """Obtiene un patrón de disponibilidad existente para usar como referencia"""
@@ -71,7 +71,7 @@ async def get_existing_availability_pattern() -> Dict[str, Any]:
         return None
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def create_availability_for_service(
     conn,
@@ -239,7 +239,7 @@ async def populate_availability():
         traceback.print_exc()
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 if __name__ == "__main__":
     asyncio.run(populate_availability())
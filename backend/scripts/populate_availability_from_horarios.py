@@ -38,7 +38,7 @@ async def get_proveedores_con_horarios() -> List[Dict[str, Any]]:
         return [dict(prov) for prov in proveedores]
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_horarios_proveedor(conn, id_proveedor: int) -> Dict[int, Dict[str, Any]]:
     """Obtiene los horarios de trabajo de un proveedor por día de la semana"""
@@ -229,7 +229,7 @@ async def populate_from_horarios():
         traceback.print_exc()
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 if __name__ == "__main__":
     asyncio.run(populate_from_horarios())
@@ -167,7 +167,7 @@ async def populate_availability():
         traceback.print_exc()
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 if __name__ == "__main__":
     asyncio.run(populate_availability())
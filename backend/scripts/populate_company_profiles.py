@@ -156,7 +156,7 @@ async def get_departamento_id(nombre: str) -> Optional[int]:
         return row['id_departamento'] if row else None
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_ciudad_id(nombre: str, id_departamento: int) -> Optional[int]:
     """Obtiene el ID de una ciudad."""
@@ -169,7 +169,7 @@ async def get_ciudad_id(nombre: str, id_departamento: int) -> Optional[int]:
         return row['id_ciudad'] if row else None
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_barrio_id(nombre: str, id_ciudad: int) -> Optional[int]:
     """Obtiene el ID de un barrio."""
@@ -182,7 +182,7 @@ async def get_barrio_id(nombre: str, id_ciudad: int) -> Optional[int]:
         return row['id_barrio'] if row else None
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def create_direccion(
     calle: str,
@@ -209,7 +209,7 @@ async def create_direccion(
         return row['id_direccion']
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def create_user_in_db(user_id: UUID, nombre_persona: str, nombre_empresa: str, ruc: str) -> bool:
     """Crea el registro en la tabla users si no existe."""
@@ -235,7 +235,7 @@ async def create_user_in_db(user_id: UUID, nombre_persona: str, nombre_empresa:
         return True
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def create_perfil_empresa(
     user_id: UUID,
@@ -258,7 +258,7 @@ async def create_perfil_empresa(
         return row['id_perfil']
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def create_company_profile(empresa_data: Dict[str, Any]) -> Dict[str, Any]:
     """Crea un perfil de empresa completo."""
@@ -48,7 +48,7 @@ async def get_proveedores_sin_horarios() -> List[Dict[str, Any]]:
         return [dict(prov) for prov in proveedores]
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_proveedores_con_horarios() -> List[int]:
     """Obtiene IDs de proveedores que ya tienen horarios"""
@@ -64,7 +64,7 @@ async def get_proveedores_con_horarios() -> List[int]:
         return [row['id_proveedor'] for row in proveedores]
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def insert_horarios_proveedor(conn, id_proveedor: int) -> int:
     """Inserta los horarios estándar para un proveedor"""
@@ -160,7 +160,7 @@ async def populate_horarios_trabajo():
         traceback.print_exc()
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 if __name__ == "__main__":
     asyncio.run(populate_horarios_trabajo())
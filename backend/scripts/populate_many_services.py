@@ -181,7 +181,7 @@ async def get_categoria_id(nombre: str) -> Optional[int]:
         return row['id_categoria'] if row else None
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_perfiles_empresa() -> List[Dict[str, Any]]:
     """Obtiene todos los perfiles de empresa verificados."""
@@ -198,7 +198,7 @@ async def get_perfiles_empresa() -> List[Dict[str, Any]]:
         return [dict(row) for row in rows]
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_or_create_moneda(codigo: str, nombre: str, simbolo: str) -> int:
     """Obtiene o crea una moneda."""
@@ -218,7 +218,7 @@ async def get_or_create_moneda(codigo: str, nombre: str, simbolo: str) -> int:
         return row['id_moneda']
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def create_servicio(
     nombre: str,
@@ -243,7 +243,7 @@ async def create_servicio(
         return row['id_servicio']
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def populate_many_services(num_servicios: int = 200):
     """Función principal para poblar muchos servicios."""
@@ -322,7 +322,7 @@ async def populate_many_services(num_servicios: int = 200):
                     print(f"  ✅ {servicios_creados} servicios creados...")
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     
     # Resumen
     print(f"\n✅ Población completada: {servicios_creados} servicios creados\n")
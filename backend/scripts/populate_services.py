@@ -206,7 +206,7 @@ async def get_or_create_moneda(codigo: str, nombre: str, simbolo: str) -> int:
         return row['id_moneda']
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_categoria_id(nombre: str) -> Optional[int]:
     """Obtiene el ID de una categoría por nombre."""
@@ -219,7 +219,7 @@ async def get_categoria_id(nombre: str) -> Optional[int]:
         return row['id_categoria'] if row else None
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def get_perfiles_empresa() -> List[Dict[str, Any]]:
     """Obtiene todos los perfiles de empresa verificados."""
@@ -236,7 +236,7 @@ async def get_perfiles_empresa() -> List[Dict[str, Any]]:
         return [dict(row) for row in rows]
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def create_servicio(
     nombre: str,
@@ -261,7 +261,7 @@ async def create_servicio(
         return row['id_servicio']
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
 
 async def populate_services():
     """Función principal para poblar servicios."""
@@ -334,7 +334,7 @@ async def populate_services():
                 print()
     finally:
         if conn:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
     
     print(f"\n✅ Población completada: {servicios_creados} servicios creados")
 
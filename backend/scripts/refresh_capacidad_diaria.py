@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Recalcula la tabla capacidad_diaria_servicio para todos los proveedores.
+
+La aplicación mantiene la tabla al cambiar horarios, excepciones o reservas,
+y el planificador interno (tarea capacidad_diaria) hace avanzar el horizonte
+(CAPACITY_HORIZON_DAYS) a diario. Este script fuerza un recálculo completo, por
+ejemplo si el planificador está deshabilitado. Requiere la migración
+migrations/create_capacidad_diaria_servicio.sql.
+
+Uso:
+    python scripts/refresh_capacidad_diaria.py
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Agregar el directorio raíz del backend al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.direct_db_service import direct_db_service
+from app.services.capacidad_diaria_service import capacidad_diaria_service
+
+
+async def main():
+    started = time.perf_counter()
+    try:
+        async with direct_db_service.connection() as conn:
+            resultado = await capacidad_diaria_service.recalcular_todos(conn)
+    finally:
+        await direct_db_service.close_pool()
+    fecha_inicio, fecha_fin = capacidad_diaria_service.horizonte()
+    print(f"✅ Capacidad diaria recalculada ({fecha_inicio} - {fecha_fin}): "
+          f"{resultado['proveedores']} proveedores, {resultado['filas']} días con slots libres "
+          f"en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
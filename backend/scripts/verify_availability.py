@@ -60,7 +60,7 @@ async def verify():
             print(f"\n📊 Disponibilidades para servicio ID {servicio_id}: {count['total']}")
             
     finally:
-        await direct_db_service.pool.release(conn)
+        await direct_db_service.release_connection(conn)
 
 if __name__ == "__main__":
     asyncio.run(verify())
@@ -52,7 +52,22 @@ python -c "from app.main import app; print('✅ App importada OK')" || {
     exit 1
 }
 
+# Determinar cantidad de workers (WEB_CONCURRENCY o núcleos disponibles)
+WORKERS=${WEB_CONCURRENCY:-$(nproc 2>/dev/null || echo 1)}
+
+# Sin Redis el estado es local al proceso: solo es seguro un worker
+if [[ "$WORKERS" -gt 1 && -z "$REDIS_URL" ]]; then
+    echo "⚠️  REDIS_URL no configurado: el estado compartido requiere Redis, usando 1 worker"
+    WORKERS=1
+fi
+
 # Iniciar la aplicación
+if [[ "$WORKERS" -gt 1 ]]; then
+    echo "🎯 Iniciando gunicorn con $WORKERS workers uvicorn..."
+    export WEB_CONCURRENCY=$WORKERS
+    exec gunicorn app.main:app -c gunicorn.conf.py
+fi
+
 echo "🎯 Iniciando uvicorn..."
 exec uvicorn app.main:app \
     --host 0.0.0.0 \
@@ -141,7 +141,7 @@ async def sync_services_scheduled():
             services = await get_services_from_db(conn)
             print(f"📊 Servicios encontrados en BD: {len(services)}")
         finally:
-            await direct_db_service.pool.release(conn)
+            await direct_db_service.release_connection(conn)
         
         # 2. Obtener servicios actuales en Weaviate
         success, weaviate_services = get_weaviate_services(WEAVIATE_URL)
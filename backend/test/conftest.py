@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Fixtures compartidas: conexión asyncpg simulada y reemplazo del pool de direct_db_service
+"""
+import inspect
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.services.direct_db_service import direct_db_service
+
+
+class FakeTransaction:
+    """conn.transaction(): registra begin y commit/rollback en las llamadas de la conexión"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        self.conn.llamadas.append(("begin", None, ()))
+        return self
+
+    async def __aexit__(self, exc_type, *exc):
+        self.conn.llamadas.append(("commit" if exc_type is None else "rollback", None, ()))
+        return False
+
+
+class FakeConnection:
+    """
+    Conexión asyncpg simulada. Cada sentencia queda en `llamadas` como (método, query, args)
+    y se responde con la respuesta registrada más reciente cuyo fragmento aparece en la query
+    (así una prueba puede pisar la de un fixture). Una respuesta puede ser un valor, una
+    excepción o una función (sync o async) de los args.
+    """
+
+    def __init__(self):
+        self.llamadas = []
+        self._respuestas = []
+
+    def responder(self, fragmento, respuesta):
+        self._respuestas.insert(0, (fragmento, respuesta))
+        return self
+
+    def consultas(self, *metodos):
+        """Queries ejecutadas (opcionalmente solo las de ciertos métodos), sin las transacciones"""
+        return [
+            query for metodo, query, _ in self.llamadas
+            if query is not None and (not metodos or metodo in metodos)
+        ]
+
+    @property
+    def transacciones(self):
+        return [metodo for metodo, query, _ in self.llamadas if query is None and metodo != "begin"]
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def _responder(self, metodo, query, args, defecto):
+        self.llamadas.append((metodo, query, args))
+        for fragmento, respuesta in self._respuestas:
+            if fragmento in query:
+                if callable(respuesta):
+                    respuesta = respuesta(*args)
+                    if inspect.isawaitable(respuesta):
+                        respuesta = await respuesta
+                if isinstance(respuesta, Exception):
+                    raise respuesta
+                return respuesta
+        return defecto
+
+    async def execute(self, query, *args):
+        return await self._responder("execute", query, args, "OK")
+
+    async def executemany(self, query, filas):
+        return await self._responder("executemany", query, (list(filas),), None)
+
+    async def fetch(self, query, *args):
+        return await self._responder("fetch", query, args, [])
+
+    async def fetchrow(self, query, *args):
+        return await self._responder("fetchrow", query, args, None)
+
+    async def fetchval(self, query, *args):
+        return await self._responder("fetchval", query, args, None)
+
+
+def connection_factory(conn):
+    """Fábrica con la interfaz de direct_db_service.connection que siempre presta `conn`"""
+    @asynccontextmanager
+    async def connection():
+        yield conn
+
+    return connection
+
+
+@pytest.fixture
+def fake_conn():
+    return FakeConnection()
+
+
+@pytest.fixture
+def fake_pool(fake_conn):
+    """Fábrica connection() que presta `fake_conn` (para servicios que reciben la fábrica)"""
+    return connection_factory(fake_conn)
+
+
+@pytest.fixture
+def fake_db(monkeypatch, fake_conn):
+    """direct_db_service presta siempre `fake_conn` (connection() y get/release_connection)"""
+    async def get_connection():
+        return fake_conn
+
+    async def release_connection(conn):
+        return None
+
+    monkeypatch.setattr(direct_db_service, "connection", connection_factory(fake_conn))
+    monkeypatch.setattr(direct_db_service, "get_connection", get_connection)
+    monkeypatch.setattr(direct_db_service, "release_connection", release_connection)
+    return fake_conn
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el cliente asíncrono de Supabase Auth
+"""
+import json
+
+import httpx
+import pytest
+from gotrue.errors import AuthApiError
+
+from app.supabase.async_auth_client import AsyncSupabaseAuth
+
+USER_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def sesion_json(email="ana@example.com"):
+    return {
+        "access_token": "access-123",
+        "refresh_token": "refresh-123",
+        "expires_in": 3600,
+        "token_type": "bearer",
+        "user": {
+            "id": USER_ID,
+            "aud": "authenticated",
+            "email": email,
+            "app_metadata": {},
+            "user_metadata": {},
+            "created_at": "2025-01-01T00:00:00Z",
+        },
+    }
+
+
+def crear_cliente(handler):
+    return AsyncSupabaseAuth(
+        url="http://gotrue.test",
+        anon_key="anon",
+        service_role_key="service",
+        transport=httpx.MockTransport(handler)
+    )
+
+
+class TestSesiones:
+    @pytest.mark.asyncio
+    async def test_sign_in_parsea_la_sesion_sin_guardarla(self):
+        """El login devuelve la sesión y el cliente no conserva tokens entre llamadas"""
+        peticiones = []
+
+        def handler(request):
+            peticiones.append(request)
+            return httpx.Response(200, json=sesion_json(json.loads(request.content)["email"]))
+
+        cliente = crear_cliente(handler)
+        respuesta = await cliente.sign_in_with_password("ana@example.com", "secreta")
+        await cliente.close()
+
+        assert respuesta.session.access_token == "access-123"
+        assert respuesta.user.id == USER_ID
+        assert peticiones[0].url.path == "/auth/v1/token"
+        assert peticiones[0].url.params["grant_type"] == "password"
+        assert peticiones[0].headers["apikey"] == "anon"
+
+    @pytest.mark.asyncio
+    async def test_error_http_se_traduce_a_auth_api_error(self):
+        """Un 400 de GoTrue llega como AuthApiError con su estado y mensaje"""
+        def handler(request):
+            return httpx.Response(400, json={"code": 400, "error_code": "invalid_credentials", "msg": "Invalid login credentials"})
+
+        with pytest.raises(AuthApiError) as exc:
+            await crear_cliente(handler).sign_in_with_password("ana@example.com", "mala")
+        assert exc.value.status == 400
+        assert "Invalid login credentials" in exc.value.message
+
+    @pytest.mark.asyncio
+    async def test_sign_out_usa_el_token_de_la_peticion_e_ignora_sesion_inexistente(self):
+        """El logout revoca con el token recibido y un 401 se considera sesión ya cerrada"""
+        peticiones = []
+
+        def handler(request):
+            peticiones.append(request)
+            return httpx.Response(401, json={"msg": "invalid JWT"})
+
+        await crear_cliente(handler).sign_out("token-del-usuario")
+        assert peticiones[0].url.path == "/auth/v1/logout"
+        assert peticiones[0].headers["Authorization"] == "Bearer token-del-usuario"
@@ -30,7 +30,7 @@ class TestGetCurrentUser:
     @pytest.fixture
     def mock_supabase_auth(self):
         """Mock para el cliente de Supabase Auth"""
-        with patch('app.api.v1.dependencies.auth_user.supabase_auth') as mock:
+        with patch('app.api.v1.dependencies.auth_user.async_auth_client', new_callable=AsyncMock) as mock:
             yield mock
     
     @pytest.mark.asyncio
@@ -44,7 +44,7 @@ class TestGetCurrentUser:
         mock_response = Mock()
         mock_response.user = mock_user
         
-        mock_supabase_auth.auth.get_user.return_value = mock_response
+        mock_supabase_auth.get_user.return_value = mock_response
         
         # Ejecutar dependencia
         result = await get_current_user(mock_credentials)
@@ -55,7 +55,7 @@ class TestGetCurrentUser:
         assert result.email == mock_user.email
         
         # Verificar que se llamó a Supabase
-        mock_supabase_auth.auth.get_user.assert_called_once_with("valid_jwt_token")
+        mock_supabase_auth.get_user.assert_called_once_with("valid_jwt_token")
     
     @pytest.mark.asyncio
     async def test_get_current_user_no_credentials(self):
@@ -72,7 +72,7 @@ class TestGetCurrentUser:
         from supabase import AuthApiError
         
         # Configurar mock para lanzar error
-        mock_supabase_auth.auth.get_user.side_effect = AuthApiError("Invalid token")
+        mock_supabase_auth.get_user.side_effect = AuthApiError("Invalid token")
         
         with pytest.raises(HTTPException) as exc_info:
             await get_current_user(mock_credentials)
@@ -87,7 +87,7 @@ class TestGetCurrentUser:
         mock_response = Mock()
         mock_response.user = None
         
-        mock_supabase_auth.auth.get_user.return_value = mock_response
+        mock_supabase_auth.get_user.return_value = mock_response
         
         with pytest.raises(HTTPException) as exc_info:
             await get_current_user(mock_credentials)
@@ -99,7 +99,7 @@ class TestGetCurrentUser:
     async def test_get_current_user_unexpected_error(self, mock_credentials, mock_supabase_auth):
         """Prueba error inesperado"""
         # Configurar mock para lanzar error inesperado
-        mock_supabase_auth.auth.get_user.side_effect = Exception("Unexpected error")
+        mock_supabase_auth.get_user.side_effect = Exception("Unexpected error")
         
         with pytest.raises(HTTPException) as exc_info:
             await get_current_user(mock_credentials)
@@ -246,7 +246,7 @@ class TestAuthDependenciesIntegration:
         mock_creds.credentials = "valid_admin_token"
         
         # Mock de Supabase
-        with patch('app.api.v1.dependencies.auth_user.supabase_auth') as mock_supabase:
+        with patch('app.api.v1.dependencies.auth_user.async_auth_client', new_callable=AsyncMock) as mock_supabase:
             mock_user = Mock()
             mock_user.id = str(uuid.uuid4())
             mock_user.email = "admin@example.com"
@@ -254,7 +254,7 @@ class TestAuthDependenciesIntegration:
             mock_response = Mock()
             mock_response.user = mock_user
             
-            mock_supabase.auth.get_user.return_value = mock_response
+            mock_supabase.get_user.return_value = mock_response
             
             # Mock de sesión de DB
             with patch('app.api.v1.dependencies.database_supabase.get_async_db') as mock_get_db:
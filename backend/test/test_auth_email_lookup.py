@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la búsqueda de usuarios de auth por email: una consulta a auth.users en
+lugar de list_users, que solo devuelve la primera página (50 usuarios)
+"""
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.routers.users.auth_user import auth
+from app.services.direct_db_service import AUTH_USER_BY_EMAIL_QUERY
+
+CONFIRMADO = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def conn(fake_db, monkeypatch):
+    """auth.users con más usuarios que una página de la API de administración"""
+    usuarios = {
+        f"usuario{i}@empresa.com.py": {"id": f"id-{i}", "email": f"usuario{i}@empresa.com.py", "email_confirmed_at": None}
+        for i in range(120)
+    }
+    usuarios["usuario119@empresa.com.py"]["email_confirmed_at"] = CONFIRMADO
+    # La consulta compara contra lower($1)
+    fake_db.responder(AUTH_USER_BY_EMAIL_QUERY, lambda email: usuarios.get(email.lower()))
+
+    list_users = AsyncMock(side_effect=AssertionError("no debe paginar la API de administración"))
+    monkeypatch.setattr(auth.async_auth_client, "list_users", list_users)
+    monkeypatch.setattr(type(auth.async_auth_client), "is_admin_configured", True)
+    return fake_db
+
+
+class TestCheckEmailConfirmation:
+    @pytest.mark.asyncio
+    async def test_usuario_fuera_de_la_primera_pagina(self, conn):
+        respuesta = await auth.check_email_confirmation("Usuario119@Empresa.com.py")
+
+        assert respuesta["is_confirmed"] is True
+        assert respuesta["confirmed_at"] == CONFIRMADO
+        assert conn.consultas() == [AUTH_USER_BY_EMAIL_QUERY]
+
+    @pytest.mark.asyncio
+    async def test_usuario_inexistente(self, conn):
+        with pytest.raises(HTTPException) as exc:
+            await auth.check_email_confirmation("nadie@empresa.com.py")
+        assert exc.value.status_code == 404
+
+
+class TestVerifyUserCreatedDespiteEmailError:
+    @pytest.mark.asyncio
+    async def test_encuentra_el_usuario_por_email(self, conn):
+        assert await auth.verify_user_created_despite_email_error("usuario75@empresa.com.py") == "id-75"
+
+    @pytest.mark.asyncio
+    async def test_usuario_no_creado(self, conn):
+        with pytest.raises(HTTPException) as exc:
+            await auth.verify_user_created_despite_email_error("nadie@empresa.com.py")
+        assert exc.value.status_code == 500
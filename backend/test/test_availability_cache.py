@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el cache de disponibilidad (backend en memoria)
+"""
+import asyncio
+from datetime import date
+
+import pytest
+
+from app.core.redis_config import CacheService, InMemoryLRUBackend
+from app.services.availability_cache import AvailabilityCache
+
+FECHA = date(2030, 1, 7)
+
+
+class TestAvailabilityCache:
+    """Aciertos, invalidación por proveedor y métricas"""
+
+    @pytest.fixture
+    def availability(self):
+        return AvailabilityCache(CacheService(InMemoryLRUBackend(), namespace="test"), ttl=60)
+
+    def _loader(self, calls):
+        async def loader():
+            calls.append(1)
+            return [(FECHA, 540, 600)]
+        return loader
+
+    @pytest.mark.asyncio
+    async def test_segunda_lectura_es_hit_con_tuplas(self, availability):
+        """La segunda lectura no recalcula y devuelve tuplas con fechas"""
+        calls = []
+
+        await availability.get_slots(1, 10, FECHA, FECHA, 60, self._loader(calls))
+
+        assert await availability.get_slots(1, 10, FECHA, FECHA, 60, self._loader(calls)) == [(FECHA, 540, 600)]
+        assert len(calls) == 1
+        assert availability.get_metrics()["hit_ratio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_invalidacion_solo_afecta_al_proveedor(self, availability):
+        """Invalidar un proveedor recalcula sus entradas pero no las de otros proveedores"""
+        calls_1, calls_2 = [], []
+
+        await availability.get_slots(1, 10, FECHA, FECHA, 60, self._loader(calls_1))
+        await availability.get_slots(2, 20, FECHA, FECHA, 60, self._loader(calls_2))
+        await availability.invalidate_provider(1)
+        await availability.get_slots(1, 10, FECHA, FECHA, 60, self._loader(calls_1))
+        await availability.get_slots(2, 20, FECHA, FECHA, 60, self._loader(calls_2))
+
+        assert len(calls_1) == 2
+        assert len(calls_2) == 1
+        assert availability.get_metrics()["invalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_esperas_coalescidas_no_cuentan_como_hits(self, availability):
+        """Las peticiones que esperan la carga en curso se cuentan aparte"""
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [(FECHA, 540, 600)]
+
+        resultados = await asyncio.gather(*(
+            availability.get_slots(1, 10, FECHA, FECHA, 60, loader) for _ in range(5)
+        ))
+
+        assert resultados == [[(FECHA, 540, 600)]] * 5
+        metrics = availability.get_metrics()
+        assert len(calls) == 1
+        assert (metrics["misses"], metrics["coalesced"], metrics["hits"]) == (1, 4, 0)
+        assert metrics["hit_ratio"] == 0.0
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el motor de disponibilidad por rango de fechas
+"""
+from datetime import date, time
+
+from app.services.availability_engine import (
+    DatosRango,
+    TIPO_EXCEPCION_CERRADO,
+    TIPO_EXCEPCION_HORARIO_ESPECIAL,
+    calcular_slots_rango,
+    construir_datos_rango,
+    free_slot_starts,
+    intervalos_reserva,
+    merge_intervals,
+)
+
+LUNES = date(2030, 1, 7)
+MARTES = date(2030, 1, 8)
+
+
+class TestBarridoIntervalos:
+    """Fusión de intervalos y barrido de la grilla de slots"""
+
+    def test_merge_fusiona_solapados_y_contiguos(self):
+        """Los intervalos solapados o contiguos se fusionan y los vacíos se descartan"""
+        assert merge_intervals([(600, 660), (540, 600), (700, 720), (650, 690), (800, 800)]) == [
+            (540, 690), (700, 720)
+        ]
+
+    def test_slots_que_tocan_una_reserva_se_descartan(self):
+        """Solo quedan los slots sin solapamiento con las reservas"""
+        # 09:00-13:00, slots de 60 min, reserva 10:30-11:15
+        assert free_slot_starts(540, 780, 60, [(630, 675)]) == [540, 720]
+
+
+class TestCalcularSlotsRango:
+    """Horario base, excepciones y reservas a lo largo de un rango"""
+
+    def test_excepciones_y_reservas(self):
+        """Un día cerrado no genera slots y un horario especial reemplaza al base"""
+        datos = DatosRango(
+            horarios={0: (540, 720), 1: (540, 720)},
+            excepciones={
+                LUNES: (TIPO_EXCEPCION_CERRADO, None),
+                MARTES: (TIPO_EXCEPCION_HORARIO_ESPECIAL, (600, 780)),
+            },
+            reservas={MARTES: [(660, 720)]},
+        )
+
+        slots = calcular_slots_rango(datos, LUNES, MARTES, 60)
+
+        assert slots == [(MARTES, 600, 660), (MARTES, 720, 780)]
+
+    def test_dias_sin_horario_base(self):
+        """Los días sin horario de trabajo no generan slots"""
+        datos = DatosRango(horarios={0: (540, 660)})
+
+        slots = calcular_slots_rango(datos, LUNES, date(2030, 1, 14), 60)
+
+        assert slots == [(LUNES, 540, 600), (LUNES, 600, 660), (date(2030, 1, 14), 540, 600), (date(2030, 1, 14), 600, 660)]
+
+
+class TestConstruirDatosRango:
+    """Armado de las entradas a partir de filas de la base de datos"""
+
+    def test_filas_a_minutos_y_ultimo_horario_prevalece(self):
+        """Las horas pasan a minutos, las reservas se fusionan y el último horario del día prevalece"""
+        datos = construir_datos_rango(
+            horarios=[(0, time(8), time(12)), (0, time(9), time(17))],
+            excepciones=[(MARTES, TIPO_EXCEPCION_HORARIO_ESPECIAL, None, None)],
+            reservas=[(LUNES, time(10), time(11)), (LUNES, time(10, 30), time(11, 30))],
+        )
+
+        assert datos.horarios == {0: (540, 1020)}
+        assert datos.excepciones == {MARTES: (TIPO_EXCEPCION_HORARIO_ESPECIAL, None)}
+        assert datos.reservas == {LUNES: [(600, 690)]}
+
+    def test_reserva_que_cruza_la_medianoche_bloquea_ambos_dias(self):
+        """Una reserva de 23:30 a 00:30 ocupa el final de su fecha y el comienzo del día siguiente"""
+        assert intervalos_reserva(LUNES, time(23, 30), time(0, 30)) == [(LUNES, (1410, 1440)), (MARTES, (0, 30))]
+        # Terminar justo a las 00:00 no ocupa el día siguiente
+        assert intervalos_reserva(LUNES, time(23), time(0)) == [(LUNES, (1380, 1440))]
+
+        reservas = construir_datos_rango(horarios=[], reservas=[(LUNES, time(23, 30), time(0, 30))]).reservas
+        assert reservas == {LUNES: [(1410, 1440)], MARTES: [(0, 30)]}
+
+        # Lunes 22:00-24:00 y martes 00:00-02:00, slots de 60 min
+        datos = DatosRango(horarios={0: (1320, 1440), 1: (0, 120)}, reservas=reservas)
+        assert calcular_slots_rango(datos, LUNES, MARTES, 60) == [(LUNES, 1320, 1380), (MARTES, 60, 120)]
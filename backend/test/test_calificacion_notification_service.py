@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el anti-spam de las notificaciones de calificación
+"""
+import asyncio
+
+import pytest
+
+from app.core.redis_config import InMemoryLRUBackend
+from app.core.shared_store import SharedStateStore
+from app.services import calificacion_notification_service as modulo
+from app.services.calificacion_notification_service import CalificacionNotificationService
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = SharedStateStore(InMemoryLRUBackend(max_entries=100), namespace="test")
+    monkeypatch.setattr(modulo, "shared_store", store)
+    return store
+
+
+def enviar(servicio, clave="reserva:1:proveedor"):
+    return servicio._send_notification("p@test.com", "Asunto", "<p>html</p>", "texto", clave)
+
+
+class TestAntiSpam:
+    """Una notificación se envía una sola vez aunque la disparen varios workers"""
+
+    @pytest.mark.asyncio
+    async def test_envios_concurrentes_mandan_un_solo_email(self, store, monkeypatch):
+        """La marca se reclama con add antes de enviar: solo una de las llamadas envía"""
+        enviados = []
+        monkeypatch.setattr(modulo.gmail_smtp_service, "send_email_with_fallback", lambda **kwargs: enviados.append(kwargs) or True)
+        servicio = CalificacionNotificationService()
+
+        resultados = await asyncio.gather(*(enviar(servicio) for _ in range(5)))
+
+        assert sorted(resultados) == [False, False, False, False, True]
+        assert len(enviados) == 1
+
+    @pytest.mark.asyncio
+    async def test_envio_fallido_libera_la_marca(self, store, monkeypatch):
+        """Si el envío falla la notificación puede reintentarse"""
+        respuestas = iter([False, True])
+        monkeypatch.setattr(modulo.gmail_smtp_service, "send_email_with_fallback", lambda **kwargs: next(respuestas))
+        servicio = CalificacionNotificationService()
+
+        assert await enviar(servicio) is False
+        assert await enviar(servicio) is True
+        assert await enviar(servicio) is False
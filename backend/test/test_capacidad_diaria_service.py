@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el resumen de capacidad diaria por servicio
+"""
+from datetime import date, time
+
+from app.services.capacidad_diaria_service import mascara_horas, resumir_slots
+
+LUNES = date(2030, 1, 7)
+MARTES = date(2030, 1, 8)
+
+
+class TestCapacidadDiaria:
+    """Máscara de horas y filas por día"""
+
+    def test_mascara_de_la_manana(self):
+        """De 6 a 12 se marcan los bits 6..11"""
+        assert mascara_horas(6, 12) == 0b111111 << 6
+        assert mascara_horas(12, 12) == 0
+
+    def test_resumen_por_dia(self):
+        """Cada día resume cantidad de slots, horas con slots libres y primer slot"""
+        slots = [(LUNES, 540, 600), (LUNES, 630, 690), (MARTES, 840, 900)]
+
+        filas = resumir_slots(5, 1, slots)
+
+        assert filas == [
+            (5, LUNES, 1, 2, (1 << 9) | (1 << 10), time(9)),
+            (5, MARTES, 1, 1, 1 << 14, time(14)),
+        ]
+        # Un slot de la mañana coincide con la búsqueda de 6 a 12
+        assert filas[0][4] & mascara_horas(6, 12)
+        assert not filas[1][4] & mascara_horas(6, 12)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la detección del modo de conexión (pooler) a Postgres
+"""
+from app.supabase.db.db_supabase import (
+    POOLER_MODE_DIRECT,
+    POOLER_MODE_SESSION,
+    POOLER_MODE_TRANSACTION,
+    resolve_pooler_mode,
+    statement_cache_size_for,
+)
+
+
+class TestResolvePoolerMode:
+    """Modo de conexión y caché de prepared statements"""
+
+    def test_puerto_6543_es_modo_transaccion(self):
+        """El pooler en modo transacción deshabilita los prepared statements"""
+        url = "postgresql://u:p@aws-0-sa-east-1.pooler.supabase.com:6543/postgres"
+
+        mode = resolve_pooler_mode(url, "auto")
+
+        assert mode == POOLER_MODE_TRANSACTION
+        assert statement_cache_size_for(mode) == 0
+
+    def test_pooler_en_modo_sesion(self):
+        """El host del pooler en el puerto 5432 es modo sesión (sin caché: no es direct explícito)"""
+        url = "postgresql://u:p@aws-0-sa-east-1.pooler.supabase.com:5432/postgres"
+
+        mode = resolve_pooler_mode(url, "auto")
+
+        assert mode == POOLER_MODE_SESSION
+        assert statement_cache_size_for(mode) == 0
+
+    def test_otro_host_se_trata_como_modo_transaccion(self):
+        """Cualquier otro host puede ser un PgBouncer en modo transacción: auto no detecta direct"""
+        for url in ("postgresql://u:p@db.abc.supabase.co:5432/postgres", "postgresql://u:p@pgbouncer.interno:5432/db", "no es una url"):
+            mode = resolve_pooler_mode(url, "auto")
+
+            assert mode == POOLER_MODE_TRANSACTION
+            assert statement_cache_size_for(mode) == 0
+
+    def test_conexion_directa_explicita_activa_cache(self):
+        """Solo DB_POOLER_MODE=direct usa la caché de sentencias"""
+        mode = resolve_pooler_mode("postgresql://u:p@db.abc.supabase.co:5432/postgres", "direct")
+
+        assert mode == POOLER_MODE_DIRECT
+        assert statement_cache_size_for(mode) > 0
+
+    def test_modo_explicito_e_invalido(self):
+        """Un modo explícito se respeta y uno inválido cae en la detección automática"""
+        url = "postgresql://u:p@localhost:6543/postgres"
+
+        assert resolve_pooler_mode(url, "session") == POOLER_MODE_SESSION
+        assert resolve_pooler_mode(url, "otro") == POOLER_MODE_TRANSACTION
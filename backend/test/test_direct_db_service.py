@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la gestión del pool de DirectDBService (engine simulado)
+"""
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import exc as sa_exc
+
+from app.services.direct_db_service import DirectDBService, PoolExhaustedError
+
+
+class FakeConnection:
+    """Conexión asyncpg mínima"""
+
+    def is_closed(self):
+        return False
+
+    def is_in_transaction(self):
+        return False
+
+
+class FakePooledConnection:
+    """Conexión proxy del pool de SQLAlchemy"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.driver_connection = FakeConnection()
+
+    def close(self):
+        self.pool.checked_out -= 1
+        self.pool.returned.append(self.driver_connection)
+
+
+class FakePool:
+    def __init__(self, max_size: int = 2, fail_connect: bool = False):
+        self.max_size = max_size
+        self.fail_connect = fail_connect
+        self.checked_out = 0
+        self.returned = []
+
+    def checkedin(self):
+        return 0
+
+    def checkedout(self):
+        return self.checked_out
+
+
+class FakeEngine:
+    """Engine asíncrono con la interfaz usada por DirectDBService"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.next_pool = FakePool()
+        self.disposed = 0
+
+    async def raw_connection(self):
+        if self.pool.fail_connect:
+            raise sa_exc.OperationalError("connect", {}, OSError("conexión rechazada"))
+        if self.pool.checked_out >= self.pool.max_size:
+            raise sa_exc.TimeoutError("QueuePool limit reached")
+        self.pool.checked_out += 1
+        return FakePooledConnection(self.pool)
+
+    async def dispose(self):
+        self.disposed += 1
+        self.pool = self.next_pool
+
+
+@pytest.fixture
+def engine():
+    fake = FakeEngine(FakePool())
+    with patch("app.services.direct_db_service.db_supabase.async_engine", fake):
+        yield fake
+
+
+class TestDirectDBServicePool:
+    """Adquisición, métricas y reemplazo del pool compartido"""
+
+    @pytest.mark.asyncio
+    async def test_context_manager_devuelve_la_conexion(self, engine):
+        """connection() devuelve la conexión al pool y registra la espera"""
+        service = DirectDBService()
+
+        async with service.connection():
+            assert service.get_pool_metrics()["in_use"] == 1
+
+        metrics = service.get_pool_metrics()
+        assert metrics["in_use"] == 0
+        assert metrics["acquire_count"] == 1
+        assert len(engine.pool.returned) == 1
+
+    @pytest.mark.asyncio
+    async def test_saturacion_no_reemplaza_el_pool(self, engine):
+        """El timeout del pool se reporta como saturación sin recrearlo"""
+        service = DirectDBService()
+
+        await service.get_connection()
+        await service.get_connection()
+        with pytest.raises(PoolExhaustedError):
+            await service.get_connection()
+
+        assert engine.disposed == 0
+        assert service.get_pool_metrics()["acquire_timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_reemplazo_gradual_del_pool(self, engine):
+        """Un pool que no conecta se reemplaza y la conexión prestada vuelve a su pool de origen"""
+        service = DirectDBService()
+        old_pool = engine.pool
+
+        conn_old = await service.get_connection()
+        old_pool.fail_connect = True
+        conn_new = await service.get_connection()
+        await service.release_connection(conn_old)
+        await service.release_connection(conn_new)
+
+        assert engine.pool is engine.next_pool
+        assert old_pool.returned == [conn_old]
+        assert engine.pool.returned == [conn_new]
+        assert service.get_pool_metrics()["pool_replacements"] == 1
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Pruebas del endpoint GET /disponibilidades/servicio/{id}/excepciones
+"""
+from datetime import date, time
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.routers import disponibilidad
+
+FECHA = date(2030, 1, 7)
+SERVICIO = {"id_servicio": 5, "id_perfil": 9, "estado": True, "nombre": "Corte", "duracion_minutos": 30}
+
+
+@pytest.fixture
+def conn(fake_db):
+    """Servicio 5 del proveedor 9 con dos excepciones de horario"""
+    fake_db.responder("FROM servicio", SERVICIO)
+    fake_db.responder("FROM excepciones_horario", [
+        {"fecha": date(2030, 1, 9), "tipo": "horario_especial", "hora_inicio": time(9, 0), "hora_fin": time(12, 30)},
+        {"fecha": FECHA, "tipo": "cerrado", "hora_inicio": None, "hora_fin": None},
+    ])
+    return fake_db
+
+
+class TestExcepcionesServicio:
+    @pytest.mark.asyncio
+    async def test_lista_excepciones_ordenadas_y_formateadas(self, conn):
+        excepciones = await disponibilidad.obtener_excepciones_servicio(5, FECHA, date(2030, 1, 31))
+
+        (_, _, args), = [llamada for llamada in conn.llamadas if llamada[0] == "fetch"]
+        assert args == (9, FECHA, date(2030, 1, 31))
+        assert excepciones == [
+            {"fecha": "2030-01-07", "tipo": "cerrado", "hora_inicio": None, "hora_fin": None, "motivo": None},
+            {"fecha": "2030-01-09", "tipo": "horario_especial", "hora_inicio": "09:00", "hora_fin": "12:30", "motivo": None},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_servicio_inexistente(self, conn):
+        conn.responder("FROM servicio", None)
+
+        with pytest.raises(HTTPException) as exc:
+            await disponibilidad.obtener_excepciones_servicio(5, FECHA, FECHA)
+        assert exc.value.status_code == 404
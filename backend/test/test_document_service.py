@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la ingesta de documentos de verificación: subidas en paralelo, filas en lote
+y compensación (S3 simulado con moto)
+"""
+import threading
+import time
+from tempfile import SpooledTemporaryFile
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from moto import mock_aws
+from starlette.datastructures import Headers
+
+from app.idrive.idrive_service import IDriveService
+from app.services.providers import document_service as modulo
+from app.services.providers.document_service import DocumentService
+from app.services.storage_health import storage_health
+from app.services.storage_service import storage_service
+
+BUCKET = "documentos"
+TIPOS = {"Constancia de RUC": 1, "Cédula de identidad": 2, "Patente comercial": 3}
+DOCUMENTO_GRANDE = b"%PDF" + b"x" * (12 * 1024 * 1024)
+
+
+def upload_file(nombre, contenido):
+    """UploadFile como lo arma Starlette: contenido en un SpooledTemporaryFile"""
+    archivo = SpooledTemporaryFile(max_size=1024 * 1024)
+    archivo.write(contenido)
+    archivo.seek(0)
+    return UploadFile(archivo, filename=nombre, headers=Headers({"content-type": "application/pdf"}))
+
+
+@pytest.fixture
+def conn(fake_conn):
+    """Resuelve los tipos de documento conocidos; sin documentos previos"""
+    return fake_conn.responder(
+        "tipo_documento = ANY",
+        lambda nombres: [{"tipo_documento": n, "id_tip_documento": TIPOS[n]} for n in nombres if n in TIPOS]
+    )
+
+
+def executemany(conn):
+    return [(query, args[0]) for metodo, query, args in conn.llamadas if metodo == "executemany"]
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    """storage_service subiendo a un bucket moto"""
+    storage_health.reset()
+    with mock_aws():
+        servicio = IDriveService()
+        servicio.access_key = "test"
+        servicio.secret_key = "test"
+        servicio.bucket_name = BUCKET
+        servicio.endpoint_url = "https://s3.amazonaws.com"
+        servicio._initialize_client()
+        servicio.client.create_bucket(Bucket=BUCKET)
+        monkeypatch.setattr(storage_service, "idrive_service", servicio)
+        yield servicio.client
+    storage_health.reset()
+
+
+def objetos(client):
+    return [obj["Key"] for obj in client.list_objects_v2(Bucket=BUCKET).get("Contents", [])]
+
+
+def procesar(conn, archivos, nombres, id_perfil=None):
+    return DocumentService.process_documents(conn, archivos, nombres, "Empresa SA", 10, id_perfil, "user-1")
+
+
+class TestProcessDocuments:
+    @pytest.mark.asyncio
+    async def test_sube_en_paralelo_y_escribe_las_filas_en_un_executemany(self, bucket, conn, monkeypatch):
+        monkeypatch.setattr(modulo, "DOCUMENT_UPLOAD_CONCURRENCY", 2)
+        activos, maximo = [0], [0]
+        lock = threading.Lock()
+        subir = storage_service.upload_fileobj_with_fallback
+
+        def subir_contando(*args, **kwargs):
+            with lock:
+                activos[0] += 1
+                maximo[0] = max(maximo[0], activos[0])
+            time.sleep(0.05)
+            try:
+                return subir(*args, **kwargs)
+            finally:
+                with lock:
+                    activos[0] -= 1
+
+        monkeypatch.setattr(storage_service, "upload_fileobj_with_fallback", subir_contando)
+        archivos = [
+            upload_file("ruc.pdf", DOCUMENTO_GRANDE),
+            upload_file("cedula.pdf", b"%PDF cedula"),
+            upload_file("patente.pdf", b"%PDF patente"),
+        ]
+
+        await procesar(conn, archivos, list(TIPOS))
+
+        assert maximo[0] == 2
+        assert len(conn.consultas("fetch")) == 1
+        (_, filas), = executemany(conn)
+        assert [fila[1] for fila in filas] == [1, 2, 3]
+        assert all(fila[2].startswith("https://s3.amazonaws.com/documentos/Empresa SA/") for fila in filas)
+
+        # El documento grande se subió con multipart (ETag "<md5>-<partes>")
+        clave_ruc = filas[0][2].split(f"/{BUCKET}/", 1)[1]
+        head = bucket.head_object(Bucket=BUCKET, Key=clave_ruc)
+        assert head["ETag"].strip('"').endswith("-2")
+        assert head["ContentLength"] == len(DOCUMENTO_GRANDE)
+        assert head["ContentType"] == "application/pdf"
+
+    @pytest.mark.asyncio
+    async def test_documento_existente_se_actualiza(self, bucket, conn):
+        conn.responder("DISTINCT ON", [{"id_tip_documento": 2, "id_documento": 77}])
+
+        await procesar(conn, [upload_file("ruc.pdf", b"%PDF"), upload_file("cedula.pdf", b"%PDF")],
+                 ["Constancia de RUC", "Cédula de identidad"], id_perfil=5)
+
+        (update, filas_update), (insert, filas_insert) = executemany(conn)
+        assert update.strip().startswith("UPDATE documento")
+        assert filas_update[0][4] == 77
+        assert insert.strip().startswith("INSERT INTO documento")
+        assert [fila[1] for fila in filas_insert] == [1]
+
+
+class TestCompensacion:
+    @pytest.mark.asyncio
+    async def test_subida_fallida_elimina_las_demas_y_no_escribe_filas(self, bucket, conn, monkeypatch):
+        subir = storage_service.upload_fileobj_with_fallback
+
+        def subir_o_fallar(fileobj, filename, *args, **kwargs):
+            if filename.endswith("cedula.pdf"):
+                return False, "Error en fallback local: disco lleno", "", "none"
+            return subir(fileobj, filename, *args, **kwargs)
+
+        monkeypatch.setattr(storage_service, "upload_fileobj_with_fallback", subir_o_fallar)
+
+        with pytest.raises(HTTPException) as exc:
+            await procesar(conn, [upload_file("ruc.pdf", b"%PDF"), upload_file("cedula.pdf", b"%PDF")],
+                     ["Constancia de RUC", "Cédula de identidad"])
+
+        assert exc.value.status_code == 500
+        assert "cedula.pdf" in exc.value.detail
+        assert executemany(conn) == []
+        assert objetos(bucket) == []
+
+    @pytest.mark.asyncio
+    async def test_error_de_bd_elimina_los_archivos_subidos(self, bucket, conn):
+        conn.responder("INSERT INTO documento", RuntimeError("conexión perdida"))
+
+        with pytest.raises(RuntimeError):
+            await procesar(conn, [upload_file("ruc.pdf", b"%PDF"), upload_file("patente.pdf", b"%PDF")],
+                     ["Constancia de RUC", "Patente comercial"])
+
+        assert objetos(bucket) == []
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la entrega de documentos en streaming desde S3 y disco local
+"""
+import io
+from datetime import datetime
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from dateutil.tz import tzutc
+from fastapi import HTTPException
+
+from app.services import document_serving
+from app.services.document_serving import content_disposition, serve_local_file, stream_s3_object
+
+CONTENIDO = bytes(range(256)) * 4096  # 1 MiB
+ETAG = '"abc123"'
+
+
+class FakeS3Client:
+    """get_object mínimo: aplica Range bytes=a-b y registra los parámetros recibidos"""
+
+    def __init__(self, error_status=None):
+        self.error_status = error_status
+        self.calls = []
+
+    def get_object(self, **params):
+        self.calls.append(params)
+        if self.error_status:
+            raise ClientError(
+                {"Error": {"Code": str(self.error_status)}, "ResponseMetadata": {"HTTPStatusCode": self.error_status}},
+                "GetObject"
+            )
+        data, extra = CONTENIDO, {}
+        if "Range" in params:
+            inicio, fin = (int(x) for x in params["Range"].split("=")[1].split("-"))
+            data = CONTENIDO[inicio:fin + 1]
+            extra["ContentRange"] = f"bytes {inicio}-{fin}/{len(CONTENIDO)}"
+        return {
+            "Body": StreamingBody(io.BytesIO(data), len(data)),
+            "ContentLength": len(data),
+            "ContentType": "application/pdf",
+            "ETag": ETAG,
+            # Igual que boto3: tzinfo de dateutil, no datetime.timezone.utc
+            "LastModified": datetime(2030, 1, 1, tzinfo=tzutc()),
+            **extra,
+        }
+
+
+async def leer(response):
+    chunks = [chunk async for chunk in response.body_iterator]
+    return chunks
+
+
+class TestStreamS3Object:
+    @pytest.mark.asyncio
+    async def test_envia_el_objeto_por_bloques_con_etag(self):
+        """El cuerpo llega completo en varios bloques y se copian ETag y Last-Modified"""
+        response = await stream_s3_object(FakeS3Client(), "docs", "a.pdf", "a.pdf")
+        chunks = await leer(response)
+
+        assert response.status_code == 200
+        assert b"".join(chunks) == CONTENIDO
+        assert len(chunks) == len(CONTENIDO) // document_serving.CHUNK_SIZE
+        assert response.headers["etag"] == ETAG
+        assert response.headers["last-modified"] == "Tue, 01 Jan 2030 00:00:00 GMT"
+        assert response.headers["accept-ranges"] == "bytes"
+
+    @pytest.mark.asyncio
+    async def test_range_devuelve_206(self):
+        cliente = FakeS3Client()
+
+        response = await stream_s3_object(cliente, "docs", "a.pdf", "a.pdf", range_header="bytes=100-199")
+        chunks = await leer(response)
+
+        assert cliente.calls[0]["Range"] == "bytes=100-199"
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENIDO)}"
+        assert response.headers["content-length"] == "100"
+        assert b"".join(chunks) == CONTENIDO[100:200]
+
+    @pytest.mark.asyncio
+    async def test_errores_condicionales_de_s3(self):
+        """304 de S3 se devuelve tal cual y 416 se traduce a HTTPException"""
+        response = await stream_s3_object(FakeS3Client(error_status=304), "docs", "a.pdf", "a.pdf", if_none_match=ETAG)
+        assert response.status_code == 304
+
+        with pytest.raises(HTTPException) as exc:
+            await stream_s3_object(FakeS3Client(error_status=416), "docs", "a.pdf", "a.pdf", range_header="bytes=9999999-")
+        assert exc.value.status_code == 416
+
+
+class TestArchivoLocal:
+    def test_file_response_y_nombre_con_acentos(self, tmp_path):
+        archivo = tmp_path / "doc.pdf"
+        archivo.write_bytes(b"%PDF")
+
+        response = serve_local_file(archivo, "Cédula de identidad.pdf")
+
+        assert response.path == archivo
+        assert response.media_type == "application/pdf"
+        assert content_disposition("Cédula de identidad.pdf").startswith("inline; filename*=utf-8''C%C3%A9dula")
+
+        with pytest.raises(HTTPException) as exc:
+            serve_local_file(tmp_path / "no-existe.pdf", "x.pdf")
+        assert exc.value.status_code == 404
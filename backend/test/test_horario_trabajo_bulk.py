@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la configuración completa del horario (inserciones masivas en una transacción)
+"""
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.routers import horario_trabajo
+from app.schemas.horario_trabajo import ConfiguracionHorarioCompletaIn
+
+
+USUARIO = SimpleNamespace(id="user-1")
+PASOS = {
+    horario_trabajo.DELETE_HORARIOS_PROVEEDOR_QUERY: "delete",
+    horario_trabajo.EXCEPCIONES_EN_CONFLICTO_QUERY: "conflictos",
+    horario_trabajo.INSERT_HORARIOS_BULK_QUERY: "horarios",
+    horario_trabajo.INSERT_EXCEPCIONES_BULK_QUERY: "excepciones",
+}
+
+
+def pasos(conn):
+    return [PASOS[query] for query in conn.consultas()]
+
+
+@pytest.fixture
+def conn(fake_db, monkeypatch):
+    """Proveedor 7 sin fechas en conflicto; las inserciones devuelven una fila por elemento"""
+    async def perfil(_user_id):
+        return 7
+
+    async def cambio(_proveedor_id):
+        return None
+
+    monkeypatch.setattr(horario_trabajo, "get_provider_profile_direct", perfil)
+    monkeypatch.setattr(horario_trabajo, "registrar_cambio_disponibilidad", cambio)
+    fake_db.responder(
+        horario_trabajo.INSERT_HORARIOS_BULK_QUERY,
+        lambda perfil_id, dias, *args: [{"id_horario": i, "dia_semana": dia} for i, dia in enumerate(dias)]
+    )
+    fake_db.responder(
+        horario_trabajo.INSERT_EXCEPCIONES_BULK_QUERY,
+        lambda perfil_id, fechas, *args: [{"id_excepcion": i, "fecha": fecha} for i, fecha in enumerate(fechas)]
+    )
+    return fake_db
+
+
+@pytest.fixture
+def configuracion():
+    return ConfiguracionHorarioCompletaIn(
+        horarios=[
+            {"dia_semana": dia, "hora_inicio": time(8), "hora_fin": time(17)} for dia in range(5)
+        ],
+        excepciones=[
+            {"fecha": date(2030, 1, 1), "tipo": "cerrado"},
+            {"fecha": date(2030, 12, 25), "tipo": "cerrado"},
+        ],
+    )
+
+
+class TestConfiguracionCompleta:
+    """Sentencias fijas por lote y rechazo de conflictos"""
+
+    @pytest.mark.asyncio
+    async def test_una_sentencia_por_tabla(self, conn, configuracion):
+        """Cinco horarios y dos excepciones se insertan con una sentencia por tabla"""
+        result = await horario_trabajo.configurar_horario_completo(configuracion, current_user=USUARIO)
+
+        assert pasos(conn) == ["delete", "conflictos", "horarios", "excepciones"]
+        assert conn.transacciones == ["commit"]
+        assert len(result["horarios"]) == 5 and len(result["excepciones"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_excepcion_en_conflicto_revierte_todo(self, conn, configuracion):
+        """Una fecha ya ocupada responde 400 y la transacción se revierte sin insertar"""
+        conn.responder(horario_trabajo.EXCEPCIONES_EN_CONFLICTO_QUERY, [{"fecha": date(2030, 12, 25)}])
+
+        with pytest.raises(HTTPException) as exc:
+            await horario_trabajo.configurar_horario_completo(configuracion, current_user=USUARIO)
+
+        assert exc.value.status_code == 400
+        assert "2030-12-25" in exc.value.detail
+        assert conn.transacciones == ["rollback"]
+        assert "horarios" not in pasos(conn)
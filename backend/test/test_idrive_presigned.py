@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Pruebas de URLs prefirmadas de iDrive y del redirect/proxy de documentos (S3 simulado con moto)
+"""
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+from moto import mock_aws
+
+from app.api.v1.routers.users.auth_user_admin import admin_router
+from app.idrive.idrive_service import IDriveService
+
+BUCKET = "documentos"
+ENDPOINT = "https://s3.amazonaws.com"
+KEY = "Empresa SA/Constancia de RUC/ruc.pdf"
+URL_ARCHIVO = f"{ENDPOINT}/{BUCKET}/Empresa%20SA/Constancia%20de%20RUC/ruc.pdf"
+CONTENIDO = b"%PDF-1.4 documento de prueba" * 1000
+
+
+@pytest.fixture
+def s3_servicio(monkeypatch):
+    """IDriveService apuntando a un bucket moto con un documento cargado"""
+    with mock_aws():
+        servicio = IDriveService()
+        servicio.access_key = "test"
+        servicio.secret_key = "test"
+        servicio.bucket_name = BUCKET
+        servicio.endpoint_url = ENDPOINT
+        servicio._initialize_client()
+        client = servicio.client
+        client.create_bucket(Bucket=BUCKET)
+        client.put_object(Bucket=BUCKET, Key=KEY, Body=CONTENIDO)
+
+        monkeypatch.setattr(admin_router, "idrive_service", servicio)
+        monkeypatch.setattr(admin_router, "idrive_s3_client", client)
+        monkeypatch.setattr(admin_router, "IDRIVE_BUCKET_NAME", BUCKET)
+        yield servicio
+
+
+class TestPresignedUrl:
+    def test_url_firmada_se_reutiliza_hasta_cerca_del_vencimiento(self, s3_servicio):
+        url = s3_servicio.generate_presigned_url(KEY, "RUC_1.pdf", "application/pdf", expires_in=300)
+
+        query = parse_qs(urlparse(url).query)
+        assert query["X-Amz-Expires"] == ["300"]
+        assert query["response-content-type"] == ["application/pdf"]
+        assert s3_servicio.generate_presigned_url(KEY, "RUC_1.pdf", "application/pdf", expires_in=300) == url
+
+        # Con menos vida que el margen de renovación se vuelve a firmar en cada pedido
+        firmas = []
+        firmar = s3_servicio.client.generate_presigned_url
+        s3_servicio.client.generate_presigned_url = lambda *args, **kwargs: firmas.append(1) or firmar(*args, **kwargs)
+        s3_servicio.generate_presigned_url(KEY, "otro.pdf", expires_in=1)
+        s3_servicio.generate_presigned_url(KEY, "otro.pdf", expires_in=1)
+        s3_servicio.generate_presigned_url(KEY, "RUC_1.pdf", "application/pdf", expires_in=300)
+        assert len(firmas) == 2
+
+    def test_sin_cliente_no_hay_url(self):
+        servicio = IDriveService()
+        servicio.client = None
+        assert servicio.generate_presigned_url(KEY) is None
+
+
+class TestEntregaDocumento:
+    @pytest.mark.asyncio
+    async def test_modo_redirect_responde_302_a_la_url_prefirmada(self, s3_servicio):
+        response = await admin_router.serve_idrive_document(URL_ARCHIVO, "RUC_1.pdf", ".pdf", modo="redirect")
+
+        assert response.status_code == 302
+        assert response.headers["cache-control"] == "no-store"
+        location = urlparse(response.headers["location"])
+        assert location.path == f"/{BUCKET}/{KEY}".replace(" ", "%20")
+        assert "X-Amz-Signature" in parse_qs(location.query)
+        # La URL firmada descarga el documento sin pasar por la API
+        descarga = requests.get(response.headers["location"])
+        assert descarga.status_code == 200
+        assert descarga.content == CONTENIDO
+
+    @pytest.mark.asyncio
+    async def test_modo_proxy_y_fallback_sirven_el_archivo(self, s3_servicio):
+        """modo=proxy transmite desde S3; si no se puede firmar, redirect cae al proxy"""
+        async def descargar(modo):
+            response = await admin_router.serve_idrive_document(URL_ARCHIVO, "RUC_1.pdf", ".pdf", modo=modo)
+            return response, b"".join([chunk async for chunk in response.body_iterator])
+
+        response, body = await descargar("proxy")
+        assert response.status_code == 200
+        assert body == CONTENIDO
+
+        s3_servicio.generate_presigned_url = lambda *args, **kwargs: None
+        response, body = await descargar("redirect")
+        assert response.status_code == 200
+        assert body == CONTENIDO
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Pruebas del pipeline de imágenes: variantes WebP, EXIF y deduplicación por hash
+"""
+import io
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from app.services.image_pipeline import (
+    ImagePipeline,
+    ImagenInvalidaError,
+    procesar_imagen,
+    srcset_desde_variantes,
+    variantes_desde_url,
+)
+from app.services import supabase_storage_service as modulo
+from app.services.storage_health import storage_health
+from app.services.supabase_storage_service import SupabaseStorageService
+
+URL_PUBLICA = "https://proyecto.supabase.co/storage/v1/object/public/imagenes/"
+ORIENTACION_90_HORARIO = 6
+
+
+def jpeg(ancho, alto, exif=None):
+    imagen = Image.new("RGB", (ancho, alto), (200, 40, 40))
+    salida = io.BytesIO()
+    imagen.save(salida, format="JPEG", exif=exif or Image.Exif())
+    return salida.getvalue()
+
+
+class FakeBucketApi:
+    def __init__(self, archivos):
+        self.archivos = archivos
+
+    def list(self, prefijo):
+        return [{"name": ruta.rsplit("/", 1)[1]} for ruta in self.archivos if ruta.startswith(prefijo + "/")]
+
+    def upload(self, path, content, options):
+        self.archivos[path] = (content, options)
+        return {"Key": path}
+
+    def get_public_url(self, path):
+        return URL_PUBLICA + path
+
+    def remove(self, rutas):
+        return [self.archivos.pop(ruta) for ruta in rutas if ruta in self.archivos]
+
+
+class FakeStorage:
+    def __init__(self):
+        self.archivos = {}
+
+    def list_buckets(self):
+        return [SimpleNamespace(name="imagenes")]
+
+    def from_(self, bucket):
+        return FakeBucketApi(self.archivos)
+
+
+class SyncPipeline:
+    """Ejecuta procesar_imagen en el mismo proceso y cuenta las llamadas"""
+
+    def __init__(self):
+        self.llamadas = 0
+
+    async def procesar(self, file_content):
+        self.llamadas += 1
+        return procesar_imagen(file_content)
+
+
+class TestProcesarImagen:
+    def test_variantes_sin_agrandar_y_sin_exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = ORIENTACION_90_HORARIO
+        exif[0x010F] = "Camara de prueba"
+
+        variantes = procesar_imagen(jpeg(3000, 2000, exif))
+
+        assert sorted(variantes) == [160, 480, 1200]
+        grande = Image.open(io.BytesIO(variantes[1200]))
+        assert grande.format == "WEBP"
+        # La orientación EXIF se aplicó (vertical) y no quedan metadatos
+        assert grande.size == (1200, 1800)
+        assert not grande.getexif()
+        assert "icc_profile" not in grande.info
+
+        chica = procesar_imagen(jpeg(300, 100))
+        assert sorted(chica) == [160, 300]
+        assert Image.open(io.BytesIO(chica[300])).size == (300, 100)
+
+    def test_contenido_invalido(self):
+        with pytest.raises(ImagenInvalidaError):
+            procesar_imagen(b"<?php echo 'no soy una imagen'; ?>")
+
+    @pytest.mark.asyncio
+    async def test_pool_de_procesos(self):
+        pipeline = ImagePipeline(max_workers=1)
+        try:
+            variantes = await pipeline.procesar(jpeg(640, 480))
+        finally:
+            pipeline.close()
+        assert sorted(variantes) == [160, 480, 640]
+
+
+class TestVariantesDesdeUrl:
+    def test_mapa_y_srcset(self):
+        base = URL_PUBLICA + "servicios/" + "a" * 64
+        variantes = variantes_desde_url(f"{base}/700.webp")
+
+        assert variantes == {160: f"{base}/160.webp", 480: f"{base}/480.webp", 700: f"{base}/700.webp"}
+        assert srcset_desde_variantes(variantes) == f"{base}/160.webp 160w, {base}/480.webp 480w, {base}/700.webp 700w"
+        # Imágenes subidas antes del pipeline no tienen variantes
+        assert variantes_desde_url(URL_PUBLICA + "servicios/1b2c.png") is None
+        assert variantes_desde_url(None) is None
+
+
+class TestSubidaDeduplicada:
+    @pytest.mark.asyncio
+    async def test_mismo_contenido_no_se_procesa_dos_veces(self, monkeypatch):
+        storage_health.reset()
+        pipeline = SyncPipeline()
+        monkeypatch.setattr(modulo, "image_pipeline", pipeline)
+        servicio = SupabaseStorageService()
+        storage = FakeStorage()
+        servicio.supabase = SimpleNamespace(storage=storage)
+        contenido = jpeg(2000, 1500)
+
+        ok, url = await servicio.upload_service_image(contenido)
+        ok_repetida, url_repetida = await servicio.upload_service_image(contenido)
+
+        assert ok and ok_repetida
+        assert url == url_repetida
+        assert url.endswith("/1200.webp")
+        assert pipeline.llamadas == 1
+        assert len(storage.archivos) == 3
+        _, opciones = storage.archivos[url[len(URL_PUBLICA):]]
+        assert opciones["content-type"] == "image/webp"
+        assert opciones["upsert"] == "true"
+        storage_health.reset()
+
+
+class TestFotoDePerfil:
+    @pytest.mark.asyncio
+    async def test_borrar_la_foto_no_afecta_a_otro_usuario_con_la_misma_imagen(self, monkeypatch):
+        storage_health.reset()
+        monkeypatch.setattr(modulo, "image_pipeline", SyncPipeline())
+        servicio = SupabaseStorageService()
+        storage = FakeStorage()
+        servicio.supabase = SimpleNamespace(storage=storage)
+        contenido = jpeg(800, 800)
+
+        _, url_ana = await servicio.upload_profile_image(contenido, "usuario-ana")
+        _, url_beto = await servicio.upload_profile_image(contenido, "usuario-beto")
+
+        assert url_ana != url_beto
+        assert "/perfiles/usuario-ana/" in url_ana
+        assert len(storage.archivos) == 2 * len(variantes_desde_url(url_ana))
+
+        assert await servicio.delete_image(url_ana)
+        restantes = set(storage.archivos)
+        assert restantes == {url[len(URL_PUBLICA):] for url in variantes_desde_url(url_beto).values()}
+        storage_health.reset()
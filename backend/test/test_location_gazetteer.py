@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Pruebas del gazetteer de ubicaciones: resolución sin tildes, autocompletado,
+listados jerárquicos y recarga por versión sin consultar Postgres en cada request
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.routers.locations import locations
+from app.repositories.providers.provider_repository import ProviderRepository
+from app.services.location_gazetteer import (
+    BARRIOS_QUERY,
+    CIUDADES_QUERY,
+    DEPARTAMENTOS_QUERY,
+    TIPO_BARRIO,
+    TIPO_CIUDAD,
+    VERSION_QUERY,
+    LocationGazetteer,
+    normalizar_nombre,
+)
+
+CREADO = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(fake_db, monkeypatch):
+    """Tablas de ubicación en memoria servidas por la conexión simulada y un gazetteer nuevo"""
+    tablas = SimpleNamespace(
+        version=1,
+        departamentos=[
+            {"id_departamento": 1, "nombre": "Central", "created_at": CREADO},
+            {"id_departamento": 2, "nombre": "Capital", "created_at": CREADO},
+            {"id_departamento": 3, "nombre": "Itapúa", "created_at": CREADO},
+        ],
+        ciudades=[
+            {"id_ciudad": 10, "nombre": "Asunción", "id_departamento": 2, "created_at": CREADO},
+            {"id_ciudad": 11, "nombre": "San Lorenzo", "id_departamento": 1, "created_at": CREADO},
+            {"id_ciudad": 12, "nombre": "Ñemby", "id_departamento": 1, "created_at": CREADO},
+            {"id_ciudad": 13, "nombre": "Luque", "id_departamento": 1, "created_at": CREADO},
+            {"id_ciudad": 14, "nombre": "Encarnación", "id_departamento": 3, "created_at": CREADO},
+        ],
+        barrios=[
+            {"id_barrio": 100, "nombre": "Villa Morra", "id_ciudad": 10},
+            {"id_barrio": 101, "nombre": "Recoleta", "id_ciudad": 10},
+            {"id_barrio": 102, "nombre": "San Vicente", "id_ciudad": 10},
+            {"id_barrio": 103, "nombre": "Barrio Lorenzo", "id_ciudad": 11},
+        ],
+    )
+    fake_db.responder(VERSION_QUERY, lambda: tablas.version)
+    fake_db.responder(DEPARTAMENTOS_QUERY, lambda: tablas.departamentos)
+    fake_db.responder(CIUDADES_QUERY, lambda: tablas.ciudades)
+    fake_db.responder(BARRIOS_QUERY, lambda: tablas.barrios)
+
+    gazetteer = LocationGazetteer(check_interval=60)
+    monkeypatch.setattr(locations, "location_gazetteer", gazetteer)
+    monkeypatch.setattr("app.repositories.providers.provider_repository.location_gazetteer", gazetteer)
+    tablas.consultas = fake_db.consultas
+    tablas.gazetteer = gazetteer
+    return tablas
+
+
+class TestNormalizacion:
+    def test_sin_tildes_mayusculas_ni_espacios_de_mas(self):
+        assert normalizar_nombre("  ASUNCIÓN ") == "asuncion"
+        assert normalizar_nombre("Ñemby") == "nemby"
+        assert normalizar_nombre("San   Lorenzo") == "san lorenzo"
+
+
+class TestResolucion:
+    @pytest.mark.asyncio
+    async def test_find_location_data_sin_tildes_y_sin_consultas_extra(self, db):
+        direccion = {"departamento": "capital", "ciudad": "ASUNCION", "barrio": "villa  morra"}
+
+        departamento, ciudad, barrio = await ProviderRepository.find_location_data(direccion)
+
+        assert (departamento.id_departamento, ciudad.id_ciudad, barrio.id_barrio) == (2, 10, 100)
+        assert ciudad.nombre == "Asunción"
+        # Una sola carga: versión + tres tablas
+        assert db.consultas() == [VERSION_QUERY, DEPARTAMENTOS_QUERY, CIUDADES_QUERY, BARRIOS_QUERY]
+
+        for _ in range(20):
+            await ProviderRepository.find_location_data({"departamento": "Central", "ciudad": "Ñemby"})
+        assert len(db.consultas()) == 4
+
+    @pytest.mark.asyncio
+    async def test_ciudad_de_otro_departamento(self, db):
+        with pytest.raises(HTTPException) as exc:
+            await ProviderRepository.find_location_data({"departamento": "Central", "ciudad": "Asunción"})
+        assert exc.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_barrio_inexistente_es_opcional(self, db):
+        _, _, barrio = await ProviderRepository.find_location_data(
+            {"departamento": "Capital", "ciudad": "Asunción", "barrio": "No existe"}
+        )
+        assert barrio is None
+
+
+class TestListados:
+    @pytest.mark.asyncio
+    async def test_listados_ordenados_ignorando_tildes(self, db):
+        departamentos = await locations.get_departamentos()
+        ciudades = await locations.get_ciudades_por_departamento(1)
+        barrios = await locations.get_barrios_por_ciudad(10)
+
+        assert [d.nombre for d in departamentos] == ["Capital", "Central", "Itapúa"]
+        assert [c.nombre for c in ciudades] == ["Luque", "Ñemby", "San Lorenzo"]
+        assert [b.nombre for b in barrios] == ["Recoleta", "San Vicente", "Villa Morra"]
+        assert await locations.get_ciudades_por_departamento(99) == []
+        assert len(db.consultas()) == 4
+
+
+class TestAutocompletado:
+    @pytest.mark.asyncio
+    async def test_prefijo_de_cualquier_palabra(self, db):
+        sugerencias = await locations.buscar_ubicaciones(q="lore", limite=10, tipo=None)
+
+        # La ciudad primero (prioridad por tipo), luego el barrio con su jerarquía
+        assert [(s.tipo, s.nombre) for s in sugerencias] == [
+            (TIPO_CIUDAD, "San Lorenzo"),
+            (TIPO_BARRIO, "Barrio Lorenzo"),
+        ]
+        barrio = sugerencias[1]
+        assert (barrio.ciudad, barrio.departamento) == ("San Lorenzo", "Central")
+
+    @pytest.mark.asyncio
+    async def test_nombre_completo_antes_que_palabra_interna(self, db):
+        sugerencias = await db.gazetteer.autocompletar("san")
+        assert [s.nombre for s in sugerencias] == ["San Lorenzo", "San Vicente"]
+
+        assert [s.nombre for s in await db.gazetteer.autocompletar("ENCARNACIÓN")] == ["Encarnación"]
+        assert [s.nombre for s in await db.gazetteer.autocompletar("ca")] == ["Capital"]
+        assert await db.gazetteer.autocompletar("ca", tipo=TIPO_CIUDAD) == []
+        assert len(await db.gazetteer.autocompletar("", limite=5)) == 0
+        assert len(await db.gazetteer.autocompletar("a", limite=1)) == 1
+
+
+class TestRecarga:
+    @pytest.mark.asyncio
+    async def test_recarga_solo_si_cambia_la_version(self, db):
+        gazetteer = db.gazetteer
+
+        async def consultar_tras_intervalo():
+            gazetteer._verificado_en -= gazetteer.check_interval
+            resultado = await gazetteer.buscar_ciudad("Fernando de la Mora", 1)
+            # La verificación corre en segundo plano: la petición en curso usa el índice actual
+            await gazetteer._verificacion
+            return resultado
+
+        await gazetteer.get_departamentos()
+        assert await consultar_tras_intervalo() is None
+        assert db.consultas()[4:] == [VERSION_QUERY]
+
+        db.ciudades.append({"id_ciudad": 15, "nombre": "Fernando de la Mora", "id_departamento": 1, "created_at": CREADO})
+        db.version = 2
+        await consultar_tras_intervalo()
+        assert db.consultas()[5:] == [VERSION_QUERY, VERSION_QUERY, DEPARTAMENTOS_QUERY, CIUDADES_QUERY, BARRIOS_QUERY]
+
+        assert (await gazetteer.buscar_ciudad("fernando de la mora", 1)).id_ciudad == 15
+        metricas = gazetteer.get_metrics()
+        assert (metricas["cargas"], metricas["verificaciones"], metricas["version"]) == (2, 2, 2)
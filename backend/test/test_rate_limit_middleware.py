@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para RateLimitMiddleware
+"""
+import json
+import time
+
+import jwt
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit_middleware import RateLimitMiddleware, RateLimitPolicy, load_policies
+from app.services.rate_limit_service import LocalGCRABackend
+
+JWT_SECRET = "secreto-de-prueba"
+
+
+def firmar(sub, secret=JWT_SECRET, exp_en=3600):
+    """JWT con las claims que emite Supabase Auth"""
+    claims = {"sub": sub, "aud": "authenticated", "exp": int(time.time()) + exp_en}
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def build_client(policies, jwt_secret=JWT_SECRET):
+    app = FastAPI()
+
+    @app.get("/search")
+    async def search(q: str = ""):
+        return {"ok": True}
+
+    @app.get("/free")
+    async def free():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, policies=policies, backend=LocalGCRABackend(), enabled=True, jwt_secret=jwt_secret)
+    return TestClient(app)
+
+
+class TestRateLimitMiddleware:
+    """Pruebas del middleware de rate limiting por ruta"""
+
+    def test_429_con_retry_after_al_exceder(self):
+        """Al superar el límite responde 429 con Retry-After"""
+        client = build_client([RateLimitPolicy("search", "/search", 2, 60)])
+
+        responses = [client.get("/search") for _ in range(3)]
+
+        assert [r.status_code for r in responses] == [200, 200, 429]
+        assert responses[0].headers["x-ratelimit-remaining"] == "1"
+        assert int(responses[2].headers["retry-after"]) >= 1
+
+    def test_rutas_sin_politica_no_se_limitan(self):
+        """Las rutas que no coinciden pasan sin límite"""
+        client = build_client([RateLimitPolicy("search", "/search", 1, 60)])
+
+        assert all(client.get("/free").status_code == 200 for _ in range(5))
+
+    def test_politica_condicionada_a_query_param(self):
+        """Con query_param la política solo aplica si el parámetro está presente"""
+        client = build_client([RateLimitPolicy("search", "/search", 1, 60, query_param="q")])
+
+        assert client.get("/search").status_code == 200
+        assert client.get("/search").status_code == 200
+        assert client.get("/search?q=abc").status_code == 200
+        assert client.get("/search?q=abc").status_code == 429
+
+    def test_clave_por_ip(self):
+        """Cada IP (X-Forwarded-For) tiene su propio cupo"""
+        client = build_client([RateLimitPolicy("search", "/search", 1, 60)])
+
+        assert client.get("/search", headers={"X-Forwarded-For": "1.1.1.1"}).status_code == 200
+        assert client.get("/search", headers={"X-Forwarded-For": "2.2.2.2"}).status_code == 200
+        assert client.get("/search", headers={"X-Forwarded-For": "1.1.1.1"}).status_code == 429
+
+    def test_rotar_x_forwarded_for_no_evita_el_limite(self):
+        """Las entradas que escribe el cliente (a la izquierda del proxy) no cambian la clave"""
+        client = build_client([RateLimitPolicy("search", "/search", 1, 60)])
+
+        assert client.get("/search", headers={"X-Forwarded-For": "9.9.9.9, 1.1.1.1"}).status_code == 200
+        assert client.get("/search", headers={"X-Forwarded-For": "8.8.8.8, 1.1.1.1"}).status_code == 429
+
+    def test_clave_por_usuario(self):
+        """Con key_by=user cada usuario verificado tiene su propio cupo, aunque cambie de token"""
+        client = build_client([RateLimitPolicy("search", "/search", 1, 60, key_by="user")])
+
+        assert client.get("/search", headers={"Authorization": f"Bearer {firmar('a')}"}).status_code == 200
+        assert client.get("/search", headers={"Authorization": f"Bearer {firmar('b')}"}).status_code == 200
+        assert client.get("/search", headers={"Authorization": f"Bearer {firmar('a', exp_en=7200)}"}).status_code == 429
+
+    def test_tokens_no_verificables_cuentan_por_ip(self):
+        """Tokens inventados, con otra firma o vencidos no obtienen un cupo nuevo"""
+        client = build_client([RateLimitPolicy("search", "/search", 1, 60, key_by="user")])
+
+        assert client.get("/search", headers={"Authorization": "Bearer a"}).status_code == 200
+        assert client.get("/search", headers={"Authorization": "Bearer b"}).status_code == 429
+        assert client.get("/search", headers={"Authorization": f"Bearer {firmar('c', secret='otro')}"}).status_code == 429
+        assert client.get("/search", headers={"Authorization": f"Bearer {firmar('d', exp_en=-60)}"}).status_code == 429
+
+    def test_sin_secreto_configurado_cuenta_por_ip(self):
+        """Sin SUPABASE_JWT_SECRET no se puede verificar el token y se usa la IP"""
+        client = build_client([RateLimitPolicy("search", "/search", 1, 60, key_by="user")], jwt_secret=None)
+
+        assert client.get("/search", headers={"Authorization": f"Bearer {firmar('a')}"}).status_code == 200
+        assert client.get("/search", headers={"Authorization": f"Bearer {firmar('b')}"}).status_code == 429
+
+
+class TestLoadPolicies:
+    """Configuración de políticas desde settings"""
+
+    def test_override_por_nombre(self):
+        """Una política con el mismo nombre reemplaza a la por defecto"""
+        raw = json.dumps([{"name": "auth_signin", "path": "/api/v1/auth/signin", "limit": 99, "period": 60, "methods": ["post"]}])
+
+        policies = {p.name: p for p in load_policies(raw)}
+
+        assert policies["auth_signin"].limit == 99
+        assert policies["auth_signin"].methods == frozenset({"POST"})
+        assert "weaviate_search_public" in policies
+
+    def test_json_invalido_usa_defaults(self):
+        """Un JSON inválido no rompe el arranque"""
+        assert {p.name for p in load_policies("no-json")} == {p.name for p in load_policies(None)}
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el rate limiter GCRA y EmailRateLimitService
+"""
+from unittest.mock import patch
+
+import pytest
+
+from app.services.rate_limit_service import EmailRateLimitService, GCRARateLimiter, LocalGCRABackend, resolve_client_ip
+
+
+class FakeClock:
+    """Reloj controlable para time.monotonic"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch("app.services.rate_limit_service.time.monotonic", fake):
+        yield fake
+
+
+class TestGCRARateLimiter:
+    """Pruebas del algoritmo GCRA sobre el backend local"""
+
+    @pytest.mark.asyncio
+    async def test_permite_rafaga_hasta_el_limite(self, clock):
+        """Se permiten `limit` eventos seguidos y el siguiente se rechaza"""
+        limiter = GCRARateLimiter("t", limit=3, period=60, backend=LocalGCRABackend())
+
+        results = [await limiter.hit("k") for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert [r.remaining for r in results[:3]] == [2, 1, 0]
+        assert results[3].retry_after == pytest.approx(20)
+
+    @pytest.mark.asyncio
+    async def test_recupera_capacidad_con_el_tiempo(self, clock):
+        """Tras un intervalo de emisión se libera un nuevo evento"""
+        limiter = GCRARateLimiter("t", limit=3, period=60, backend=LocalGCRABackend())
+        for _ in range(3):
+            await limiter.hit("k")
+
+        clock.now += 20
+
+        assert (await limiter.hit("k")).allowed is True
+        assert (await limiter.hit("k")).allowed is False
+
+    @pytest.mark.asyncio
+    async def test_peek_no_consume(self, clock):
+        """peek no modifica el estado"""
+        limiter = GCRARateLimiter("t", limit=1, period=60, backend=LocalGCRABackend())
+
+        assert (await limiter.peek("k")).allowed is True
+        assert (await limiter.hit("k")).allowed is True
+        assert (await limiter.peek("k")).allowed is False
+
+    @pytest.mark.asyncio
+    async def test_claves_independientes(self, clock):
+        """Cada clave tiene su propio cubo"""
+        limiter = GCRARateLimiter("t", limit=1, period=60, backend=LocalGCRABackend())
+
+        assert (await limiter.hit("a")).allowed is True
+        assert (await limiter.hit("b")).allowed is True
+
+
+class TestLocalGCRABackend:
+    """El backend local se mantiene acotado"""
+
+    @pytest.mark.asyncio
+    async def test_desalojo_global_de_claves_recuperadas(self, clock):
+        """El barrido periódico elimina claves cuyo cubo ya se llenó"""
+        backend = LocalGCRABackend(sweep_interval=10)
+        limiter = GCRARateLimiter("t", limit=2, period=4, backend=backend)
+        for i in range(100):
+            await limiter.hit(f"email-{i}")
+        assert len(backend) == 100
+
+        clock.now += 11
+        await limiter.hit("nuevo")
+
+        assert len(backend) == 1
+
+    @pytest.mark.asyncio
+    async def test_respeta_max_keys(self, clock):
+        """Nunca se superan max_keys entradas vivas"""
+        backend = LocalGCRABackend(max_keys=10)
+        limiter = GCRARateLimiter("t", limit=1, period=3600, backend=backend)
+        for i in range(50):
+            await limiter.hit(f"ip-{i}")
+
+        assert len(backend) <= 11
+
+
+class TestEmailRateLimitService:
+    """Límites combinados por email e IP"""
+
+    @pytest.fixture
+    def service(self, clock):
+        with patch("app.services.rate_limit_service.build_gcra_backend", LocalGCRABackend):
+            yield EmailRateLimitService(max_attempts=2, rate_limit_window=60, max_attempts_per_ip=3)
+
+    @pytest.mark.asyncio
+    async def test_limite_por_email(self, service):
+        """El tercer intento del mismo email se rechaza"""
+        results = [await service.check_and_record("a@b.com", "1.1.1.1") for _ in range(3)]
+
+        assert [r.allowed for r in results] == [True, True, False]
+        assert await service.get_remaining_attempts("a@b.com") == 0
+        assert await service.get_next_attempt_time("a@b.com") is not None
+
+    @pytest.mark.asyncio
+    async def test_limite_por_ip_entre_emails(self, service):
+        """Una IP no puede rotar emails para evadir el límite"""
+        results = [await service.check_and_record(f"u{i}@b.com", "1.1.1.1") for i in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+
+
+class TestResolveClientIp:
+    """IP del cliente a partir de X-Forwarded-For y los proxies de confianza"""
+
+    def test_entradas_escritas_por_el_cliente_se_ignoran(self):
+        """Con un proxy solo cuenta la última entrada: rotar el header no cambia la IP"""
+        assert resolve_client_ip("9.9.9.9, 1.1.1.1", "10.0.0.1", trusted_hops=1) == "1.1.1.1"
+        assert resolve_client_ip("8.8.8.8, 1.1.1.1", "10.0.0.1", trusted_hops=1) == "1.1.1.1"
+        assert resolve_client_ip("7.7.7.7, 1.1.1.1, 10.0.0.2", "10.0.0.1", trusted_hops=2) == "1.1.1.1"
+
+    def test_sin_proxy_usa_la_conexion(self):
+        """Sin proxies de confianza, sin header o con menos entradas de las esperadas se usa la conexión"""
+        assert resolve_client_ip("9.9.9.9", "203.0.113.5", trusted_hops=0) == "203.0.113.5"
+        assert resolve_client_ip(None, "203.0.113.5", trusted_hops=1) == "203.0.113.5"
+        assert resolve_client_ip("1.1.1.1", "10.0.0.1", trusted_hops=2) == "10.0.0.1"
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el subsistema de cache (backend en memoria)
+"""
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from app.core.redis_config import CacheBackend, CacheService, InMemoryLRUBackend, cache_key, cached
+from app.schemas.auth_user import SupabaseUser
+
+
+class TestCacheBackend:
+    """La interfaz es abstracta: un backend incompleto falla al instanciarse, no en la primera llamada"""
+
+    def test_backend_incompleto_no_se_instancia(self):
+        class SoloGet(CacheBackend):
+            async def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            CacheBackend()
+        with pytest.raises(TypeError):
+            SoloGet()
+
+
+class TestInMemoryCache:
+    """Pruebas para CacheService sobre InMemoryLRUBackend"""
+
+    @pytest.fixture
+    def cache(self):
+        return CacheService(InMemoryLRUBackend(max_entries=3), namespace="test", default_ttl=60)
+
+    @pytest.mark.asyncio
+    async def test_set_get_roundtrip_serializa_tipos(self, cache):
+        """Los valores se serializan a JSON, incluyendo fechas y Decimal"""
+        valor = {"fecha": date(2025, 1, 2), "hora": datetime(2025, 1, 2, 9, 30), "monto": Decimal("10.5")}
+        await cache.set("a", valor)
+
+        result = await cache.get("a")
+
+        assert result == {"fecha": "2025-01-02", "hora": "2025-01-02T09:30:00", "monto": 10.5}
+        assert cache.get_metrics()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_miss_devuelve_default(self, cache):
+        """Una clave inexistente devuelve el default y cuenta como miss"""
+        assert await cache.get("no-existe", "default") == "default"
+        assert cache.get_metrics()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expira(self, cache):
+        """Las entradas expiradas no se devuelven"""
+        with patch("app.core.redis_config.time.monotonic", return_value=1000.0):
+            await cache.set("a", 1, ttl=10)
+        with patch("app.core.redis_config.time.monotonic", return_value=1011.0):
+            assert await cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_lru_desaloja_la_menos_usada(self, cache):
+        """Con max_entries=3 se desaloja la clave usada hace más tiempo"""
+        for key in ("a", "b", "c"):
+            await cache.set(key, key)
+        await cache.get("a")
+        await cache.set("d", "d")
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "a"
+
+    @pytest.mark.asyncio
+    async def test_clear_pattern_respeta_namespace(self, cache):
+        """clear_pattern solo borra las claves del patrón dentro del namespace"""
+        await cache.set(cache_key("dashboard", "stats"), 1)
+        await cache.set(cache_key("dashboard", "otro"), 2)
+        await cache.set(cache_key("usuarios", "1"), 3)
+
+        assert await cache.clear_pattern("dashboard:*") == 2
+        assert await cache.get("usuarios:1") == 3
+
+    @pytest.mark.asyncio
+    async def test_get_or_set_single_flight(self, cache):
+        """Las cargas concurrentes de la misma clave ejecutan el loader una sola vez"""
+        llamadas = []
+
+        async def loader():
+            llamadas.append(1)
+            await asyncio.sleep(0.01)
+            return {"valor": 42}
+
+        resultados = await asyncio.gather(*(cache.get_or_set("k", loader) for _ in range(20)))
+
+        assert len(llamadas) == 1
+        assert all(r == {"valor": 42} for r in resultados)
+        assert cache.get_metrics()["coalesced"] == 19
+
+    @pytest.mark.asyncio
+    async def test_get_or_set_propaga_errores_sin_cachear(self, cache):
+        """Si el loader falla, el error se propaga y no se guarda nada"""
+        async def loader():
+            raise ValueError("falla")
+
+        with pytest.raises(ValueError):
+            await cache.get_or_set("k", loader)
+        assert await cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_decorador_cached(self, cache):
+        """El decorador cachea por argumentos simples"""
+        llamadas = []
+
+        @cached("servicios", cache=cache)
+        async def obtener(id_servicio: int):
+            llamadas.append(id_servicio)
+            return {"id": id_servicio}
+
+        await obtener(id_servicio=1)
+        await obtener(id_servicio=1)
+        await obtener(id_servicio=2)
+
+        assert llamadas == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_decorador_cached_separa_por_usuario(self, cache):
+        """El usuario autenticado forma parte de la clave: cada uno ve sus propios datos"""
+        @cached("mis_reservas", cache=cache)
+        async def mis_reservas(current_user: SupabaseUser):
+            return {"user": current_user.id}
+
+        ana = SupabaseUser(id="u-1", email="ana@test.com")
+        beto = SupabaseUser(id="u-2", email="beto@test.com")
+
+        assert await mis_reservas(current_user=ana) == {"user": "u-1"}
+        assert await mis_reservas(current_user=beto) == {"user": "u-2"}
+
+    @pytest.mark.asyncio
+    async def test_decorador_cached_rechaza_argumentos_sin_clave(self, cache):
+        """Un argumento que no se puede representar en la clave no se omite en silencio"""
+        @cached("perfil", cache=cache)
+        async def perfil(request: object):
+            return {}
+
+        with pytest.raises(TypeError):
+            await perfil(request=object())
+
+        @cached("perfil", cache=cache, key_builder=lambda request: "fijo")
+        async def perfil_con_clave(request: object):
+            return {"ok": True}
+
+        assert await perfil_con_clave(request=object()) == {"ok": True}
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la reserva atómica de horarios (ReservaBookingService).
+
+La prueba de concurrencia necesita una base de datos con el esquema de la
+aplicación: se ejecuta solo si TEST_DATABASE_URL está definida.
+"""
+import asyncio
+import os
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.reserva_booking_service import ReservaBookingService, fechas_periodo, periodo_reserva
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+RESERVAS_CONCURRENTES = 200
+
+
+from app.services.reserva_booking_service import CONFIRMED_OVERLAP_QUERY, INSERT_RESERVA_QUERY
+
+LOCK = "pg_advisory_xact_lock"
+
+
+def pasos(conn):
+    """Orden de las sentencias: lock, verificación de solapamiento e inserción"""
+    nombres = {LOCK: "lock", CONFIRMED_OVERLAP_QUERY: "check", INSERT_RESERVA_QUERY: "insert"}
+    return [next(n for f, n in nombres.items() if f in query) for query in conn.consultas()]
+
+
+@pytest.fixture
+def conn(fake_conn):
+    """Sin reservas confirmadas en el horario; la inserción devuelve la reserva 1"""
+    return fake_conn.responder(INSERT_RESERVA_QUERY, {"id_reserva": 1})
+
+
+class TestReservaBookingService:
+    """Orden de las operaciones y error de conflicto"""
+
+    @pytest.mark.asyncio
+    async def test_bloquea_antes_de_verificar_e_insertar(self, conn):
+        """El advisory lock se toma antes de la verificación y de la inserción"""
+        await ReservaBookingService().crear_reserva(conn, 1, "u", "d", None, date(2030, 1, 1), time(9), time(10))
+
+        assert pasos(conn) == ["lock", "check", "insert"]
+
+    @pytest.mark.asyncio
+    async def test_horario_confirmado_devuelve_409(self, conn):
+        """Si el horario ya está confirmado no se inserta y se responde 409"""
+        conn.responder(CONFIRMED_OVERLAP_QUERY, {"id_reserva": 99})
+
+        with pytest.raises(HTTPException) as exc:
+            await ReservaBookingService().crear_reserva(conn, 1, "u", "d", None, date(2030, 1, 1), time(9), time(10))
+
+        assert exc.value.status_code == 409
+        assert "insert" not in pasos(conn)
+
+    @pytest.mark.asyncio
+    async def test_reserva_que_cruza_la_medianoche_bloquea_ambos_dias(self, conn):
+        """Compite con las reservas del día siguiente: se bloquean los dos días, en orden"""
+        await ReservaBookingService().crear_reserva(conn, 1, "u", "d", None, date(2030, 1, 31), time(23, 30), time(0, 30))
+
+        assert pasos(conn) == ["lock", "lock", "check", "insert"]
+        assert [args[0] for metodo, query, args in conn.llamadas if metodo == "execute"] == [
+            "reserva_slot:1:2030-01-31", "reserva_slot:1:2030-02-01"
+        ]
+
+
+class TestPeriodoReserva:
+    """Límites del rango usado en las consultas de solapamiento (igual que reserva.periodo)"""
+
+    def test_periodo_del_mismo_dia(self):
+        assert periodo_reserva(date(2030, 1, 1), time(9), time(10)) == (
+            datetime(2030, 1, 1, 9), datetime(2030, 1, 1, 10)
+        )
+
+    def test_periodo_que_cruza_la_medianoche(self):
+        """Si hora_fin no es posterior a hora_inicio la reserva termina al día siguiente"""
+        assert periodo_reserva(date(2030, 1, 1), time(23, 30), time(0, 30)) == (
+            datetime(2030, 1, 1, 23, 30), datetime(2030, 1, 2, 0, 30)
+        )
+
+
+class TestFechasPeriodo:
+    """Días cuyos advisory locks toma una reserva"""
+
+    def test_mismo_dia(self):
+        assert fechas_periodo(date(2030, 1, 1), time(9), time(10)) == [date(2030, 1, 1)]
+
+    def test_termina_a_medianoche_no_ocupa_el_dia_siguiente(self):
+        assert fechas_periodo(date(2030, 1, 1), time(22), time(0)) == [date(2030, 1, 1)]
+
+    def test_cruza_la_medianoche(self):
+        assert fechas_periodo(date(2030, 12, 31), time(23), time(1)) == [date(2030, 12, 31), date(2031, 1, 1)]
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="requiere TEST_DATABASE_URL con el esquema de la aplicación")
+class TestReservaBookingConcurrencia:
+    """Cientos de reservas concurrentes del mismo horario: exactamente una queda confirmada"""
+
+    async def _scenario(self):
+        import asyncpg
+
+        pool = await asyncpg.create_pool(TEST_DATABASE_URL, min_size=5, max_size=20, statement_cache_size=0)
+        service = ReservaBookingService()
+        fecha = date(2099, 1, 1) + timedelta(days=random.randint(0, 3000))
+        hora_inicio, hora_fin = time(10, 0), time(11, 0)
+        created = []
+        try:
+            async with pool.acquire() as conn:
+                datos = await conn.fetchrow("""
+                    SELECT s.id_servicio, u.id AS user_id
+                    FROM servicio s
+                    JOIN perfil_empresa pe ON s.id_perfil = pe.id_perfil
+                    JOIN users u ON u.id != pe.user_id
+                    WHERE s.estado = true
+                    LIMIT 1
+                """)
+            if datos is None:
+                pytest.skip("no hay servicios ni clientes en la base de datos de prueba")
+
+            async def reservar_y_confirmar():
+                async with pool.acquire() as conn:
+                    reserva = await service.crear_reserva(
+                        conn, datos["id_servicio"], datos["user_id"], "prueba concurrencia", None,
+                        fecha, hora_inicio, hora_fin
+                    )
+                    created.append(reserva["id_reserva"])
+                    await service.confirmar_reserva(conn, reserva["id_reserva"])
+
+            results = await asyncio.gather(
+                *(reservar_y_confirmar() for _ in range(RESERVAS_CONCURRENTES)),
+                return_exceptions=True
+            )
+            async with pool.acquire() as conn:
+                confirmadas = await conn.fetchval(
+                    "SELECT COUNT(*) FROM reserva WHERE id_reserva = ANY($1::int[]) AND estado = 'confirmada'",
+                    created
+                )
+            return results, confirmadas
+        finally:
+            if created:
+                async with pool.acquire() as conn:
+                    await conn.execute("DELETE FROM reserva WHERE id_reserva = ANY($1::int[])", created)
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_una_sola_reserva_gana_el_horario(self):
+        results, confirmadas = await self._scenario()
+
+        ganadoras = [r for r in results if r is None]
+        conflictos = [r for r in results if isinstance(r, HTTPException) and r.status_code == 409]
+        assert len(ganadoras) == 1
+        assert len(conflictos) == RESERVAS_CONCURRENTES - 1
+        assert confirmadas == 1
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el planificador de tareas (lease de liderazgo y métricas) y el
+barrido de reservas pendientes vencidas
+"""
+from datetime import date, datetime, timezone
+
+import pytest
+
+from app.services import date_service, scheduled_jobs
+from app.services.scheduler_service import (
+    ACQUIRE_LEASE_QUERY,
+    REGISTRAR_EJECUCION_DIARIA_QUERY,
+    ULTIMA_EJECUCION_DIARIA_QUERY,
+    SchedulerService,
+)
+
+
+@pytest.fixture
+def conn(fake_conn):
+    """Sin otro dueño: el lease se concede al worker que lo pide"""
+    return fake_conn.responder(ACQUIRE_LEASE_QUERY, lambda *args: args[1])
+
+
+def lotes(conn, tamanos):
+    """El barrido devuelve lotes de los tamaños indicados"""
+    pendientes = list(tamanos)
+    conn.responder(
+        scheduled_jobs.CANCELAR_RESERVAS_VENCIDAS_QUERY,
+        lambda *args: [{"id_reserva": i} for i in range(pendientes.pop(0))]
+    )
+
+
+class TestSchedulerService:
+    """Solo el dueño del lease ejecuta tareas y cada ejecución queda en las métricas"""
+
+    @pytest.mark.asyncio
+    async def test_sin_lease_no_ejecuta_tareas(self, fake_conn, fake_pool):
+        fake_conn.responder(ACQUIRE_LEASE_QUERY, "otro-worker")
+        scheduler = SchedulerService(connection_factory=fake_pool)
+        ejecutadas = []
+
+        async def tarea(conn):
+            ejecutadas.append(1)
+
+        scheduler.register("tarea", 60, tarea)
+        await scheduler.tick()
+
+        assert ejecutadas == []
+        assert scheduler.es_lider is False
+
+    @pytest.mark.asyncio
+    async def test_lider_ejecuta_tareas_vencidas_y_registra_metricas(self, conn, fake_pool):
+        scheduler = SchedulerService(connection_factory=fake_pool)
+
+        async def tarea(conn):
+            return 3
+
+        async def tarea_con_error(conn):
+            raise RuntimeError("fallo")
+
+        scheduler.register("ok", 60, tarea)
+        scheduler.register("error", 60, tarea_con_error)
+        await scheduler.tick()
+        # El intervalo aún no se cumplió: el segundo ciclo no vuelve a ejecutarlas
+        await scheduler.tick()
+
+        metricas = scheduler.get_metrics()["jobs"]
+        assert scheduler.es_lider is True
+        assert metricas["ok"]["ejecuciones"] == 1
+        assert metricas["ok"]["ultimo_resultado"] == 3
+        assert metricas["error"]["errores"] == 1
+        assert metricas["error"]["ultimo_error"] == "fallo"
+
+
+@pytest.fixture
+def reloj_utc(monkeypatch):
+    """Reloj del servidor en UTC; la prueba mueve `reloj.instante`"""
+    class RelojServidorUTC(datetime):
+        instante = datetime(2030, 1, 7, 12, 0, tzinfo=timezone.utc)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.instante.astimezone(tz) if tz else cls.instante.replace(tzinfo=None)
+
+    monkeypatch.setattr(date_service, "datetime", RelojServidorUTC)
+    return RelojServidorUTC
+
+
+@pytest.fixture
+def ejecuciones_diarias(conn):
+    """Tabla scheduler_ejecucion_diaria en memoria"""
+    tabla = {}
+    conn.responder(ULTIMA_EJECUCION_DIARIA_QUERY, lambda nombre: tabla.get(nombre))
+    conn.responder(REGISTRAR_EJECUCION_DIARIA_QUERY, lambda nombre, fecha: tabla.__setitem__(nombre, fecha))
+    return tabla
+
+
+class TestTareasDiarias:
+    """Una ejecución por fecha de Paraguay, aunque el líder cambie o el servidor se reinicie"""
+
+    @pytest.mark.asyncio
+    async def test_corre_al_cambiar_la_fecha_de_paraguay(self, conn, fake_pool, reloj_utc, ejecuciones_diarias):
+        ejecutadas = []
+
+        async def tarea(conn):
+            ejecutadas.append(date_service.DateService.now().date())
+
+        scheduler = SchedulerService(connection_factory=fake_pool)
+        scheduler.register_daily("capacidad", tarea, reintento=0)
+
+        await scheduler.tick()
+        # 02:30 UTC del 8 = 23:30 del 7 en Paraguay: todavía no cambió la fecha
+        reloj_utc.instante = datetime(2030, 1, 8, 2, 30, tzinfo=timezone.utc)
+        await scheduler.tick()
+        reloj_utc.instante = datetime(2030, 1, 8, 3, 30, tzinfo=timezone.utc)
+        await scheduler.tick()
+
+        assert ejecutadas == [date(2030, 1, 7), date(2030, 1, 8)]
+        assert ejecuciones_diarias == {"capacidad": date(2030, 1, 8)}
+
+    @pytest.mark.asyncio
+    async def test_reinicio_o_nuevo_lider_no_la_repite(self, conn, fake_pool, reloj_utc, ejecuciones_diarias):
+        ejecuciones_diarias["capacidad"] = date(2030, 1, 7)
+        ejecutadas = []
+
+        async def tarea(conn):
+            ejecutadas.append(1)
+
+        scheduler = SchedulerService(connection_factory=fake_pool)
+        scheduler.register_daily("capacidad", tarea, reintento=0)
+        await scheduler.tick()
+        await scheduler.tick()
+
+        assert ejecutadas == []
+        # La fecha quedó en memoria: el segundo ciclo no vuelve a consultarla
+        assert conn.consultas("fetchval").count(ULTIMA_EJECUCION_DIARIA_QUERY) == 1
+
+    @pytest.mark.asyncio
+    async def test_si_falla_no_registra_la_fecha_y_reintenta(self, conn, fake_pool, reloj_utc, ejecuciones_diarias):
+        intentos = []
+
+        async def tarea(conn):
+            intentos.append(1)
+            if len(intentos) == 1:
+                raise RuntimeError("fallo")
+
+        scheduler = SchedulerService(connection_factory=fake_pool)
+        scheduler.register_daily("capacidad", tarea, reintento=0)
+        await scheduler.tick()
+
+        assert ejecuciones_diarias == {}
+        await scheduler.tick()
+        await scheduler.tick()
+
+        assert len(intentos) == 2
+        assert ejecuciones_diarias == {"capacidad": date(2030, 1, 7)}
+
+
+class TestCancelarReservasVencidas:
+    """El barrido procesa lotes hasta que uno viene incompleto"""
+
+    @pytest.mark.asyncio
+    async def test_barrido_por_lotes(self, conn):
+        lotes(conn, [2, 2, 1])
+
+        total = await scheduled_jobs.cancelar_reservas_vencidas(conn, ahora=datetime(2030, 1, 1), tamano_lote=2)
+
+        assert total == 5
+        assert conn.consultas("fetch").count(scheduled_jobs.CANCELAR_RESERVAS_VENCIDAS_QUERY) == 3
+
+    @pytest.mark.asyncio
+    async def test_compara_con_la_hora_de_paraguay_y_no_la_del_servidor(self, conn, reloj_utc):
+        """Servidor en UTC a las 12:00 (09:00 en Paraguay): la reserva de las 10:00 sigue pendiente"""
+        inicio_reserva = datetime(2030, 1, 7, 10, 0)
+        conn.responder(
+            scheduled_jobs.CANCELAR_RESERVAS_VENCIDAS_QUERY,
+            lambda ahora, limite: [{"id_reserva": 1}] if inicio_reserva <= ahora else []
+        )
+
+        total = await scheduled_jobs.cancelar_reservas_vencidas(conn)
+
+        assert total == 0
+        (_, _, (ahora, _)), = [llamada for llamada in conn.llamadas if llamada[0] == "fetch"]
+        assert ahora == datetime(2030, 1, 7, 9, 0)
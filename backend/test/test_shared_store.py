@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el almacén de estado compartido (backend en memoria)
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.core.redis_config import InMemoryLRUBackend
+from app.core.shared_store import SharedStateStore
+from app.services.password_reset_service import PasswordResetService
+
+
+@pytest.fixture
+def store():
+    return SharedStateStore(InMemoryLRUBackend(max_entries=100), namespace="test")
+
+
+class TestSharedStateStore:
+    """Operaciones básicas y atómicas del almacén"""
+
+    @pytest.mark.asyncio
+    async def test_add_solo_guarda_si_no_existe(self, store):
+        """add es un set-if-absent: el segundo intento devuelve False"""
+        assert await store.add("k", 1) is True
+        assert await store.add("k", 2) is False
+        assert await store.get("k") == 1
+
+    @pytest.mark.asyncio
+    async def test_incr_crea_y_acumula(self, store):
+        """incr crea el contador y lo incrementa"""
+        assert await store.incr("c", ttl=60) == 1
+        assert await store.incr("c", 5) == 6
+
+    @pytest.mark.asyncio
+    async def test_delete(self, store):
+        """delete informa si la clave existía"""
+        await store.set("k", {"a": 1})
+        assert await store.delete("k") is True
+        assert await store.delete("k") is False
+        assert await store.exists("k") is False
+
+
+class TestPasswordResetConAlmacen:
+    """El flujo de códigos de restablecimiento sobre el almacén compartido"""
+
+    @pytest.fixture
+    def service(self, store):
+        with patch("app.services.password_reset_service.shared_store", store):
+            yield PasswordResetService()
+
+    async def _guardar_codigo(self, service, expires_at):
+        await service._save_reset_data("a@b.com", {
+            "code": "1234",
+            "expires_at": expires_at,
+            "attempts": 0,
+            "max_attempts": 3
+        })
+
+    @pytest.mark.asyncio
+    async def test_codigo_correcto_queda_verificado(self, service):
+        """Verificar el código persiste el estado verificado"""
+        await self._guardar_codigo(service, datetime.now() + timedelta(minutes=1))
+
+        result = await service.verify_reset_code("a@b.com", "1234")
+
+        assert result["success"] is True
+        assert await service.is_code_verified("a@b.com") is True
+
+    @pytest.mark.asyncio
+    async def test_intentos_fallidos_se_persisten(self, service):
+        """Los intentos fallidos se acumulan entre llamadas"""
+        await self._guardar_codigo(service, datetime.now() + timedelta(minutes=1))
+
+        await service.verify_reset_code("a@b.com", "0000")
+        result = await service.verify_reset_code("a@b.com", "0000")
+
+        assert result["remaining_attempts"] == 1
+        assert (await service.get_reset_data("a@b.com"))["attempts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_codigo_expirado_se_elimina(self, service):
+        """Un código expirado se rechaza y se borra"""
+        await self._guardar_codigo(service, datetime.now() - timedelta(seconds=1))
+
+        result = await service.verify_reset_code("a@b.com", "1234")
+
+        assert result["expired"] is True
+        assert await service.get_reset_data("a@b.com") is None
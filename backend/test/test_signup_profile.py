@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la creación transaccional del perfil y rol en el registro
+"""
+import pytest
+
+from app.services import direct_db_service as direct_db_module
+from app.services.direct_db_service import DirectDBService
+
+
+def perfil_upsert(user_id, nombre_persona, nombre_empresa, ruc):
+    return {"id": user_id, "nombre_persona": nombre_persona, "nombre_empresa": nombre_empresa, "ruc": ruc, "estado": "INACTIVO"}
+
+
+@pytest.fixture
+def servicio(fake_conn, fake_pool):
+    """DirectDBService sobre la conexión simulada; el rol 'Cliente' existe (id 2)"""
+    fake_conn.responder(direct_db_module.UPSERT_USER_PROFILE_QUERY, perfil_upsert)
+    fake_conn.responder(direct_db_module.ASSIGN_ROLE_QUERY, 2)
+    service = DirectDBService()
+    service.connection = fake_pool
+    return service
+
+
+def pasos(conn):
+    nombres = {direct_db_module.UPSERT_USER_PROFILE_QUERY: "perfil", direct_db_module.ASSIGN_ROLE_QUERY: "rol"}
+    return [nombres.get(query, metodo) for metodo, query, _ in conn.llamadas]
+
+
+class TestEnsureUserProfileAndRole:
+    """Perfil y rol se escriben en una sola transacción, sin esperar al trigger"""
+
+    @pytest.mark.asyncio
+    async def test_perfil_y_rol_en_una_transaccion(self, servicio, fake_conn):
+        perfil = await servicio.ensure_user_profile_and_role("u-1", "Ana", "ACME", "1234567-8")
+
+        assert pasos(fake_conn) == ["begin", "perfil", "rol", "commit"]
+        assert perfil["estado"] == "INACTIVO"
+
+    @pytest.mark.asyncio
+    async def test_sin_rol_cliente_igual_devuelve_el_perfil(self, servicio, fake_conn):
+        fake_conn.responder(direct_db_module.ASSIGN_ROLE_QUERY, None)
+
+        perfil = await servicio.ensure_user_profile_and_role("u-1", "Ana", "ACME")
+
+        assert perfil["id"] == "u-1"
+        assert fake_conn.transacciones == ["commit"]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Pruebas del estado de salud cacheado de los backends de almacenamiento
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from moto import mock_aws
+
+from app.idrive.idrive_service import IDriveService
+from app.services import supabase_storage_service
+from app.services.storage_health import (
+    BACKEND_IDRIVE,
+    BACKEND_SUPABASE,
+    ESTADO_CAIDO,
+    ESTADO_DESCONOCIDO,
+    ESTADO_SANO,
+    StorageBackendHealth,
+    storage_health,
+)
+from app.services.supabase_storage_service import SupabaseStorageService
+
+BUCKET = "documentos"
+
+
+@pytest.fixture(autouse=True)
+def estado_limpio():
+    storage_health.reset()
+    yield
+    storage_health.reset()
+
+
+@pytest.fixture
+def idrive():
+    """IDriveService sobre un bucket moto que cuenta las llamadas a head_bucket"""
+    with mock_aws():
+        servicio = IDriveService()
+        servicio.access_key = "test"
+        servicio.secret_key = "test"
+        servicio.bucket_name = BUCKET
+        servicio.endpoint_url = "https://s3.amazonaws.com"
+        servicio._initialize_client()
+        servicio.client.create_bucket(Bucket=BUCKET)
+
+        servicio.sondeos = 0
+        head_bucket = servicio.client.head_bucket
+
+        def contar_head_bucket(**kwargs):
+            servicio.sondeos += 1
+            return head_bucket(**kwargs)
+
+        servicio.client.head_bucket = contar_head_bucket
+        yield servicio
+
+
+class FakeBucketApi:
+    def __init__(self, storage):
+        self.storage = storage
+
+    def list(self, prefijo):
+        return []
+
+    def upload(self, path, content, options):
+        if self.storage.falla_subida:
+            raise RuntimeError("upload falló")
+        self.storage.subidas.append(path)
+        return {"Key": path}
+
+    def get_public_url(self, path):
+        return f"https://supabase.test/storage/v1/object/public/imagenes/{path}"
+
+
+class FakePipeline:
+    """Devuelve una única variante sin procesar la imagen"""
+
+    async def procesar(self, file_content):
+        return {1200: file_content}
+
+
+class FakeStorage:
+    """Storage de supabase-py mínimo: cuenta list_buckets y puede fallar la subida"""
+
+    def __init__(self):
+        self.list_buckets_calls = 0
+        self.subidas = []
+        self.falla_subida = False
+
+    def list_buckets(self):
+        self.list_buckets_calls += 1
+        return [SimpleNamespace(name="imagenes")]
+
+    def from_(self, bucket):
+        return FakeBucketApi(self)
+
+
+class TestIDrive:
+    def test_sondea_una_vez_y_otra_vez_solo_tras_un_fallo(self, idrive):
+        for i in range(3):
+            ok, _, _ = idrive.upload_file(b"contenido", f"doc_{i}.pdf", "application/pdf")
+            assert ok
+        assert idrive.sondeos == 1
+
+        # Una subida fallida deja el estado desconocido y la siguiente vuelve a sondear
+        put_object = idrive.client.put_object
+        idrive.client.put_object = lambda **kwargs: (_ for _ in ()).throw(RuntimeError("timeout"))
+        ok, _, _ = idrive.upload_file(b"contenido", "falla.pdf")
+        assert not ok
+        assert storage_health.backend(BACKEND_IDRIVE).estado == ESTADO_DESCONOCIDO
+
+        idrive.client.put_object = put_object
+        ok, _, _ = idrive.upload_file(b"contenido", "doc_4.pdf")
+        assert ok
+        assert idrive.sondeos == 2
+
+        metricas = storage_health.get_metrics()["backends"][BACKEND_IDRIVE]
+        assert metricas["estado"] == ESTADO_SANO
+        assert metricas["subidas"] == 5
+        assert metricas["errores"] == 1
+        assert metricas["duracion_promedio_ms"] is not None
+
+    def test_backend_caido_no_se_sondea_hasta_que_vence_el_ttl(self, idrive):
+        idrive.bucket_name = "no-existe"
+        for _ in range(3):
+            ok, mensaje, _ = idrive.upload_file(b"contenido", "doc.pdf")
+            assert not ok
+        assert idrive.sondeos == 1
+        health = storage_health.backend(BACKEND_IDRIVE)
+        assert health.estado == ESTADO_CAIDO
+        # Las subidas rechazadas por el cache no cuentan como intentos contra el backend
+        assert health.subidas == 0
+
+        health.verificado_en -= health.ttl
+        idrive.bucket_name = BUCKET
+        assert idrive.upload_file(b"contenido", "doc.pdf")[0]
+        assert idrive.sondeos == 2
+
+
+class TestSupabase:
+    @pytest.mark.asyncio
+    async def test_list_buckets_una_sola_vez(self, monkeypatch):
+        monkeypatch.setattr(supabase_storage_service, "image_pipeline", FakePipeline())
+        servicio = SupabaseStorageService()
+        storage = FakeStorage()
+        servicio.supabase = SimpleNamespace(storage=storage)
+
+        await asyncio.gather(*(
+            servicio.upload_service_image(f"img_{i}".encode()) for i in range(5)
+        ))
+        await servicio.upload_profile_image(b"perfil", "usuario-1")
+        assert storage.list_buckets_calls == 1
+        assert len(storage.subidas) == 6
+
+        storage.falla_subida = True
+        assert await servicio.upload_service_image(b"falla") == (False, None)
+        storage.falla_subida = False
+        assert (await servicio.upload_service_image(b"otra"))[0]
+        assert storage.list_buckets_calls == 2
+        assert storage_health.backend(BACKEND_SUPABASE).metricas()["errores"] == 1
+
+
+class TestStorageBackendHealth:
+    def test_estados(self):
+        health = StorageBackendHealth(nombre="x", ttl=60)
+        assert health.necesita_sondeo()
+        health.registrar_sondeo(True, "ok")
+        assert not health.necesita_sondeo()
+        health.registrar_sondeo(False, "caído")
+        assert not health.necesita_sondeo()
+        health.verificado_en -= 61
+        assert health.necesita_sondeo()
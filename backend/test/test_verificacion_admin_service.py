@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Pruebas para las estadísticas y la cola paginada de verificaciones
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import verificacion_admin_service as modulo
+from app.services.verificacion_admin_service import (
+    VerificacionAdminService,
+    decode_cursor,
+    encode_cursor,
+)
+
+BASE = datetime(2030, 1, 10, 12, 0, tzinfo=timezone(timedelta(hours=-3)))
+
+
+def fila_cola(id_verificacion, fecha):
+    return {
+        "id_verificacion": id_verificacion,
+        "fecha_solicitud": fecha,
+        "fecha_revision": None,
+        "estado": "pendiente",
+        "comentario": None,
+        "id_perfil": 1,
+        "created_at": fecha,
+        "nombre_empresa": "Empresa",
+        "nombre_fantasia": None,
+        "verificado": False,
+        "estado_empresa": "ACTIVO",
+        "nombre_contacto": "Ana",
+        "email_contacto": None,
+        "total_documentos": 3,
+        "documentos_pendientes": 1,
+    }
+
+
+def pagina_cola(filas):
+    """Responde como la consulta de la cola: orden descendente, cursor y LIMIT"""
+    def fetch(estado, fecha_cursor, id_cursor, limite):
+        ordenadas = sorted(filas, key=lambda f: (f["fecha_solicitud"], f["id_verificacion"]), reverse=True)
+        if fecha_cursor is not None:
+            ordenadas = [f for f in ordenadas if (f["fecha_solicitud"], f["id_verificacion"]) < (fecha_cursor, id_cursor)]
+        return ordenadas[:limite]
+    return fetch
+
+
+class TestCola:
+    @pytest.mark.asyncio
+    async def test_recorre_todas_las_paginas_sin_repetir(self, fake_db):
+        """Empates de fecha se desempatan por id y next_cursor es None al final"""
+        filas = [fila_cola(i, BASE - timedelta(hours=i // 2)) for i in range(1, 8)]
+        fake_db.responder(modulo.COLA_QUERY, pagina_cola(filas))
+        servicio = VerificacionAdminService()
+
+        vistos, cursor = [], None
+        while True:
+            pagina = await servicio.obtener_cola(limite=3, cursor=cursor)
+            vistos += [item["id_verificacion"] for item in pagina["items"]]
+            cursor = pagina["next_cursor"]
+            if cursor is None:
+                break
+
+        assert sorted(vistos) == list(range(1, 8))
+        assert len(vistos) == len(set(vistos))
+        assert len(fake_db.llamadas) == 3
+        assert pagina["items"][0]["email_contacto"] == modulo.VALOR_DEFAULT_NO_DISPONIBLE
+        # Se pide una fila extra para detectar la página siguiente
+        assert fake_db.llamadas[0][2][3] == 4
+
+    def test_cursor_invalido_es_400(self):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor("no-es-un-cursor")
+        assert exc.value.status_code == 400
+        assert decode_cursor(encode_cursor(BASE, 42)) == (BASE, 42)
+
+
+class TestEstadisticas:
+    @pytest.mark.asyncio
+    async def test_estados_sin_filas_aparecen_en_cero(self, fake_db):
+        """Una sola consulta; la tasa de aprobación usa solo las solicitudes resueltas"""
+        fake_db.responder(modulo.ESTADISTICAS_QUERY, [
+            {"estado": "pendiente", "total": 4, "hoy": 1, "ultimos_7_dias": 2, "ultimos_30_dias": 4, "mas_antigua": BASE},
+            {"estado": "aprobada", "total": 3, "hoy": 0, "ultimos_7_dias": 1, "ultimos_30_dias": 3, "mas_antigua": BASE},
+        ])
+
+        stats = await VerificacionAdminService().obtener_estadisticas()
+
+        assert fake_db.consultas() == [modulo.ESTADISTICAS_QUERY]
+        assert stats["total"] == 7
+        assert stats["pendientes"] == 4
+        assert stats["rechazadas"] == 0
+        assert stats["por_estado"]["rechazada"]["total"] == 0
+        assert stats["tasa_aprobacion"] == 100
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Pruebas de regresión de los endpoints de datos de verificación: una conexión y una
+consulta por petición (agregado JSON con CTEs)
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.routers.providers.documents_router import get_mis_documentos
+from app.api.v1.routers.providers.verification_router import get_mis_datos_solicitud
+from app.api.v1.routers.users.auth_user.auth import get_verificacion_datos
+from app.repositories.providers.provider_repository import LATEST_REQUEST_DOCUMENTS_QUERY, VERIFICATION_AGGREGATE_QUERY
+
+LATENCIA_CONSULTA = 0.05
+USUARIO = SimpleNamespace(id="6f1c2d4e-0000-4000-8000-000000000001")
+
+AGREGADO = {
+    "empresa": {
+        "id_perfil": 10, "razon_social": "Empresa SA", "nombre_fantasia": "Empresa",
+        "estado": "pendiente", "verificado": False, "fecha_inicio": None, "fecha_fin": None,
+        "id_direccion": 3, "user_id": USUARIO.id,
+    },
+    "solicitud": {
+        "id_verificacion": 7, "id_perfil": 10, "estado": "pendiente",
+        "fecha_solicitud": "2026-10-01T12:00:00+00:00", "fecha_revision": None,
+        "comentario": None, "created_at": "2026-10-01T12:00:00+00:00",
+    },
+    "direccion": {
+        "calle": "Mcal. López", "numero": "1234", "referencia": "Frente a la plaza",
+        "departamento": "Central", "ciudad": "Luque", "barrio": "Centro",
+    },
+    "sucursal": {"nombre": "Casa matriz", "telefono": "0981000000", "email": "ventas@empresa.com.py"},
+    "documentos": [
+        {"id_documento": 1, "tipo_documento": "Constancia de RUC", "es_requerido": True,
+         "estado_revision": "pendiente", "url_archivo": "https://s3/ruc.pdf",
+         "fecha_verificacion": None, "observacion": None, "created_at": "2026-10-01T12:00:00+00:00"},
+    ],
+}
+
+
+@pytest.fixture
+def agregado(fake_db):
+    """El agregado se responde tras la latencia de un round trip (asyncpg devuelve json como texto)"""
+    def instalar(datos=AGREGADO):
+        async def consulta(*args):
+            await asyncio.sleep(LATENCIA_CONSULTA)
+            return json.dumps(datos)
+
+        fake_db.responder(VERIFICATION_AGGREGATE_QUERY, consulta)
+        return fake_db
+
+    return instalar
+
+
+@pytest.fixture
+def documentos_solicitud(fake_db):
+    """Documentos de la última solicitud, con la misma latencia por round trip"""
+    def instalar(datos):
+        async def consulta(*args):
+            await asyncio.sleep(LATENCIA_CONSULTA)
+            return json.dumps(datos)
+
+        fake_db.responder(LATEST_REQUEST_DOCUMENTS_QUERY, consulta)
+        return fake_db
+
+    return instalar
+
+
+async def medir(coro):
+    inicio = time.perf_counter()
+    resultado = await coro
+    return resultado, time.perf_counter() - inicio
+
+
+class TestVerificacionDatos:
+    @pytest.mark.asyncio
+    async def test_una_consulta(self, agregado):
+        conn = agregado()
+
+        respuesta, duracion = await medir(get_verificacion_datos(current_user=USUARIO))
+
+        assert conn.consultas() == [VERIFICATION_AGGREGATE_QUERY]
+        # Antes eran cinco consultas secuenciales (5 x latencia)
+        assert duracion < 2 * LATENCIA_CONSULTA
+        empresa = respuesta["empresa"]
+        assert empresa["direccion"] == "Mcal. López 1234"
+        assert empresa["ciudad"] == "Luque"
+        assert empresa["nombre_sucursal"] == "Casa matriz"
+        assert respuesta["solicitud"]["id_verificacion"] == 7
+        assert respuesta["documentos"][0]["tipo_documento"] == "Constancia de RUC"
+
+    @pytest.mark.asyncio
+    async def test_sin_perfil_de_empresa(self, agregado):
+        agregado({"empresa": None, "solicitud": None, "direccion": None, "sucursal": None, "documentos": []})
+
+        with pytest.raises(HTTPException) as exc:
+            await get_verificacion_datos(current_user=USUARIO)
+        assert exc.value.status_code == 404
+
+
+class TestMisDatosSolicitud:
+    @pytest.mark.asyncio
+    async def test_una_consulta(self, agregado):
+        conn = agregado()
+
+        respuesta, duracion = await medir(get_mis_datos_solicitud(current_user=USUARIO))
+
+        assert conn.consultas() == [VERIFICATION_AGGREGATE_QUERY]
+        assert duracion < 2 * LATENCIA_CONSULTA
+        assert respuesta["empresa"]["email_contacto"] == "ventas@empresa.com.py"
+        assert respuesta["direccion"]["barrio"] == "Centro"
+        assert respuesta["solicitud"]["estado"] == "pendiente"
+
+    @pytest.mark.asyncio
+    async def test_sin_solicitud(self, agregado):
+        agregado(dict(AGREGADO, solicitud=None))
+
+        with pytest.raises(HTTPException) as exc:
+            await get_mis_datos_solicitud(current_user=USUARIO)
+        assert exc.value.status_code == 404
+
+
+class TestMisDocumentos:
+    @pytest.mark.asyncio
+    async def test_una_consulta(self, documentos_solicitud):
+        sin_tipo = dict(AGREGADO["documentos"][0], id_documento=2, tipo_documento=None, es_requerido=False)
+        conn = documentos_solicitud({
+            "empresa": {"id_perfil": 10},
+            "solicitud": {"id_verificacion": 7, "estado": "pendiente"},
+            "documentos": AGREGADO["documentos"] + [sin_tipo],
+        })
+
+        respuesta, duracion = await medir(get_mis_documentos(current_user=USUARIO))
+
+        assert conn.consultas() == [LATEST_REQUEST_DOCUMENTS_QUERY]
+        # Antes eran tres consultas más una por documento para su tipo
+        assert duracion < 2 * LATENCIA_CONSULTA
+        assert respuesta["solicitud_id"] == 7
+        assert [doc["tipo_documento"] for doc in respuesta["documentos"]] == ["Constancia de RUC", "Tipo no encontrado"]
+
+    @pytest.mark.asyncio
+    async def test_sin_perfil_ni_solicitud(self, documentos_solicitud):
+        for datos in ({"empresa": None, "solicitud": None, "documentos": []},
+                      {"empresa": {"id_perfil": 10}, "solicitud": None, "documentos": []}):
+            documentos_solicitud(datos)
+
+            with pytest.raises(HTTPException) as exc:
+                await get_mis_documentos(current_user=USUARIO)
+            assert exc.value.status_code == 404
@@ -1240,7 +1240,7 @@ const AdminVerificationsPage: React.FC = () => {
                                                         e.stopPropagation();
                                                         try {
                                                             if (user?.accessToken) {
-                                                                const authUrl = buildApiUrl(`/admin/verificaciones-ruc/${selectedSolicitud.id_verificacion_ruc}/documento/servir?token=${encodeURIComponent(user.accessToken)}`);
+                                                                const authUrl = buildApiUrl(`/admin/verificaciones-ruc/${selectedSolicitud.id_verificacion_ruc}/documento/servir?token=${encodeURIComponent(user.accessToken)}&modo=proxy`);
                                                                 
                                                                 // Mostrar indicador de carga
                                                                 const button = e.currentTarget;
@@ -1301,7 +1301,7 @@ const AdminVerificationsPage: React.FC = () => {
                                                         e.stopPropagation();
                                                         try {
                                                             if (user?.accessToken) {
-                                                                const authUrl = buildApiUrl(`/admin/verificaciones-ruc/${selectedSolicitud.id_verificacion_ruc}/documento/servir?token=${encodeURIComponent(user.accessToken)}`);
+                                                                const authUrl = buildApiUrl(`/admin/verificaciones-ruc/${selectedSolicitud.id_verificacion_ruc}/documento/servir?token=${encodeURIComponent(user.accessToken)}&modo=proxy`);
                                                                 
                                                                 // Mostrar indicador de carga
                                                                 const button = e.currentTarget;
@@ -1442,7 +1442,7 @@ const AdminVerificationsPage: React.FC = () => {
                                                                 e.stopPropagation();
                                                                 try {
                                                                     if (user?.accessToken) {
-                                                                        const authUrl = buildDocumentUrl(selectedSolicitud.id_verificacion, doc.id_documento);
+                                                                        const authUrl = `${buildDocumentUrl(selectedSolicitud.id_verificacion, doc.id_documento)}&modo=proxy`;
                                                                         
                                                                         // Mostrar indicador de carga
                                                                         const button = e.currentTarget;
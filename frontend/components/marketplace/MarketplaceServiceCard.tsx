@@ -42,6 +42,9 @@ const MarketplaceServiceCard: React.FC<MarketplaceServiceCardProps> = memo(({ se
                 {service.imagen ? (
                     <img
                         src={getServiceImageUrl(service.imagen) || undefined}
+                        srcSet={service.imagen_srcset || undefined}
+                        sizes="(min-width: 1536px) 20vw, (min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+                        loading="lazy"
                         alt={`Imagen de ${service.nombre}`}
                         className="w-full h-full object-cover"
                         onError={(e) => {
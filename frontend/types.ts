@@ -67,6 +67,9 @@ export interface BackendService {
   nombre_moneda: string | null;
   simbolo_moneda: string | null;
   imagen: string | null;
+  // Variantes WebP de la imagen (ancho -> URL) y srcset; null en imágenes anteriores
+  imagen_variantes?: Record<string, string> | null;
+  imagen_srcset?: string | null;
   tarifas: any[];
 }
 